@@ -3,7 +3,8 @@
 This module exposes behavioral heuristics as LangChain tools and orchestrates
 them with a LangGraph state machine. It produces a single JSON output matching the
 contract required by the credit decision system. No profiling, biometrics, or final
-decisions are performed here.
+decisions are performed here. `analyze_behavior_async` is the same analysis with its
+LLM call awaited on the async gateway client.
 """
 
 from __future__ import annotations
@@ -11,11 +12,14 @@ from __future__ import annotations
 import importlib
 import os
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.llm_gateway import allm_client, llm_client
+from agents.llm_routing import acomplete, complete
+from agents.timing import timed_node
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.groq.com/openai/v1")
 LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+AGENT_VERSION = "1"
 
 
 # ---------------------------------------------------------------------------
@@ -205,14 +209,11 @@ def _compute_confidence(telemetry: Dict[str, Any], flags: List[str]) -> float:
 
 
 def _llm_client():
-    if not OPENAI_API_KEY:
-        return None
-    try:
-        openai_mod = importlib.import_module("openai")
-        OpenAI = getattr(openai_mod, "OpenAI")
-        return OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
-    except Exception:
-        return None
+    return llm_client("behavior", LLM_MODEL)
+
+
+def _allm_client():
+    return allm_client("behavior", LLM_MODEL)
 
 
 def _extract_json_text(raw: Optional[str]) -> Optional[str]:
@@ -247,48 +248,34 @@ def _parse_llm_json(raw: Optional[str]) -> Optional[Dict[str, Any]]:
     return parsed if isinstance(parsed, dict) else None
 
 
-def _generate_behavior_explanations(state: Dict[str, Any]) -> Dict[str, Any]:
-    flags = state.get("flags", [])
+def _no_llm_explanations(state: Dict[str, Any]) -> Dict[str, Any]:
     brs_score = state.get("brs_score", 0.0)
     behavior_level = state.get("behavior_level", "LOW")
-    supporting_metrics = state.get("supporting_metrics", {}) or {}
+    return {
+        "flags": {flag: "LLM non disponible" for flag in state.get("flags", [])},
+        "summary": f"Score global {round(brs_score,4)} -> niveau {behavior_level} (LLM indisponible)",
+    }
 
-    client = _llm_client()
-    if not client:
-        return {
-            "flags": {flag: "LLM non disponible" for flag in flags},
-            "summary": f"Score global {round(brs_score,4)} -> niveau {behavior_level} (LLM indisponible)",
-        }
 
-    prompt = f"""
+def _failed_llm_explanations(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "flags": {flag: "LLM indisponible" for flag in state.get("flags", [])},
+        "summary": "LLM indisponible, résumé non généré.",
+    }
+
+
+def _explanations_prompt(state: Dict[str, Any]) -> str:
+    return f"""
 Tu es un analyste comportemental senior. Explique en français chaque flag et résume le score.
-Flags: {flags}
-Score: {round(brs_score,4)}
-Niveau: {behavior_level}
-Metrics: {supporting_metrics}
+Flags: {state.get("flags", [])}
+Score: {round(state.get("brs_score", 0.0),4)}
+Niveau: {state.get("behavior_level", "LOW")}
+Metrics: {state.get("supporting_metrics", {}) or {}}
 Réponds en JSON du type {{"flags": {{flag: explication}}, "summary": "..."}}.
 """
-    content: Optional[str] = None
 
-    # Try new Responses API first (OpenAI 2.x). Groq may not support it; fallback to chat.completions.
-    try:
-        resp = client.responses.create(model=LLM_MODEL, input=prompt, max_output_tokens=400)
-        content = resp.output_text
-    except Exception:
-        try:
-            chat = client.chat.completions.create(
-                model=LLM_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=400,
-            )
-            content = chat.choices[0].message.content  # type: ignore[index]
-        except Exception:
-            return {
-                "flags": {flag: "LLM indisponible" for flag in flags},
-                "summary": "LLM indisponible, résumé non généré.",
-            }
 
-    import json
+def _parse_explanations(content: Optional[str], state: Dict[str, Any]) -> Dict[str, Any]:
     parsed = _parse_llm_json(content)
     if isinstance(parsed, dict):
         if "flags" in parsed and "summary" in parsed:
@@ -303,11 +290,34 @@ Réponds en JSON du type {{"flags": {{flag: explication}}, "summary": "..."}}.
     if len(fallback_text) > 500:
         fallback_text = fallback_text[:500] + "..."
     return {
-        "flags": {flag: "Voir résumé." for flag in flags},
+        "flags": {flag: "Voir résumé." for flag in state.get("flags", [])},
         "summary": fallback_text,
     }
 
 
+def _generate_behavior_explanations(state: Dict[str, Any]) -> Dict[str, Any]:
+    client = _llm_client()
+    if not client:
+        return _no_llm_explanations(state)
+    # Responses API where the provider serves it (Groq may not), chat.completions otherwise.
+    try:
+        content = complete(client, LLM_MODEL, _explanations_prompt(state), 400)
+    except Exception:
+        return _failed_llm_explanations(state)
+    return _parse_explanations(content, state)
+
+
+async def _generate_behavior_explanations_async(state: Dict[str, Any]) -> Dict[str, Any]:
+    client = _allm_client()
+    if not client:
+        return _no_llm_explanations(state)
+    try:
+        content = await acomplete(client, LLM_MODEL, _explanations_prompt(state), 400)
+    except Exception:
+        return _failed_llm_explanations(state)
+    return _parse_explanations(content, state)
+
+
 # ---------------------------------------------------------------------------
 # LangChain tool wrappers (lazy import to avoid hard failure if not installed)
 # ---------------------------------------------------------------------------
@@ -381,12 +391,14 @@ except Exception:
 BehaviorState = Dict[str, Any]
 
 
+@timed_node("detect_flags")
 def _node_detect_flags(state: BehaviorState) -> BehaviorState:
     telemetry = state.get("telemetry") or {}
     flags = _detect_flags(telemetry)
     return {**state, "flags": flags}
 
 
+@timed_node("score")
 def _node_score(state: BehaviorState) -> BehaviorState:
     flags = state.get("flags") or []
     telemetry = state.get("telemetry") or {}
@@ -394,20 +406,32 @@ def _node_score(state: BehaviorState) -> BehaviorState:
     return {**state, "brs_score": brs}
 
 
+@timed_node("level")
 def _node_level(state: BehaviorState) -> BehaviorState:
     score = state.get("brs_score") or 0.0
     level = _level_from_score(score)
     return {**state, "behavior_level": level}
 
 
+def _with_supporting_metrics(state: BehaviorState) -> BehaviorState:
+    return {**state, "supporting_metrics": _build_supporting_metrics(state.get("telemetry") or {})}
+
+
+@timed_node("generate_explanation")
 def _node_explain(state: BehaviorState) -> BehaviorState:
-    telemetry = state.get("telemetry") or {}
-    supporting_metrics = _build_supporting_metrics(telemetry)
-    enriched_state = {**state, "supporting_metrics": supporting_metrics}
+    enriched_state = _with_supporting_metrics(state)
     explanations = _generate_behavior_explanations(enriched_state)
     return {**enriched_state, "explanations": explanations}
 
 
+@timed_node("generate_explanation")
+async def _node_explain_async(state: BehaviorState) -> BehaviorState:
+    enriched_state = _with_supporting_metrics(state)
+    explanations = await _generate_behavior_explanations_async(enriched_state)
+    return {**enriched_state, "explanations": explanations}
+
+
+@timed_node("finalize")
 def _node_finalize(state: BehaviorState) -> BehaviorState:
     telemetry = state.get("telemetry") or {}
     flags = state.get("flags") or []
@@ -431,8 +455,8 @@ def _node_finalize(state: BehaviorState) -> BehaviorState:
     return {**state, "supporting_metrics": supporting_metrics, "output": output}
 
 
-def build_behavior_graph():
-    """Build the LangGraph for behavior scoring."""
+def build_behavior_graph(asynchronous: bool = False):
+    """Build the LangGraph for behavior scoring (with a coroutine LLM node for `ainvoke` if `asynchronous`)."""
     if not _LANGGRAPH_AVAILABLE or StateGraph is None:
         raise ImportError("langgraph is not installed")
 
@@ -440,7 +464,7 @@ def build_behavior_graph():
     graph.add_node("detect_flags", _node_detect_flags)
     graph.add_node("score", _node_score)
     graph.add_node("level", _node_level)
-    graph.add_node("generate_explanation", _node_explain)
+    graph.add_node("generate_explanation", _node_explain_async if asynchronous else _node_explain)
     graph.add_node("finalize", _node_finalize)
 
     graph.set_entry_point("detect_flags")
@@ -462,75 +486,105 @@ def visualize_behavior_graph() -> str:
 # Main entry point
 # ---------------------------------------------------------------------------
 
-def analyze_behavior(request: Dict[str, Any]) -> Dict[str, Any]:
-    """Run the behavior analysis and return the standardized JSON output.
-
-    Uses LangGraph if available; otherwise falls back to pure Python execution.
-    """
-    case_id = request.get("case_id")
+def _behavior_inputs(request: Dict[str, Any]) -> Tuple[Any, Dict[str, Any], Optional[Dict[str, Any]]]:
     telemetry = request.get("telemetry") or {}
     if not isinstance(telemetry, dict):
         telemetry = {}
     payment_summary = request.get("payment_behavior_summary")
     if not payment_summary:
         payment_summary = (request.get("payment_history") or {}).get("payment_behavior_summary")
+    return request.get("case_id"), telemetry, payment_summary
 
-    if payment_summary:
-        flags = _flags_from_payment_summary(payment_summary)
-        telemetry_flags = _detect_flags(telemetry) if telemetry else []
-        flags = _merge_flags(flags, [f for f in telemetry_flags if f != "MISSING_TELEMETRY"])
-        brs_score = _score_payment_behavior(payment_summary)
-        behavior_level = _level_from_score(brs_score)
-        supporting_metrics = _build_payment_supporting_metrics(payment_summary)
-        if telemetry:
-            supporting_metrics.update(_build_supporting_metrics(telemetry))
-        explanations = _generate_behavior_explanations({
-            "flags": flags,
-            "brs_score": brs_score,
-            "behavior_level": behavior_level,
-            "supporting_metrics": supporting_metrics,
-        })
-        confidence = _compute_payment_confidence(payment_summary)
-        if telemetry:
-            confidence = min(1.0, confidence + 0.05)
-        return {
-            "case_id": case_id,
-            "behavior_analysis": {
-                "brs_score": round(brs_score, 4),
-                "behavior_level": behavior_level,
-                "behavior_flags": flags,
-                "supporting_metrics": supporting_metrics,
-                "explanations": explanations,
-                "payment_behavior_summary": payment_summary,
-            },
-            "confidence": round(confidence, 4),
-        }
 
-    if _LANGGRAPH_AVAILABLE:
-        graph = build_behavior_graph().compile()
-        result_state = graph.invoke({"case_id": case_id, "telemetry": telemetry})
-        return result_state.get("output", {})
+def _payment_facts(telemetry: Dict[str, Any], payment_summary: Dict[str, Any]) -> Dict[str, Any]:
+    flags = _flags_from_payment_summary(payment_summary)
+    telemetry_flags = _detect_flags(telemetry) if telemetry else []
+    flags = _merge_flags(flags, [f for f in telemetry_flags if f != "MISSING_TELEMETRY"])
+    brs_score = _score_payment_behavior(payment_summary)
+    supporting_metrics = _build_payment_supporting_metrics(payment_summary)
+    if telemetry:
+        supporting_metrics.update(_build_supporting_metrics(telemetry))
+    return {
+        "flags": flags,
+        "brs_score": brs_score,
+        "behavior_level": _level_from_score(brs_score),
+        "supporting_metrics": supporting_metrics,
+    }
+
 
+def _telemetry_facts(telemetry: Dict[str, Any]) -> Dict[str, Any]:
     flags = _detect_flags(telemetry) if telemetry else ["MISSING_TELEMETRY"]
     brs_score = _score_behavior(flags, telemetry)
-    behavior_level = _level_from_score(brs_score)
-    supporting_metrics = _build_supporting_metrics(telemetry)
-    explanations = _generate_behavior_explanations({
+    return {
         "flags": flags,
         "brs_score": brs_score,
-        "behavior_level": behavior_level,
-        "supporting_metrics": supporting_metrics,
-    })
-    confidence = _compute_confidence(telemetry, flags)
+        "behavior_level": _level_from_score(brs_score),
+        "supporting_metrics": _build_supporting_metrics(telemetry),
+    }
+
 
+def _behavior_output(
+    case_id: Any,
+    telemetry: Dict[str, Any],
+    payment_summary: Optional[Dict[str, Any]],
+    facts: Dict[str, Any],
+    explanations: Dict[str, Any],
+) -> Dict[str, Any]:
+    if payment_summary:
+        confidence = _compute_payment_confidence(payment_summary)
+        if telemetry:
+            confidence = min(1.0, confidence + 0.05)
+    else:
+        confidence = _compute_confidence(telemetry, facts["flags"])
+    analysis = {
+        "brs_score": round(facts["brs_score"], 4),
+        "behavior_level": facts["behavior_level"],
+        "behavior_flags": facts["flags"],
+        "supporting_metrics": facts["supporting_metrics"],
+        "explanations": explanations,
+    }
+    if payment_summary:
+        analysis["payment_behavior_summary"] = payment_summary
     return {
         "case_id": case_id,
-        "behavior_analysis": {
-            "brs_score": round(brs_score, 4),
-            "behavior_level": behavior_level,
-            "behavior_flags": flags,
-            "supporting_metrics": supporting_metrics,
-            "explanations": explanations,
-        },
+        "behavior_analysis": analysis,
         "confidence": round(confidence, 4),
     }
+
+
+def analyze_behavior(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the behavior analysis and return the standardized JSON output.
+
+    Uses LangGraph if available; otherwise falls back to pure Python execution.
+    """
+    case_id, telemetry, payment_summary = _behavior_inputs(request)
+
+    if payment_summary:
+        facts = _payment_facts(telemetry, payment_summary)
+        return _behavior_output(case_id, telemetry, payment_summary, facts, _generate_behavior_explanations(facts))
+
+    if _LANGGRAPH_AVAILABLE:
+        graph = build_behavior_graph().compile()
+        result_state = graph.invoke({"case_id": case_id, "telemetry": telemetry})
+        return result_state.get("output", {})
+
+    facts = _telemetry_facts(telemetry)
+    return _behavior_output(case_id, telemetry, None, facts, _generate_behavior_explanations(facts))
+
+
+async def analyze_behavior_async(request: Dict[str, Any]) -> Dict[str, Any]:
+    """`analyze_behavior` with the LLM explanation awaited instead of blocking a thread."""
+    case_id, telemetry, payment_summary = _behavior_inputs(request)
+
+    if payment_summary:
+        facts = _payment_facts(telemetry, payment_summary)
+        explanations = await _generate_behavior_explanations_async(facts)
+        return _behavior_output(case_id, telemetry, payment_summary, facts, explanations)
+
+    if _LANGGRAPH_AVAILABLE:
+        graph = build_behavior_graph(asynchronous=True).compile()
+        result_state = await graph.ainvoke({"case_id": case_id, "telemetry": telemetry})
+        return result_state.get("output", {})
+
+    facts = _telemetry_facts(telemetry)
+    return _behavior_output(case_id, telemetry, None, facts, await _generate_behavior_explanations_async(facts))
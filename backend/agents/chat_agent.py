@@ -6,26 +6,18 @@ Falls back to a deterministic summary when no LLM is configured.
 
 from __future__ import annotations
 
-import importlib
 import json
 import os
 from typing import Any, Dict, List
 
+from agents.llm_gateway import llm_client
+
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.groq.com/openai/v1")
 LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
 
 
 def _llm_client():
-    if not OPENAI_API_KEY:
-        return None
-    try:
-        openai_mod = importlib.import_module("openai")
-        OpenAI = getattr(openai_mod, "OpenAI")
-        return OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
-    except Exception:
-        return None
+    return llm_client("chat", LLM_MODEL)
 
 
 def _safe_dict(val: Any) -> Dict[str, Any]:
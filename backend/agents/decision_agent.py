@@ -1,36 +1,53 @@
 """Decision Agent (LLM-first with rule-based fallback).
 
 Uses scores and flags from other agents to produce a final credit decision.
-Falls back to deterministic rules when LLM is unavailable or returns invalid data.
+Clear-cut cases are decided by deterministic rules alone (see `_llm_gate`);
+the others go to the LLM, falling back to the rules when it is unavailable or
+returns invalid data. `make_decision_payload_async` awaits that LLM call on the
+async gateway client.
 """
 
 from __future__ import annotations
 
-import importlib
 import json
 import os
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.llm_gateway import allm_client, llm_client
+from agents.llm_routing import acomplete, complete, route
+from agents.timing import timed_node
+from core.metrics import DECISION_LLM_GATE, DECISION_LLM_SAVED, LLM_SECONDS
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.groq.com/openai/v1")
 DECISION_LLM_MODEL = os.getenv("DECISION_LLM_MODEL", os.getenv("LLM_MODEL", "llama-3.1-8b-instant"))
 DECISION_LLM_FALLBACK_MODEL = os.getenv("DECISION_LLM_FALLBACK_MODEL", "llama-3.1-8b-instant")
 try:
     DECISION_LLM_MAX_OUTPUT_TOKENS = int(os.getenv("DECISION_LLM_MAX_OUTPUT_TOKENS", "300"))
 except ValueError:
     DECISION_LLM_MAX_OUTPUT_TOKENS = 300
+# "band": clear-cut cases are decided by the rules alone; "off": the LLM sees every case
+DECISION_LLM_GATING = os.getenv("DECISION_LLM_GATING", "band").strip().lower()
+try:
+    DECISION_LLM_GATE_LOW = float(os.getenv("DECISION_LLM_GATE_LOW", "0.4"))
+except ValueError:
+    DECISION_LLM_GATE_LOW = 0.4
+try:
+    DECISION_LLM_GATE_HIGH = float(os.getenv("DECISION_LLM_GATE_HIGH", "0.75"))
+except ValueError:
+    DECISION_LLM_GATE_HIGH = 0.75
+# the gating policy decides which cases the LLM sees, so saved decisions made
+# under another policy must not be reused
+AGENT_VERSION = f"2-{DECISION_LLM_GATING}-{DECISION_LLM_GATE_LOW}-{DECISION_LLM_GATE_HIGH}"
+
+_CRITICAL_FLAGS = {"FRAUD", "DOC_TAMPER", "MISSING_DOCUMENTS", "INCOME_MISMATCH"}
 
 
 def _llm_client():
-    if not OPENAI_API_KEY:
-        return None
-    try:
-        openai_mod = importlib.import_module("openai")
-        OpenAI = getattr(openai_mod, "OpenAI")
-        return OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
-    except Exception:
-        return None
+    return llm_client("decision", DECISION_LLM_MODEL, DECISION_LLM_FALLBACK_MODEL)
+
+
+def _allm_client():
+    return allm_client("decision", DECISION_LLM_MODEL, DECISION_LLM_FALLBACK_MODEL)
 
 
 def _safe_list(value: Any) -> List[Any]:
@@ -205,33 +222,31 @@ def _build_prompt(signals: Dict[str, Any], candidate_reason_codes: Optional[List
     )
 
 
+@timed_node("llm")
 def _call_llm(client, prompt: str) -> Optional[str]:
     if not client:
         return None
-    for model in (DECISION_LLM_MODEL, DECISION_LLM_FALLBACK_MODEL):
-        if not model:
+    for model in route("decision", DECISION_LLM_MODEL, DECISION_LLM_FALLBACK_MODEL):
+        try:
+            content = complete(client, model, prompt, DECISION_LLM_MAX_OUTPUT_TOKENS)
+        except Exception:
             continue
+        if content:
+            return content
+    return None
+
+
+@timed_node("llm")
+async def _call_llm_async(client, prompt: str) -> Optional[str]:
+    if not client:
+        return None
+    for model in route("decision", DECISION_LLM_MODEL, DECISION_LLM_FALLBACK_MODEL):
         try:
-            resp = client.responses.create(
-                model=model,
-                input=prompt,
-                max_output_tokens=DECISION_LLM_MAX_OUTPUT_TOKENS,
-            )
-            content = getattr(resp, "output_text", None)
-            if content:
-                return content
+            content = await acomplete(client, model, prompt, DECISION_LLM_MAX_OUTPUT_TOKENS)
         except Exception:
-            try:
-                chat = client.chat.completions.create(
-                    model=model,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=DECISION_LLM_MAX_OUTPUT_TOKENS,
-                )
-                content = chat.choices[0].message.content  # type: ignore[index]
-                if content:
-                    return content
-            except Exception:
-                continue
+            continue
+        if content:
+            return content
     return None
 
 
@@ -258,19 +273,59 @@ def _requires_review_from_signals(signals: Dict[str, Any], decision: str, confid
         return True
     if confidence < 0.65:
         return True
-    orchestrator = signals.get("orchestrator") or {}
-    if _safe_list(orchestrator.get("detected_conflicts")):
-        return True
-    critical_flags = {"FRAUD", "DOC_TAMPER", "MISSING_DOCUMENTS", "INCOME_MISMATCH"}
-    doc_flags = set(_safe_list((signals.get("document") or {}).get("flags")))
-    image_flags = set(_safe_list((signals.get("image") or {}).get("flags")))
-    fraud_flags = set(_safe_list((signals.get("fraud") or {}).get("flags")))
-    behavior_flags = set(_safe_list((signals.get("behavior") or {}).get("flags")))
-    if fraud_flags:
-        return True
-    if critical_flags.intersection(doc_flags | image_flags | behavior_flags):
+    if _has_conflicts(signals):
         return True
-    return False
+    return bool(_critical_flags(signals))
+
+
+def _has_conflicts(signals: Dict[str, Any]) -> bool:
+    orchestrator = signals.get("orchestrator") or {}
+    return bool(_safe_list(orchestrator.get("detected_conflicts")))
+
+
+def _critical_flags(signals: Dict[str, Any]) -> List[str]:
+    """Every fraud flag, plus the critical flags raised by the other agents."""
+    flags = set(_safe_list((signals.get("fraud") or {}).get("flags")))
+    for source in ("document", "image", "behavior"):
+        flags |= _CRITICAL_FLAGS.intersection(_safe_list((signals.get(source) or {}).get("flags")))
+    return sorted(str(flag) for flag in flags)
+
+
+def _llm_gate(signals: Dict[str, Any], rule_payload: Dict[str, Any]) -> Tuple[bool, str]:
+    """Whether the LLM should decide this case, and why.
+
+    Under the `band` policy the rules alone decide clear-cut cases: a low risk
+    score with no fraud or critical flag (`clear_approve`), or a high one
+    backed by such flags (`clear_reject`). Cases in the uncertainty band, or
+    with conflicting agent signals, still go to the LLM.
+    """
+    if DECISION_LLM_GATING == "off":
+        return True, "gating_off"
+    if _has_conflicts(signals):
+        return True, "conflicts"
+    risk_score = _safe_float(rule_payload.get("risk_score"), 0.5)
+    critical = _critical_flags(signals)
+    if risk_score < DECISION_LLM_GATE_LOW and not critical:
+        return False, "clear_approve"
+    if risk_score >= DECISION_LLM_GATE_HIGH and critical:
+        return False, "clear_reject"
+    return True, "uncertain"
+
+
+def configure_gating(policy: str, low: Optional[float] = None, high: Optional[float] = None) -> None:
+    """Switch the gating policy at runtime (offline comparisons), keeping AGENT_VERSION in step."""
+    global AGENT_VERSION, DECISION_LLM_GATING, DECISION_LLM_GATE_HIGH, DECISION_LLM_GATE_LOW
+    DECISION_LLM_GATING = policy
+    if low is not None:
+        DECISION_LLM_GATE_LOW = low
+    if high is not None:
+        DECISION_LLM_GATE_HIGH = high
+    AGENT_VERSION = f"2-{DECISION_LLM_GATING}-{DECISION_LLM_GATE_LOW}-{DECISION_LLM_GATE_HIGH}"
+
+
+def _mean_llm_seconds() -> float:
+    count = LLM_SECONDS.count("decision", DECISION_LLM_MODEL)
+    return LLM_SECONDS.sum("decision", DECISION_LLM_MODEL) / count if count else 0.0
 
 
 def _make_decision_payload_rule_based(doc_result, sim_result, behavior_result=None, payment_summary=None):
@@ -308,17 +363,16 @@ def _make_decision_payload_rule_based(doc_result, sim_result, behavior_result=No
     }
 
 
-def make_decision_payload(
+def _gated_decision(
     doc_result: Dict[str, Any],
     sim_result: Dict[str, Any],
-    behavior_result: Optional[Dict[str, Any]] = None,
-    payment_summary: Optional[Dict[str, Any]] = None,
-    fraud_result: Optional[Dict[str, Any]] = None,
-    image_result: Optional[Dict[str, Any]] = None,
-    orchestrator_output: Optional[Dict[str, Any]] = None,
-    reason_codes: Optional[List[str]] = None,
-    case_id: Optional[str] = None,
-) -> Dict[str, Any]:
+    behavior_result: Optional[Dict[str, Any]],
+    payment_summary: Optional[Dict[str, Any]],
+    fraud_result: Optional[Dict[str, Any]],
+    image_result: Optional[Dict[str, Any]],
+    orchestrator_output: Optional[Dict[str, Any]],
+) -> Tuple[Dict[str, Any], Dict[str, Any], bool, str]:
+    """The rule-based payload, the decision signals, and whether (and why) the LLM should see the case."""
     fallback_payload = _make_decision_payload_rule_based(doc_result, sim_result, behavior_result, payment_summary)
 
     signals = _build_decision_signals(
@@ -331,38 +385,64 @@ def make_decision_payload(
         orchestrator_output=orchestrator_output,
     )
 
-    client = _llm_client()
-    llm_payload: Dict[str, Any] = {}
-    if client:
-        prompt = _build_prompt(signals, reason_codes)
-        content = _call_llm(client, prompt)
-        parsed = _parse_llm_json(content)
-        if parsed:
-            decision = _normalize_decision_label(parsed.get("decision"))
-            if decision not in {"approve", "reject", "review"}:
-                decision = fallback_payload.get("decision", "review")
-
-            confidence = _coerce_confidence(
-                parsed.get("decision_confidence", parsed.get("confidence")),
-                fallback_payload.get("decision_confidence", 0.55),
-            )
-
-            human_review_required = parsed.get("human_review_required")
-            if not isinstance(human_review_required, bool):
-                human_review_required = _requires_review_from_signals(signals, decision, confidence)
-
-            llm_payload = {
-                "decision": decision,
-                "decision_raw": parsed.get("decision"),
-                "decision_confidence": confidence,
-                "confidence": confidence,
-                "human_review_required": human_review_required,
-                "reason_codes": _extract_reason_codes(parsed.get("reason_codes"), reason_codes),
-            }
-            if isinstance(parsed.get("summary"), str):
-                llm_payload["summary"] = parsed.get("summary")
+    use_llm, gate = _llm_gate(signals, fallback_payload)
+    return fallback_payload, signals, use_llm, gate
+
+
+def _count_gate(use_llm: bool, gate: str, client: Any) -> None:
+    if not use_llm:
+        DECISION_LLM_GATE.inc("skipped", gate)
+        DECISION_LLM_SAVED.inc(amount=_mean_llm_seconds())
+    else:
+        DECISION_LLM_GATE.inc("llm" if client else "no_llm", gate)
+
 
+def _llm_payload(
+    content: Optional[str],
+    fallback_payload: Dict[str, Any],
+    signals: Dict[str, Any],
+    reason_codes: Optional[List[str]],
+) -> Dict[str, Any]:
+    parsed = _parse_llm_json(content)
+    if not parsed:
+        return {}
+    decision = _normalize_decision_label(parsed.get("decision"))
+    if decision not in {"approve", "reject", "review"}:
+        decision = fallback_payload.get("decision", "review")
+
+    confidence = _coerce_confidence(
+        parsed.get("decision_confidence", parsed.get("confidence")),
+        fallback_payload.get("decision_confidence", 0.55),
+    )
+
+    human_review_required = parsed.get("human_review_required")
+    if not isinstance(human_review_required, bool):
+        human_review_required = _requires_review_from_signals(signals, decision, confidence)
+
+    llm_payload = {
+        "decision": decision,
+        "decision_raw": parsed.get("decision"),
+        "decision_confidence": confidence,
+        "confidence": confidence,
+        "human_review_required": human_review_required,
+        "reason_codes": _extract_reason_codes(parsed.get("reason_codes"), reason_codes),
+    }
+    if isinstance(parsed.get("summary"), str):
+        llm_payload["summary"] = parsed.get("summary")
+    return llm_payload
+
+
+def _merge_payloads(
+    fallback_payload: Dict[str, Any],
+    llm_payload: Dict[str, Any],
+    signals: Dict[str, Any],
+    gate: str,
+    reason_codes: Optional[List[str]],
+    case_id: Optional[str],
+) -> Dict[str, Any]:
     merged = {**fallback_payload, **llm_payload}
+    merged["llm_gate"] = gate
+    merged["decision_source"] = "llm" if llm_payload else "rules"
     if isinstance(reason_codes, list):
         merged.setdefault("reason_codes", reason_codes)
     if case_id is not None:
@@ -378,6 +458,53 @@ def make_decision_payload(
     return merged
 
 
+def make_decision_payload(
+    doc_result: Dict[str, Any],
+    sim_result: Dict[str, Any],
+    behavior_result: Optional[Dict[str, Any]] = None,
+    payment_summary: Optional[Dict[str, Any]] = None,
+    fraud_result: Optional[Dict[str, Any]] = None,
+    image_result: Optional[Dict[str, Any]] = None,
+    orchestrator_output: Optional[Dict[str, Any]] = None,
+    reason_codes: Optional[List[str]] = None,
+    case_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    fallback_payload, signals, use_llm, gate = _gated_decision(
+        doc_result, sim_result, behavior_result, payment_summary, fraud_result, image_result, orchestrator_output
+    )
+    client = _llm_client() if use_llm else None
+    _count_gate(use_llm, gate, client)
+    llm_payload: Dict[str, Any] = {}
+    if client:
+        content = _call_llm(client, _build_prompt(signals, reason_codes))
+        llm_payload = _llm_payload(content, fallback_payload, signals, reason_codes)
+    return _merge_payloads(fallback_payload, llm_payload, signals, gate, reason_codes, case_id)
+
+
+async def make_decision_payload_async(
+    doc_result: Dict[str, Any],
+    sim_result: Dict[str, Any],
+    behavior_result: Optional[Dict[str, Any]] = None,
+    payment_summary: Optional[Dict[str, Any]] = None,
+    fraud_result: Optional[Dict[str, Any]] = None,
+    image_result: Optional[Dict[str, Any]] = None,
+    orchestrator_output: Optional[Dict[str, Any]] = None,
+    reason_codes: Optional[List[str]] = None,
+    case_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """`make_decision_payload` with the LLM call awaited instead of blocking a thread."""
+    fallback_payload, signals, use_llm, gate = _gated_decision(
+        doc_result, sim_result, behavior_result, payment_summary, fraud_result, image_result, orchestrator_output
+    )
+    client = _allm_client() if use_llm else None
+    _count_gate(use_llm, gate, client)
+    llm_payload: Dict[str, Any] = {}
+    if client:
+        content = await _call_llm_async(client, _build_prompt(signals, reason_codes))
+        llm_payload = _llm_payload(content, fallback_payload, signals, reason_codes)
+    return _merge_payloads(fallback_payload, llm_payload, signals, gate, reason_codes, case_id)
+
+
 def make_decision(doc_result, sim_result, behavior_result=None, payment_summary=None):
     payload = make_decision_payload(doc_result, sim_result, behavior_result, payment_summary)
     return payload.get("decision", "review")
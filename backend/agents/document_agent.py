@@ -3,20 +3,25 @@
 Analyzes OCR'ed textual documents against the declared customer profile. Produces
 structured, audit-friendly JSON without making credit decisions. Uses LangChain tools
 for extraction and explanations, orchestrated via LangGraph with a fallback pure-Python
-path if those libraries are unavailable.
+path if those libraries are unavailable. `analyze_documents_async` runs the same
+nodes with its LLM calls awaited on the async gateway client.
 """
 
 from __future__ import annotations
 
 import importlib
+import json
 import os
 import re
 from statistics import mean
 from typing import Any, Dict, List, Optional
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.groq.com/openai/v1")
+from agents.llm_gateway import allm_client, llm_client
+from agents.llm_routing import acomplete, complete
+from agents.timing import timed_node
+
 LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+AGENT_VERSION = "1"
 
 
 # ---------------------------------------------------------------------------
@@ -88,22 +93,15 @@ def _detect_generic_pattern(text: str) -> bool:
 
 
 def _llm_client():
-    if not OPENAI_API_KEY:
-        return None
-    try:
-        openai_mod = importlib.import_module("openai")
-        OpenAI = getattr(openai_mod, "OpenAI")
-        return OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
-    except Exception:
-        return None
+    return llm_client("document", LLM_MODEL)
 
 
-def _llm_extract_fields(doc_summary: str) -> Dict[str, Any]:
-    client = _llm_client()
-    if not client or not doc_summary.strip():
-        return {}
+def _allm_client():
+    return allm_client("document", LLM_MODEL)
 
-    prompt = f"""
+
+def _extract_fields_prompt(doc_summary: str) -> str:
+    return f"""
 Tu es un extracteur documentaire. Extrait si possible:
 - income_documented (nombre)
 - contract_type_detected (permanent/temporary/freelance)
@@ -115,21 +113,9 @@ Texte:
 Reponds en JSON: {{"income_documented": 0, "contract_type_detected": "", "seniority_detected_years": 0}}
 Si absent, mets null.
 """
-    try:
-        resp = client.responses.create(model=LLM_MODEL, input=prompt, max_output_tokens=200)
-        content = resp.output_text
-    except Exception:
-        try:
-            chat = client.chat.completions.create(
-                model=LLM_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=200,
-            )
-            content = chat.choices[0].message.content  # type: ignore[index]
-        except Exception:
-            return {}
-
-    import json
+
+
+def _parse_extracted_fields(content: Optional[str]) -> Dict[str, Any]:
     try:
         parsed = json.loads(content)
         if isinstance(parsed, dict):
@@ -143,15 +129,30 @@ Si absent, mets null.
     return {}
 
 
-def _generate_llm_explanations(flags: List[str], extracted: Dict[str, Any], declared: Dict[str, Any], doc_summary: str) -> Dict[str, Any]:
+def _llm_extract_fields(doc_summary: str) -> Dict[str, Any]:
     client = _llm_client()
-    if not client:
-        return {
-            "flag_explanations": {flag: "LLM non disponible" for flag in flags},
-            "global_summary": "LLM non disponible, explication générique basée sur règles."
-        }
+    if not client or not doc_summary.strip():
+        return {}
+    try:
+        content = complete(client, LLM_MODEL, _extract_fields_prompt(doc_summary), 200)
+    except Exception:
+        return {}
+    return _parse_extracted_fields(content)
+
 
-    prompt = f"""
+async def _llm_extract_fields_async(doc_summary: str) -> Dict[str, Any]:
+    client = _allm_client()
+    if not client or not doc_summary.strip():
+        return {}
+    try:
+        content = await acomplete(client, LLM_MODEL, _extract_fields_prompt(doc_summary), 200)
+    except Exception:
+        return {}
+    return _parse_extracted_fields(content)
+
+
+def _explanations_prompt(flags: List[str], extracted: Dict[str, Any], declared: Dict[str, Any], doc_summary: str) -> str:
+    return f"""
 Tu es un analyste documentaire senior. Explique chaque incohérence détectée et résume les documents.
 Flags: {flags}
 Champs extraits: {extracted}
@@ -159,16 +160,23 @@ Profil déclaré: {declared}
 Résumé texte: {doc_summary[:2000]}
 Réponds en JSON: {{"flag_explanations": {{flag: texte}}, "global_summary": "..."}}
 """
-    try:
-        resp = client.responses.create(model=LLM_MODEL, input=prompt, max_output_tokens=600)
-        content = resp.output_text
-    except Exception:
-        return {
-            "flag_explanations": {flag: "LLM indisponible (fallback)." for flag in flags},
-            "global_summary": "LLM indisponible, résumé non généré."
-        }
 
-    import json
+
+def _no_llm_explanations(flags: List[str]) -> Dict[str, Any]:
+    return {
+        "flag_explanations": {flag: "LLM non disponible" for flag in flags},
+        "global_summary": "LLM non disponible, explication générique basée sur règles."
+    }
+
+
+def _failed_llm_explanations(flags: List[str]) -> Dict[str, Any]:
+    return {
+        "flag_explanations": {flag: "LLM indisponible (fallback)." for flag in flags},
+        "global_summary": "LLM indisponible, résumé non généré."
+    }
+
+
+def _parse_explanations(content: str, flags: List[str]) -> Dict[str, Any]:
     cleaned = content.replace("```json", "```").replace("```", "").replace("Réponse en JSON :", "").strip()
     candidate = cleaned
     if "{" in cleaned and "}" in cleaned:
@@ -185,6 +193,30 @@ Réponds en JSON: {{"flag_explanations": {{flag: texte}}, "global_summary": "...
     }
 
 
+def _generate_llm_explanations(flags: List[str], extracted: Dict[str, Any], declared: Dict[str, Any], doc_summary: str) -> Dict[str, Any]:
+    client = _llm_client()
+    if not client:
+        return _no_llm_explanations(flags)
+    try:
+        content = complete(client, LLM_MODEL, _explanations_prompt(flags, extracted, declared, doc_summary), 600) or ""
+    except Exception:
+        return _failed_llm_explanations(flags)
+    return _parse_explanations(content, flags)
+
+
+async def _generate_llm_explanations_async(
+    flags: List[str], extracted: Dict[str, Any], declared: Dict[str, Any], doc_summary: str
+) -> Dict[str, Any]:
+    client = _allm_client()
+    if not client:
+        return _no_llm_explanations(flags)
+    try:
+        content = await acomplete(client, LLM_MODEL, _explanations_prompt(flags, extracted, declared, doc_summary), 600) or ""
+    except Exception:
+        return _failed_llm_explanations(flags)
+    return _parse_explanations(content, flags)
+
+
 # ---------------------------------------------------------------------------
 # LangChain tools (lazily imported)
 # ---------------------------------------------------------------------------
@@ -249,7 +281,8 @@ except Exception:
 DocumentState = Dict[str, Any]
 
 
-def _node_extract(state: DocumentState) -> DocumentState:
+def _extract(state: DocumentState) -> DocumentState:
+    """Rule-based extraction; `_needs_llm_fields` tells whether the LLM should fill the gaps."""
     declared = state.get("declared_profile") or {}
     documents = state.get("documents") or []
 
@@ -293,13 +326,6 @@ def _node_extract(state: DocumentState) -> DocumentState:
     }
     doc_summary = "\n".join(summaries[:5])
 
-    if not any(extracted_fields.values()) and doc_summary.strip():
-        llm_extracted = _llm_extract_fields(doc_summary)
-        if isinstance(llm_extracted, dict):
-            for key, value in llm_extracted.items():
-                if extracted_fields.get(key) in (None, "", 0) and value not in (None, "", 0):
-                    extracted_fields[key] = value
-
     return {
         **state,
         "extracted_fields": extracted_fields,
@@ -309,6 +335,36 @@ def _node_extract(state: DocumentState) -> DocumentState:
     }
 
 
+def _needs_llm_fields(state: DocumentState) -> bool:
+    return not any(state["extracted_fields"].values()) and bool(state["doc_summary"].strip())
+
+
+def _merge_llm_fields(state: DocumentState, llm_extracted: Any) -> DocumentState:
+    extracted_fields = state["extracted_fields"]
+    if isinstance(llm_extracted, dict):
+        for key, value in llm_extracted.items():
+            if extracted_fields.get(key) in (None, "", 0) and value not in (None, "", 0):
+                extracted_fields[key] = value
+    return state
+
+
+@timed_node("extract")
+def _node_extract(state: DocumentState) -> DocumentState:
+    state = _extract(state)
+    if _needs_llm_fields(state):
+        state = _merge_llm_fields(state, _llm_extract_fields(state["doc_summary"]))
+    return state
+
+
+@timed_node("extract")
+async def _node_extract_async(state: DocumentState) -> DocumentState:
+    state = _extract(state)
+    if _needs_llm_fields(state):
+        state = _merge_llm_fields(state, await _llm_extract_fields_async(state["doc_summary"]))
+    return state
+
+
+@timed_node("flags")
 def _node_flags(state: DocumentState) -> DocumentState:
     declared = state.get("declared_profile") or {}
     extracted = state.get("extracted_fields") or {}
@@ -346,6 +402,7 @@ def _node_flags(state: DocumentState) -> DocumentState:
     return {**state, "flags": list(dict.fromkeys(flags))}
 
 
+@timed_node("score")
 def _node_score(state: DocumentState) -> DocumentState:
     flags = state.get("flags", [])
     suspicious_patterns = state.get("suspicious_patterns", [])
@@ -362,6 +419,7 @@ def _node_score(state: DocumentState) -> DocumentState:
     return {**state, "dds_score": round(dds_score, 4), "consistency_level": level}
 
 
+@timed_node("llm_explain")
 def _node_llm_explain(state: DocumentState) -> DocumentState:
     explanations = _generate_llm_explanations(
         flags=state.get("flags", []),
@@ -372,6 +430,18 @@ def _node_llm_explain(state: DocumentState) -> DocumentState:
     return {**state, "explanations": explanations}
 
 
+@timed_node("llm_explain")
+async def _node_llm_explain_async(state: DocumentState) -> DocumentState:
+    explanations = await _generate_llm_explanations_async(
+        flags=state.get("flags", []),
+        extracted=state.get("extracted_fields", {}),
+        declared=state.get("declared_profile", {}),
+        doc_summary=state.get("doc_summary", ""),
+    )
+    return {**state, "explanations": explanations}
+
+
+@timed_node("finalize")
 def _node_finalize(state: DocumentState) -> DocumentState:
     extracted = state.get("extracted_fields", {})
     flags = state.get("flags", [])
@@ -406,15 +476,16 @@ def _node_finalize(state: DocumentState) -> DocumentState:
     return {**state, "output": output}
 
 
-def build_document_graph():
+def build_document_graph(asynchronous: bool = False):
+    """The agent's graph; with `asynchronous`, its LLM nodes are coroutines (run it with `ainvoke`)."""
     if not _LANGGRAPH_AVAILABLE or StateGraph is None:
         raise ImportError("langgraph is not installed")
 
     graph = StateGraph(DocumentState)
-    graph.add_node("extract", _node_extract)
+    graph.add_node("extract", _node_extract_async if asynchronous else _node_extract)
     graph.add_node("flags", _node_flags)
     graph.add_node("score", _node_score)
-    graph.add_node("llm_explain", _node_llm_explain)
+    graph.add_node("llm_explain", _node_llm_explain_async if asynchronous else _node_llm_explain)
     graph.add_node("finalize", _node_finalize)
 
     graph.set_entry_point("extract")
@@ -434,29 +505,42 @@ def visualize_document_graph() -> str:
 # ---------------------------------------------------------------------------
 # Main entrypoint
 # ---------------------------------------------------------------------------
+def _initial_state(request: Dict[str, Any]) -> DocumentState:
+    return {
+        "case_id": request.get("case_id"),
+        "declared_profile": request.get("declared_profile", {}) or {},
+        "documents": request.get("documents", []) or [],
+    }
+
+
 def analyze_documents(request: Dict[str, Any]) -> Dict[str, Any]:
-    case_id = request.get("case_id")
-    declared = request.get("declared_profile", {}) or {}
-    documents = request.get("documents", []) or []
+    state = _initial_state(request)
 
     if _LANGGRAPH_AVAILABLE:
         graph = build_document_graph().compile()
-        result_state = graph.invoke({
-            "case_id": case_id,
-            "declared_profile": declared,
-            "documents": documents,
-        })
+        result_state = graph.invoke(state)
         return result_state.get("output", {})
 
     # Fallback pure-Python path
-    state: DocumentState = {
-        "case_id": case_id,
-        "declared_profile": declared,
-        "documents": documents,
-    }
     state = _node_extract(state)
     state = _node_flags(state)
     state = _node_score(state)
     state = _node_llm_explain(state)
     state = _node_finalize(state)
     return state.get("output", {})
+
+
+async def analyze_documents_async(request: Dict[str, Any]) -> Dict[str, Any]:
+    state = _initial_state(request)
+
+    if _LANGGRAPH_AVAILABLE:
+        graph = build_document_graph(asynchronous=True).compile()
+        result_state = await graph.ainvoke(state)
+        return result_state.get("output", {})
+
+    state = await _node_extract_async(state)
+    state = _node_flags(state)
+    state = _node_score(state)
+    state = await _node_llm_explain_async(state)
+    state = _node_finalize(state)
+    return state.get("output", {})
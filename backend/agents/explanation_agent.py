@@ -2,7 +2,8 @@
 
 Transforms multi-agent results into dual-audience explanations (internal vs client)
 using LangChain tools and a LangGraph workflow. Includes LLM-backed summaries with
-graceful fallback when LLM is unavailable.
+graceful fallback when LLM is unavailable. `explain_decision_async` runs the same
+workflow with the customer summary node awaited.
 """
 
 from __future__ import annotations
@@ -10,11 +11,13 @@ from __future__ import annotations
 import importlib
 import os
 import re
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents.llm_routing import acomplete, complete
+from agents.timing import timed_node
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.groq.com/openai/v1")
 LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+AGENT_VERSION = "1"
 
 
 # ---------------------------------------------------------------------------
@@ -22,8 +25,14 @@ LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
 # ---------------------------------------------------------------------------
 
 def _llm_client():
-    if not OPENAI_API_KEY:
-        return None
+    # The LLM customer summary has never been enabled: explanations stay
+    # rule-based until it is turned on deliberately.
+    return None
+
+
+def _allm_client():
+    # disabled like `_llm_client`; `allm_client("explanation", LLM_MODEL)` once it is enabled
+    return None
 
 
 def _extract_json_text(raw: Optional[str]) -> Optional[str]:
@@ -55,12 +64,6 @@ def _parse_llm_json(raw: Optional[str]) -> Optional[Dict[str, Any]]:
     except Exception:
         return None
     return parsed if isinstance(parsed, dict) else None
-    try:
-        openai_mod = importlib.import_module("openai")
-        OpenAI = getattr(openai_mod, "OpenAI")
-        return OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
-    except Exception:
-        return None
 
 
 def _safe_list(val: Any) -> List[Any]:
@@ -160,35 +163,55 @@ def _payment_signal(summary: Optional[Dict[str, Any]]) -> Optional[str]:
     return "PAYMENT_HISTORY_MIXED"
 
 
-def _generate_customer_explanation(flags: List[str], key_factors: List[Dict[str, Any]], next_steps: List[str]) -> Dict[str, Any]:
-    client = _llm_client()
-    prompt = f"""
+def _customer_prompt(flags: List[str], key_factors: List[Dict[str, Any]], next_steps: List[str]) -> str:
+    return f"""
 Tu es un conseiller client. Résume en termes simples pourquoi le dossier est en revue et quelles sont les prochaines étapes.
 Flags: {flags}
 Key factors: {key_factors}
 Next steps: {next_steps}
 Réponds en JSON: {{"summary": "...", "main_reasons": [..], "next_steps": [...]}}.
 """
+
+
+def _parse_customer_explanation(content: Optional[str]) -> Optional[Dict[str, Any]]:
+    if content:
+        parsed = _parse_llm_json(content)
+        if isinstance(parsed, dict) and "summary" in parsed:
+            return parsed
+    return None
+
+
+def _generate_customer_explanation(flags: List[str], key_factors: List[Dict[str, Any]], next_steps: List[str]) -> Dict[str, Any]:
+    client = _llm_client()
     if client:
         content: Optional[str] = None
         try:
-            resp = client.responses.create(model=LLM_MODEL, input=prompt, max_output_tokens=400)
-            content = resp.output_text
+            content = complete(client, LLM_MODEL, _customer_prompt(flags, key_factors, next_steps), 400)
         except Exception:
-            try:
-                chat = client.chat.completions.create(
-                    model=LLM_MODEL,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=400,
-                )
-                content = chat.choices[0].message.content  # type: ignore[index]
-            except Exception:
-                content = None
-        if content:
-            parsed = _parse_llm_json(content)
-            if isinstance(parsed, dict) and "summary" in parsed:
-                return parsed
+            content = None
+        parsed = _parse_customer_explanation(content)
+        if parsed is not None:
+            return parsed
+    return _fallback_customer_explanation(flags, key_factors, next_steps)
 
+
+async def _generate_customer_explanation_async(
+    flags: List[str], key_factors: List[Dict[str, Any]], next_steps: List[str]
+) -> Dict[str, Any]:
+    client = _allm_client()
+    if client:
+        content: Optional[str] = None
+        try:
+            content = await acomplete(client, LLM_MODEL, _customer_prompt(flags, key_factors, next_steps), 400)
+        except Exception:
+            content = None
+        parsed = _parse_customer_explanation(content)
+        if parsed is not None:
+            return parsed
+    return _fallback_customer_explanation(flags, key_factors, next_steps)
+
+
+def _fallback_customer_explanation(flags: List[str], key_factors: List[Dict[str, Any]], next_steps: List[str]) -> Dict[str, Any]:
     fallback_summary = "Votre dossier est en cours de revue. Nous clarifions certains éléments avant décision."
     fallback_reasons = [kf.get("description", "Raison à préciser") for kf in key_factors] or flags or ["Revue complémentaire requise."]
     return {
@@ -264,6 +287,7 @@ except Exception:
 ExplanationState = Dict[str, Any]
 
 
+@timed_node("collect_signals")
 def node_collect_signals(state: ExplanationState) -> ExplanationState:
     doc_result = state.get("doc_result") or {}
     sim_result = state.get("sim_result") or {}
@@ -319,6 +343,7 @@ def node_collect_signals(state: ExplanationState) -> ExplanationState:
     return {**state, "supporting_signals": deduped}
 
 
+@timed_node("map_reason_codes")
 def node_map_reason_codes(state: ExplanationState) -> ExplanationState:
     decision = state.get("decision") or {}
     reason_codes = decision.get("reason_codes") or []
@@ -333,6 +358,7 @@ def node_map_reason_codes(state: ExplanationState) -> ExplanationState:
     return {**state, "key_factors": key_factors, "reason_codes": _safe_list(reason_codes)}
 
 
+@timed_node("generate_internal_summary")
 def node_generate_internal_summary(state: ExplanationState) -> ExplanationState:
     decision = state.get("decision") or {}
     key_factors = state.get("key_factors", [])
@@ -361,7 +387,7 @@ def node_generate_internal_summary(state: ExplanationState) -> ExplanationState:
     return {**state, "internal_summary": summary}
 
 
-def node_generate_customer_summary(state: ExplanationState) -> ExplanationState:
+def _customer_summary_args(state: ExplanationState) -> Tuple[List[str], List[Dict[str, Any]], List[str]]:
     flags = state.get("supporting_signals", [])
     key_factors = state.get("key_factors", [])
     payment_insights = _payment_insights(state.get("payment_behavior_summary"))
@@ -372,11 +398,22 @@ def node_generate_customer_summary(state: ExplanationState) -> ExplanationState:
         "Vérifier les informations d'emploi et de revenus",
         "Attendre le retour du conseiller suite à la revue",
     ]
+    return flags, key_factors, next_steps
 
-    customer_expl = _generate_customer_explanation(flags, key_factors, next_steps)
+
+@timed_node("generate_customer_summary")
+def node_generate_customer_summary(state: ExplanationState) -> ExplanationState:
+    customer_expl = _generate_customer_explanation(*_customer_summary_args(state))
+    return {**state, "customer_explanation": customer_expl}
+
+
+@timed_node("generate_customer_summary")
+async def node_generate_customer_summary_async(state: ExplanationState) -> ExplanationState:
+    customer_expl = await _generate_customer_explanation_async(*_customer_summary_args(state))
     return {**state, "customer_explanation": customer_expl}
 
 
+@timed_node("finalize")
 def node_finalize(state: ExplanationState) -> ExplanationState:
     case_id = state.get("case_id") or (state.get("decision") or {}).get("case_id")
     key_factors = state.get("key_factors", [])
@@ -406,7 +443,8 @@ def node_finalize(state: ExplanationState) -> ExplanationState:
     return {**state, "output": output}
 
 
-def build_explanation_graph():
+def build_explanation_graph(asynchronous: bool = False):
+    """The agent's graph; with `asynchronous`, its LLM node is a coroutine (run it with `ainvoke`)."""
     if not _LANGGRAPH_AVAILABLE or StateGraph is None:
         raise ImportError("langgraph is not installed")
 
@@ -414,7 +452,10 @@ def build_explanation_graph():
     graph.add_node("collect_signals", node_collect_signals)
     graph.add_node("map_reason_codes", node_map_reason_codes)
     graph.add_node("generate_internal_summary", node_generate_internal_summary)
-    graph.add_node("generate_customer_summary", node_generate_customer_summary)
+    graph.add_node(
+        "generate_customer_summary",
+        node_generate_customer_summary_async if asynchronous else node_generate_customer_summary,
+    )
     graph.add_node("finalize", node_finalize)
 
     graph.set_entry_point("collect_signals")
@@ -447,19 +488,18 @@ flowchart TD
 # ---------------------------------------------------------------------------
 # Entrypoint
 # ---------------------------------------------------------------------------
-def explain_decision(
+def _initial_state(
     decision: Any,
     doc_result: Dict[str, Any],
     sim_result: Dict[str, Any],
-    behavior_result: Optional[Dict[str, Any]] = None,
-    fraud_result: Optional[Dict[str, Any]] = None,
-    image_result: Optional[Dict[str, Any]] = None,
-    payment_behavior_summary: Optional[Dict[str, Any]] = None,
-) -> Dict[str, Any]:
+    behavior_result: Optional[Dict[str, Any]],
+    fraud_result: Optional[Dict[str, Any]],
+    image_result: Optional[Dict[str, Any]],
+    payment_behavior_summary: Optional[Dict[str, Any]],
+) -> ExplanationState:
     if not isinstance(decision, dict):
         decision = {"decision": decision}
-
-    state: ExplanationState = {
+    return {
         "case_id": decision.get("case_id") or doc_result.get("case_id"),
         "decision": decision,
         "doc_result": doc_result,
@@ -470,6 +510,20 @@ def explain_decision(
         "payment_behavior_summary": payment_behavior_summary,
     }
 
+
+def explain_decision(
+    decision: Any,
+    doc_result: Dict[str, Any],
+    sim_result: Dict[str, Any],
+    behavior_result: Optional[Dict[str, Any]] = None,
+    fraud_result: Optional[Dict[str, Any]] = None,
+    image_result: Optional[Dict[str, Any]] = None,
+    payment_behavior_summary: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    state = _initial_state(
+        decision, doc_result, sim_result, behavior_result, fraud_result, image_result, payment_behavior_summary
+    )
+
     if _LANGGRAPH_AVAILABLE:
         graph = build_explanation_graph().compile()
         result_state = graph.invoke(state)
@@ -482,3 +536,29 @@ def explain_decision(
     state = node_generate_customer_summary(state)
     state = node_finalize(state)
     return state.get("output", {})
+
+
+async def explain_decision_async(
+    decision: Any,
+    doc_result: Dict[str, Any],
+    sim_result: Dict[str, Any],
+    behavior_result: Optional[Dict[str, Any]] = None,
+    fraud_result: Optional[Dict[str, Any]] = None,
+    image_result: Optional[Dict[str, Any]] = None,
+    payment_behavior_summary: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    state = _initial_state(
+        decision, doc_result, sim_result, behavior_result, fraud_result, image_result, payment_behavior_summary
+    )
+
+    if _LANGGRAPH_AVAILABLE:
+        graph = build_explanation_graph(asynchronous=True).compile()
+        result_state = await graph.ainvoke(state)
+        return result_state.get("output", {})
+
+    state = node_collect_signals(state)
+    state = node_map_reason_codes(state)
+    state = node_generate_internal_summary(state)
+    state = await node_generate_customer_summary_async(state)
+    state = node_finalize(state)
+    return state.get("output", {})
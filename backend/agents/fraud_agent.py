@@ -6,6 +6,7 @@ Features:
 - Computes fraud risk score (0.0-1.0) and risk level.
 - Generates audit-friendly explanations via LLM with graceful fallback.
 - Provides LangChain tools and a LangGraph pipeline; falls back to pure Python if missing.
+- `analyze_fraud_async` awaits the LLM explanation on the async gateway client.
 """
 from __future__ import annotations
 
@@ -14,10 +15,14 @@ import os
 import re
 from typing import Any, Dict, List, Optional, Tuple
 
+from agents.llm_gateway import allm_client, llm_client
+from agents.llm_routing import acomplete, complete
+from agents.timing import timed_node
+
 # Environment-driven LLM config
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.groq.com/openai/v1")
 LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+AGENT_VERSION = "1"
 
 
 # ---------------------------------------------------------------------------
@@ -25,14 +30,11 @@ LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
 # ---------------------------------------------------------------------------
 
 def _llm_client():
-    if not OPENAI_API_KEY:
-        return None
-    try:
-        openai_mod = importlib.import_module("openai")
-        OpenAI = getattr(openai_mod, "OpenAI")
-        return OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
-    except Exception:
-        return None
+    return llm_client("fraud", LLM_MODEL)
+
+
+def _allm_client():
+    return allm_client("fraud", LLM_MODEL)
 
 
 def _safe_list(val: Any) -> List[Any]:
@@ -216,34 +218,25 @@ def _score_risk(detected_flags: List[str], supporting_signals: List[str]) -> Tup
     return score, level
 
 
-def _explain_flags_llm(flags: List[str], score: float, level: str, signals: List[str]) -> Dict[str, Any]:
-    client = _llm_client()
-    prompt = f"""
+def _explanation_prompt(flags: List[str], score: float, level: str, signals: List[str]) -> str:
+    return f"""
 Tu es un analyste fraude. Explique de facon concise les flags et le niveau de risque.
 Flags: {flags}
 Signals: {signals}
 Score: {score:.2f}, Level: {level}
 Reponds en JSON: {{"flag_explanations": {{"FLAG": "..."}}, "global_summary": "..."}}
 """
-    if client:
-        content: Optional[str] = None
-        try:
-            resp = client.responses.create(model=LLM_MODEL, input=prompt, max_output_tokens=300)
-            content = resp.output_text
-        except Exception:
-            try:
-                chat = client.chat.completions.create(
-                    model=LLM_MODEL,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=300,
-                )
-                content = chat.choices[0].message.content  # type: ignore[index]
-            except Exception:
-                content = None
-        if content:
-            parsed = _parse_llm_json(content)
-            if isinstance(parsed, dict) and "flag_explanations" in parsed:
-                return parsed
+
+
+def _parse_explanations(content: Optional[str]) -> Optional[Dict[str, Any]]:
+    if content:
+        parsed = _parse_llm_json(content)
+        if isinstance(parsed, dict) and "flag_explanations" in parsed:
+            return parsed
+    return None
+
+
+def _default_explanations(flags: List[str]) -> Dict[str, Any]:
     # Fallback deterministic explanations
     default_map = {
         "SUSPICIOUS_AMOUNT": "Transaction inhabituelle depassant le seuil defini.",
@@ -262,6 +255,34 @@ Reponds en JSON: {{"flag_explanations": {{"FLAG": "..."}}, "global_summary": "..
     return {"flag_explanations": flag_expl, "global_summary": summary}
 
 
+def _explain_flags_llm(flags: List[str], score: float, level: str, signals: List[str]) -> Dict[str, Any]:
+    client = _llm_client()
+    if client:
+        content: Optional[str] = None
+        try:
+            content = complete(client, LLM_MODEL, _explanation_prompt(flags, score, level, signals), 300)
+        except Exception:
+            content = None
+        parsed = _parse_explanations(content)
+        if parsed is not None:
+            return parsed
+    return _default_explanations(flags)
+
+
+async def _explain_flags_llm_async(flags: List[str], score: float, level: str, signals: List[str]) -> Dict[str, Any]:
+    client = _allm_client()
+    if client:
+        content: Optional[str] = None
+        try:
+            content = await acomplete(client, LLM_MODEL, _explanation_prompt(flags, score, level, signals), 300)
+        except Exception:
+            content = None
+        parsed = _parse_explanations(content)
+        if parsed is not None:
+            return parsed
+    return _default_explanations(flags)
+
+
 # ---------------------------------------------------------------------------
 # LangChain tools (lazy)
 # ---------------------------------------------------------------------------
@@ -326,12 +347,14 @@ except Exception:
 FraudState = Dict[str, Any]
 
 
+@timed_node("collect_signals")
 def node_collect_signals(state: FraudState) -> FraudState:
     payload = state.get("payload") or {}
     supporting, detected = _aggregate_signals(payload)
     return {**state, "supporting_signals": supporting, "detected_flags": detected}
 
 
+@timed_node("score")
 def node_score(state: FraudState) -> FraudState:
     detected = state.get("detected_flags", [])
     supporting = state.get("supporting_signals", [])
@@ -339,15 +362,28 @@ def node_score(state: FraudState) -> FraudState:
     return {**state, "fraud_score": score, "risk_level": level}
 
 
+def _explain_args(state: FraudState) -> Tuple[List[str], float, str, List[str]]:
+    return (
+        _safe_list(state.get("detected_flags")),
+        float(state.get("fraud_score", 0.0)),
+        str(state.get("risk_level", "LOW")),
+        _safe_list(state.get("supporting_signals")),
+    )
+
+
+@timed_node("explain")
 def node_explain(state: FraudState) -> FraudState:
-    flags = _safe_list(state.get("detected_flags"))
-    score = float(state.get("fraud_score", 0.0))
-    level = str(state.get("risk_level", "LOW"))
-    signals = _safe_list(state.get("supporting_signals"))
-    explanations = _explain_flags_llm(flags, score, level, signals)
+    explanations = _explain_flags_llm(*_explain_args(state))
+    return {**state, "explanations": explanations}
+
+
+@timed_node("explain")
+async def node_explain_async(state: FraudState) -> FraudState:
+    explanations = await _explain_flags_llm_async(*_explain_args(state))
     return {**state, "explanations": explanations}
 
 
+@timed_node("finalize")
 def node_finalize(state: FraudState) -> FraudState:
     flags = _safe_list(state.get("detected_flags"))
     supporting = _safe_list(state.get("supporting_signals"))
@@ -384,13 +420,14 @@ def node_finalize(state: FraudState) -> FraudState:
     return {**state, "output": output}
 
 
-def build_fraud_graph():
+def build_fraud_graph(asynchronous: bool = False):
+    """The agent's graph; with `asynchronous`, its LLM node is a coroutine (run it with `ainvoke`)."""
     if not _LANGGRAPH_AVAILABLE or StateGraph is None:
         raise ImportError("langgraph is not installed")
     graph = StateGraph(FraudState)
     graph.add_node("collect_signals", node_collect_signals)
     graph.add_node("score", node_score)
-    graph.add_node("explain", node_explain)
+    graph.add_node("explain", node_explain_async if asynchronous else node_explain)
     graph.add_node("finalize", node_finalize)
 
     graph.set_entry_point("collect_signals")
@@ -428,6 +465,23 @@ def analyze_fraud(payload: Dict[str, Any]) -> Dict[str, Any]:
     return state.get("output", {})
 
 
+async def analyze_fraud_async(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """`analyze_fraud` with the LLM explanation awaited instead of blocking a thread."""
+
+    state: FraudState = {"case_id": payload.get("case_id"), "payload": payload}
+
+    if _LANGGRAPH_AVAILABLE:
+        graph = build_fraud_graph(asynchronous=True).compile()
+        result = await graph.ainvoke(state)
+        return result.get("output", {})
+
+    state = node_collect_signals(state)
+    state = node_score(state)
+    state = await node_explain_async(state)
+    state = node_finalize(state)
+    return state.get("output", {})
+
+
 if __name__ == "__main__":
     sample = {
         "case_id": "demo-case",
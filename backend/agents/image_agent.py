@@ -8,6 +8,8 @@ from __future__ import annotations
 
 from typing import Any, Dict, List
 
+AGENT_VERSION = "1"
+
 
 def _safe_list(val: Any) -> List[str]:
     return val if isinstance(val, list) else []
@@ -69,3 +71,8 @@ def analyze_images(payload: Dict[str, Any]) -> Dict[str, Any]:
         },
         "confidence": round(confidence, 4),
     }
+
+
+async def analyze_images_async(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # pure heuristics, cheap enough to run on the event loop
+    return analyze_images(payload)
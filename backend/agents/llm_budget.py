@@ -0,0 +1,75 @@
+"""Request-scoped limits for agent LLM calls.
+
+The orchestrator runs every agent inside `agent_deadline(seconds)`. Agents ask
+`llm_allowed()` before building an LLM client and pass `llm_timeout()` as the
+client timeout, so a slow provider can never hold an agent past its slice.
+`rules_only()` turns the LLM off entirely; the orchestrator uses it to compute
+an agent's rule-based result once the agent has run out of time.
+
+Both values live in context variables, so they follow the agent into
+`asyncio.to_thread` and any executor call made through `contextvars`.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+try:
+    LLM_TIMEOUT_SEC = float(os.getenv("LLM_TIMEOUT_SEC", "20"))
+except ValueError:
+    LLM_TIMEOUT_SEC = 20.0
+
+# monotonic instant after which the current agent must stop calling the LLM
+_DEADLINE: ContextVar[Optional[float]] = ContextVar("agent_llm_deadline", default=None)
+_RULES_ONLY: ContextVar[bool] = ContextVar("agent_rules_only", default=False)
+
+
+@contextmanager
+def agent_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bound LLM calls made in this block to `seconds` (None = no extra bound)."""
+    current = _DEADLINE.get()
+    deadline = current
+    if seconds is not None:
+        candidate = time.monotonic() + max(0.0, seconds)
+        deadline = candidate if current is None else min(current, candidate)
+    token = _DEADLINE.set(deadline)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+@contextmanager
+def rules_only() -> Iterator[None]:
+    token = _RULES_ONLY.set(True)
+    try:
+        yield
+    finally:
+        _RULES_ONLY.reset(token)
+
+
+def remaining() -> Optional[float]:
+    deadline = _DEADLINE.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def llm_allowed() -> bool:
+    if _RULES_ONLY.get():
+        return False
+    left = remaining()
+    return left is None or left > 0
+
+
+def llm_timeout(default: Optional[float] = None) -> float:
+    """Client timeout for the next LLM call: the default, capped by the slice left."""
+    timeout = LLM_TIMEOUT_SEC if default is None else default
+    left = remaining()
+    if left is not None:
+        timeout = min(timeout, left)
+    return max(timeout, 0.001)
@@ -0,0 +1,296 @@
+"""Content-addressed cache of LLM responses.
+
+Many agent prompts are fully determined by their inputs (the explanation
+summaries for a flag set, the fraud flag explanation, the decision prompt,
+the similarity analysis), so a rerun of an unchanged case would otherwise pay
+the provider's latency and cost again. Responses are keyed by a hash of the
+endpoint, model, prompt (whitespace-normalised) and sampling parameters;
+transport options such as `timeout` are not part of the key.
+
+Two tiers:
+- an in-process LRU of LLM_CACHE_SIZE entries (`core.cache.TTLCache`);
+- optionally a shared store chosen by LLM_CACHE_BACKEND, so other workers and
+  restarts benefit too: `disk` (one JSON file per entry under LLM_CACHE_DIR)
+  or `postgres` (the `llm_response_cache` table).
+
+TTLs are per agent: LLM_CACHE_TTL_SEC, overridden by LLM_CACHE_TTL_<AGENT>_SEC;
+0 disables caching for that agent (the chat agent's default, its replies being
+conversational). LLM_CACHE_ENABLED=0 turns the cache off, and `bypass()` skips
+lookups for a block (forced reruns) while still storing the fresh responses.
+Lookups are counted in `llm_cache_requests_total{agent, outcome}`.
+
+`acached_call` is the same cache for the async clients: the in-process tier
+is read on the loop, the shared store (a file or a query) through
+`core.scheduler.run_blocking`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+from core.cache import TTLCache
+from core.metrics import LLM_CACHE
+from core.scheduler import run_blocking
+from core.singleflight import LLM_CALLS
+
+_BYPASS: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+# agents whose responses are not cached unless LLM_CACHE_TTL_<AGENT>_SEC is set
+_DEFAULT_TTLS = {"chat": 0.0}
+# request options that change how the call is made, not what it returns
+_TRANSPORT_KEYS = frozenset({"timeout", "extra_headers", "extra_query"})
+
+
+def _env_seconds(name: str, default: float) -> Optional[float]:
+    try:
+        value = float(os.getenv(name, str(default)))
+    except ValueError:
+        value = default
+    return value if value > 0 else None
+
+
+def agent_ttl(agent: str) -> Optional[float]:
+    """Seconds `agent`'s responses are kept; None when they are not cached."""
+    if os.getenv("LLM_CACHE_ENABLED", "1") == "0":
+        return None
+    default = _DEFAULT_TTLS.get(agent)
+    if default is None:
+        default = _env_seconds("LLM_CACHE_TTL_SEC", 86400.0) or 0.0
+    return _env_seconds(f"LLM_CACHE_TTL_{agent.upper()}_SEC", default)
+
+
+@contextmanager
+def bypass(active: bool = True) -> Iterator[None]:
+    """Skip cache lookups in this block; fresh responses still refresh the cache."""
+    token = _BYPASS.set(active or _BYPASS.get())
+    try:
+        yield
+    finally:
+        _BYPASS.reset(token)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def request_key(endpoint: str, request: Dict[str, Any]) -> str:
+    material = {k: v for k, v in request.items() if k not in _TRANSPORT_KEYS}
+    encoded = json.dumps({"endpoint": endpoint, "request": _normalize(material)}, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _DiskStore:
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        left = float(entry.get("expires_at", 0)) - time.time()
+        if left <= 0:
+            path.unlink(missing_ok=True)
+            return None
+        return entry.get("response"), left
+
+    def set(self, key: str, agent: str, model: str, payload: Any, ttl: float) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"agent": agent, "model": model, "expires_at": time.time() + ttl, "response": payload}
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(entry, default=str), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+class _PostgresStore:
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        from core.db import fetch_llm_response
+
+        return fetch_llm_response(key)
+
+    def set(self, key: str, agent: str, model: str, payload: Any, ttl: float) -> None:
+        from core.db import upsert_llm_response
+
+        upsert_llm_response(key, agent, model, payload, ttl)
+
+
+_MEMORY: Optional[TTLCache] = None
+_STORE: Tuple[str, Any] = ("", None)
+_LOCK = threading.Lock()
+
+
+def _memory() -> TTLCache:
+    global _MEMORY
+    with _LOCK:
+        if _MEMORY is None:
+            try:
+                size = int(os.getenv("LLM_CACHE_SIZE", "512"))
+            except ValueError:
+                size = 512
+            _MEMORY = TTLCache(maxsize=size, ttl=None)
+        return _MEMORY
+
+
+def _store() -> Any:
+    """The shared tier selected by LLM_CACHE_BACKEND, or None."""
+    global _STORE
+    backend = os.getenv("LLM_CACHE_BACKEND", "").strip().lower()
+    if backend == "disk":
+        backend = "disk:" + os.getenv("LLM_CACHE_DIR", ".llm_cache")
+    if backend != _STORE[0]:
+        if backend.startswith("disk:"):
+            store: Any = _DiskStore(backend[len("disk:"):])
+        elif backend == "postgres":
+            store = _PostgresStore()
+        else:
+            store = None
+        _STORE = (backend, store)
+    return _STORE[1]
+
+
+def clear() -> None:
+    """Empty the in-process tier (the shared store is left alone)."""
+    _memory().clear()
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _lookup(agent: str, key: str, ttl: float, store: Any, load: Callable[[Any], Any]) -> Tuple[bool, Any]:
+    """(True, response) on a hit in either tier, counted; (False, None) otherwise."""
+    memory = _memory()
+    if _BYPASS.get():
+        LLM_CACHE.inc(agent, "bypass")
+        return False, None
+    value = memory.get(key)
+    if value is not None:
+        LLM_CACHE.inc(agent, "memory_hit")
+        return True, value
+    stored = None
+    if store is not None:
+        try:
+            stored = store.get(key)
+            if stored is not None:
+                value = load(stored[0])
+        except Exception as exc:
+            print(f"[WARN] LLM cache read failed: {exc}")
+            stored = None
+    if stored is not None:
+        memory.set(key, value, min(ttl, stored[1]))
+        LLM_CACHE.inc(agent, "store_hit")
+        return True, value
+    LLM_CACHE.inc(agent, "miss")
+    return False, None
+
+
+def _keep(agent: str, model: str, key: str, ttl: float, store: Any, value: Any, dump: Callable[[Any], Any]) -> None:
+    _memory().set(key, value, ttl)
+    if store is not None:
+        try:
+            payload = dump(value)
+            if payload is not None:
+                store.set(key, agent, model, payload, ttl)
+        except Exception as exc:
+            print(f"[WARN] LLM cache write failed: {exc}")
+
+
+def _request_timeout(request: Dict[str, Any]) -> Optional[float]:
+    timeout = request.get("timeout")
+    return float(timeout) if isinstance(timeout, (int, float)) else None
+
+
+def cached_call(
+    agent: str,
+    model: str,
+    endpoint: str,
+    request: Dict[str, Any],
+    call: Callable[[], Any],
+    dump: Callable[[Any], Any] = _identity,
+    load: Callable[[Any], Any] = _identity,
+    accept: Callable[[Any], bool] = bool,
+) -> Any:
+    """`call()`'s response, or the one cached for an identical request by `agent`.
+
+    `dump`/`load` convert a response to and from JSON for the shared store
+    (`dump` returning None keeps it in memory only); responses failing
+    `accept` (by default: empty ones) are not cached. An identical request
+    already in flight is joined instead of being sent again, cached or not
+    (`core.singleflight`).
+    """
+    if request.get("stream"):
+        return call()
+    key = request_key(endpoint, request)
+    timeout = _request_timeout(request)
+    ttl = agent_ttl(agent)
+    if ttl is None:
+        return LLM_CALLS.do(key, call, timeout=timeout)
+    store = _store()
+    hit, value = _lookup(agent, key, ttl, store, load)
+    if hit:
+        return value
+
+    def _fetch() -> Any:
+        value = call()
+        if accept(value):
+            _keep(agent, model, key, ttl, store, value, dump)
+        return value
+
+    return LLM_CALLS.do(key, _fetch, timeout=timeout)
+
+
+async def acached_call(
+    agent: str,
+    model: str,
+    endpoint: str,
+    request: Dict[str, Any],
+    call: Callable[[], Awaitable[Any]],
+    dump: Callable[[Any], Any] = _identity,
+    load: Callable[[Any], Any] = _identity,
+    accept: Callable[[Any], bool] = bool,
+) -> Any:
+    """`cached_call` for a coroutine function `call`."""
+    if request.get("stream"):
+        return await call()
+    key = request_key(endpoint, request)
+    timeout = _request_timeout(request)
+    ttl = agent_ttl(agent)
+    if ttl is None:
+        return await LLM_CALLS.ado(key, call, timeout=timeout)
+    store = _store()
+    if store is None:
+        hit, value = _lookup(agent, key, ttl, store, load)
+    else:
+        hit, value = await run_blocking(_lookup, agent, key, ttl, store, load)
+    if hit:
+        return value
+
+    async def _fetch() -> Any:
+        value = await call()
+        if accept(value):
+            if store is None:
+                _keep(agent, model, key, ttl, store, value, dump)
+            else:
+                await run_blocking(_keep, agent, model, key, ttl, store, value, dump)
+        return value
+
+    return await LLM_CALLS.ado(key, _fetch, timeout=timeout)
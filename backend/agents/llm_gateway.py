@@ -0,0 +1,333 @@
+"""Process-wide LLM gateway shared by every agent.
+
+Agents used to build a new `OpenAI(...)` client, and with it a new HTTP
+connection pool and TLS handshake to the provider, each time they called the
+LLM. `llm_client("fraud")` now returns a light per-agent handle over clients
+that are built once per process and endpoint and keep their connections alive
+between calls and cases.
+
+A call is routed by its `model=` argument, so an agent switching to its
+fallback model also picks up that model's endpoint, timeout and retries.
+Per-model overrides come from LLM_MODEL_SETTINGS, a JSON object keyed by model:
+
+    {"llama-3.3-70b-versatile": {"timeout": 30, "max_retries": 1},
+     "gpt-4o-mini": {"base_url": "https://api.openai.com/v1", "api_key_env": "OPENAI_KEY_OAI"},
+     "llama-3.1-8b-instant": {"endpoint": "chat"}}
+
+`endpoint` (`responses` or `chat`) skips probing which API the provider
+serves for that model, see `agents.llm_routing`.
+
+The per-call timeout is the model's timeout (LLM_TIMEOUT_SEC by default)
+capped by what is left of the agent's slice, see `agents.llm_budget`. Every
+call is first looked up in the response cache (`agents.llm_cache`); calls that
+reach the provider go through `instrument_client` for metrics and tracing.
+
+`allm_client("fraud")` is the same handle for the agents' `*_async` entry
+points: its `create` methods are awaited, on one shared `AsyncOpenAI` per
+endpoint over one `httpx.AsyncClient` pool, so an in-flight call holds a
+socket rather than a thread. Async clients are bound to their event loop, so
+these are kept per loop (`core.scheduler.loop_resource`): a long-lived loop
+(the API's) shares them across requests and cases.
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from agents.llm_budget import llm_allowed, llm_timeout
+from agents.llm_cache import acached_call, cached_call
+from agents.llm_metrics import instrument_client
+from core.scheduler import loop_resource
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.groq.com/openai/v1")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+@dataclass(frozen=True)
+class ModelSettings:
+    base_url: str
+    api_key: str
+    timeout: Optional[float] = None
+    max_retries: int = 2
+    endpoint: Optional[str] = None
+
+
+_OVERRIDES: Tuple[str, Dict[str, Dict[str, Any]]] = ("", {})
+
+
+def _overrides() -> Dict[str, Dict[str, Any]]:
+    global _OVERRIDES
+    raw = os.getenv("LLM_MODEL_SETTINGS", "").strip()
+    if raw != _OVERRIDES[0]:
+        parsed: Dict[str, Dict[str, Any]] = {}
+        if raw:
+            try:
+                loaded = json.loads(raw)
+                parsed = {str(k): v for k, v in loaded.items() if isinstance(v, dict)}
+            except (ValueError, AttributeError) as exc:
+                print(f"[WARN] Ignoring invalid LLM_MODEL_SETTINGS: {exc}")
+        _OVERRIDES = (raw, parsed)
+    return _OVERRIDES[1]
+
+
+def model_settings(model: Optional[str]) -> ModelSettings:
+    override = _overrides().get(model or "", {})
+    api_key = os.getenv(override["api_key_env"], "") if override.get("api_key_env") else OPENAI_API_KEY
+    timeout = override.get("timeout")
+    endpoint = override.get("endpoint")
+    return ModelSettings(
+        base_url=str(override.get("base_url") or OPENAI_BASE_URL),
+        api_key=api_key,
+        timeout=float(timeout) if timeout is not None else None,
+        max_retries=int(override.get("max_retries", _env_int("LLM_MAX_RETRIES", 2))),
+        endpoint=endpoint if endpoint in ("responses", "chat") else None,
+    )
+
+
+_CLIENTS: Dict[Tuple[str, str, int], Any] = {}
+_HTTP_CLIENT: Any = None
+_LOCK = threading.Lock()
+
+
+def _new_http_client(asynchronous: bool = False) -> Any:
+    try:
+        httpx = importlib.import_module("httpx")
+    except ImportError:
+        return None
+    limits = httpx.Limits(
+        max_connections=_env_int("LLM_POOL_MAX_CONNECTIONS", 20),
+        max_keepalive_connections=_env_int("LLM_POOL_MAX_KEEPALIVE", 10),
+        keepalive_expiry=_env_float("LLM_POOL_KEEPALIVE_SEC", 60.0),
+    )
+    return httpx.AsyncClient(limits=limits) if asynchronous else httpx.Client(limits=limits)
+
+
+def http_client() -> Any:
+    """The keep-alive HTTP connection pool behind every gateway client (None without httpx)."""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        with _LOCK:
+            if _HTTP_CLIENT is None:
+                _HTTP_CLIENT = _new_http_client()
+    return _HTTP_CLIENT
+
+
+def _shared_client(settings: ModelSettings) -> Any:
+    key = (settings.base_url, settings.api_key, settings.max_retries)
+    client = _CLIENTS.get(key)
+    if client is not None:
+        return client
+    pool = http_client()
+    with _LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            OpenAI = getattr(importlib.import_module("openai"), "OpenAI")
+            kwargs: Dict[str, Any] = {
+                "api_key": settings.api_key,
+                "base_url": settings.base_url,
+                "max_retries": settings.max_retries,
+            }
+            if pool is not None:
+                kwargs["http_client"] = pool
+            client = OpenAI(**kwargs)
+            _CLIENTS[key] = client
+    return client
+
+
+def async_http_client() -> Any:
+    """The running loop's keep-alive `httpx.AsyncClient` behind every async gateway client (None without httpx)."""
+    return loop_resource("llm.http", lambda: _new_http_client(asynchronous=True))
+
+
+def _async_shared_client(settings: ModelSettings) -> Any:
+    def _build() -> Any:
+        AsyncOpenAI = getattr(importlib.import_module("openai"), "AsyncOpenAI")
+        kwargs: Dict[str, Any] = {
+            "api_key": settings.api_key,
+            "base_url": settings.base_url,
+            "max_retries": settings.max_retries,
+        }
+        pool = async_http_client()
+        if pool is not None:
+            kwargs["http_client"] = pool
+        return AsyncOpenAI(**kwargs)
+
+    return loop_resource(("llm.client", settings.base_url, settings.api_key, settings.max_retries), _build)
+
+
+# response classes rebuilt from the shared cache tier, by endpoint
+_RESPONSE_TYPES = {
+    "responses": ("openai.types.responses", "Response"),
+    "chat.completions": ("openai.types.chat", "ChatCompletion"),
+}
+
+
+def _dump_response(response: Any) -> Any:
+    dump = getattr(response, "model_dump", None)
+    return dump(mode="json") if dump is not None else None
+
+
+def _response_loader(endpoint: str) -> Any:
+    def _load(payload: Any) -> Any:
+        module, name = _RESPONSE_TYPES[endpoint]
+        return getattr(importlib.import_module(module), name).model_validate(payload)
+
+    return _load
+
+
+def _has_output(response: Any) -> bool:
+    """Whether a response carries text worth caching (empty or refused ones are retried)."""
+    try:
+        if hasattr(response, "choices"):
+            return bool(response.choices[0].message.content)
+        return bool(getattr(response, "output_text", None))
+    except (AttributeError, IndexError, TypeError):
+        return False
+
+
+class _RoutedCreate:
+    __slots__ = ("_agent", "_path")
+
+    def __init__(self, agent: str, *path: str) -> None:
+        self._agent = agent
+        self._path = path
+
+    def create(self, **kwargs: Any) -> Any:
+        settings = model_settings(kwargs.get("model"))
+        kwargs.setdefault("timeout", llm_timeout(settings.timeout))
+
+        def _call() -> Any:
+            if not settings.api_key:
+                raise RuntimeError(f"No API key for LLM model {kwargs.get('model')}")
+            target = instrument_client(_shared_client(settings), self._agent)
+            for name in self._path:
+                target = getattr(target, name)
+            return target.create(**kwargs)
+
+        endpoint = ".".join(self._path)
+        return cached_call(
+            self._agent,
+            str(kwargs.get("model")),
+            endpoint,
+            kwargs,
+            _call,
+            dump=_dump_response,
+            load=_response_loader(endpoint),
+            accept=_has_output,
+        )
+
+
+class _AsyncRoutedCreate(_RoutedCreate):
+    __slots__ = ()
+
+    async def create(self, **kwargs: Any) -> Any:  # type: ignore[override]
+        settings = model_settings(kwargs.get("model"))
+        kwargs.setdefault("timeout", llm_timeout(settings.timeout))
+
+        async def _call() -> Any:
+            if not settings.api_key:
+                raise RuntimeError(f"No API key for LLM model {kwargs.get('model')}")
+            target = instrument_client(_async_shared_client(settings), self._agent, asynchronous=True)
+            for name in self._path:
+                target = getattr(target, name)
+            return await target.create(**kwargs)
+
+        endpoint = ".".join(self._path)
+        return await acached_call(
+            self._agent,
+            str(kwargs.get("model")),
+            endpoint,
+            kwargs,
+            _call,
+            dump=_dump_response,
+            load=_response_loader(endpoint),
+            accept=_has_output,
+        )
+
+
+class _RoutedChat:
+    __slots__ = ("completions",)
+
+    def __init__(self, agent: str, routed: type = _RoutedCreate) -> None:
+        self.completions = routed(agent, "chat", "completions")
+
+
+class _Gateway:
+    __slots__ = ("responses", "chat")
+
+    def __init__(self, agent: str, asynchronous: bool = False) -> None:
+        routed = _AsyncRoutedCreate if asynchronous else _RoutedCreate
+        self.responses = routed(agent, "responses")
+        self.chat = _RoutedChat(agent, routed)
+
+
+def _has_key(models: Tuple[str, ...]) -> bool:
+    if models:
+        return any(model_settings(model).api_key for model in models)
+    if OPENAI_API_KEY:
+        return True
+    return any(os.getenv(override.get("api_key_env") or "", "") for override in _overrides().values())
+
+
+def llm_client(agent: str, *models: str) -> Any:
+    """
+    LLM client for `agent`, or None when the agent may not call the LLM or has
+    no API key: none of `models` resolves one (OPENAI_API_KEY or the model's
+    api_key_env), or with no models given, no key is configured at all.
+    """
+    if not llm_allowed() or not _has_key(models):
+        return None
+    try:
+        importlib.import_module("openai")
+    except ImportError:
+        return None
+    return _Gateway(agent)
+
+
+def allm_client(agent: str, *models: str) -> Any:
+    """`llm_client` whose `create` calls are coroutines, for the agents' `*_async` entry points."""
+    if not llm_allowed() or not _has_key(models):
+        return None
+    try:
+        importlib.import_module("openai")
+    except ImportError:
+        return None
+    return _Gateway(agent, asynchronous=True)
+
+
+def close_clients() -> None:
+    """Close the shared connection pool (process shutdown); async clients close with `close_loop_resources`."""
+    global _HTTP_CLIENT
+    with _LOCK:
+        pool, _HTTP_CLIENT = _HTTP_CLIENT, None
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+    if pool is not None:
+        try:
+            pool.close()
+        except Exception:
+            pass
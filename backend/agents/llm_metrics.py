@@ -0,0 +1,138 @@
+"""LLM call metrics for the agents' OpenAI clients.
+
+`instrument_client(client, "fraud")` wraps an OpenAI client so that every
+`responses.create` / `chat.completions.create` runs in an `llm` tracing span,
+is timed into `llm_request_duration_seconds{agent, model}` and is counted in
+`llm_errors_total` when it raises. Everything else is passed through, so
+call sites keep using the client as before. `instrument_client(client, agent,
+asynchronous=True)` does the same for an `AsyncOpenAI` client, timing each
+awaited call.
+
+The last LLM_LATENCY_WINDOW call durations of each model (failed calls
+included: a timeout is the latency worth routing around) are also kept for
+`observed_p95(model)`, which `agents.llm_routing` compares across models.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from core.metrics import LLM_ERRORS, LLM_SECONDS
+from core.tracing import span
+
+try:
+    LLM_LATENCY_WINDOW = max(1, int(os.getenv("LLM_LATENCY_WINDOW", "50")))
+except ValueError:
+    LLM_LATENCY_WINDOW = 50
+try:
+    LLM_LATENCY_MIN_SAMPLES = max(1, int(os.getenv("LLM_LATENCY_MIN_SAMPLES", "10")))
+except ValueError:
+    LLM_LATENCY_MIN_SAMPLES = 10
+
+_RECENT: Dict[str, Deque[float]] = {}
+_RECENT_LOCK = threading.Lock()
+
+
+def _record_latency(model: str, seconds: float) -> None:
+    with _RECENT_LOCK:
+        window = _RECENT.get(model)
+        if window is None:
+            window = _RECENT[model] = deque(maxlen=LLM_LATENCY_WINDOW)
+        window.append(seconds)
+
+
+def observed_p95(model: str) -> Optional[float]:
+    """p95 latency in seconds over `model`'s recent calls, None below LLM_LATENCY_MIN_SAMPLES."""
+    with _RECENT_LOCK:
+        samples = sorted(_RECENT.get(model, ()))
+    if len(samples) < LLM_LATENCY_MIN_SAMPLES:
+        return None
+    return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+
+def reset_latencies() -> None:
+    with _RECENT_LOCK:
+        _RECENT.clear()
+
+
+class _TimedCreate:
+    __slots__ = ("_target", "_agent")
+
+    def __init__(self, target: Any, agent: str) -> None:
+        self._target = target
+        self._agent = agent
+
+    def create(self, *args: Any, **kwargs: Any) -> Any:
+        model = str(kwargs.get("model") or "unknown")
+        started = time.perf_counter()
+        with LLM_SECONDS.time(self._agent, model), span("llm", agent=self._agent, model=model):
+            try:
+                return self._target.create(*args, **kwargs)
+            except Exception:
+                LLM_ERRORS.inc(self._agent, model)
+                raise
+            finally:
+                _record_latency(model, time.perf_counter() - started)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+
+class _AsyncTimedCreate(_TimedCreate):
+    __slots__ = ()
+
+    async def create(self, *args: Any, **kwargs: Any) -> Any:  # type: ignore[override]
+        model = str(kwargs.get("model") or "unknown")
+        started = time.perf_counter()
+        with LLM_SECONDS.time(self._agent, model), span("llm", agent=self._agent, model=model):
+            try:
+                return await self._target.create(*args, **kwargs)
+            except Exception:
+                LLM_ERRORS.inc(self._agent, model)
+                raise
+            finally:
+                _record_latency(model, time.perf_counter() - started)
+
+
+class _Chat:
+    __slots__ = ("_chat", "_agent", "_timed")
+
+    def __init__(self, chat: Any, agent: str, timed: type = _TimedCreate) -> None:
+        self._chat = chat
+        self._agent = agent
+        self._timed = timed
+
+    @property
+    def completions(self) -> _TimedCreate:
+        return self._timed(self._chat.completions, self._agent)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._chat, name)
+
+
+class InstrumentedClient:
+    __slots__ = ("_client", "_agent", "_timed")
+
+    def __init__(self, client: Any, agent: str, asynchronous: bool = False) -> None:
+        self._client = client
+        self._agent = agent
+        self._timed = _AsyncTimedCreate if asynchronous else _TimedCreate
+
+    @property
+    def responses(self) -> _TimedCreate:
+        return self._timed(self._client.responses, self._agent)
+
+    @property
+    def chat(self) -> _Chat:
+        return _Chat(self._client.chat, self._agent, self._timed)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+def instrument_client(client: Any, agent: str, asynchronous: bool = False) -> Any:
+    return InstrumentedClient(client, agent, asynchronous) if client is not None else None
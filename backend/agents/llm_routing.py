@@ -0,0 +1,134 @@
+"""Endpoint capability probing and latency-aware model routing.
+
+Agents used to try `responses.create` on every call and fall back to
+`chat.completions.create` when it raised, so against an OpenAI-compatible
+provider without the Responses API each call (and again each fallback model)
+paid a failing round trip first. `complete(client, model, prompt, ...)` (and
+`acomplete` for an `allm_client`) picks the endpoint instead:
+
+- the model's `endpoint` in LLM_MODEL_SETTINGS, when set;
+- otherwise the endpoint found by the first call for that provider and model,
+  kept for LLM_CAPABILITY_TTL_SEC (default 6 hours) so a provider upgrade is
+  eventually noticed. A Responses call failing for another reason than a
+  timeout, a rate limit or a server error marks the model as chat-only.
+
+`route(agent, primary, fallback)` orders a primary and a fallback model by
+their observed p95 latency (`agents.llm_metrics.observed_p95`): the fallback
+goes first when the primary's p95 is LLM_ROUTING_P95_RATIO (default 1.5)
+times the fallback's, or when it no longer fits in what is left of the
+agent's slice while the fallback's does. LLM_LATENCY_ROUTING=0 keeps the
+configured order. Choices are counted in `llm_model_routing_total`.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, List, Optional
+
+from agents.llm_budget import remaining
+from agents.llm_gateway import model_settings
+from agents.llm_metrics import observed_p95
+from core.cache import TTLCache
+from core.metrics import LLM_ENDPOINTS, LLM_ROUTED
+
+try:
+    LLM_CAPABILITY_TTL_SEC = float(os.getenv("LLM_CAPABILITY_TTL_SEC", "21600"))
+except ValueError:
+    LLM_CAPABILITY_TTL_SEC = 21600.0
+try:
+    LLM_ROUTING_P95_RATIO = float(os.getenv("LLM_ROUTING_P95_RATIO", "1.5"))
+except ValueError:
+    LLM_ROUTING_P95_RATIO = 1.5
+
+# (base_url, model) -> "responses" | "chat"
+_CAPABILITIES = TTLCache(maxsize=256, ttl=LLM_CAPABILITY_TTL_SEC if LLM_CAPABILITY_TTL_SEC > 0 else None)
+# status codes of failures that say nothing about the endpoint being served
+_TRANSIENT_STATUSES = frozenset({408, 409, 429})
+
+
+def _transient(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status in _TRANSIENT_STATUSES or (status >= 500 and status != 501)
+    name = type(exc).__name__
+    return isinstance(exc, TimeoutError) or "Timeout" in name or "Connection" in name
+
+
+def endpoint_for(model: str) -> Optional[str]:
+    """`responses` or `chat` for `model`, None until its first call has probed it."""
+    settings = model_settings(model)
+    return settings.endpoint or _CAPABILITIES.get((settings.base_url, model))
+
+
+def _remember(model: str, endpoint: str) -> None:
+    settings = model_settings(model)
+    if settings.endpoint or _CAPABILITIES.get((settings.base_url, model)) == endpoint:
+        return
+    _CAPABILITIES.set((settings.base_url, model), endpoint)
+    LLM_ENDPOINTS.inc(model, endpoint)
+    print(f"[INFO] LLM endpoint for {model} at {settings.base_url}: {endpoint}")
+
+
+def forget_endpoints() -> None:
+    _CAPABILITIES.clear()
+
+
+def complete(client: Any, model: str, prompt: str, max_tokens: int) -> Optional[str]:
+    """Text generated by `model` for `prompt`, through the endpoint it supports.
+
+    Raises when the chat completion fails; a Responses call that fails falls
+    back to chat, as the agents did before.
+    """
+    if endpoint_for(model) != "chat":
+        try:
+            resp = client.responses.create(model=model, input=prompt, max_output_tokens=max_tokens)
+        except Exception as exc:
+            if not _transient(exc):
+                _remember(model, "chat")
+        else:
+            _remember(model, "responses")
+            return getattr(resp, "output_text", None)
+    chat = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+    )
+    return chat.choices[0].message.content  # type: ignore[index]
+
+
+async def acomplete(client: Any, model: str, prompt: str, max_tokens: int) -> Optional[str]:
+    """`complete` through an async gateway client."""
+    if endpoint_for(model) != "chat":
+        try:
+            resp = await client.responses.create(model=model, input=prompt, max_output_tokens=max_tokens)
+        except Exception as exc:
+            if not _transient(exc):
+                _remember(model, "chat")
+        else:
+            _remember(model, "responses")
+            return getattr(resp, "output_text", None)
+    chat = await client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+    )
+    return chat.choices[0].message.content  # type: ignore[index]
+
+
+def route(agent: str, primary: str, fallback: Optional[str]) -> List[str]:
+    """`primary` and `fallback` (when distinct), the one expected to answer faster first."""
+    models = [model for model in dict.fromkeys((primary, fallback)) if model]
+    reason = "primary"
+    if len(models) == 2 and os.getenv("LLM_LATENCY_ROUTING", "1") != "0":
+        primary_p95, fallback_p95 = observed_p95(models[0]), observed_p95(models[1])
+        if primary_p95 is not None and fallback_p95 is not None:
+            left = remaining()
+            if primary_p95 > fallback_p95 * LLM_ROUTING_P95_RATIO:
+                reason = "p95"
+            elif left is not None and fallback_p95 <= left < primary_p95:
+                reason = "budget"
+            if reason != "primary":
+                models.reverse()
+    if models:
+        LLM_ROUTED.inc(agent, models[0], reason)
+    return models
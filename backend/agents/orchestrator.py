@@ -63,12 +63,18 @@ class OrchestratorAgent:
         print("✓ Orchestrator initialized")
         print("=" * 70)
     
-    def orchestrate(self, request: Dict[str, Any], agent_results: Dict[str, Any]) -> Dict[str, Any]:
+    def orchestrate(
+        self,
+        request: Dict[str, Any],
+        agent_results: Dict[str, Any],
+        execution_times: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Any]:
         """Main orchestration logic.
         
         Args:
             request: Original credit request
             agent_results: Dict mapping agent_name -> agent response
+            execution_times: Optional dict mapping agent_name -> wall-clock ms
             
         Returns:
             Unified orchestrator output for Decision Agent
@@ -81,7 +87,7 @@ class OrchestratorAgent:
         print(f"\n📋 Processing case: {case_id}")
         
         # 1. Normalize agent outputs
-        normalized_outputs = self._normalize_agent_outputs(agent_results)
+        normalized_outputs = self._normalize_agent_outputs(agent_results, execution_times)
         
         # 2. Detect conflicts
         conflicts = self._detect_conflicts(normalized_outputs)
@@ -123,7 +129,8 @@ class OrchestratorAgent:
                     "success": output.success,
                     "confidence": output.confidence,
                     "data": output.data,
-                    "error": output.error
+                    "error": output.error,
+                    "execution_time_ms": output.execution_time_ms,
                 }
                 for name, output in normalized_outputs.items()
             },
@@ -136,9 +143,14 @@ class OrchestratorAgent:
         
         return orchestrator_output
     
-    def _normalize_agent_outputs(self, agent_results: Dict[str, Any]) -> Dict[str, AgentOutput]:
+    def _normalize_agent_outputs(
+        self,
+        agent_results: Dict[str, Any],
+        execution_times: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, AgentOutput]:
         """Convert raw agent responses to standardized AgentOutput objects."""
         normalized = {}
+        execution_times = execution_times or {}
         
         for agent_name, result in agent_results.items():
             if not isinstance(result, dict):
@@ -148,7 +160,8 @@ class OrchestratorAgent:
                     data={},
                     confidence=0.0,
                     priority=AgentPriority.MEDIUM,
-                    error="Invalid result format"
+                    error="Invalid result format",
+                    execution_time_ms=execution_times.get(agent_name),
                 )
                 continue
             
@@ -168,7 +181,8 @@ class OrchestratorAgent:
                 data=result,
                 confidence=float(confidence),
                 priority=priority,
-                error=None
+                error=None,
+                execution_time_ms=execution_times.get(agent_name),
             )
         
         print(f"\n✓ Normalized {len(normalized)} agent outputs")
@@ -529,9 +543,13 @@ def get_orchestrator() -> OrchestratorAgent:
     return _orchestrator_instance
 
 
-def orchestrate_decision(request: Dict[str, Any], agent_results: Dict[str, Any]) -> Dict[str, Any]:
+def orchestrate_decision(
+    request: Dict[str, Any],
+    agent_results: Dict[str, Any],
+    execution_times: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
     """Main entry point for orchestration."""
-    return get_orchestrator().orchestrate(request, agent_results)
+    return get_orchestrator().orchestrate(request, agent_results, execution_times)
 
 
 # ==============================================================================
@@ -3,6 +3,7 @@ SIMILARITY AGENT AI - Agent Intelligent pour Décision de Crédit
 Refactorisé avec LangChain & LangGraph
 """
 
+import asyncio
 import os
 import json
 import time
@@ -19,7 +20,16 @@ from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
 
 # Original Imports maintained for logic
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from agents.llm_budget import llm_allowed, llm_timeout
+from agents.llm_cache import acached_call as acached_llm_call, cached_call as cached_llm_call
+from agents.llm_gateway import async_http_client as llm_async_http_client, http_client as llm_http_client
+from agents.timing import timed_node
+from core.metrics import EMBEDDING_SECONDS, LLM_ERRORS, LLM_SECONDS, QDRANT_RETRIES, QDRANT_SECONDS
+from core.scheduler import loop_resource, run_blocking
+from core.singleflight import EMBEDDINGS, QDRANT_SEARCHES
+from core.tracing import span
 
 # ==============================================================================
 # CONFIGURATION
@@ -41,6 +51,7 @@ QDRANT_AUTO_LOAD = os.getenv("QDRANT_AUTO_LOAD", "0") == "1"
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.groq.com/openai/v1")
 LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.3-70b-versatile")
+AGENT_VERSION = "1"
 
 try:
     QDRANT_TIMEOUT_SEC = float(os.getenv("QDRANT_TIMEOUT_SEC", "2.5"))
@@ -63,15 +74,22 @@ except ValueError:
 def _embed_with_timeout(embedder, text: str, timeout_sec: float) -> Optional[List[float]]:
     result: Dict[str, Any] = {"value": None, "error": None}
 
+    def _embed() -> List[float]:
+        with EMBEDDING_SECONDS.time("similarity"):
+            return embedder.embed_query(text)
+
     def _run() -> None:
         try:
-            result["value"] = embedder.embed_query(text)
+            # the same text being embedded elsewhere (other case, sync job) is awaited, not recomputed
+            result["value"] = EMBEDDINGS.do((EMBEDDING_MODEL, text), _embed)
         except Exception as exc:
             result["error"] = exc
 
     thread = threading.Thread(target=_run, daemon=True)
-    thread.start()
-    thread.join(timeout_sec)
+    # spanned here: the embedding thread does not inherit the trace context
+    with span("embed", source="similarity"):
+        thread.start()
+        thread.join(timeout_sec)
     if thread.is_alive():
         return None
     if result.get("error") is not None:
@@ -89,6 +107,44 @@ def _embed_with_retry(embedder, text: str, timeout_sec: float, retries: int) ->
             time.sleep(0.1 * (attempt + 1))
     return None
 
+
+async def _embed_with_timeout_async(embedder, text: str, timeout_sec: float) -> Optional[List[float]]:
+    def _embed() -> List[float]:
+        with EMBEDDING_SECONDS.time("similarity"):
+            return embedder.embed_query(text)
+
+    try:
+        # the model is CPU-bound, it runs on the blocking pool; a timed-out embedding is abandoned there
+        with span("embed", source="similarity"):
+            return await asyncio.wait_for(
+                EMBEDDINGS.ado((EMBEDDING_MODEL, text), lambda: run_blocking(_embed)),
+                timeout_sec,
+            )
+    except Exception:
+        return None
+
+
+async def _embed_with_retry_async(embedder, text: str, timeout_sec: float, retries: int) -> Optional[List[float]]:
+    attempts = max(1, retries + 1)
+    for attempt in range(attempts):
+        vector = await _embed_with_timeout_async(embedder, text, timeout_sec)
+        if vector:
+            return vector
+        if attempt < attempts - 1:
+            await asyncio.sleep(0.1 * (attempt + 1))
+    return None
+
+
+def _chat_model(**http_clients: Any) -> ChatOpenAI:
+    return ChatOpenAI(
+        api_key=OPENAI_API_KEY,
+        base_url=OPENAI_BASE_URL,
+        model=LLM_MODEL,
+        temperature=0.2,
+        model_kwargs={"response_format": {"type": "json_object"}},
+        **http_clients,
+    )
+
 """
 QDRANT PAYLOAD SCHEMA (compatibilite "dataset actuel", sans changer les formulaires)
 
@@ -161,6 +217,13 @@ QDRANT_CREDIT_CASE_PAYLOAD_SCHEMA: Dict[str, str] = {
 }
 
 
+def _is_json_object(content: Any) -> bool:
+    try:
+        return isinstance(json.loads(content), dict)
+    except (TypeError, ValueError):
+        return False
+
+
 def _extract_payment_summary(request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     summary = request_data.get("payment_behavior_summary")
     if isinstance(summary, dict):
@@ -357,6 +420,14 @@ def _normalize_payload_credit_case(record: Dict[str, Any]) -> Dict[str, Any]:
     return payload
 
 
+def _point_payload_score(result: Any) -> Tuple[Dict[str, Any], float]:
+    if hasattr(result, "payload"):
+        return getattr(result, "payload", {}) or {}, float(getattr(result, "score", 0) or 0)
+    if isinstance(result, dict):
+        return result.get("payload", {}) or {}, float(result.get("score", 0) or 0)
+    return {}, 0.0
+
+
 def _case_status(case: Dict[str, Any]) -> str:
     if case.get("fraud_flag"):
         return "FRAUD"
@@ -651,6 +722,7 @@ class SimilarityAgentAI:
         qdrant_key = QDRANT_API_KEY or None
         if not QDRANT_URL:
              print("ATTENTION: QDRANT_URL manquant, utilisation du local http://localhost:6333")
+        self._qdrant_settings = {"url": qdrant_url, "api_key": qdrant_key}
         try:
             self.qdrant_client = QdrantClient(url=qdrant_url, api_key=qdrant_key)
             print(f"Qdrant connecte: {str(qdrant_url)[:30]}...")
@@ -669,13 +741,8 @@ class SimilarityAgentAI:
         
         # 3. Init LLM (LangChain ChatOpenAI)
         if OPENAI_API_KEY: 
-            self.llm = ChatOpenAI(
-                api_key=OPENAI_API_KEY, 
-                base_url=OPENAI_BASE_URL,
-                model=LLM_MODEL,
-                temperature=0.2,
-                model_kwargs={"response_format": {"type": "json_object"}}
-            )
+            # same keep-alive connection pool as the other agents
+            self.llm = _chat_model(http_client=llm_http_client())
             self.llm_enabled = True
             print("LLM connecte: " + LLM_MODEL)
         else:
@@ -694,8 +761,9 @@ class SimilarityAgentAI:
             if QDRANT_AUTO_LOAD:
                 self._load_dataset_into_qdrant_if_empty()
         
-        # 4. Construire le Graph LangGraph
+        # 4. Construire le Graph LangGraph (et sa variante async, sans thread par requete)
         self.graph = self._build_graph()
+        self.async_graph = self._build_graph(asynchronous=True)
 
         print("=" * 60)
         print("Similarity Agent AI initialise avec succes!")
@@ -1078,6 +1146,7 @@ class SimilarityAgentAI:
     # LANGGRAPH NODES
     # --------------------------------------------------------------------------
 
+    @timed_node("extract_profile")
     def node_extract_profile(self, state: AgentState) -> Dict:
         """Etape 1: Extraction du profil"""
         print("")
@@ -1090,176 +1159,254 @@ class SimilarityAgentAI:
         
         return {"profile": profile, "profile_dict": profile_dict}
 
-    def node_generate_embedding(self, state: AgentState) -> Dict:
-        """Etape 2: Generation de l'embedding"""
+    def _embedding_texts(self, state: AgentState) -> Tuple[str, str]:
         print("")
         print("Etape 2/5: Generation de l'embedding...")
         profile = state.get("profile")
         if profile is None:
             raise ValueError("Profil manquant pour la generation d'embedding")
-
-        profile_text = profile.to_text()
         payment_summary = _extract_payment_summary(state.get("request_data") or {})
-        payment_text = _build_payment_embedding_text(payment_summary)
+        return profile.to_text(), _build_payment_embedding_text(payment_summary)
 
+    def _embedding_output(self, profile_vector: Optional[List[float]], payment_vector: Optional[List[float]]) -> Dict:
+        if not profile_vector:
+            print("   Embedding profile indisponible, fallback sans vecteur")
+            return {"query_vector": [], "query_vectors": {}}
+        query_vectors: Dict[str, List[float]] = {"profile": profile_vector}
+        if payment_vector:
+            query_vectors["payment"] = payment_vector
+        print("   Embedding profile genere: " + str(len(profile_vector)) + " dimensions")
+        return {"query_vector": profile_vector, "query_vectors": query_vectors}
+
+    @timed_node("generate_embedding")
+    def node_generate_embedding(self, state: AgentState) -> Dict:
+        """Etape 2: Generation de l'embedding"""
+        profile_text, payment_text = self._embedding_texts(state)
         if not self.embedding_model:
             print("   Embedding indisponible, fallback sans vecteur")
             return {"query_vector": [], "query_vectors": {}}
 
         # Utilisation de LangChain Embeddings
-        query_vectors: Dict[str, List[float]] = {}
         profile_vector = _embed_with_retry(self.embedding_model, profile_text, EMBEDDING_TIMEOUT_SEC, EMBEDDING_RETRY_COUNT)
-        if not profile_vector:
-            print("   Embedding profile indisponible, fallback sans vecteur")
-            return {"query_vector": [], "query_vectors": {}}
-        query_vectors["profile"] = profile_vector
-        if payment_text:
+        payment_vector = None
+        if profile_vector and payment_text:
             payment_vector = _embed_with_retry(self.embedding_model, payment_text, EMBEDDING_TIMEOUT_SEC, EMBEDDING_RETRY_COUNT)
-            if payment_vector:
-                query_vectors["payment"] = payment_vector
+        return self._embedding_output(profile_vector, payment_vector)
 
-        print("   Embedding profile genere: " + str(len(profile_vector)) + " dimensions")
-        return {"query_vector": profile_vector, "query_vectors": query_vectors}
+    @timed_node("generate_embedding")
+    async def node_generate_embedding_async(self, state: AgentState) -> Dict:
+        """Etape 2 (async): l'embedding tourne sur le pool bloquant, la boucle reste libre"""
+        profile_text, payment_text = self._embedding_texts(state)
+        if not self.embedding_model:
+            print("   Embedding indisponible, fallback sans vecteur")
+            return {"query_vector": [], "query_vectors": {}}
 
-    def node_search_similar(self, state: AgentState) -> Dict:
-        """Etape 3: Recherche Qdrant"""
+        profile_vector = await _embed_with_retry_async(self.embedding_model, profile_text, EMBEDDING_TIMEOUT_SEC, EMBEDDING_RETRY_COUNT)
+        payment_vector = None
+        if profile_vector and payment_text:
+            payment_vector = await _embed_with_retry_async(self.embedding_model, payment_text, EMBEDDING_TIMEOUT_SEC, EMBEDDING_RETRY_COUNT)
+        return self._embedding_output(profile_vector, payment_vector)
+
+    def _async_qdrant(self) -> Optional[AsyncQdrantClient]:
+        """The AsyncQdrantClient of the running event loop; its connections are bound to that loop."""
+        if not self.qdrant_client:
+            return None
+        settings = self._qdrant_settings
+        return loop_resource(("qdrant", settings["url"]), lambda: AsyncQdrantClient(**settings))
+
+    def _search_points(self, operation: str, **kwargs: Any) -> Any:
+        """One timed Qdrant search; an identical search already in flight is joined instead."""
+
+        def _run() -> Any:
+            with QDRANT_SECONDS.time(operation), span("qdrant." + operation):
+                return getattr(self.qdrant_client, operation)(collection_name=self.collection_name, **kwargs)
+
+        key = (operation, self.collection_name, repr(sorted(kwargs.items())))
+        return QDRANT_SEARCHES.do(key, _run)
+
+    async def _search_points_async(self, operation: str, **kwargs: Any) -> Any:
+        """`_search_points` on the AsyncQdrantClient; it joins sync searches in flight, and they join it."""
+
+        async def _run() -> Any:
+            with QDRANT_SECONDS.time(operation), span("qdrant." + operation):
+                return await getattr(self._async_qdrant(), operation)(collection_name=self.collection_name, **kwargs)
+
+        key = (operation, self.collection_name, repr(sorted(kwargs.items())))
+        return await QDRANT_SEARCHES.ado(key, _run)
+
+    def _search_inputs(self, state: AgentState) -> Dict[str, Any]:
         print("")
         print("Etape 3/5: Recherche des " + str(self.top_k) + " cas similaires...")
-        
+
         request_data = state.get("request_data") or {}
         vector_type = str(request_data.get("vector_type") or "profile").lower()
         query_vectors = state.get("query_vectors") or {}
         query_vector = query_vectors.get(vector_type) or query_vectors.get("profile") or state.get("query_vector", [])
-        using_vector = vector_type if vector_type in query_vectors else "profile"
-        profile_dict = state.get("profile_dict") or {}
-        similar_cases: List[Dict[str, Any]] = []
-        if not self.qdrant_client or not query_vector:
-            print("   Qdrant ou embedding indisponible, aucun cas similaire recherche")
-            points = []
-        else:
-            def _query_vector(name: str, vector: List[float]) -> List[Any]:
-                if not vector:
-                    return []
-                attempts = max(1, QDRANT_RETRY_COUNT + 1)
-                for attempt in range(attempts):
-                    try:
-                        results = self.qdrant_client.query_points(
-                            collection_name=self.collection_name,
-                            query=vector,
-                            using=name,
-                            limit=self.top_k,
-                            with_payload=True,
-                            timeout=QDRANT_TIMEOUT_SEC,
-                        )
-                        return results.points if hasattr(results, "points") else results
-                    except Exception:
-                        if attempt < attempts - 1:
-                            time.sleep(0.1 * (attempt + 1))
-                        continue
-                return []
+        return {
+            "request_data": request_data,
+            "vector_type": vector_type,
+            "query_vectors": query_vectors,
+            "query_vector": query_vector,
+            "using_vector": vector_type if vector_type in query_vectors else "profile",
+            "hybrid": vector_type in {"hybrid", "profile+payment", "profile_payment"},
+            "profile_vector": query_vectors.get("profile") or state.get("query_vector", []),
+        }
 
-            if vector_type in {"hybrid", "profile+payment", "profile_payment"}:
-                profile_vector = query_vectors.get("profile") or state.get("query_vector", [])
-                payment_vector = query_vectors.get("payment")
+    def _query_kwargs(self, vector: List[float], using: str) -> Dict[str, Any]:
+        return {"query": vector, "using": using, "limit": self.top_k, "with_payload": True, "timeout": QDRANT_TIMEOUT_SEC}
+
+    def _search_kwargs(self, vector: List[float], using: str) -> Dict[str, Any]:
+        return {"query_vector": vector, "limit": self.top_k, "with_payload": True, "using": using, "timeout": QDRANT_TIMEOUT_SEC}
+
+    def _merge_weighted(self, profile_points: List[Any], payment_points: List[Any], request_data: Dict[str, Any]) -> List[Any]:
+        # If payment vector missing, fallback to profile only.
+        if not payment_points:
+            return profile_points
+        profile_weight = float(request_data.get("profile_weight", 0.6))
+        payment_weight = float(request_data.get("payment_weight", 0.4))
+        # Weighted merge of profile + payment results by case_id.
+        combined: Dict[Any, Dict[str, Any]] = {}
+
+        def _ingest(points_list: List[Any], weight: float):
+            for result in points_list:
+                payload, score = _point_payload_score(result)
+                case_id = payload.get("case_id")
+                if case_id is None:
+                    continue
+                entry = combined.setdefault(
+                    case_id,
+                    {"payload": payload, "score": 0.0},
+                )
+                entry["score"] += weight * score
+
+        _ingest(profile_points, profile_weight)
+        _ingest(payment_points, payment_weight)
+        points = []
+        for case_id, entry in combined.items():
+            points.append({"payload": entry["payload"], "score": entry["score"]})
+        points.sort(key=lambda x: x.get("score", 0), reverse=True)
+        return points[: self.top_k]
+
+    def _find_points(self, search: Dict[str, Any]) -> List[Any]:
+        query_vector = search["query_vector"]
+        using_vector = search["using_vector"]
+
+        def _query_vector(name: str, vector: List[float]) -> List[Any]:
+            if not vector:
+                return []
+            attempts = max(1, QDRANT_RETRY_COUNT + 1)
+            for attempt in range(attempts):
+                try:
+                    results = self._search_points("query_points", **self._query_kwargs(vector, name))
+                    return results.points if hasattr(results, "points") else results
+                except Exception:
+                    if attempt < attempts - 1:
+                        QDRANT_RETRIES.inc("query_points")
+                        time.sleep(0.1 * (attempt + 1))
+                    continue
+            return []
 
-                profile_points = _query_vector("profile", profile_vector)
-                payment_points = _query_vector("payment", payment_vector or [])
+        if search["hybrid"]:
+            profile_points = _query_vector("profile", search["profile_vector"])
+            payment_points = _query_vector("payment", search["query_vectors"].get("payment") or [])
+            return self._merge_weighted(profile_points, payment_points, search["request_data"])
 
-                # If payment vector missing, fallback to profile only.
-                if not payment_points:
-                    points = profile_points
-                else:
-                    profile_weight = float(request_data.get("profile_weight", 0.6))
-                    payment_weight = float(request_data.get("payment_weight", 0.4))
-                    # Weighted merge of profile + payment results by case_id.
-                    combined: Dict[Any, Dict[str, Any]] = {}
-
-                    def _ingest(points_list: List[Any], weight: float):
-                        for result in points_list:
-                            if hasattr(result, "payload"):
-                                payload = getattr(result, "payload", {}) or {}
-                                score = float(getattr(result, "score", 0) or 0)
-                            elif isinstance(result, dict):
-                                payload = result.get("payload", {}) or {}
-                                score = float(result.get("score", 0) or 0)
-                            else:
-                                payload = {}
-                                score = 0.0
-                            case_id = payload.get("case_id")
-                            if case_id is None:
-                                continue
-                            entry = combined.setdefault(
-                                case_id,
-                                {"payload": payload, "score": 0.0},
-                            )
-                            entry["score"] += weight * score
-
-                    _ingest(profile_points, profile_weight)
-                    _ingest(payment_points, payment_weight)
+        try:
+            results = self._search_points("query_points", **self._query_kwargs(query_vector, using_vector))
+            return results.points if hasattr(results, "points") else results
+        except Exception as e:
+            points: List[Any] = []
+            # Retry with profile vector if a specific vector name fails.
+            if using_vector != "profile":
+                QDRANT_RETRIES.inc("query_points")
+                try:
+                    results = self._search_points(
+                        "query_points", **self._query_kwargs(search["query_vectors"].get("profile") or query_vector, "profile")
+                    )
+                    points = results.points if hasattr(results, "points") else results
+                    print("   Fallback Qdrant: using=profile")
+                except Exception as e2:
+                    print("Erreur Qdrant: " + str(e2))
                     points = []
-                    for case_id, entry in combined.items():
-                        points.append({"payload": entry["payload"], "score": entry["score"]})
-                    points.sort(key=lambda x: x.get("score", 0), reverse=True)
-                    points = points[: self.top_k]
             else:
+                print("Erreur Qdrant: " + str(e))
+            if hasattr(self.qdrant_client, "search"):
+                QDRANT_RETRIES.inc("search")
                 try:
-                    results = self.qdrant_client.query_points(
-                        collection_name=self.collection_name,
-                        query=query_vector,
-                        using=using_vector,
-                        limit=self.top_k,
-                        with_payload=True,
-                        timeout=QDRANT_TIMEOUT_SEC,
+                    results = self._search_points("search", **self._search_kwargs(query_vector, using_vector))
+                    points = results if isinstance(results, list) else getattr(results, "points", [])
+                    print("   Fallback Qdrant: search() utilise")
+                except Exception as search_exc:
+                    print("Erreur Qdrant search: " + str(search_exc))
+                    points = []
+            else:
+                points = []
+            return points
+
+    async def _find_points_async(self, search: Dict[str, Any]) -> List[Any]:
+        """`_find_points` on the AsyncQdrantClient: same retries, fallbacks and hybrid merge."""
+        query_vector = search["query_vector"]
+        using_vector = search["using_vector"]
+        qdrant = self._async_qdrant()
+
+        async def _query_vector(name: str, vector: List[float]) -> List[Any]:
+            if not vector:
+                return []
+            attempts = max(1, QDRANT_RETRY_COUNT + 1)
+            for attempt in range(attempts):
+                try:
+                    results = await self._search_points_async("query_points", **self._query_kwargs(vector, name))
+                    return results.points if hasattr(results, "points") else results
+                except Exception:
+                    if attempt < attempts - 1:
+                        QDRANT_RETRIES.inc("query_points")
+                        await asyncio.sleep(0.1 * (attempt + 1))
+                    continue
+            return []
+
+        if search["hybrid"]:
+            profile_points, payment_points = await asyncio.gather(
+                _query_vector("profile", search["profile_vector"]),
+                _query_vector("payment", search["query_vectors"].get("payment") or []),
+            )
+            return self._merge_weighted(profile_points, payment_points, search["request_data"])
+
+        try:
+            results = await self._search_points_async("query_points", **self._query_kwargs(query_vector, using_vector))
+            return results.points if hasattr(results, "points") else results
+        except Exception as e:
+            points: List[Any] = []
+            # Retry with profile vector if a specific vector name fails.
+            if using_vector != "profile":
+                QDRANT_RETRIES.inc("query_points")
+                try:
+                    results = await self._search_points_async(
+                        "query_points", **self._query_kwargs(search["query_vectors"].get("profile") or query_vector, "profile")
                     )
                     points = results.points if hasattr(results, "points") else results
-                except Exception as e:
-                    # Retry with profile vector if a specific vector name fails.
-                    if using_vector != "profile":
-                        try:
-                            results = self.qdrant_client.query_points(
-                                collection_name=self.collection_name,
-                                query=query_vectors.get("profile") or query_vector,
-                                using="profile",
-                                limit=self.top_k,
-                                with_payload=True,
-                                timeout=QDRANT_TIMEOUT_SEC,
-                            )
-                            points = results.points if hasattr(results, "points") else results
-                            print("   Fallback Qdrant: using=profile")
-                        except Exception as e2:
-                            print("Erreur Qdrant: " + str(e2))
-                            points = []
-                    else:
-                        print("Erreur Qdrant: " + str(e))
-                    if hasattr(self.qdrant_client, "search"):
-                        try:
-                            results = self.qdrant_client.search(
-                                collection_name=self.collection_name,
-                                query_vector=query_vector,
-                                limit=self.top_k,
-                                with_payload=True,
-                                using=using_vector,
-                                timeout=QDRANT_TIMEOUT_SEC,
-                            )
-                            points = results if isinstance(results, list) else getattr(results, "points", [])
-                            print("   Fallback Qdrant: search() utilise")
-                        except Exception as search_exc:
-                            print("Erreur Qdrant search: " + str(search_exc))
-                            points = []
-                    else:
-                        points = []
-        
-        for result in points:
-            if hasattr(result, "payload"):
-                payload = getattr(result, "payload", {}) or {}
-                score = float(getattr(result, "score", 0) or 0)
-            elif isinstance(result, dict):
-                payload = result.get("payload", {}) or {}
-                score = float(result.get("score", 0) or 0)
+                    print("   Fallback Qdrant: using=profile")
+                except Exception as e2:
+                    print("Erreur Qdrant: " + str(e2))
+                    points = []
+            else:
+                print("Erreur Qdrant: " + str(e))
+            if hasattr(qdrant, "search"):
+                QDRANT_RETRIES.inc("search")
+                try:
+                    results = await self._search_points_async("search", **self._search_kwargs(query_vector, using_vector))
+                    points = results if isinstance(results, list) else getattr(results, "points", [])
+                    print("   Fallback Qdrant: search() utilise")
+                except Exception as search_exc:
+                    print("Erreur Qdrant search: " + str(search_exc))
+                    points = []
             else:
-                payload = {}
-                score = 0.0
+                points = []
+            return points
 
+    def _similar_cases_output(self, points: List[Any], profile_dict: Dict[str, Any]) -> Dict:
+        similar_cases: List[Dict[str, Any]] = []
+        for result in points:
+            payload, score = _point_payload_score(result)
             similar_cases.append({
                 "case_id": payload.get("case_id"),
                 "similarity_score": score,
@@ -1267,7 +1414,7 @@ class SimilarityAgentAI:
                 "fraud_flag": payload.get("fraud_flag", False),
                 "payload": payload
             })
-            
+
         if not similar_cases:
             fallback_cases = self._fallback_similar_cases(profile_dict)
             if fallback_cases:
@@ -1277,7 +1424,7 @@ class SimilarityAgentAI:
                 print("   " + str(len(similar_cases)) + " cas similaires trouves")
         else:
             print("   " + str(len(similar_cases)) + " cas similaires trouves")
-        
+
         if similar_cases:
             print("")
             print("   Top 5 des cas similaires:")
@@ -1286,9 +1433,32 @@ class SimilarityAgentAI:
                 fraud = " FRAUDE" if c["fraud_flag"] else ""
                 score_pct = int(c["similarity_score"] * 100)
                 print("      " + str(i) + ". Case #" + str(c["case_id"]) + ": " + str(score_pct) + "% | " + status + fraud)
-                
+
         return {"similar_cases": similar_cases}
 
+    @timed_node("search_similar")
+    def node_search_similar(self, state: AgentState) -> Dict:
+        """Etape 3: Recherche Qdrant"""
+        search = self._search_inputs(state)
+        if not self.qdrant_client or not search["query_vector"]:
+            print("   Qdrant ou embedding indisponible, aucun cas similaire recherche")
+            points = []
+        else:
+            points = self._find_points(search)
+        return self._similar_cases_output(points, state.get("profile_dict") or {})
+
+    @timed_node("search_similar")
+    async def node_search_similar_async(self, state: AgentState) -> Dict:
+        """Etape 3 (async): Recherche Qdrant via AsyncQdrantClient"""
+        search = self._search_inputs(state)
+        if not self.qdrant_client or not search["query_vector"]:
+            print("   Qdrant ou embedding indisponible, aucun cas similaire recherche")
+            points = []
+        else:
+            points = await self._find_points_async(search)
+        return self._similar_cases_output(points, state.get("profile_dict") or {})
+
+    @timed_node("compute_stats")
     def node_compute_stats(self, state: AgentState) -> Dict:
         """Etape 4: Calcul statistiques"""
         print("")
@@ -1334,56 +1504,119 @@ class SimilarityAgentAI:
         
         return {"stats": stats}
 
-    def node_ai_analysis(self, state: AgentState) -> Dict:
-        """Etape 5: Appel LLM via LangChain"""
+    def _finish_analysis(self, state: AgentState, ai_analysis: Dict[str, Any]) -> Dict:
+        payment_summary = _extract_payment_summary(state.get("request_data", {}))
+        if payment_summary:
+            assessment = _classify_payment_summary(payment_summary)
+            ai_analysis = self._apply_payment_assessment(ai_analysis, assessment)
+        ai_analysis = _augment_similarity_flags(ai_analysis, state.get("stats", {}))
+        return {"ai_analysis": ai_analysis}
+
+    def _analysis_prompt(self, state: AgentState) -> Optional[str]:
+        """The analysis prompt, or None when the LLM is off (the fallback analysis is used)."""
         print("")
         print("Etape 5/5: Analyse AI en cours...")
-        
-        if not self.llm_enabled:
+
+        if not self.llm_enabled or not llm_allowed():
             print("   LLM non disponible, utilisation de l'analyse de secours")
-            ai_analysis = self._fallback_analysis()
-            payment_summary = _extract_payment_summary(state.get("request_data", {}))
-            if payment_summary:
-                assessment = _classify_payment_summary(payment_summary)
-                ai_analysis = self._apply_payment_assessment(ai_analysis, assessment)
-            ai_analysis = _augment_similarity_flags(ai_analysis, state.get("stats", {}))
-            return {"ai_analysis": ai_analysis}
-            
-        profile_dict = state["profile_dict"]
-        similar_cases = state["similar_cases"]
-        stats = state["stats"]
-        
-        prompt_content = self._build_prompt_content(profile_dict, similar_cases, stats)
+            return None
+
+        prompt_content = self._build_prompt_content(state["profile_dict"], state["similar_cases"], state["stats"])
         payment_summary = _extract_payment_summary(state.get("request_data", {}))
         if payment_summary:
             prompt_content += _format_payment_summary_for_prompt(payment_summary)
-        
+        return prompt_content
+
+    def _analysis_request(self, prompt_content: str) -> Dict[str, Any]:
+        return {
+            "model": LLM_MODEL,
+            "messages": [SYSTEM_PROMPT, prompt_content],
+            "temperature": 0.2,
+            "response_format": "json_object",
+        }
+
+    @timed_node("ai_analysis")
+    def node_ai_analysis(self, state: AgentState) -> Dict:
+        """Etape 5: Appel LLM via LangChain"""
+        prompt_content = self._analysis_prompt(state)
+        if prompt_content is None:
+            return self._finish_analysis(state, self._fallback_analysis())
+
         try:
             # Appel LangChain ChatOpenAI
             messages = [
                 SystemMessage(content=SYSTEM_PROMPT),
                 HumanMessage(content=prompt_content)
             ]
-            response = self.llm.invoke(messages)
-            ai_analysis = json.loads(response.content)
+
+            def _invoke() -> str:
+                with LLM_SECONDS.time("similarity", LLM_MODEL), span("llm", agent="similarity", model=LLM_MODEL):
+                    try:
+                        return self.llm.bind(timeout=llm_timeout()).invoke(messages).content
+                    except Exception:
+                        LLM_ERRORS.inc("similarity", LLM_MODEL)
+                        raise
+
+            content = cached_llm_call(
+                "similarity",
+                LLM_MODEL,
+                "langchain.chat",
+                self._analysis_request(prompt_content),
+                _invoke,
+                accept=_is_json_object,
+            )
+            ai_analysis = json.loads(content)
             print("   Analyse LLM terminee")
-            payment_summary = _extract_payment_summary(state.get("request_data", {}))
-            if payment_summary:
-                assessment = _classify_payment_summary(payment_summary)
-                ai_analysis = self._apply_payment_assessment(ai_analysis, assessment)
-            ai_analysis = _augment_similarity_flags(ai_analysis, state.get("stats", {}))
-            return {"ai_analysis": ai_analysis}
-            
+            return self._finish_analysis(state, ai_analysis)
+
         except Exception as e:
             print("Erreur LLM: " + str(e))
-            ai_analysis = self._fallback_analysis()
-            payment_summary = _extract_payment_summary(state.get("request_data", {}))
-            if payment_summary:
-                assessment = _classify_payment_summary(payment_summary)
-                ai_analysis = self._apply_payment_assessment(ai_analysis, assessment)
-            ai_analysis = _augment_similarity_flags(ai_analysis, state.get("stats", {}))
-            return {"ai_analysis": ai_analysis}
+            return self._finish_analysis(state, self._fallback_analysis())
+
+    def _async_llm(self) -> ChatOpenAI:
+        """The ChatOpenAI of the running event loop, on that loop's shared httpx.AsyncClient."""
+        return loop_resource(
+            ("similarity.llm", LLM_MODEL), lambda: _chat_model(http_async_client=llm_async_http_client())
+        )
 
+    @timed_node("ai_analysis")
+    async def node_ai_analysis_async(self, state: AgentState) -> Dict:
+        """Etape 5 (async): Appel LLM via LangChain `ainvoke`"""
+        prompt_content = self._analysis_prompt(state)
+        if prompt_content is None:
+            return self._finish_analysis(state, self._fallback_analysis())
+
+        try:
+            messages = [
+                SystemMessage(content=SYSTEM_PROMPT),
+                HumanMessage(content=prompt_content)
+            ]
+
+            async def _ainvoke() -> str:
+                with LLM_SECONDS.time("similarity", LLM_MODEL), span("llm", agent="similarity", model=LLM_MODEL):
+                    try:
+                        return (await self._async_llm().bind(timeout=llm_timeout()).ainvoke(messages)).content
+                    except Exception:
+                        LLM_ERRORS.inc("similarity", LLM_MODEL)
+                        raise
+
+            content = await acached_llm_call(
+                "similarity",
+                LLM_MODEL,
+                "langchain.chat",
+                self._analysis_request(prompt_content),
+                _ainvoke,
+                accept=_is_json_object,
+            )
+            ai_analysis = json.loads(content)
+            print("   Analyse LLM terminee")
+            return self._finish_analysis(state, ai_analysis)
+
+        except Exception as e:
+            print("Erreur LLM: " + str(e))
+            return self._finish_analysis(state, self._fallback_analysis())
+
+    @timed_node("format_output")
     def node_format_output(self, state: AgentState) -> Dict:
         """Etape Finale: Construction de la reponse"""
         stats = state["stats"]
@@ -1437,15 +1670,17 @@ class SimilarityAgentAI:
         }
         return {"final_output": result}
 
-    def _build_graph(self) -> Any:
+    def _build_graph(self, asynchronous: bool = False) -> Any:
         workflow = StateGraph(AgentState)
         
-        # Ajout des noeuds
+        # Ajout des noeuds (les noeuds I/O ont une variante async pour `ainvoke`)
         workflow.add_node("extract_profile", self.node_extract_profile)
-        workflow.add_node("generate_embedding", self.node_generate_embedding)
-        workflow.add_node("search_similar", self.node_search_similar)
+        workflow.add_node(
+            "generate_embedding", self.node_generate_embedding_async if asynchronous else self.node_generate_embedding
+        )
+        workflow.add_node("search_similar", self.node_search_similar_async if asynchronous else self.node_search_similar)
         workflow.add_node("compute_stats", self.node_compute_stats)
-        workflow.add_node("ai_analysis", self.node_ai_analysis)
+        workflow.add_node("ai_analysis", self.node_ai_analysis_async if asynchronous else self.node_ai_analysis)
         workflow.add_node("format_output", self.node_format_output)
         
         # Definition des aretes (flux lineaire)
@@ -1460,14 +1695,22 @@ class SimilarityAgentAI:
         return workflow.compile()
     
     def analyze_similarity(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self._print_start()
+        final_state = self.graph.invoke({"request_data": request})
+        return self._report(final_state)
+
+    async def analyze_similarity_async(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self._print_start()
+        final_state = await self.async_graph.ainvoke({"request_data": request})
+        return self._report(final_state)
+
+    def _print_start(self) -> None:
         print("")
         print("=" * 70)
         print("SIMILARITY AGENT AI - Analyse en cours...")
         print("=" * 70)
-        
-        initial_state = {"request_data": request}
-        final_state = self.graph.invoke(initial_state)
-        
+
+    def _report(self, final_state: Dict[str, Any]) -> Dict[str, Any]:
         result = final_state["final_output"]
         ai_analysis = final_state["ai_analysis"]
         
@@ -1516,16 +1759,24 @@ class SimilarityAgentAI:
 # ==============================================================================
 
 _agent_instance = None
+_agent_lock = threading.Lock()
 
 def get_agent() -> SimilarityAgentAI:
     global _agent_instance
     if _agent_instance is None:
-        _agent_instance = SimilarityAgentAI()
+        with _agent_lock:
+            if _agent_instance is None:
+                _agent_instance = SimilarityAgentAI()
     return _agent_instance
 
 def analyze_similarity(request) -> Dict[str, Any]: 
     return get_agent().analyze_similarity(request)
 
+async def analyze_similarity_async(request) -> Dict[str, Any]:
+    # the first call loads the embedding model and checks the collection: off the event loop
+    agent = _agent_instance if _agent_instance is not None else await run_blocking(get_agent)
+    return await agent.analyze_similarity_async(request)
+
 
 # ==============================================================================
 # TEST
@@ -0,0 +1,73 @@
+"""Per-node wall-clock timings for agent graphs.
+
+Agents decorate their LangGraph node functions with `@timed_node("extract")`.
+While the orchestrator runs an agent inside `collect_node_timings()`, every
+decorated node adds its duration (milliseconds, summed if it runs twice) to
+the collector (and opens a `node.<name>` tracing span); outside of one the
+decorator only costs a context-variable lookup. Coroutine nodes (those of
+the agents' `*_async` graphs) are timed from first step to return, awaits
+included.
+
+The collector is a plain dict held in a context variable, so nodes that
+LangGraph or `asyncio.to_thread` run in another thread (with a copied
+context) still write into the same dict.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from core.tracing import span
+
+_NODE_TIMINGS: ContextVar[Optional[Dict[str, float]]] = ContextVar("agent_node_timings", default=None)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@contextmanager
+def collect_node_timings() -> Iterator[Dict[str, float]]:
+    """Collect the timings of nodes run in this block into the yielded dict."""
+    timings: Dict[str, float] = {}
+    token = _NODE_TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        _NODE_TIMINGS.reset(token)
+
+
+def timed_node(name: str) -> Callable[[F], F]:
+    def decorate(fn: F) -> F:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                timings = _NODE_TIMINGS.get()
+                if timings is None:
+                    return await fn(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    with span("node." + name):
+                        return await fn(*args, **kwargs)
+                finally:
+                    elapsed = (time.perf_counter() - started) * 1000.0
+                    timings[name] = round(timings.get(name, 0.0) + elapsed, 2)
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            timings = _NODE_TIMINGS.get()
+            if timings is None:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                with span("node." + name):
+                    return fn(*args, **kwargs)
+            finally:
+                elapsed = (time.perf_counter() - started) * 1000.0
+                timings[name] = round(timings.get(name, 0.0) + elapsed, 2)
+        return wrapper  # type: ignore[return-value]
+    return decorate
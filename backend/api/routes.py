@@ -1,12 +1,13 @@
 from datetime import datetime, timezone
 from uuid import uuid4
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple
 
 import json
 import os
 import hashlib
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, BackgroundTasks, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 
 from api.schemas import (
@@ -15,6 +16,7 @@ from api.schemas import (
     RegisterRequest,
     CreditRequestCreate,
     CreditRequest,
+    CreditRequestStatus,
     BankerRequest,
     DecisionCreate,
     CommentCreate,
@@ -33,7 +35,8 @@ from api.schemas import (
     PaymentBehaviorSummary,
 )
 from api.deps import get_current_user
-from core.orchestrator import run_orchestrator
+from core.orchestrator import run_orchestrator, run_orchestrator_async
+from core.tracing import span
 from core.db import (
     fetch_user_by_email,
     create_user as create_user_db,
@@ -52,6 +55,11 @@ from core.db import (
     clear_agent_sessions_for_banker,
     resubmit_credit_request_db,
     create_payment_for_case,
+    fetch_document_texts,
+    upsert_document_texts,
+    enqueue_job,
+    fetch_case_job,
+    fetch_case_overview_for_client,
 )
 from agents.chat_agent import generate_agent_reply, build_initial_agent_reply
 
@@ -67,6 +75,19 @@ router = APIRouter(prefix="/api")
 UPLOAD_ROOT = os.getenv("UPLOAD_DIR", "/app/data/uploads")
 
 
+def _orchestration_queued() -> bool:
+    """Submissions and reruns are orchestrated by `worker.py` unless ORCHESTRATION_QUEUE=0."""
+    return os.getenv("ORCHESTRATION_QUEUE", "1") != "0"
+
+
+def _upload_job_hold_sec() -> float:
+    """How long an upload's orchestrate job waits for its files before running without them."""
+    try:
+        return max(0.0, float(os.getenv("JOB_UPLOAD_HOLD_SEC", "300")))
+    except ValueError:
+        return 300.0
+
+
 def _require_role(user: Dict[str, Any], role: str) -> None:
     if user.get("role") != role:
         raise HTTPException(status_code=403, detail="Forbidden")
@@ -90,20 +111,85 @@ def _infer_doc_type(filename: str) -> str:
     return "other"
 
 
-def _extract_pdf_text(content: bytes) -> str:
+def _extract_pdf(content: bytes) -> Tuple[Optional[str], Optional[int]]:
+    """Return (text, page_count); text is None when PyPDF2 is unavailable or fails, so nothing gets cached."""
     try:
         from PyPDF2 import PdfReader  # type: ignore
     except Exception:
-        return ""
+        return None, None
     try:
         import io
-        reader = PdfReader(io.BytesIO(content))
-        pages = []
-        for page in reader.pages:
-            pages.append(page.extract_text() or "")
-        return "\n".join(pages).strip()
+        with span("pdf.extract", bytes=len(content)):
+            reader = PdfReader(io.BytesIO(content))
+            pages = []
+            for page in reader.pages:
+                pages.append(page.extract_text() or "")
+        return "\n".join(pages).strip(), len(pages)
+    except Exception as exc:
+        print(f"[WARN] PDF text extraction failed: {exc}")
+        return None, None
+
+
+def _extract_pdf_text(content: bytes) -> str:
+    return _extract_pdf(content)[0] or ""
+
+
+def _extract_document(filename: str, data: bytes) -> Tuple[Optional[str], Optional[int]]:
+    if filename.lower().endswith(".pdf"):
+        return _extract_pdf(data)
+    try:
+        return data.decode("utf-8"), None
     except Exception:
-        return ""
+        return "", None
+
+
+def _resolve_document_texts(items: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Map file_hash -> extracted text through the document_text_cache table.
+
+    Each item has `file_hash`, `filename` and either `data` (bytes) or
+    `file_path`. Cached hashes are a single lookup; the rest are extracted once
+    per distinct hash and written back, so the same bytes uploaded to another
+    case (or viewed again) never hit PyPDF2 twice. Cache failures degrade to
+    plain extraction.
+    """
+    hashes = [str(item.get("file_hash") or "") for item in items]
+    try:
+        cached = fetch_document_texts(hashes)
+    except Exception as exc:
+        print(f"[WARN] Document text cache lookup failed: {exc}")
+        cached = {}
+
+    texts: Dict[str, str] = {h: str(row.get("raw_text") or "") for h, row in cached.items()}
+    fresh: List[Dict[str, Any]] = []
+    for item, file_hash in zip(items, hashes):
+        if not file_hash or file_hash in texts:
+            continue
+        data = item.get("data")
+        file_path = str(item.get("file_path") or "")
+        if data is None and file_path and os.path.exists(file_path):
+            try:
+                data = Path(file_path).read_bytes()
+            except Exception:
+                data = None
+        if data is None:
+            continue
+        text, page_count = _extract_document(str(item.get("filename") or ""), data)
+        texts[file_hash] = text or ""
+        if text is not None:
+            fresh.append({
+                "file_hash": file_hash,
+                "raw_text": text,
+                "page_count": page_count,
+                "document_type": _infer_doc_type("", text),
+            })
+
+    if fresh:
+        try:
+            upsert_document_texts(fresh)
+        except Exception as exc:
+            print(f"[WARN] Document text cache write failed: {exc}")
+    return texts
 
 
 async def _store_files(case_id: int, files: Optional[List[UploadFile]]) -> List[Dict[str, Any]]:
@@ -329,6 +415,9 @@ def _build_agents_raw(detail: Dict[str, Any]) -> Dict[str, Any]:
                 output = json.loads(output)
             except Exception:
                 output = {"summary": output}
+        if isinstance(output, dict):
+            # saved stage results are orchestrator state, not agent signals
+            output = {k: v for k, v in output.items() if k != "reuse"}
         agents_raw[key] = output
     return agents_raw
 
@@ -391,9 +480,20 @@ def _safe_filename(name: str) -> str:
 def _hydrate_documents(detail: Dict[str, Any]) -> None:
     """
     Ensure documents in detail include raw_text and inferred document_type,
-    even if filenames are generic (ex: 1.pdf).
+    even if filenames are generic (ex: 1.pdf). Text comes from the
+    document_text_cache; files are only read and parsed on a cache miss.
     """
     documents = detail.get("documents") or []
+    missing = [
+        {
+            "file_hash": doc.get("file_hash"),
+            "file_path": doc.get("file_path"),
+            "filename": _safe_filename(str(doc.get("file_path") or "")) or str(doc.get("filename") or ""),
+        }
+        for doc in documents
+        if isinstance(doc, dict) and not doc.get("raw_text")
+    ]
+    texts = _resolve_document_texts(missing) if missing else {}
     updated: List[Dict[str, Any]] = []
     for doc in documents:
         if not isinstance(doc, dict):
@@ -401,18 +501,8 @@ def _hydrate_documents(detail: Dict[str, Any]) -> None:
         file_path = str(doc.get("file_path") or "")
         filename = _safe_filename(file_path) or str(doc.get("filename") or "")
         raw_text = str(doc.get("raw_text") or "")
-        if not raw_text and file_path and os.path.exists(file_path):
-            try:
-                data = Path(file_path).read_bytes()
-                if filename.lower().endswith(".pdf"):
-                    raw_text = _extract_pdf_text(data)
-                else:
-                    try:
-                        raw_text = data.decode("utf-8")
-                    except Exception:
-                        raw_text = ""
-            except Exception:
-                raw_text = ""
+        if not raw_text:
+            raw_text = texts.get(str(doc.get("file_hash") or ""), "")
         document_type = doc.get("document_type") or doc.get("doc_type") or "uploaded"
         # Improve doc type detection using raw text.
         document_type = _infer_doc_type(filename, raw_text)
@@ -435,26 +525,29 @@ async def _store_files(case_id: int, files: Optional[List[UploadFile]]) -> List[
         return stored_documents
     dest_dir = Path(UPLOAD_ROOT) / str(case_id)
     dest_dir.mkdir(parents=True, exist_ok=True)
+    uploads: List[Dict[str, Any]] = []
     for file in files:
         filename = _safe_filename(file.filename or "document")
         dest_path = dest_dir / filename
         data = await file.read()
         dest_path.write_bytes(data)
-        raw_text = ""
-        if filename.lower().endswith(".pdf"):
-            raw_text = _extract_pdf_text(data)
-        else:
-            try:
-                raw_text = data.decode("utf-8")
-            except Exception:
-                raw_text = ""
-        doc_type = _infer_doc_type(filename, raw_text)
+        uploads.append({
+            "file_hash": hashlib.sha256(data).hexdigest(),
+            "file_path": str(dest_path),
+            "filename": filename,
+            "data": data,
+        })
+    # cache round trips and PDF extraction block: keep them off the event loop
+    texts = await run_in_threadpool(_resolve_document_texts, uploads)
+    for upload in uploads:
+        raw_text = texts.get(upload["file_hash"], "")
+        doc_type = _infer_doc_type(upload["filename"], raw_text)
         stored_documents.append(
             {
-                "file_path": str(dest_path),
+                "file_path": upload["file_path"],
                 "document_type": doc_type,
-                "file_hash": hashlib.sha256(data).hexdigest(),
-                "filename": filename,
+                "file_hash": upload["file_hash"],
+                "filename": upload["filename"],
                 "doc_type": doc_type,
                 "raw_text": raw_text,
             }
@@ -473,6 +566,7 @@ def _build_banker_request(detail: Dict[str, Any]) -> BankerRequest:
         auto_decision=detail.get("auto_decision"),
         auto_decision_confidence=float(detail["auto_decision_confidence"]) if detail.get("auto_decision_confidence") is not None else None,
         auto_review_required=detail.get("auto_review_required"),
+        orchestration_metadata=detail.get("orchestration_metadata"),
         amount=float(detail["loan_amount"]),
         duration_months=int(detail["loan_duration"]),
         monthly_income=float(detail["monthly_income"]),
@@ -555,16 +649,21 @@ def create_credit_request(body: CreditRequestCreate, user=Depends(get_current_us
     if documents_payloads:
         payload_data = {**payload_data, "documents_payloads": documents_payloads}
 
-    created = create_credit_request_db(user["user_id"], payload_data, None)
+    queued = _orchestration_queued()
+    job_payload = {**payload_data, "user_id": user["user_id"]}
+    # The orchestrate job commits with the case: a crash can't leave it unscored.
+    created = create_credit_request_db(user["user_id"], payload_data, None, job_payload if queued else None)
     case_id = int(created["case_id"])
-    orchestration = run_orchestrator({**payload_data, "case_id": case_id, "user_id": user["user_id"]})
-    save_orchestration(case_id, orchestration)
-    if sync_credit_case_to_qdrant and background_tasks is not None:
-        background_tasks.add_task(sync_credit_case_to_qdrant, case_id)
-    banker_detail = fetch_case_detail(case_id)
-    if banker_detail:
-        _hydrate_documents(banker_detail)
-        _prime_agent_sessions(banker_detail)
+    request_payload = {**job_payload, "case_id": case_id}
+    if not queued:
+        orchestration = run_orchestrator(request_payload)
+        save_orchestration(case_id, orchestration)
+        if sync_credit_case_to_qdrant and background_tasks is not None:
+            background_tasks.add_task(sync_credit_case_to_qdrant, case_id)
+        banker_detail = fetch_case_detail(case_id)
+        if banker_detail:
+            _hydrate_documents(banker_detail)
+            _prime_agent_sessions(banker_detail)
     detail = fetch_case_detail_for_client(created["case_id"], user["user_id"])
     if not detail:
         raise HTTPException(status_code=500, detail="Failed to create request")
@@ -611,14 +710,24 @@ async def create_credit_request_upload(
     if not isinstance(payload_data, dict):
         raise HTTPException(status_code=400, detail="Invalid payload")
 
+    queued = _orchestration_queued()
     payload_for_db = {**payload_data, "documents": []}
-    created = create_credit_request_db(user["user_id"], payload_for_db, None)
+    # The case needs an id before its files can be stored, so its orchestrate
+    # job is committed with it but held back; it's released below with the
+    # documents, or runs without them after the hold if we never get there.
+    created = await run_in_threadpool(
+        create_credit_request_db,
+        user["user_id"],
+        payload_for_db,
+        None,
+        {**payload_data, "user_id": user["user_id"]} if queued else None,
+        _upload_job_hold_sec(),
+    )
     case_id = int(created["case_id"])
 
     stored_documents = await _store_files(case_id, files)
 
     if stored_documents:
-        add_case_documents(case_id, stored_documents)
         documents_payloads = [
             {
                 "doc_type": doc.get("document_type"),
@@ -632,16 +741,21 @@ async def create_credit_request_upload(
             "documents_payloads": documents_payloads,
             "documents": [doc.get("filename") for doc in stored_documents],
         }
-    orchestration = run_orchestrator({**payload_data, "case_id": case_id, "user_id": user["user_id"]})
-    save_orchestration(case_id, orchestration)
-    if sync_credit_case_to_qdrant and background_tasks is not None:
-        background_tasks.add_task(sync_credit_case_to_qdrant, case_id)
-    banker_detail = fetch_case_detail(case_id)
-    if banker_detail:
-        _hydrate_documents(banker_detail)
-        _prime_agent_sessions(banker_detail)
+    request_payload = {**payload_data, "case_id": case_id, "user_id": user["user_id"]}
+    if queued:
+        await run_in_threadpool(add_case_documents, case_id, stored_documents, request_payload)
+    else:
+        await run_in_threadpool(add_case_documents, case_id, stored_documents)
+        orchestration = await run_orchestrator_async(request_payload)
+        await run_in_threadpool(save_orchestration, case_id, orchestration)
+        if sync_credit_case_to_qdrant and background_tasks is not None:
+            background_tasks.add_task(sync_credit_case_to_qdrant, case_id)
+        banker_detail = await run_in_threadpool(fetch_case_detail, case_id)
+        if banker_detail:
+            await run_in_threadpool(_hydrate_documents, banker_detail)
+            await run_in_threadpool(_prime_agent_sessions, banker_detail)
 
-    detail = fetch_case_detail_for_client(created["case_id"], user["user_id"])
+    detail = await run_in_threadpool(fetch_case_detail_for_client, created["case_id"], user["user_id"])
     if not detail:
         raise HTTPException(status_code=500, detail="Failed to create request")
     decision_info = _map_decision(detail.get("decision"))
@@ -712,6 +826,23 @@ def get_credit_request(req_id: str, user=Depends(get_current_user)):
     )
 
 
+@router.get("/client/credit-requests/{req_id}/status", response_model=CreditRequestStatus)
+def get_credit_request_status(req_id: str, user=Depends(get_current_user)):
+    """Cheap polling target while a submitted case waits for its orchestration job."""
+    _require_role(user, "client")
+    overview = fetch_case_overview_for_client(int(req_id), user["user_id"])
+    if not overview:
+        raise HTTPException(status_code=404, detail="Credit request not found")
+    job = fetch_case_job(int(req_id), "orchestrate")
+    return CreditRequestStatus(
+        id=str(overview["case_id"]),
+        status=_map_status(overview["status"], overview.get("decision")),
+        updated_at=overview["updated_at"],
+        processing=job["status"] if job else None,
+        attempts=int(job["attempts"]) if job else 0,
+    )
+
+
 @router.post("/client/credit-requests/{req_id}/resubmit", response_model=CreditRequest)
 async def resubmit_credit_request(
     req_id: str,
@@ -729,7 +860,7 @@ async def resubmit_credit_request(
     if files:
         stored_documents = await _store_files(int(req_id), files)
         if stored_documents:
-            add_case_documents(int(req_id), stored_documents)
+            await run_in_threadpool(add_case_documents, int(req_id), stored_documents)
 
     documents_payloads = [
         {
@@ -746,20 +877,20 @@ async def resubmit_credit_request(
         "documents_payloads": documents_payloads,
     }
 
-    updated = resubmit_credit_request_db(int(req_id), int(user["user_id"]), payload_data)
+    updated = await run_in_threadpool(resubmit_credit_request_db, int(req_id), int(user["user_id"]), payload_data)
     if not updated:
         raise HTTPException(status_code=404, detail="Credit request not found")
 
-    orchestration = run_orchestrator({**payload_data, "case_id": int(req_id), "user_id": user["user_id"]})
-    save_orchestration(int(req_id), orchestration)
+    orchestration = await run_orchestrator_async({**payload_data, "case_id": int(req_id), "user_id": user["user_id"]})
+    await run_in_threadpool(save_orchestration, int(req_id), orchestration)
     if sync_credit_case_to_qdrant and background_tasks is not None:
         background_tasks.add_task(sync_credit_case_to_qdrant, int(req_id))
-    banker_detail = fetch_case_detail(int(req_id))
+    banker_detail = await run_in_threadpool(fetch_case_detail, int(req_id))
     if banker_detail:
-        _hydrate_documents(banker_detail)
-        _prime_agent_sessions(banker_detail)
+        await run_in_threadpool(_hydrate_documents, banker_detail)
+        await run_in_threadpool(_prime_agent_sessions, banker_detail)
 
-    detail = fetch_case_detail_for_client(int(req_id), user["user_id"])
+    detail = await run_in_threadpool(fetch_case_detail_for_client, int(req_id), user["user_id"])
     if not detail:
         raise HTTPException(status_code=500, detail="Failed to resubmit request")
     decision_info = _map_decision(detail.get("decision"))
@@ -837,9 +968,38 @@ def list_client_requests(user=Depends(get_current_user)):
 
 # --- Banker -------------------------------------------------------------------
 @router.get("/banker/credit-requests", response_model=list[BankerRequest])
-def list_requests(status: Optional[str] = None, user: Dict = Depends(get_current_user)):
+def list_requests(
+    response: Response,
+    status: Optional[str] = None,
+    auto_decision: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0, le=1),
+    max_confidence: Optional[float] = Query(None, ge=0, le=1),
+    min_amount: Optional[float] = Query(None, ge=0),
+    max_amount: Optional[float] = Query(None, ge=0),
+    employment_type: Optional[str] = None,
+    sort: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    user: Dict = Depends(get_current_user),
+):
     _require_role(user, "banker")
-    records = list_cases_for_banker(status_filter=status)
+    try:
+        records, next_cursor = list_cases_for_banker(
+            status_filter=status,
+            auto_decision=auto_decision,
+            min_confidence=min_confidence,
+            max_confidence=max_confidence,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            employment_type=employment_type,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     results: List[BankerRequest] = []
     for detail in records:
         if not detail:
@@ -890,7 +1050,7 @@ async def upload_case_documents(
     files: Optional[List[UploadFile]] = File(default=None),
 ):
     _require_role(user, "banker")
-    detail = fetch_case_detail(int(req_id))
+    detail = await run_in_threadpool(fetch_case_detail, int(req_id))
     if not detail:
         raise HTTPException(status_code=404, detail="Credit request not found")
 
@@ -898,18 +1058,18 @@ async def upload_case_documents(
     if not stored_documents:
         raise HTTPException(status_code=400, detail="No files uploaded")
 
-    add_case_documents(int(req_id), stored_documents)
+    await run_in_threadpool(add_case_documents, int(req_id), stored_documents)
 
-    refreshed = fetch_case_detail(int(req_id))
+    refreshed = await run_in_threadpool(fetch_case_detail, int(req_id))
     if refreshed:
-        _hydrate_documents(refreshed)
-        orchestration = run_orchestrator(refreshed)
-        save_orchestration(int(req_id), orchestration)
+        await run_in_threadpool(_hydrate_documents, refreshed)
+        orchestration = await run_orchestrator_async(refreshed)
+        await run_in_threadpool(save_orchestration, int(req_id), orchestration)
         if sync_credit_case_to_qdrant and background_tasks is not None:
             background_tasks.add_task(sync_credit_case_to_qdrant, int(req_id))
-        _prime_agent_sessions(refreshed, int(user.get("user_id")))
+        await run_in_threadpool(_prime_agent_sessions, refreshed, int(user.get("user_id")))
 
-    final_detail = fetch_case_detail(int(req_id))
+    final_detail = await run_in_threadpool(fetch_case_detail, int(req_id))
     if not final_detail:
         raise HTTPException(status_code=404, detail="Credit request not found")
     return _build_banker_request(final_detail)
@@ -1047,18 +1207,27 @@ def post_agent_chat(req_id: str, body: AgentChatRequest, user: Dict = Depends(ge
 
 
 @router.post("/banker/credit-requests/{req_id}/rerun")
-def rerun_agents(req_id: str, user: Dict = Depends(get_current_user), background_tasks: BackgroundTasks = None):
-    detail = fetch_case_detail(int(req_id))
+async def rerun_agents(
+    req_id: str,
+    force: bool = Query(False, description="Re-run every agent even if the case inputs are unchanged"),
+    user: Dict = Depends(get_current_user),
+    background_tasks: BackgroundTasks = None,
+):
+    detail = await run_in_threadpool(fetch_case_detail, int(req_id))
     if not detail:
         raise HTTPException(status_code=404, detail="Credit request not found")
-    result = run_orchestrator(detail)
-    save_orchestration(int(req_id), result)
+    if _orchestration_queued():
+        # rerun jobs outrank new submissions and bulk rescoring in the queue
+        job_id = await run_in_threadpool(enqueue_job, "rerun", int(req_id), {"force": force})
+        return {"status": "queued", "job_id": job_id, "agents": None}
+    result = await run_orchestrator_async(detail, force=force)
+    await run_in_threadpool(save_orchestration, int(req_id), result)
     if sync_credit_case_to_qdrant and background_tasks is not None:
         background_tasks.add_task(sync_credit_case_to_qdrant, int(req_id))
-    refreshed = fetch_case_detail(int(req_id))
+    refreshed = await run_in_threadpool(fetch_case_detail, int(req_id))
     if refreshed:
-        _hydrate_documents(refreshed)
-        _prime_agent_sessions(refreshed, int(user.get("user_id")))
+        await run_in_threadpool(_hydrate_documents, refreshed)
+        await run_in_threadpool(_prime_agent_sessions, refreshed, int(user.get("user_id")))
     agents = result.get("agents") or None
     return {"status": "ok", "agents": agents}
 
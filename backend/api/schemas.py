@@ -7,6 +7,7 @@ from pydantic import BaseModel, Field
 Role = Literal["client", "banker"]
 Decision = Literal["approve", "reject", "review"]
 Status = Literal["pending", "in_review", "approved", "rejected"]
+JobStatus = Literal["queued", "running", "done", "failed"]
 
 
 class LoginRequest(BaseModel):
@@ -204,6 +205,14 @@ class CreditRequest(BaseModel):
     payment_behavior_summary: Optional[PaymentBehaviorSummary] = None
 
 
+class CreditRequestStatus(BaseModel):
+    id: str
+    status: Status
+    updated_at: datetime
+    processing: Optional[JobStatus] = None
+    attempts: int = 0
+
+
 class BankerRequest(BaseModel):
     id: str
     status: Status
@@ -231,6 +240,7 @@ class BankerRequest(BaseModel):
     auto_decision: Optional[str] = None
     auto_decision_confidence: Optional[float] = None
     auto_review_required: Optional[bool] = None
+    orchestration_metadata: Optional[Dict[str, Any]] = None
     loan: Optional[LoanInfo] = None
     installments: List[InstallmentInfo] = Field(default_factory=list)
     payments: List[PaymentInfo] = Field(default_factory=list)
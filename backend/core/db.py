@@ -1,12 +1,55 @@
 import os
+import sys
 import json
+import base64
 import hashlib
 import time
-from datetime import date
+import threading
+from datetime import date, datetime
+from decimal import Decimal
 from typing import Optional, Dict, Any, List, Tuple
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import psycopg2.extensions
+import psycopg2.pool
+from psycopg2.extras import RealDictCursor as _RealDictCursor, execute_values
+
+from core.metrics import DB_QUERY_SECONDS
+from core.tracing import span
+
+
+class _TimedCursorMixin:
+    """Records every statement in `db_query_duration_seconds` and as a
+    `db.query` span, labelled with the function that issued it (the
+    accessor, not `execute_values`)."""
+
+    def execute(self, query, vars=None):
+        caller = sys._getframe(1)
+        if caller.f_code.co_name == "execute_values" and caller.f_back is not None:
+            caller = caller.f_back
+        started = time.perf_counter()
+        try:
+            with span("db.query", query=caller.f_code.co_name):
+                return super().execute(query, vars)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, caller.f_code.co_name)
+
+    def executemany(self, query, vars_list):
+        caller = sys._getframe(1).f_code.co_name
+        started = time.perf_counter()
+        try:
+            with span("db.query", query=caller):
+                return super().executemany(query, vars_list)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, caller)
+
+
+class _TimedCursor(_TimedCursorMixin, psycopg2.extensions.cursor):
+    pass
+
+
+class RealDictCursor(_TimedCursorMixin, _RealDictCursor):
+    pass
 
 
 def _json_dumps(value: Any) -> str:
@@ -39,27 +82,48 @@ def _host_candidates(primary: str) -> List[str]:
     return deduped
 
 
-def _connect():
-    params = _get_db_params()
-    retries = int(os.getenv("DB_CONNECT_RETRIES", "5"))
-    delay = float(os.getenv("DB_CONNECT_DELAY", "1.0"))
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _is_transient_connect_error(exc: Exception) -> bool:
+    msg = str(exc).lower()
+    return (
+        "could not translate host name" in msg
+        or "name or service not known" in msg
+        or "temporary failure in name resolution" in msg
+        or "could not connect to server" in msg
+        or "connection refused" in msg
+    )
+
+
+def _open_connection(params: Dict[str, str]) -> Tuple[Any, str]:
+    """Open a raw connection, walking host candidates with retries.
+
+    Returns the connection and the host that accepted it.
+    """
+    params = dict(params)
+    retries = _env_int("DB_CONNECT_RETRIES", 5)
+    delay = _env_float("DB_CONNECT_DELAY", 1.0)
     last_exc: Optional[Exception] = None
     for host in _host_candidates(params.get("host") or "postgres"):
         params["host"] = host
         for attempt in range(retries):
             try:
-                return psycopg2.connect(**params)
+                return psycopg2.connect(**params, cursor_factory=_TimedCursor), host
             except psycopg2.OperationalError as exc:
                 last_exc = exc
-                msg = str(exc).lower()
-                transient = (
-                    "could not translate host name" in msg
-                    or "name or service not known" in msg
-                    or "temporary failure in name resolution" in msg
-                    or "could not connect to server" in msg
-                    or "connection refused" in msg
-                )
-                if not transient or attempt == retries - 1:
+                if not _is_transient_connect_error(exc) or attempt == retries - 1:
                     break
                 time.sleep(delay)
         # try next host candidate
@@ -68,200 +132,200 @@ def _connect():
     raise psycopg2.OperationalError("Unable to connect to database")
 
 
-def init_db() -> None:
-    conn = _connect()
-    try:
-        with conn:
+class _ConnectionPool:
+    """Bounded, thread-safe pool of psycopg2 connections.
+
+    The host is resolved once (via `_open_connection`) when the pool is created;
+    later connections go straight to that host and only re-walk the candidates
+    if it stops answering. Borrowing blocks up to `timeout` seconds when all
+    `maxconn` connections are in use. Idle connections are health-checked on
+    borrow: closed or broken ones are dropped, and ones idle for longer than
+    `healthcheck_after` seconds are pinged with `SELECT 1`.
+    """
+
+    def __init__(
+        self,
+        params: Dict[str, str],
+        minconn: int,
+        maxconn: int,
+        timeout: float,
+        healthcheck_after: float,
+    ) -> None:
+        self.pid = os.getpid()
+        self._params = dict(params)
+        self._maxconn = max(1, maxconn)
+        self._timeout = timeout
+        self._healthcheck_after = healthcheck_after
+        self._slots = threading.BoundedSemaphore(self._maxconn)
+        self._lock = threading.Lock()
+        self._idle: List[Tuple[Any, float]] = []
+        self._closed = False
+
+        conn, host = _open_connection(self._params)
+        self._params["host"] = host
+        self._idle.append((conn, time.monotonic()))
+        for _ in range(min(max(minconn, 1), self._maxconn) - 1):
+            self._idle.append((self._open(), time.monotonic()))
+
+    def _open(self):
+        try:
+            return psycopg2.connect(**self._params, cursor_factory=_TimedCursor)
+        except psycopg2.OperationalError as exc:
+            if not _is_transient_connect_error(exc):
+                raise
+            # resolved host went away: fail over to the remaining candidates
+            conn, host = _open_connection(self._params)
+            self._params["host"] = host
+            return conn
+
+    def _healthy(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if time.monotonic() - idle_since < self._healthcheck_after:
+            return True
+        try:
             with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    ALTER TABLE credit_cases
-                    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-                    """
-                )
-                cur.execute(
-                    """
-                    ALTER TABLE credit_cases
-                    ADD COLUMN IF NOT EXISTS summary TEXT
-                    """
-                )
-                cur.execute(
-                    """
-                    ALTER TABLE credit_cases
-                    ADD COLUMN IF NOT EXISTS auto_decision TEXT
-                    """
-                )
-                cur.execute(
-                    """
-                    ALTER TABLE credit_cases
-                    ADD COLUMN IF NOT EXISTS auto_decision_confidence NUMERIC
-                    """
-                )
-                cur.execute(
-                    """
-                    ALTER TABLE credit_cases
-                    ADD COLUMN IF NOT EXISTS auto_review_required BOOLEAN
-                    """
-                )
-                cur.execute(
-                    """
-                    ALTER TABLE decisions
-                    ADD COLUMN IF NOT EXISTS note TEXT
-                    """
-                )
-                cur.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS comments (
-                        comment_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-                        case_id BIGINT NOT NULL REFERENCES credit_cases(case_id) ON DELETE CASCADE,
-                        author_id BIGINT NOT NULL REFERENCES users(user_id),
-                        message TEXT NOT NULL,
-                        is_public BOOLEAN NOT NULL DEFAULT TRUE,
-                        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-                    )
-                    """
-                )
-                cur.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS agent_sessions (
-                        session_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-                        case_id BIGINT NOT NULL REFERENCES credit_cases(case_id) ON DELETE CASCADE,
-                        agent_name TEXT NOT NULL,
-                        banker_id BIGINT,
-                        snapshot_json JSONB NOT NULL DEFAULT '{}'::jsonb,
-                        messages_json JSONB NOT NULL DEFAULT '[]'::jsonb,
-                        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-                        UNIQUE (case_id, agent_name, banker_id)
-                    )
-                    """
-                )
-                cur.execute(
-                    """
-                    ALTER TABLE agent_sessions
-                    ADD COLUMN IF NOT EXISTS banker_id BIGINT
-                    """
-                )
-                cur.execute(
-                    """
-                    ALTER TABLE agent_sessions
-                    DROP CONSTRAINT IF EXISTS agent_sessions_case_id_agent_name_key
-                    """
-                )
-                cur.execute(
-                    """
-                    DO $$
-                    BEGIN
-                        IF NOT EXISTS (
-                            SELECT 1 FROM pg_constraint
-                            WHERE conname = 'agent_sessions_case_id_agent_name_banker_id_key'
-                        ) THEN
-                            ALTER TABLE agent_sessions
-                            ADD CONSTRAINT agent_sessions_case_id_agent_name_banker_id_key
-                            UNIQUE (case_id, agent_name, banker_id);
-                        END IF;
-                    END$$;
-                    """
-                )
-                cur.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS loans (
-                        loan_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-                        user_id BIGINT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
-                        case_id BIGINT UNIQUE REFERENCES credit_cases(case_id) ON DELETE SET NULL,
-                        principal_amount NUMERIC(14,2) NOT NULL CHECK (principal_amount > 0),
-                        interest_rate NUMERIC(5,4) NOT NULL CHECK (interest_rate >= 0),
-                        term_months INTEGER NOT NULL CHECK (term_months > 0),
-                        status TEXT NOT NULL CHECK (status IN ('ACTIVE', 'CLOSED', 'DEFAULTED', 'CANCELLED')),
-                        approved_at TIMESTAMPTZ,
-                        start_date DATE,
-                        end_date DATE,
-                        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-                    )
-                    """
-                )
-                cur.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS installments (
-                        installment_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-                        loan_id BIGINT NOT NULL REFERENCES loans(loan_id) ON DELETE CASCADE,
-                        installment_number INTEGER NOT NULL CHECK (installment_number > 0),
-                        due_date DATE NOT NULL,
-                        amount_due NUMERIC(14,2) NOT NULL CHECK (amount_due >= 0),
-                        status TEXT NOT NULL CHECK (status IN ('PENDING', 'PAID', 'LATE', 'MISSED')),
-                        amount_paid NUMERIC(14,2) NOT NULL DEFAULT 0 CHECK (amount_paid >= 0),
-                        paid_at DATE,
-                        days_late INTEGER,
-                        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
-                        UNIQUE (loan_id, installment_number)
-                    )
-                    """
-                )
-                cur.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS payments (
-                        payment_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-                        loan_id BIGINT NOT NULL REFERENCES loans(loan_id) ON DELETE CASCADE,
-                        installment_id BIGINT REFERENCES installments(installment_id) ON DELETE SET NULL,
-                        payment_date DATE NOT NULL,
-                        amount NUMERIC(14,2) NOT NULL,
-                        channel TEXT NOT NULL CHECK (channel IN ('bank_transfer', 'card', 'cash', 'direct_debit', 'mobile')),
-                        status TEXT NOT NULL CHECK (status IN ('COMPLETED', 'PENDING', 'FAILED', 'REVERSED')),
-                        is_reversal BOOLEAN NOT NULL DEFAULT FALSE,
-                        reversal_of BIGINT REFERENCES payments(payment_id) ON DELETE SET NULL,
-                        created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-                    )
-                    """
-                )
-                cur.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS payment_behavior_summary (
-                        summary_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
-                        user_id BIGINT NOT NULL UNIQUE REFERENCES users(user_id) ON DELETE CASCADE,
-                        total_loans INTEGER NOT NULL DEFAULT 0,
-                        total_installments INTEGER NOT NULL DEFAULT 0,
-                        on_time_installments INTEGER NOT NULL DEFAULT 0,
-                        late_installments INTEGER NOT NULL DEFAULT 0,
-                        missed_installments INTEGER NOT NULL DEFAULT 0,
-                        on_time_rate NUMERIC(5,4) NOT NULL DEFAULT 0,
-                        avg_days_late NUMERIC(6,2) NOT NULL DEFAULT 0,
-                        max_days_late INTEGER NOT NULL DEFAULT 0,
-                        avg_payment_amount NUMERIC(14,2) NOT NULL DEFAULT 0,
-                        last_payment_date DATE,
-                        updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-                    )
-                    """
-                )
-                cur.execute(
-                    """
-                    CREATE INDEX IF NOT EXISTS idx_loans_user_id ON loans(user_id)
-                    """
-                )
-                cur.execute(
-                    """
-                    CREATE INDEX IF NOT EXISTS idx_installments_loan_id ON installments(loan_id)
-                    """
-                )
-                cur.execute(
-                    """
-                    CREATE INDEX IF NOT EXISTS idx_payments_loan_id ON payments(loan_id)
-                    """
-                )
-                cur.execute(
-                    """
-                    CREATE INDEX IF NOT EXISTS idx_payments_installment_id ON payments(installment_id)
-                    """
-                )
-                cur.execute(
-                    """
-                    SELECT setval(
-                        pg_get_serial_sequence('credit_cases', 'case_id'),
-                        COALESCE((SELECT MAX(case_id) FROM credit_cases), 1),
-                        (SELECT MAX(case_id) IS NOT NULL FROM credit_cases)
-                    )
-                    """
-                )
-    finally:
-        conn.close()
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _discard(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def getconn(self):
+        if self._closed:
+            raise psycopg2.pool.PoolError("connection pool is closed")
+        if not self._slots.acquire(timeout=self._timeout):
+            raise psycopg2.pool.PoolError(
+                f"connection pool exhausted ({self._maxconn} in use after {self._timeout}s)"
+            )
+        try:
+            while True:
+                with self._lock:
+                    item = self._idle.pop() if self._idle else None
+                if item is None:
+                    return self._open()
+                conn, idle_since = item
+                if self._healthy(conn, idle_since):
+                    return conn
+                self._discard(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        try:
+            if not discard and not conn.closed:
+                try:
+                    if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                    # the next borrower expects the default transactional session
+                    if getattr(conn, "autocommit", False):
+                        conn.autocommit = False
+                except psycopg2.Error:
+                    discard = True
+            if discard or conn.closed or self._closed:
+                self._discard(conn)
+                return
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def closeall(self) -> None:
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+class _PooledConnection:
+    """Connection handle whose `close()` hands the connection back to the pool.
+
+    Everything else (`cursor()`, `commit()`, `with conn:` transactions) is
+    delegated, so accessors keep the usual `try: ... finally: conn.close()` shape.
+    """
+
+    __slots__ = ("_pool", "_conn")
+
+    def __init__(self, pool: _ConnectionPool, conn) -> None:
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name: str) -> Any:
+        conn = self._conn
+        if conn is None:
+            raise psycopg2.InterfaceError("connection already returned to the pool")
+        return getattr(conn, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in _PooledConnection.__slots__:
+            object.__setattr__(self, name, value)
+            return
+        conn = self._conn
+        if conn is None:
+            raise psycopg2.InterfaceError("connection already returned to the pool")
+        setattr(conn, name, value)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.putconn(conn)
+
+
+_POOL: Optional[_ConnectionPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool() -> _ConnectionPool:
+    global _POOL
+    pool = _POOL
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _POOL_LOCK:
+        if _POOL is None or _POOL.pid != os.getpid():
+            # a forked worker must not share its parent's sockets
+            _POOL = _ConnectionPool(
+                _get_db_params(),
+                minconn=_env_int("DB_POOL_MIN", 1),
+                maxconn=_env_int("DB_POOL_MAX", 10),
+                timeout=_env_float("DB_POOL_TIMEOUT", 10.0),
+                healthcheck_after=_env_float("DB_POOL_HEALTHCHECK_SEC", 30.0),
+            )
+        return _POOL
+
+
+def close_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None and pool.pid == os.getpid():
+        pool.closeall()
+
+
+def _connect():
+    with span("db.connect"):
+        if os.getenv("DB_POOL_ENABLED", "1") == "0":
+            conn, _ = _open_connection(_get_db_params())
+            return conn
+        pool = _get_pool()
+        return _PooledConnection(pool, pool.getconn())
 
 
 def fetch_user_by_email(email: str) -> Optional[Dict[str, Any]]:
@@ -321,7 +385,14 @@ def create_credit_request(
     user_id: int,
     payload: Dict[str, Any],
     orchestration: Optional[Dict[str, Any]] = None,
+    job_payload: Optional[Dict[str, Any]] = None,
+    job_delay: float = 0.0,
 ) -> Dict[str, Any]:
+    """
+    Insert a SUBMITTED case. With `job_payload`, its `orchestrate` job (payload
+    plus the new case_id, due in `job_delay` seconds) is queued in the same
+    transaction, so a case is never committed without the job that scores it.
+    """
     conn = _connect()
     try:
         with conn:
@@ -379,17 +450,10 @@ def create_credit_request(
                 _insert_documents(cur, case_id, payload.get("documents") or [])
 
                 if orchestration:
-                    agents = (orchestration or {}).get("agents") or {}
-                    for agent_name, output in agents.items():
-                        if agent_name not in {"document", "similarity", "behavior", "fraud", "image", "decision", "explanation"}:
-                            continue
-                        cur.execute(
-                            """
-                            INSERT INTO agent_outputs (case_id, agent_name, output_json)
-                            VALUES (%s, %s, %s::jsonb)
-                            """,
-                            (case_id, agent_name, _json_dumps(output)),
-                        )
+                    _upsert_agent_outputs(cur, case_id, (orchestration or {}).get("agents") or {})
+
+                if job_payload is not None:
+                    _enqueue_job(cur, "orchestrate", case_id, {**job_payload, "case_id": case_id}, delay=job_delay)
 
                 return {
                     "case_id": case_id,
@@ -423,6 +487,23 @@ def _normalize_contract_type(raw: Optional[str]) -> Optional[str]:
     return mapping.get(normalized, normalized)
 
 
+# file_hash prefix of documents whose bytes could not be read when they were
+# inserted; such hashes identify a path, not a content, and are never cached.
+PATH_HASH_PREFIX = "path:"
+
+
+def _document_hash(file_path: str) -> str:
+    """sha256 of the file's bytes, or a `path:`-prefixed hash of its path when unreadable."""
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return PATH_HASH_PREFIX + hashlib.sha256(file_path.encode("utf-8")).hexdigest()
+
+
 def _insert_documents(cur, case_id: int, documents: List[Any]) -> None:
     for doc in documents or []:
         if isinstance(doc, dict):
@@ -430,13 +511,11 @@ def _insert_documents(cur, case_id: int, documents: List[Any]) -> None:
             if not file_path:
                 continue
             doc_type = str(doc.get("document_type") or doc.get("doc_type") or "uploaded")
-            doc_hash = str(doc.get("file_hash") or "")
-            if not doc_hash:
-                doc_hash = hashlib.sha256(file_path.encode("utf-8")).hexdigest()
+            doc_hash = str(doc.get("file_hash") or "") or _document_hash(file_path)
         else:
             file_path = str(doc)
             doc_type = "uploaded"
-            doc_hash = hashlib.sha256(file_path.encode("utf-8")).hexdigest()
+            doc_hash = _document_hash(file_path)
         cur.execute(
             """
             INSERT INTO documents (case_id, document_type, file_path, file_hash)
@@ -446,26 +525,129 @@ def _insert_documents(cur, case_id: int, documents: List[Any]) -> None:
         )
 
 
-def add_case_documents(case_id: int, documents: List[Dict[str, Any]]) -> None:
-    if not documents:
+def fetch_document_texts(file_hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Cached extractions for the given file hashes, keyed by hash (misses are absent)."""
+    hashes = sorted({h for h in file_hashes if h and not h.startswith(PATH_HASH_PREFIX)})
+    if not hashes:
+        return {}
+    conn = _connect()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                """
+                SELECT file_hash, raw_text, page_count, document_type, extracted_at
+                FROM document_text_cache
+                WHERE file_hash = ANY(%s)
+                """,
+                (hashes,),
+            )
+            return {row["file_hash"]: row for row in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def upsert_document_texts(entries: List[Dict[str, Any]]) -> None:
+    """Store extractions by file hash; the first extraction of a given content wins."""
+    rows = [
+        (e["file_hash"], e.get("raw_text") or "", e.get("page_count"), e.get("document_type"))
+        for e in entries
+        if e.get("file_hash") and not str(e["file_hash"]).startswith(PATH_HASH_PREFIX)
+    ]
+    if not rows:
         return
     conn = _connect()
     try:
         with conn:
             with conn.cursor() as cur:
-                _insert_documents(cur, case_id, documents)
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO document_text_cache (file_hash, raw_text, page_count, document_type)
+                    VALUES %s
+                    ON CONFLICT (file_hash) DO NOTHING
+                    """,
+                    rows,
+                )
+    finally:
+        conn.close()
+
+
+def fetch_llm_response(cache_key: str) -> Optional[Tuple[Any, float]]:
+    """Cached LLM response for `cache_key` and its remaining lifetime in seconds (None if absent or expired)."""
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT response, EXTRACT(EPOCH FROM expires_at - NOW())
+                FROM llm_response_cache
+                WHERE cache_key = %s AND expires_at > NOW()
+                """,
+                (cache_key,),
+            )
+            row = cur.fetchone()
+            return (row[0], float(row[1])) if row else None
+    finally:
+        conn.close()
+
+
+def upsert_llm_response(cache_key: str, agent: str, model: str, response: Any, ttl_seconds: float) -> None:
+    """Store an LLM response for `ttl_seconds`; expired rows of the same agent are purged on the way."""
+    conn = _connect()
+    try:
+        with conn:
+            with conn.cursor() as cur:
                 cur.execute(
                     """
-                    UPDATE credit_cases
-                    SET updated_at = NOW()
-                    WHERE case_id = %s
+                    INSERT INTO llm_response_cache (cache_key, agent, model, response, expires_at)
+                    VALUES (%s, %s, %s, %s::jsonb, NOW() + make_interval(secs => %s))
+                    ON CONFLICT (cache_key) DO UPDATE
+                    SET response = EXCLUDED.response,
+                        model = EXCLUDED.model,
+                        created_at = NOW(),
+                        expires_at = EXCLUDED.expires_at
                     """,
-                    (case_id,),
+                    (cache_key, agent, model, _json_dumps(response), ttl_seconds),
+                )
+                cur.execute(
+                    """
+                    DELETE FROM llm_response_cache
+                    WHERE cache_key IN (
+                        SELECT cache_key FROM llm_response_cache
+                        WHERE agent = %s AND expires_at <= NOW()
+                        LIMIT 100
+                    )
+                    """,
+                    (agent,),
                 )
     finally:
         conn.close()
 
 
+def add_case_documents(case_id: int, documents: List[Dict[str, Any]], job_payload: Optional[Dict[str, Any]] = None) -> None:
+    """Attach documents to a case; with `job_payload`, (re)queue its `orchestrate` job, due now, in the same transaction."""
+    if not documents and job_payload is None:
+        return
+    conn = _connect()
+    try:
+        with conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                if documents:
+                    _insert_documents(cur, case_id, documents)
+                    cur.execute(
+                        """
+                        UPDATE credit_cases
+                        SET updated_at = NOW()
+                        WHERE case_id = %s
+                        """,
+                        (case_id,),
+                    )
+                if job_payload is not None:
+                    _enqueue_job(cur, "orchestrate", case_id, {**job_payload, "case_id": case_id})
+    finally:
+        conn.close()
+
+
 def resubmit_credit_request_db(case_id: int, user_id: int, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     conn = _connect()
     try:
@@ -491,6 +673,7 @@ def resubmit_credit_request_db(case_id: int, user_id: int, payload: Dict[str, An
                         auto_decision = NULL,
                         auto_decision_confidence = NULL,
                         auto_review_required = NULL,
+                        orchestration_metadata = NULL,
                         status = 'SUBMITTED',
                         updated_at = NOW()
                     WHERE case_id = %s
@@ -541,13 +724,7 @@ def resubmit_credit_request_db(case_id: int, user_id: int, payload: Dict[str, An
                     """,
                     (case_id,),
                 )
-                cur.execute(
-                    """
-                    DELETE FROM agent_outputs
-                    WHERE case_id = %s
-                    """,
-                    (case_id,),
-                )
+                _upsert_agent_outputs(cur, case_id, {})
                 cur.execute(
                     """
                     DELETE FROM agent_sessions
@@ -579,6 +756,8 @@ def save_orchestration(case_id: int, orchestration: Dict[str, Any]) -> None:
                 auto_decision = decision_payload.get("decision") if isinstance(decision_payload, dict) else None
                 auto_confidence = decision_payload.get("decision_confidence") if isinstance(decision_payload, dict) else None
                 auto_review_required = decision_payload.get("human_review_required") if isinstance(decision_payload, dict) else None
+                metadata = (orchestration.get("orchestrator") or {}).get("orchestration_metadata")
+                metadata_json = _json_dumps(metadata) if isinstance(metadata, dict) else None
                 if summary is not None:
                     cur.execute(
                         """
@@ -587,11 +766,12 @@ def save_orchestration(case_id: int, orchestration: Dict[str, Any]) -> None:
                             auto_decision = %s,
                             auto_decision_confidence = %s,
                             auto_review_required = %s,
+                            orchestration_metadata = COALESCE(%s::jsonb, orchestration_metadata),
                             updated_at = NOW(),
                             status = 'UNDER_REVIEW'
                         WHERE case_id = %s
                         """,
-                        (summary, auto_decision, auto_confidence, auto_review_required, case_id),
+                        (summary, auto_decision, auto_confidence, auto_review_required, metadata_json, case_id),
                     )
                 else:
                     cur.execute(
@@ -600,32 +780,365 @@ def save_orchestration(case_id: int, orchestration: Dict[str, Any]) -> None:
                         SET auto_decision = %s,
                             auto_decision_confidence = %s,
                             auto_review_required = %s,
+                            orchestration_metadata = COALESCE(%s::jsonb, orchestration_metadata),
                             updated_at = NOW(),
                             status = 'UNDER_REVIEW'
                         WHERE case_id = %s
                         """,
-                        (auto_decision, auto_confidence, auto_review_required, case_id),
+                        (auto_decision, auto_confidence, auto_review_required, metadata_json, case_id),
                     )
 
+                _upsert_agent_outputs(cur, case_id, _with_reusable_stages(orchestration))
+    finally:
+        conn.close()
+
+
+def _with_reusable_stages(orchestration: Dict[str, Any]) -> Dict[str, Any]:
+    """Agent outputs to persist, each with its stage's reusable result under `reuse`.
+
+    The orchestrator reads `reuse` back on the next run to skip agents whose
+    inputs did not change.
+    """
+    stages = orchestration.get("stages") or {}
+    return {
+        name: {**output, "reuse": stages[name]} if isinstance(output, dict) and name in stages else output
+        for name, output in (orchestration.get("agents") or {}).items()
+    }
+
+
+_AGENT_OUTPUT_NAMES = ("document", "similarity", "behavior", "fraud", "image", "decision", "explanation")
+
+# Statement-level snapshot: `previous` and `stale` read the rows as they were
+# before the upsert, so replaced versions can be archived in the same statement.
+_UPSERT_AGENT_OUTPUTS_SQL = """
+    WITH incoming AS (
+        SELECT x.agent_name, x.output_json, md5(x.output_json::text) AS content_hash
+        FROM jsonb_to_recordset(%(rows)s::jsonb) AS x(agent_name TEXT, output_json JSONB)
+    ),
+    previous AS (
+        SELECT a.case_id, a.agent_name, a.output_json, a.content_hash, a.updated_at
+        FROM agent_outputs a
+        JOIN incoming i ON i.agent_name = a.agent_name
+        WHERE a.case_id = %(case_id)s
+          AND a.content_hash IS DISTINCT FROM i.content_hash
+    ),
+    stale AS (
+        DELETE FROM agent_outputs a
+        WHERE a.case_id = %(case_id)s
+          AND a.agent_name NOT IN (SELECT agent_name FROM incoming)
+        RETURNING a.case_id, a.agent_name, a.output_json, a.content_hash, a.updated_at
+    ),
+    archived AS (
+        INSERT INTO agent_output_history (case_id, agent_name, output_json, content_hash, created_at)
+        SELECT case_id, agent_name, output_json, content_hash, updated_at
+        FROM (SELECT * FROM previous UNION ALL SELECT * FROM stale) replaced
+        WHERE %(history)s
+    ),
+    written AS (
+        INSERT INTO agent_outputs (case_id, agent_name, output_json, content_hash)
+        SELECT %(case_id)s, agent_name, output_json, content_hash
+        FROM incoming
+        ON CONFLICT (case_id, agent_name) DO UPDATE
+        SET output_json = EXCLUDED.output_json,
+            content_hash = EXCLUDED.content_hash,
+            created_at = NOW(),
+            updated_at = NOW()
+        WHERE agent_outputs.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+        RETURNING agent_name
+    )
+    SELECT agent_name FROM written
+"""
+
+
+def _upsert_agent_outputs(cur, case_id: int, agents: Dict[str, Any]) -> List[str]:
+    """
+    Make `agents` the case's current agent outputs in one statement.
+
+    Rows whose content hash is unchanged are left untouched (no new tuple, no
+    TOAST rewrite); changed agents are updated in place and agents absent from
+    `agents` are removed. Replaced and removed versions go to
+    agent_output_history unless AGENT_OUTPUT_HISTORY=0. Returns the names of
+    the agents actually written.
+    """
+    rows = [
+        {"agent_name": name, "output_json": output}
+        for name, output in agents.items()
+        if name in _AGENT_OUTPUT_NAMES
+    ]
+    cur.execute(
+        _UPSERT_AGENT_OUTPUTS_SQL,
+        {
+            "case_id": case_id,
+            "rows": _json_dumps(rows),
+            "history": os.getenv("AGENT_OUTPUT_HISTORY", "1") != "0",
+        },
+    )
+    return [row["agent_name"] if isinstance(row, dict) else row[0] for row in cur.fetchall()]
+
+
+_JOB_COLUMNS = (
+    "job_id, job_type, case_id, payload, status, priority, attempts, max_attempts, run_after, "
+    "locked_by, locked_at, lease_expires_at, last_error, created_at, updated_at"
+)
+
+# Higher runs first: a banker waiting on a rerun preempts new submissions, which
+# preempt index maintenance and bulk rescoring. JOB_PRIORITY_<TYPE> overrides.
+_JOB_PRIORITIES = {"rerun": 100, "orchestrate": 50, "vector_sync": 20, "rescore": 0}
+
+
+def job_priority(job_type: str) -> int:
+    return _env_int(f"JOB_PRIORITY_{job_type.upper()}", _JOB_PRIORITIES.get(job_type, 0))
+
+
+def _enqueue_job(
+    cur,
+    job_type: str,
+    case_id: Optional[int],
+    payload: Dict[str, Any],
+    max_attempts: Optional[int] = None,
+    priority: Optional[int] = None,
+    delay: float = 0.0,
+) -> int:
+    """`enqueue_job` inside the caller's transaction, so the job commits (or not) with its other writes."""
+    attempts = max_attempts if max_attempts is not None else _env_int("JOB_MAX_ATTEMPTS", 3)
+    cur.execute(
+        """
+        INSERT INTO job_queue (job_type, case_id, payload, max_attempts, priority, run_after)
+        VALUES (%s, %s, %s::jsonb, %s, %s, NOW() + make_interval(secs => %s))
+        ON CONFLICT (case_id, job_type) WHERE status = 'queued'
+        DO UPDATE SET payload = EXCLUDED.payload,
+                      max_attempts = EXCLUDED.max_attempts,
+                      priority = GREATEST(job_queue.priority, EXCLUDED.priority),
+                      run_after = LEAST(job_queue.run_after, EXCLUDED.run_after),
+                      updated_at = NOW()
+        RETURNING job_id
+        """,
+        (
+            job_type,
+            case_id,
+            _json_dumps(payload),
+            max(1, attempts),
+            job_priority(job_type) if priority is None else priority,
+            max(0.0, delay),
+        ),
+    )
+    return int(cur.fetchone()["job_id"])
+
+
+def enqueue_job(
+    job_type: str,
+    case_id: Optional[int],
+    payload: Dict[str, Any],
+    max_attempts: Optional[int] = None,
+    priority: Optional[int] = None,
+    delay: float = 0.0,
+) -> int:
+    """
+    Queue a background job, due in `delay` seconds, and return its id.
+
+    A case has at most one waiting job per type: enqueueing again while one is
+    still queued replaces its payload (and raises its priority or brings its
+    due time forward if needed) instead of adding a duplicate.
+    """
+    conn = _connect()
+    try:
+        with conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                return _enqueue_job(cur, job_type, case_id, payload, max_attempts, priority, delay)
+    finally:
+        conn.close()
+
+
+def enqueue_rescore_jobs(statuses: Optional[List[str]] = None) -> int:
+    """Queue a low-priority `rescore` job for every case (or those in `statuses`); returns the count."""
+    conn = _connect()
+    try:
+        with conn:
+            with conn.cursor() as cur:
                 cur.execute(
                     """
-                    DELETE FROM agent_outputs
-                    WHERE case_id = %s
+                    INSERT INTO job_queue (job_type, case_id, payload, max_attempts, priority)
+                    SELECT 'rescore', c.case_id, '{}'::jsonb, %(max_attempts)s, %(priority)s
+                    FROM credit_cases c
+                    WHERE %(statuses)s::text[] IS NULL OR c.status = ANY(%(statuses)s::text[])
+                    ON CONFLICT (case_id, job_type) WHERE status = 'queued' DO NOTHING
                     """,
-                    (case_id,),
+                    {
+                        "statuses": list(statuses) if statuses else None,
+                        "max_attempts": max(1, _env_int("JOB_MAX_ATTEMPTS", 3)),
+                        "priority": job_priority("rescore"),
+                    },
+                )
+                return cur.rowcount
+    finally:
+        conn.close()
+
+
+def _job_lease_seconds() -> float:
+    return _env_float("JOB_LEASE_SEC", 60.0)
+
+
+def claim_job(worker_id: str, job_types: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Lease the next runnable job to `worker_id` (None when the queue is empty).
+
+    Runnable means queued and due, or running under a lease that has lapsed
+    (its worker died). Jobs are taken by priority, then due time. SKIP LOCKED
+    lets any number of workers claim concurrently without waiting on each other.
+    """
+    conn = _connect()
+    try:
+        with conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(
+                    f"""
+                    UPDATE job_queue j
+                    SET status = 'running',
+                        attempts = j.attempts + 1,
+                        locked_by = %(worker_id)s,
+                        locked_at = NOW(),
+                        lease_expires_at = NOW() + make_interval(secs => %(lease)s),
+                        updated_at = NOW()
+                    WHERE j.job_id = (
+                        SELECT job_id
+                        FROM job_queue
+                        WHERE ((status = 'queued' AND run_after <= NOW())
+                               OR (status = 'running' AND lease_expires_at < NOW()))
+                          AND (%(job_types)s::text[] IS NULL OR job_type = ANY(%(job_types)s::text[]))
+                        ORDER BY priority DESC, run_after ASC, job_id ASC
+                        LIMIT 1
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING {_JOB_COLUMNS}
+                    """,
+                    {
+                        "worker_id": worker_id,
+                        "lease": _job_lease_seconds(),
+                        "job_types": list(job_types) if job_types else None,
+                    },
                 )
+                return cur.fetchone()
+    finally:
+        conn.close()
 
-                agents = orchestration.get("agents") or {}
-                for agent_name, output in agents.items():
-                    if agent_name not in {"document", "similarity", "behavior", "fraud", "image", "decision", "explanation"}:
-                        continue
+
+def heartbeat_jobs(worker_id: str, job_ids: List[int]) -> List[int]:
+    """Extend the leases of jobs `worker_id` is running; returns the ids it still owns."""
+    if not job_ids:
+        return []
+    conn = _connect()
+    try:
+        with conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(
+                    """
+                    UPDATE job_queue
+                    SET lease_expires_at = NOW() + make_interval(secs => %s)
+                    WHERE job_id = ANY(%s) AND status = 'running' AND locked_by = %s
+                    RETURNING job_id
+                    """,
+                    (_job_lease_seconds(), list(job_ids), worker_id),
+                )
+                return [int(row["job_id"]) for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def complete_job(job_id: int, worker_id: str) -> bool:
+    """Mark a leased job done; False when another worker has since reclaimed it."""
+    conn = _connect()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE job_queue
+                    SET status = 'done', locked_by = NULL, locked_at = NULL, lease_expires_at = NULL,
+                        last_error = NULL, updated_at = NOW()
+                    WHERE job_id = %s AND status = 'running' AND locked_by = %s
+                    """,
+                    (job_id, worker_id),
+                )
+                return cur.rowcount == 1
+    finally:
+        conn.close()
+
+
+def fail_job(job_id: int, worker_id: str, error: str) -> Optional[str]:
+    """
+    Record a failed attempt of a leased job.
+
+    The job is queued again after an exponential backoff (JOB_RETRY_BACKOFF_SEC
+    doubled per attempt) until it has used max_attempts, then marked failed.
+    A case has at most one waiting job per type, so when the case was enqueued
+    again while this attempt ran, that newer job is the retry: this one is
+    marked failed and "superseded" is returned. Otherwise returns the job's new
+    status, or None when the worker no longer owns it.
+    """
+    params = {
+        "job_id": job_id,
+        "worker_id": worker_id,
+        "error": error[:2000],
+        "backoff": _env_float("JOB_RETRY_BACKOFF_SEC", 30.0),
+    }
+    for attempt in range(2):
+        conn = _connect()
+        try:
+            with conn:
+                with conn.cursor(cursor_factory=RealDictCursor) as cur:
                     cur.execute(
                         """
-                        INSERT INTO agent_outputs (case_id, agent_name, output_json)
-                        VALUES (%s, %s, %s::jsonb)
+                        UPDATE job_queue j
+                        SET status = CASE
+                                WHEN j.attempts >= j.max_attempts OR EXISTS (
+                                    SELECT 1 FROM job_queue w
+                                    WHERE w.case_id = j.case_id AND w.job_type = j.job_type AND w.status = 'queued'
+                                ) THEN 'failed'
+                                ELSE 'queued'
+                            END,
+                            run_after = NOW() + make_interval(secs => %(backoff)s * power(2, GREATEST(j.attempts - 1, 0))),
+                            locked_by = NULL,
+                            locked_at = NULL,
+                            lease_expires_at = NULL,
+                            last_error = %(error)s,
+                            updated_at = NOW()
+                        WHERE j.job_id = %(job_id)s AND j.status = 'running' AND j.locked_by = %(worker_id)s
+                        RETURNING j.status, j.attempts < j.max_attempts AS superseded
                         """,
-                        (case_id, agent_name, _json_dumps(output)),
+                        params,
                     )
+                    row = cur.fetchone()
+        except psycopg2.IntegrityError:
+            # a sibling was queued after the EXISTS check; the retry sees it
+            if attempt:
+                raise
+            continue
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        if row["status"] == "failed" and row["superseded"]:
+            return "superseded"
+        return row["status"]
+    return None
+
+
+def fetch_case_job(case_id: int, job_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Most recent background job of a case (optionally of one type)."""
+    conn = _connect()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                f"""
+                SELECT {_JOB_COLUMNS}
+                FROM job_queue
+                WHERE case_id = %s AND (%s::text IS NULL OR job_type = %s)
+                ORDER BY job_id DESC
+                LIMIT 1
+                """,
+                (case_id, job_type, job_type),
+            )
+            return cur.fetchone()
     finally:
         conn.close()
 
@@ -726,106 +1239,191 @@ def clear_agent_sessions() -> int:
         conn.close()
 
 
-def list_cases_for_banker(status_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+_CASE_OVERVIEW_COLUMNS = """
+    c.case_id,
+    c.user_id,
+    c.status,
+    c.loan_amount,
+    c.loan_duration,
+    c.summary,
+    c.auto_decision,
+    c.auto_decision_confidence,
+    c.auto_review_required,
+    c.created_at,
+    c.updated_at,
+    f.monthly_income,
+    f.other_income,
+    f.monthly_charges,
+    f.employment_type,
+    f.contract_type,
+    f.seniority_years,
+    f.marital_status,
+    f.number_of_children,
+    f.spouse_employed,
+    f.housing_status,
+    f.is_primary_holder,
+    d.decision AS decision_value,
+    d.confidence AS decision_confidence,
+    d.reason_codes AS decision_reason_codes,
+    d.note AS decision_note,
+    d.decided_by AS decision_decided_by,
+    d.decided_at AS decision_decided_at
+"""
+
+_DECISION_COLUMN_ALIASES = (
+    ("decision", "decision_value"),
+    ("confidence", "decision_confidence"),
+    ("reason_codes", "decision_reason_codes"),
+    ("note", "decision_note"),
+    ("decided_by", "decision_decided_by"),
+    ("decided_at", "decision_decided_at"),
+)
+
+
+def _fold_overview_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold the joined decision_* columns into row["decision"] and add empty detail lists."""
+    decision = {key: row.pop(alias, None) for key, alias in _DECISION_COLUMN_ALIASES}
+    row["decision"] = decision if decision["decision"] is not None else None
+    row["documents"] = []
+    row["agent_outputs"] = []
+    row["comments"] = []
+    return row
+
+
+_BANKER_STATUS_GROUPS = {
+    "pending": ("SUBMITTED", "UNDER_REVIEW"),
+    "decided": ("DECIDED",),
+}
+_CASE_STATUSES = ("DRAFT", "SUBMITTED", "UNDER_REVIEW", "DECIDED")
+
+
+def _encode_case_cursor(created_at: datetime, case_id: int, sort: str) -> str:
+    payload = json.dumps({"t": created_at.isoformat(), "id": int(case_id), "s": sort}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_case_cursor(cursor: str, sort: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        created_at = datetime.fromisoformat(payload["t"])
+        case_id = int(payload["id"])
+        cursor_sort = payload.get("s", "desc")
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+    if cursor_sort != sort:
+        raise ValueError("Cursor was issued for a different sort order")
+    return created_at, case_id
+
+
+def list_cases_for_banker(
+    status_filter: Optional[str] = None,
+    auto_decision: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    employment_type: Optional[str] = None,
+    sort: str = "desc",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of case overviews, keyset-paginated on (created_at, case_id).
+
+    Returns the rows and the cursor for the next page (None on the last page).
+    Raises ValueError for an unknown sort/status or a malformed cursor.
+    """
+    sort = (sort or "desc").lower()
+    if sort not in ("asc", "desc"):
+        raise ValueError("sort must be 'asc' or 'desc'")
+    max_limit = _env_int("BANKER_LIST_MAX_PAGE_SIZE", 500)
+    if limit is None:
+        limit = _env_int("BANKER_LIST_PAGE_SIZE", 100)
+    limit = max(1, min(int(limit), max_limit))
+
+    conditions: List[str] = []
+    params: List[Any] = []
+    if status_filter:
+        key = status_filter.strip().lower()
+        if key in _BANKER_STATUS_GROUPS:
+            statuses = _BANKER_STATUS_GROUPS[key]
+        elif key.upper() in _CASE_STATUSES:
+            statuses = (key.upper(),)
+        else:
+            raise ValueError(f"Unknown status filter: {status_filter}")
+        conditions.append("c.status = ANY(%s)")
+        params.append(list(statuses))
+    if auto_decision:
+        conditions.append("lower(c.auto_decision) = %s")
+        params.append(auto_decision.strip().lower())
+    if min_confidence is not None:
+        conditions.append("c.auto_decision_confidence >= %s")
+        params.append(min_confidence)
+    if max_confidence is not None:
+        conditions.append("c.auto_decision_confidence <= %s")
+        params.append(max_confidence)
+    if min_amount is not None:
+        conditions.append("c.loan_amount >= %s")
+        params.append(min_amount)
+    if max_amount is not None:
+        conditions.append("c.loan_amount <= %s")
+        params.append(max_amount)
+    if employment_type:
+        conditions.append("f.employment_type = %s")
+        params.append(employment_type.strip().lower())
+    if cursor:
+        after_created_at, after_case_id = _decode_case_cursor(cursor, sort)
+        comparator = "<" if sort == "desc" else ">"
+        conditions.append(f"(c.created_at, c.case_id) {comparator} (%s, %s)")
+        params.extend([after_created_at, after_case_id])
+
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    direction = "DESC" if sort == "desc" else "ASC"
+    params.append(limit + 1)
+
     conn = _connect()
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            if status_filter == "pending":
-                where_clause = "WHERE c.status IN ('SUBMITTED', 'UNDER_REVIEW')"
-                params: tuple = ()
-            elif status_filter == "decided":
-                where_clause = "WHERE c.status = 'DECIDED'"
-                params = ()
-            else:
-                where_clause = ""
-                params = ()
-
             cur.execute(
                 f"""
-                SELECT
-                    c.case_id,
-                    c.user_id,
-                    c.status,
-                    c.loan_amount,
-                    c.loan_duration,
-                    c.summary,
-                    c.auto_decision,
-                    c.auto_decision_confidence,
-                    c.auto_review_required,
-                    c.created_at,
-                    c.updated_at,
-                    f.monthly_income,
-                    f.other_income,
-                    f.monthly_charges,
-                    f.employment_type,
-                    f.contract_type,
-                    f.seniority_years,
-                    f.marital_status,
-                    f.number_of_children,
-                    f.spouse_employed,
-                    f.housing_status,
-                    f.is_primary_holder,
-                    d.decision AS decision_value,
-                    d.confidence AS decision_confidence,
-                    d.reason_codes AS decision_reason_codes,
-                    d.note AS decision_note,
-                    d.decided_by AS decision_decided_by,
-                    d.decided_at AS decision_decided_at
+                SELECT {_CASE_OVERVIEW_COLUMNS}
                 FROM credit_cases c
                 JOIN financial_profile f ON f.case_id = c.case_id
                 LEFT JOIN decisions d ON d.case_id = c.case_id
                 {where_clause}
-                ORDER BY c.created_at DESC
+                ORDER BY c.created_at {direction}, c.case_id {direction}
+                LIMIT %s
                 """,
                 params,
             )
             rows = cur.fetchall()
-
-            results: List[Dict[str, Any]] = []
-            for row in rows:
-                if row.get("decision_value") is not None:
-                    row["decision"] = {
-                        "decision": row.pop("decision_value"),
-                        "confidence": row.pop("decision_confidence"),
-                        "reason_codes": row.pop("decision_reason_codes"),
-                        "note": row.pop("decision_note"),
-                        "decided_by": row.pop("decision_decided_by"),
-                        "decided_at": row.pop("decision_decided_at"),
-                    }
-                else:
-                    row.pop("decision_value", None)
-                    row.pop("decision_confidence", None)
-                    row.pop("decision_reason_codes", None)
-                    row.pop("decision_note", None)
-                    row.pop("decision_decided_by", None)
-                    row.pop("decision_decided_at", None)
-                    row["decision"] = None
-
-                row["documents"] = []
-                row["agent_outputs"] = []
-                row["comments"] = []
-                results.append(row)
-
-            return results
     finally:
         conn.close()
 
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_case_cursor(last["created_at"], last["case_id"], sort)
+    return [_fold_overview_row(row) for row in rows], next_cursor
+
 
 def list_cases_for_client(user_id: int) -> List[Dict[str, Any]]:
     conn = _connect()
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(
-                """
-                SELECT case_id
-                FROM credit_cases
-                WHERE user_id = %s
-                ORDER BY created_at DESC
+                f"""
+                SELECT {_CASE_OVERVIEW_COLUMNS}
+                FROM credit_cases c
+                JOIN financial_profile f ON f.case_id = c.case_id
+                LEFT JOIN decisions d ON d.case_id = c.case_id
+                WHERE c.user_id = %s
+                ORDER BY c.created_at DESC
                 """,
                 (user_id,),
             )
-            case_ids = [row["case_id"] for row in cur.fetchall()]
-        return [fetch_case_overview_for_client(case_id, user_id) for case_id in case_ids if case_id is not None]
+            return [_fold_overview_row(row) for row in cur.fetchall()]
     finally:
         conn.close()
 
@@ -835,55 +1433,17 @@ def fetch_case_overview(case_id: int) -> Optional[Dict[str, Any]]:
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(
-                """
-                SELECT
-                    c.case_id,
-                    c.user_id,
-                    c.status,
-                    c.loan_amount,
-                    c.loan_duration,
-                    c.summary,
-                    c.auto_decision,
-                    c.auto_decision_confidence,
-                    c.auto_review_required,
-                    c.created_at,
-                    c.updated_at,
-                    f.monthly_income,
-                    f.other_income,
-                    f.monthly_charges,
-                    f.employment_type,
-                    f.contract_type,
-                    f.seniority_years,
-                    f.marital_status,
-                    f.number_of_children,
-                    f.spouse_employed,
-                    f.housing_status,
-                    f.is_primary_holder
+                f"""
+                SELECT {_CASE_OVERVIEW_COLUMNS}
                 FROM credit_cases c
                 JOIN financial_profile f ON f.case_id = c.case_id
+                LEFT JOIN decisions d ON d.case_id = c.case_id
                 WHERE c.case_id = %s
                 """,
                 (case_id,),
             )
-            base = cur.fetchone()
-            if not base:
-                return None
-
-            cur.execute(
-                """
-                SELECT decision, confidence, reason_codes, note, decided_by, decided_at
-                FROM decisions
-                WHERE case_id = %s
-                """,
-                (case_id,),
-            )
-            decision = cur.fetchone()
-
-            base["documents"] = []
-            base["agent_outputs"] = []
-            base["comments"] = []
-            base["decision"] = decision
-            return base
+            row = cur.fetchone()
+            return _fold_overview_row(row) if row else None
     finally:
         conn.close()
 
@@ -893,23 +1453,208 @@ def fetch_case_overview_for_client(case_id: int, user_id: int) -> Optional[Dict[
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(
-                """
-                SELECT case_id
-                FROM credit_cases
-                WHERE case_id = %s AND user_id = %s
+                f"""
+                SELECT {_CASE_OVERVIEW_COLUMNS}
+                FROM credit_cases c
+                JOIN financial_profile f ON f.case_id = c.case_id
+                LEFT JOIN decisions d ON d.case_id = c.case_id
+                WHERE c.case_id = %s AND c.user_id = %s
                 """,
                 (case_id, user_id),
             )
             row = cur.fetchone()
-            if not row:
-                return None
-        detail = fetch_case_overview(case_id)
-        return detail
+            return _fold_overview_row(row) if row else None
     finally:
         conn.close()
 
 
+_JSON_DATETIME_KEYS = {"created_at", "updated_at", "uploaded_at", "decided_at", "approved_at"}
+_JSON_DATE_KEYS = {"start_date", "end_date", "due_date", "paid_at", "payment_date", "last_payment_date"}
+
+
+def _json_object_hook(obj: Dict[str, Any]) -> Dict[str, Any]:
+    for key, value in obj.items():
+        if not isinstance(value, str):
+            continue
+        try:
+            if key in _JSON_DATETIME_KEYS:
+                obj[key] = datetime.fromisoformat(value)
+            elif key in _JSON_DATE_KEYS:
+                obj[key] = date.fromisoformat(value)
+        except ValueError:
+            pass
+    return obj
+
+
+def _decode_json_column(raw: Optional[str]) -> Any:
+    """Decode a `json_agg`/`row_to_json` column selected as text.
+
+    Numbers come back as Decimal and known date/timestamp keys as date/datetime,
+    matching what RealDictCursor returns for the equivalent plain columns.
+    """
+    if raw is None:
+        return None
+    return json.loads(raw, parse_float=Decimal, object_hook=_json_object_hook)
+
+
+_CASE_DETAIL_JSON_SQL = """
+    SELECT
+        c.case_id,
+        c.user_id,
+        c.status,
+        c.loan_amount,
+        c.loan_duration,
+        c.summary,
+        c.auto_decision,
+        c.auto_decision_confidence,
+        c.auto_review_required,
+        c.orchestration_metadata,
+        c.created_at,
+        c.updated_at,
+        f.monthly_income,
+        f.other_income,
+        f.monthly_charges,
+        f.employment_type,
+        f.contract_type,
+        f.seniority_years,
+        f.marital_status,
+        f.number_of_children,
+        f.spouse_employed,
+        f.housing_status,
+        f.is_primary_holder,
+        docs.items::text AS documents,
+        outs.items::text AS agent_outputs,
+        dec.item::text AS decision,
+        com.items::text AS comments
+        {payment_columns}
+    FROM credit_cases c
+    JOIN financial_profile f ON f.case_id = c.case_id
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(json_agg(d ORDER BY d.document_id), '[]'::json) AS items
+        FROM (
+            SELECT document_id, document_type, file_path, file_hash, uploaded_at
+            FROM documents
+            WHERE case_id = c.case_id
+        ) d
+    ) docs ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(json_agg(json_build_object(
+            'agent_name', a.agent_name,
+            'output_json', a.output_json::text,
+            'created_at', a.created_at
+        ) ORDER BY a.output_id), '[]'::json) AS items
+        FROM agent_outputs a
+        WHERE a.case_id = c.case_id
+    ) outs ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT row_to_json(x) AS item
+        FROM (
+            SELECT decision, confidence, reason_codes::text AS reason_codes, note, decided_by, decided_at
+            FROM decisions
+            WHERE case_id = c.case_id
+        ) x
+    ) dec ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(json_agg(m ORDER BY m.created_at), '[]'::json) AS items
+        FROM (
+            SELECT comment_id, author_id, message, is_public, created_at
+            FROM comments
+            WHERE case_id = c.case_id
+        ) m
+    ) com ON TRUE
+    {payment_joins}
+    WHERE c.case_id = %(case_id)s
+"""
+
+_CASE_DETAIL_JSON_PAYMENT_COLUMNS = """,
+        ln.item::text AS loan,
+        inst.items::text AS installments,
+        pay.items::text AS payments,
+        pbs.item::text AS payment_behavior_summary
+"""
+
+_CASE_DETAIL_JSON_PAYMENT_JOINS = """
+    LEFT JOIN loans l ON l.case_id = c.case_id
+    LEFT JOIN LATERAL (
+        SELECT row_to_json(x) AS item
+        FROM (
+            SELECT l.loan_id, l.user_id, l.case_id, l.principal_amount, l.interest_rate, l.term_months,
+                   l.status, l.approved_at, l.start_date, l.end_date, l.created_at
+        ) x
+        WHERE l.loan_id IS NOT NULL
+    ) ln ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(json_agg(i ORDER BY i.installment_number), '[]'::json) AS items
+        FROM (
+            SELECT installment_id, loan_id, installment_number, due_date, amount_due,
+                   status, amount_paid, paid_at, days_late, created_at
+            FROM installments
+            WHERE loan_id = l.loan_id
+        ) i
+    ) inst ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT COALESCE(json_agg(p ORDER BY p.payment_date, p.payment_id), '[]'::json) AS items
+        FROM (
+            SELECT payment_id, loan_id, installment_id, payment_date, amount, channel,
+                   status, is_reversal, reversal_of, created_at
+            FROM payments
+            WHERE loan_id = l.loan_id
+        ) p
+    ) pay ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT row_to_json(x) AS item
+        FROM (
+            SELECT summary_id, user_id, total_loans, total_installments, on_time_installments,
+                   late_installments, missed_installments, on_time_rate, avg_days_late,
+                   max_days_late, avg_payment_amount, last_payment_date, updated_at
+            FROM payment_behavior_summary
+            WHERE user_id = c.user_id
+        ) x
+    ) pbs ON TRUE
+"""
+
+_CASE_DETAIL_JSON_KEYS = ("documents", "agent_outputs", "decision", "comments")
+_CASE_DETAIL_JSON_PAYMENT_KEYS = ("loan", "installments", "payments", "payment_behavior_summary")
+
+
+def _fetch_case_detail_json(case_id: int, include_payments: bool = True) -> Optional[Dict[str, Any]]:
+    """Load the case detail document in a single statement (lateral joins + json_agg)."""
+    sql = _CASE_DETAIL_JSON_SQL.format(
+        payment_columns=_CASE_DETAIL_JSON_PAYMENT_COLUMNS if include_payments else "",
+        payment_joins=_CASE_DETAIL_JSON_PAYMENT_JOINS if include_payments else "",
+    )
+    conn = _connect()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(sql, {"case_id": case_id})
+            base = cur.fetchone()
+    finally:
+        conn.close()
+    if not base:
+        return None
+    keys = _CASE_DETAIL_JSON_KEYS + (_CASE_DETAIL_JSON_PAYMENT_KEYS if include_payments else ())
+    for key in keys:
+        base[key] = _decode_json_column(base.get(key))
+    # JSONB payloads are nested as text so their contents decode like psycopg2's
+    # own jsonb handling (plain floats, no date coercion).
+    for row in base["agent_outputs"]:
+        row["output_json"] = json.loads(row["output_json"]) if row.get("output_json") is not None else None
+    if base["decision"] and base["decision"].get("reason_codes") is not None:
+        base["decision"]["reason_codes"] = json.loads(base["decision"]["reason_codes"])
+    return base
+
+
 def fetch_case_detail(case_id: int, include_payments: bool = True) -> Optional[Dict[str, Any]]:
+    """Full case detail (profile, documents, agent outputs, decision, comments, loan data).
+
+    DB_CASE_DETAIL_LOADER=multi switches back to one query per section.
+    """
+    if os.getenv("DB_CASE_DETAIL_LOADER", "json").strip().lower() == "multi":
+        return _fetch_case_detail_multi(case_id, include_payments=include_payments)
+    return _fetch_case_detail_json(case_id, include_payments=include_payments)
+
+
+def _fetch_case_detail_multi(case_id: int, include_payments: bool = True) -> Optional[Dict[str, Any]]:
     conn = _connect()
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
@@ -925,6 +1670,7 @@ def fetch_case_detail(case_id: int, include_payments: bool = True) -> Optional[D
                     c.auto_decision,
                     c.auto_decision_confidence,
                     c.auto_review_required,
+                    c.orchestration_metadata,
                     c.created_at,
                     c.updated_at,
                     f.monthly_income,
@@ -1154,14 +1900,14 @@ def fetch_case_detail_for_client(case_id: int, user_id: int, include_payments: b
                 (case_id, user_id),
             )
             row = cur.fetchone()
-            if not row:
-                return None
-        detail = fetch_case_detail(case_id, include_payments=include_payments)
-        if detail:
-            detail["comments"] = [c for c in detail.get("comments", []) if c.get("is_public")]
-        return detail
     finally:
         conn.close()
+    if not row:
+        return None
+    detail = fetch_case_detail(case_id, include_payments=include_payments)
+    if detail:
+        detail["comments"] = [c for c in detail.get("comments", []) if c.get("is_public")]
+    return detail
 
 
 def upsert_decision(case_id: int, decision: str, note: Optional[str], banker_id: int) -> Optional[Dict[str, Any]]:
@@ -1205,9 +1951,13 @@ def upsert_decision(case_id: int, decision: str, note: Optional[str], banker_id:
                     (status, case_id),
                 )
                 if decision_upper == "APPROVE":
-                    _ensure_loan_for_case(cur, case_id)
+                    loan_id, installments_created = _ensure_loan_for_case(cur, case_id)
                     # Loan/instalments creation impacts payment context: keep summary synced.
-                    _recompute_payment_behavior_summary_tx(cur, user_id)
+                    # New installments are PENDING, so only the totals move.
+                    if loan_id is not None and installments_created:
+                        _apply_payment_behavior_delta_tx(
+                            cur, user_id, {"total_loans": 1, "total_installments": installments_created}
+                        )
                 return decision_row
     finally:
         conn.close()
@@ -1257,7 +2007,8 @@ def _days_in_month(year: int, month: int) -> int:
     return 29 if is_leap else 28
 
 
-def _ensure_loan_for_case(cur, case_id: int) -> Optional[int]:
+def _ensure_loan_for_case(cur, case_id: int) -> Tuple[Optional[int], int]:
+    """Return (loan_id, installments created); nothing is created when the case already has a loan."""
     cur.execute(
         """
         SELECT loan_id FROM loans WHERE case_id = %s
@@ -1266,7 +2017,7 @@ def _ensure_loan_for_case(cur, case_id: int) -> Optional[int]:
     )
     row = cur.fetchone()
     if row:
-        return int(row["loan_id"]) if isinstance(row, dict) else int(row[0])
+        return (int(row["loan_id"]) if isinstance(row, dict) else int(row[0])), 0
 
     cur.execute(
         """
@@ -1278,7 +2029,7 @@ def _ensure_loan_for_case(cur, case_id: int) -> Optional[int]:
     )
     case_row = cur.fetchone()
     if not case_row:
-        return None
+        return None, 0
     user_id = case_row["user_id"]
     principal = float(case_row["loan_amount"])
     term_months = int(case_row["loan_duration"])
@@ -1307,21 +2058,53 @@ def _ensure_loan_for_case(cur, case_id: int) -> Optional[int]:
     )
     loan_id = cur.fetchone()["loan_id"]
 
-    total_with_interest = principal * (1 + interest_rate * (term_months / 12.0))
-    monthly_amount = round(total_with_interest / term_months, 2)
-    for n in range(1, term_months + 1):
-        due_date = _add_months(today, n)
-        cur.execute(
-            """
-            INSERT INTO installments (
-                loan_id, installment_number, due_date, amount_due, status
-            )
-            VALUES (%s, %s, %s, %s, 'PENDING')
-            """,
-            (loan_id, n, due_date, monthly_amount),
-        )
+    monthly_amount = _monthly_installment_amount(principal, interest_rate, term_months, _amortization_method())
+    _insert_installment_schedule(cur, int(loan_id), today, term_months, monthly_amount)
 
-    return int(loan_id)
+    return int(loan_id), term_months
+
+
+def _amortization_method() -> str:
+    method = os.getenv("LOAN_AMORTIZATION_METHOD", "simple").strip().lower()
+    if method not in ("simple", "annuity"):
+        print(f"[WARN] Unknown LOAN_AMORTIZATION_METHOD={method!r}; using simple interest")
+        return "simple"
+    return method
+
+
+def _monthly_installment_amount(principal: float, annual_rate: float, term_months: int, method: str = "simple") -> float:
+    """
+    Monthly amount due for a loan.
+
+    - simple: principal plus simple interest over the term, split evenly
+      (principal * (1 + rate * term / 12) / term).
+    - annuity: constant payment fully amortizing the principal at rate / 12
+      per month (principal * r / (1 - (1 + r) ** -term)).
+    """
+    if term_months <= 0:
+        raise ValueError("term_months must be positive")
+    if method == "annuity":
+        monthly_rate = annual_rate / 12.0
+        if monthly_rate <= 0:
+            return round(principal / term_months, 2)
+        return round(principal * monthly_rate / (1 - (1 + monthly_rate) ** -term_months), 2)
+    total_with_interest = principal * (1 + annual_rate * (term_months / 12.0))
+    return round(total_with_interest / term_months, 2)
+
+
+def _insert_installment_schedule(cur, loan_id: int, start_date: date, term_months: int, amount_due: float) -> None:
+    """Insert the whole PENDING schedule in one statement, one row per month after start_date.
+
+    Postgres clamps date + n months to the end of shorter months, like _add_months.
+    """
+    cur.execute(
+        """
+        INSERT INTO installments (loan_id, installment_number, due_date, amount_due, status)
+        SELECT %s, n, (%s::date + make_interval(months => n))::date, %s, 'PENDING'
+        FROM generate_series(1, %s) AS n
+        """,
+        (loan_id, start_date, amount_due, term_months),
+    )
 
 
 def fetch_loan_by_case(case_id: int) -> Optional[Dict[str, Any]]:
@@ -1418,12 +2201,15 @@ def fetch_payment_context(user_id: int, case_id: Optional[int] = None) -> Dict[s
     }
 
 
-def _recompute_payment_behavior_summary_tx(cur, user_id: int) -> Optional[Dict[str, Any]]:
-    """
-    Recompute and upsert payment_behavior_summary inside an existing transaction.
+_SUMMARY_RETURNING = """
+    summary_id, user_id, total_loans, total_installments, on_time_installments,
+    late_installments, missed_installments, on_time_rate, avg_days_late,
+    max_days_late, avg_payment_amount, last_payment_date, updated_at
+"""
 
-    This keeps "late/missed/on_time" derived from installments and payments in sync.
-    """
+
+def _compute_payment_behavior_summary(cur, user_id: int) -> Dict[str, Any]:
+    """Aggregate a user's full installment and payment history (the reconciliation baseline)."""
     cur.execute("SELECT COUNT(*) AS total_loans FROM loans WHERE user_id = %s", (user_id,))
     total_loans = int((cur.fetchone() or {}).get("total_loans") or 0)
 
@@ -1434,7 +2220,8 @@ def _recompute_payment_behavior_summary_tx(cur, user_id: int) -> Optional[Dict[s
             SUM(CASE WHEN i.status = 'PAID' AND COALESCE(i.days_late, 0) <= 0 THEN 1 ELSE 0 END) AS on_time_installments,
             SUM(CASE WHEN i.status = 'MISSED' THEN 1 ELSE 0 END) AS missed_installments,
             SUM(CASE WHEN (i.status = 'LATE') OR (i.status = 'PAID' AND COALESCE(i.days_late, 0) > 0) THEN 1 ELSE 0 END) AS late_installments,
-            AVG(CASE WHEN COALESCE(i.days_late, 0) > 0 THEN i.days_late END) AS avg_days_late,
+            SUM(CASE WHEN COALESCE(i.days_late, 0) > 0 THEN i.days_late ELSE 0 END) AS days_late_sum,
+            SUM(CASE WHEN COALESCE(i.days_late, 0) > 0 THEN 1 ELSE 0 END) AS days_late_count,
             MAX(COALESCE(i.days_late, 0)) AS max_days_late
         FROM installments i
         JOIN loans l ON l.loan_id = i.loan_id
@@ -1445,16 +2232,14 @@ def _recompute_payment_behavior_summary_tx(cur, user_id: int) -> Optional[Dict[s
     inst = cur.fetchone() or {}
     total_installments = int(inst.get("total_installments") or 0)
     on_time_installments = int(inst.get("on_time_installments") or 0)
-    late_installments = int(inst.get("late_installments") or 0)
-    missed_installments = int(inst.get("missed_installments") or 0)
-    avg_days_late = float(inst.get("avg_days_late") or 0)
-    max_days_late = int(inst.get("max_days_late") or 0)
-    on_time_rate = float(on_time_installments / total_installments) if total_installments > 0 else 0.0
+    days_late_sum = int(inst.get("days_late_sum") or 0)
+    days_late_count = int(inst.get("days_late_count") or 0)
 
     cur.execute(
         """
         SELECT
-            AVG(p.amount) AS avg_payment_amount,
+            COUNT(*) AS payment_count,
+            SUM(p.amount) AS payment_amount_sum,
             MAX(p.payment_date) AS last_payment_date
         FROM payments p
         JOIN loans l ON l.loan_id = p.loan_id
@@ -1465,11 +2250,39 @@ def _recompute_payment_behavior_summary_tx(cur, user_id: int) -> Optional[Dict[s
         (user_id,),
     )
     pay = cur.fetchone() or {}
-    avg_payment_amount = float(pay.get("avg_payment_amount") or 0)
-    last_payment_date = pay.get("last_payment_date")
+    payment_count = int(pay.get("payment_count") or 0)
+    payment_amount_sum = float(pay.get("payment_amount_sum") or 0)
+
+    return {
+        "total_loans": total_loans,
+        "total_installments": total_installments,
+        "on_time_installments": on_time_installments,
+        "late_installments": int(inst.get("late_installments") or 0),
+        "missed_installments": int(inst.get("missed_installments") or 0),
+        "on_time_rate": float(on_time_installments / total_installments) if total_installments > 0 else 0.0,
+        "avg_days_late": float(days_late_sum / days_late_count) if days_late_count > 0 else 0.0,
+        "max_days_late": int(inst.get("max_days_late") or 0),
+        "avg_payment_amount": float(payment_amount_sum / payment_count) if payment_count > 0 else 0.0,
+        "last_payment_date": pay.get("last_payment_date"),
+        "days_late_sum": days_late_sum,
+        "days_late_count": days_late_count,
+        "payment_count": payment_count,
+        "payment_amount_sum": payment_amount_sum,
+    }
+
 
+def _recompute_payment_behavior_summary_tx(cur, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Recompute and upsert payment_behavior_summary inside an existing transaction.
+
+    This keeps "late/missed/on_time" derived from installments and payments in sync.
+    Writes go through _apply_payment_behavior_delta_tx; this full pass is the
+    fallback for rows without running totals and the repair path
+    (scripts/reconcile_payment_summaries.py).
+    """
+    values = _compute_payment_behavior_summary(cur, user_id)
     cur.execute(
-        """
+        f"""
         INSERT INTO payment_behavior_summary (
             user_id,
             total_loans,
@@ -1482,9 +2295,18 @@ def _recompute_payment_behavior_summary_tx(cur, user_id: int) -> Optional[Dict[s
             max_days_late,
             avg_payment_amount,
             last_payment_date,
+            days_late_sum,
+            days_late_count,
+            payment_count,
+            payment_amount_sum,
             updated_at
         )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+        VALUES (
+            %(user_id)s, %(total_loans)s, %(total_installments)s, %(on_time_installments)s,
+            %(late_installments)s, %(missed_installments)s, %(on_time_rate)s, %(avg_days_late)s,
+            %(max_days_late)s, %(avg_payment_amount)s, %(last_payment_date)s, %(days_late_sum)s,
+            %(days_late_count)s, %(payment_count)s, %(payment_amount_sum)s, NOW()
+        )
         ON CONFLICT (user_id) DO UPDATE SET
             total_loans = EXCLUDED.total_loans,
             total_installments = EXCLUDED.total_installments,
@@ -1496,28 +2318,119 @@ def _recompute_payment_behavior_summary_tx(cur, user_id: int) -> Optional[Dict[s
             max_days_late = EXCLUDED.max_days_late,
             avg_payment_amount = EXCLUDED.avg_payment_amount,
             last_payment_date = EXCLUDED.last_payment_date,
+            days_late_sum = EXCLUDED.days_late_sum,
+            days_late_count = EXCLUDED.days_late_count,
+            payment_count = EXCLUDED.payment_count,
+            payment_amount_sum = EXCLUDED.payment_amount_sum,
             updated_at = NOW()
-        RETURNING summary_id, user_id, total_loans, total_installments, on_time_installments,
-                  late_installments, missed_installments, on_time_rate, avg_days_late,
-                  max_days_late, avg_payment_amount, last_payment_date, updated_at
+        RETURNING {_SUMMARY_RETURNING}
         """,
-        (
-            user_id,
-            total_loans,
-            total_installments,
-            on_time_installments,
-            late_installments,
-            missed_installments,
-            on_time_rate,
-            avg_days_late,
-            max_days_late,
-            avg_payment_amount,
-            last_payment_date,
-        ),
+        {"user_id": user_id, **values},
     )
     return cur.fetchone()
 
 
+def _installment_bucket(status: Optional[str], days_late: Optional[int]) -> Dict[str, int]:
+    """Contribution of one installment to the summary counters (mirrors the full aggregate)."""
+    days = int(days_late or 0)
+    return {
+        "on_time_installments": 1 if status == "PAID" and days <= 0 else 0,
+        "late_installments": 1 if status == "LATE" or (status == "PAID" and days > 0) else 0,
+        "missed_installments": 1 if status == "MISSED" else 0,
+        "days_late_sum": days if days > 0 else 0,
+        "days_late_count": 1 if days > 0 else 0,
+    }
+
+
+def _installment_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary delta for an installment moving from `before` to `after` (status/days_late rows)."""
+    old = _installment_bucket(before.get("status"), before.get("days_late"))
+    new = _installment_bucket(after.get("status"), after.get("days_late"))
+    delta: Dict[str, Any] = {key: new[key] - old[key] for key in new}
+    old_days = int(before.get("days_late") or 0)
+    new_days = int(after.get("days_late") or 0)
+    delta["max_days_late"] = new_days
+    # A shrinking value may have been the maximum: only then is MAX re-derived.
+    delta["max_days_late_stale"] = new_days < old_days
+    return delta
+
+
+def _apply_payment_behavior_delta_tx(cur, user_id: int, delta: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Apply a delta to payment_behavior_summary inside an existing transaction.
+
+    Counters and sums are incremented, averages re-derived from the running
+    sums, max_days_late and last_payment_date only move forward (unless
+    `max_days_late_stale` asks for MAX to be re-read). Falls back to a full
+    recompute when the user has no summary row or its running totals were
+    never initialised.
+    """
+    params = {
+        "user_id": user_id,
+        "total_loans": 0,
+        "total_installments": 0,
+        "on_time_installments": 0,
+        "late_installments": 0,
+        "missed_installments": 0,
+        "days_late_sum": 0,
+        "days_late_count": 0,
+        "payment_count": 0,
+        "payment_amount_sum": 0,
+        "max_days_late": None,
+        "max_days_late_stale": False,
+        "last_payment_date": None,
+    }
+    params.update(delta)
+    cur.execute(
+        f"""
+        UPDATE payment_behavior_summary s
+        SET total_loans = s.total_loans + %(total_loans)s,
+            total_installments = s.total_installments + %(total_installments)s,
+            on_time_installments = s.on_time_installments + %(on_time_installments)s,
+            late_installments = s.late_installments + %(late_installments)s,
+            missed_installments = s.missed_installments + %(missed_installments)s,
+            days_late_sum = s.days_late_sum + %(days_late_sum)s,
+            days_late_count = s.days_late_count + %(days_late_count)s,
+            payment_count = s.payment_count + %(payment_count)s,
+            payment_amount_sum = s.payment_amount_sum + %(payment_amount_sum)s,
+            on_time_rate = CASE
+                WHEN s.total_installments + %(total_installments)s > 0
+                THEN (s.on_time_installments + %(on_time_installments)s)::numeric
+                     / (s.total_installments + %(total_installments)s)
+                ELSE 0 END,
+            avg_days_late = CASE
+                WHEN s.days_late_count + %(days_late_count)s > 0
+                THEN (s.days_late_sum + %(days_late_sum)s)::numeric / (s.days_late_count + %(days_late_count)s)
+                ELSE 0 END,
+            avg_payment_amount = CASE
+                WHEN s.payment_count + %(payment_count)s > 0
+                THEN (s.payment_amount_sum + %(payment_amount_sum)s) / (s.payment_count + %(payment_count)s)
+                ELSE 0 END,
+            max_days_late = CASE
+                WHEN %(max_days_late_stale)s THEN (
+                    SELECT COALESCE(MAX(COALESCE(i.days_late, 0)), 0)
+                    FROM installments i
+                    JOIN loans l ON l.loan_id = i.loan_id
+                    WHERE l.user_id = s.user_id
+                )
+                ELSE GREATEST(s.max_days_late, %(max_days_late)s::int) END,
+            last_payment_date = GREATEST(s.last_payment_date, %(last_payment_date)s::date),
+            updated_at = NOW()
+        WHERE s.user_id = %(user_id)s
+          AND s.days_late_sum IS NOT NULL
+          AND s.days_late_count IS NOT NULL
+          AND s.payment_count IS NOT NULL
+          AND s.payment_amount_sum IS NOT NULL
+        RETURNING {_SUMMARY_RETURNING}
+        """,
+        params,
+    )
+    row = cur.fetchone()
+    if row:
+        return row
+    return _recompute_payment_behavior_summary_tx(cur, user_id)
+
+
 def recompute_payment_behavior_summary(user_id: int) -> Optional[Dict[str, Any]]:
     """
     Public wrapper to recompute payment_behavior_summary for a user.
@@ -1540,10 +2453,10 @@ def create_payment_for_case(
     installment_id: Optional[int] = None,
 ) -> Optional[Dict[str, Any]]:
     """
-    Insert a payment for a case's loan and recompute payment_behavior_summary.
+    Insert a payment for a case's loan and update payment_behavior_summary.
 
     This is intentionally simple: it updates one installment when provided (or the next due),
-    then recomputes the user's aggregated payment summary.
+    then applies that installment's and payment's delta to the user's aggregated summary.
     """
     conn = _connect()
     try:
@@ -1583,7 +2496,7 @@ def create_payment_for_case(
                 if installment_id is not None:
                     cur.execute(
                         """
-                        SELECT installment_id, due_date, amount_due, amount_paid
+                        SELECT installment_id, due_date, amount_due, amount_paid, status, days_late
                         FROM installments
                         WHERE installment_id = %s AND loan_id = %s
                         FOR UPDATE
@@ -1606,6 +2519,9 @@ def create_payment_for_case(
                     (loan_id, installment_id, payment_date, amount, channel, status),
                 )
                 payment = cur.fetchone()
+                delta: Dict[str, Any] = {}
+                if status == "COMPLETED":
+                    delta.update(payment_count=1, payment_amount_sum=float(amount), last_payment_date=payment_date)
 
                 # Best-effort update of installment stats.
                 if installment_row and installment_id is not None:
@@ -1622,11 +2538,13 @@ def create_payment_for_case(
                             days_late = GREATEST(0, (%s::date - due_date)),
                             status = %s
                         WHERE installment_id = %s
+                        RETURNING status, days_late
                         """,
                         (new_paid, payment_date, payment_date, new_status, installment_id),
                     )
+                    delta.update(_installment_delta(installment_row, cur.fetchone() or {}))
 
-                _recompute_payment_behavior_summary_tx(cur, user_id)
+                _apply_payment_behavior_delta_tx(cur, user_id, delta)
                 cur.execute(
                     """
                     UPDATE credit_cases
@@ -0,0 +1,259 @@
+"""Prometheus metrics for the API and the background worker.
+
+A small in-process registry rendered in the Prometheus text exposition
+format by `GET /metrics` (the worker serves the same registry on
+JOB_METRICS_PORT). Recording a value is a tuple lookup and a few additions
+under the metric's own lock, so instrumented hot paths (every DB statement,
+every agent node) pay well under a microsecond. Values are per process:
+scrape each API and worker process.
+
+Label values are passed positionally, in `labelnames` order:
+
+    AGENT_SECONDS.observe(0.42, "document")
+    QDRANT_RETRIES.inc("query_points")
+    with LLM_SECONDS.time("decision", "gpt-4o-mini"):
+        ...
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds; covers a 1 ms DB statement up to a slow LLM call
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_REGISTRY: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Sequence[object]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(label) for label in labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: object, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: object) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return super().render() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: object, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    @contextmanager
+    def track_inprogress(self, *labels: object) -> Iterator[None]:
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: object) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][idx] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, *labels: object) -> Iterator[None]:
+        """Observe the duration of the block, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def count(self, *labels: object) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def sum(self, *labels: object) -> float:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry[1] if entry else 0.0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = super().render()
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in list(_REGISTRY):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+ORCHESTRATIONS_IN_FLIGHT = Gauge("orchestrations_in_flight", "Orchestrations currently running in this process.")
+AGENT_SECONDS = Histogram("agent_duration_seconds", "Wall-clock time of one agent stage (reused stages excluded).", ("agent",))
+AGENT_FALLBACKS = Counter(
+    "agent_fallbacks_total",
+    "Agent stages replaced by their rule-based or fallback result, by reason (timeout, error).",
+    ("agent", "reason"),
+)
+LLM_SECONDS = Histogram("llm_request_duration_seconds", "Latency of one LLM API call.", ("agent", "model"))
+LLM_ERRORS = Counter("llm_errors_total", "LLM API calls that raised.", ("agent", "model"))
+DECISION_LLM_GATE = Counter(
+    "decision_llm_gate_total",
+    "Decision agent runs by LLM gate outcome (skipped, llm, no_llm) and reason (clear_approve, uncertain, ...).",
+    ("outcome", "reason"),
+)
+DECISION_LLM_SAVED = Counter(
+    "decision_llm_saved_seconds_total",
+    "Estimated decision LLM latency avoided by rule-decided cases (mean observed decision LLM latency per skip).",
+)
+LLM_ENDPOINTS = Counter(
+    "llm_endpoint_probes_total",
+    "API endpoint (responses, chat) found for a model by the first call to it.",
+    ("model", "endpoint"),
+)
+LLM_ROUTED = Counter(
+    "llm_model_routing_total",
+    "Calls by the model tried first and why (primary, p95, budget).",
+    ("agent", "model", "reason"),
+)
+LLM_CACHE = Counter(
+    "llm_cache_requests_total",
+    "LLM response cache lookups by outcome (memory_hit, store_hit, miss, bypass).",
+    ("agent", "outcome"),
+)
+EMBEDDING_SECONDS = Histogram("embedding_duration_seconds", "Latency of one embedding computation.", ("source",))
+QDRANT_SECONDS = Histogram("qdrant_request_duration_seconds", "Latency of one Qdrant request.", ("operation",))
+QDRANT_RETRIES = Counter("qdrant_retries_total", "Qdrant requests retried after a failure.", ("operation",))
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "Duration of one SQL statement, by the core.db function that issued it.",
+    ("query",),
+)
+SINGLE_FLIGHT_SHARED = Counter(
+    "singleflight_shared_total",
+    "Calls served by an identical call already in flight (llm, embedding, qdrant).",
+    ("kind",),
+)
+VECTOR_SYNC = Counter("vector_sync_total", "Postgres -> Qdrant case syncs by outcome (success, failure).", ("outcome",))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args) -> None:
+        pass
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """Serve `/metrics` from a daemon thread (for processes without the API)."""
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as exc:
+        print(f"[WARN] Metrics server not started on port {port}: {exc}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
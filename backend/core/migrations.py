@@ -0,0 +1,261 @@
+"""
+Versioned schema migrations.
+
+Every `*.sql` file in the migrations directory is one migration; its version
+is the file stem and files are applied in name order. Applied versions are
+recorded in `schema_version` together with a checksum of the file, so each
+migration runs exactly once per database. Files must stay idempotent
+(`IF NOT EXISTS`, `DROP ... IF EXISTS`) because databases initialised by hand
+with `psql` have no `schema_version` rows yet and will re-run them once.
+The exception is the files that predate `schema_version`: when the table is
+first created on a database already in the state they produce (`schema.sql`,
+or the files applied by hand), they are recorded as applied without running.
+
+A file whose first line is `-- migrate: no-transaction` is run statement by
+statement in autocommit mode, which `CREATE INDEX CONCURRENTLY` requires.
+Such files are split on `;` at end of line, so they must not contain
+dollar-quoted bodies.
+
+Usage (from backend/):
+    python -m core.migrations status
+    python -m core.migrations apply
+"""
+
+import argparse
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.db import _get_db_params, _open_connection
+
+# Arbitrary constant shared by every process running migrations.
+_ADVISORY_LOCK_KEY = 7_202_601_290
+_NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+# Migrations applied by hand before schema_version existed, and the probe telling
+# whether a database already has them: the agent_name check admitting every agent.
+_BASELINE_VERSIONS = ("20260127_add_decision_agent_output", "20260128_add_explanation_agent_output")
+_BASELINE_PROBE_SQL = """
+    SELECT pg_get_constraintdef(oid) LIKE '%''explanation''%'
+    FROM pg_constraint
+    WHERE conname = 'agent_outputs_agent_name_check'
+"""
+# Checksums of files deliberately edited after release, still accepted for
+# databases that recorded the earlier version (the edits leave them correct).
+_PREVIOUS_CHECKSUMS = {
+    "20260127_add_decision_agent_output": {"c3e1512a4a65b6dd719e0e6edb4392ddd7bcb27a455e5c53a2465aeee42f2c6d"},
+    # the unique index moved to 20260201_agent_output_upserts_index
+    "20260201_agent_output_upserts": {"cbf600b86cfb8d1e5f81f0ed9b1273ae0253c4ad3206f40039411d2f6e90d628"},
+}
+
+_VERSION_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version TEXT PRIMARY KEY,
+        checksum TEXT NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    path: Path
+    sql: str
+    checksum: str
+
+    @property
+    def transactional(self) -> bool:
+        first_line = self.sql.lstrip().splitlines()[0] if self.sql.strip() else ""
+        return first_line.strip().lower() != _NO_TRANSACTION_MARKER
+
+
+def _split_statements(sql: str) -> List[str]:
+    statements = []
+    for chunk in re.split(r";[ \t]*(?:\n|$)", sql):
+        lines = [line for line in chunk.splitlines() if not line.strip().startswith("--")]
+        statement = "\n".join(lines).strip()
+        if statement:
+            statements.append(statement)
+    return statements
+
+
+def migrations_dir() -> Optional[Path]:
+    configured = os.getenv("MIGRATIONS_DIR")
+    if configured:
+        return Path(configured)
+    backend_dir = Path(__file__).resolve().parents[1]
+    # /app/migrations in the backend image, ../migrations in a checkout.
+    for candidate in (backend_dir / "migrations", backend_dir.parent / "migrations"):
+        if candidate.is_dir():
+            return candidate
+    return None
+
+
+def discover_migrations(directory: Optional[Path] = None) -> List[Migration]:
+    directory = directory or migrations_dir()
+    if directory is None or not directory.is_dir():
+        return []
+    migrations: List[Migration] = []
+    for path in sorted(directory.glob("*.sql")):
+        sql = path.read_text(encoding="utf-8")
+        migrations.append(
+            Migration(
+                version=path.stem,
+                path=path,
+                sql=sql,
+                checksum=hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+            )
+        )
+    return migrations
+
+
+def _applied_versions(cur) -> Dict[str, str]:
+    cur.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return {}
+    cur.execute("SELECT version, checksum FROM schema_version")
+    return {row[0]: row[1] for row in cur.fetchall()}
+
+
+def pending_migrations(applied: Dict[str, str], migrations: List[Migration]) -> List[Migration]:
+    for migration in migrations:
+        recorded = applied.get(migration.version)
+        accepted = {migration.checksum} | _PREVIOUS_CHECKSUMS.get(migration.version, set())
+        if recorded is not None and recorded not in accepted:
+            print(f"[WARN] Migration {migration.version} changed after it was applied; not re-running it")
+    return [m for m in migrations if m.version not in applied]
+
+
+def _record_baseline(cur, migrations: List[Migration]) -> None:
+    """Mark the pre-schema_version files as applied if the database already reflects them."""
+    cur.execute(_BASELINE_PROBE_SQL)
+    row = cur.fetchone()
+    if not row or not row[0]:
+        return
+    for migration in migrations:
+        if migration.version in _BASELINE_VERSIONS:
+            cur.execute(
+                "INSERT INTO schema_version (version, checksum) VALUES (%s, %s) ON CONFLICT (version) DO NOTHING",
+                (migration.version, migration.checksum),
+            )
+            print(f"[INFO] Existing schema already includes migration {migration.version}; recorded as applied")
+
+
+def schema_status(directory: Optional[Path] = None) -> List[Migration]:
+    """Return migrations not yet recorded in schema_version (one cheap query)."""
+    migrations = discover_migrations(directory)
+    conn, _ = _open_connection(_get_db_params())
+    try:
+        with conn.cursor() as cur:
+            applied = _applied_versions(cur)
+        conn.rollback()
+    finally:
+        conn.close()
+    return pending_migrations(applied, migrations)
+
+
+def apply_migrations(directory: Optional[Path] = None) -> List[str]:
+    """Apply pending migrations and return their versions.
+
+    Each file runs in its own transaction (or statement by statement for
+    no-transaction files) and is recorded in schema_version once it succeeds.
+
+    A session advisory lock serialises concurrent runners (e.g. several workers
+    starting at once); the losers wait, then find nothing left to apply.
+    """
+    migrations = discover_migrations(directory)
+    conn, _ = _open_connection(_get_db_params())
+    applied_now: List[str] = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (_ADVISORY_LOCK_KEY,))
+        conn.commit()
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT to_regclass('schema_version') IS NULL")
+                    adopting = cur.fetchone()[0]
+                    cur.execute(_VERSION_TABLE_SQL)
+                    if adopting:
+                        _record_baseline(cur, migrations)
+                    applied = _applied_versions(cur)
+            for migration in pending_migrations(applied, migrations):
+                if migration.transactional:
+                    with conn:
+                        with conn.cursor() as cur:
+                            cur.execute(migration.sql)
+                            cur.execute(
+                                "INSERT INTO schema_version (version, checksum) VALUES (%s, %s)",
+                                (migration.version, migration.checksum),
+                            )
+                else:
+                    conn.autocommit = True
+                    try:
+                        with conn.cursor() as cur:
+                            for statement in _split_statements(migration.sql):
+                                cur.execute(statement)
+                            cur.execute(
+                                "INSERT INTO schema_version (version, checksum) VALUES (%s, %s)",
+                                (migration.version, migration.checksum),
+                            )
+                    finally:
+                        conn.autocommit = False
+                applied_now.append(migration.version)
+                print(f"[INFO] Applied migration {migration.version}")
+        finally:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (_ADVISORY_LOCK_KEY,))
+            conn.commit()
+    finally:
+        conn.close()
+    return applied_now
+
+
+def init_db() -> None:
+    """Startup hook: a version check, applying migrations only when some are pending.
+
+    DB_MIGRATIONS_ON_STARTUP selects the behaviour: `apply` (default), `check`
+    (log pending migrations but never run DDL) or `skip` (no database access,
+    e.g. on read-only replicas).
+    """
+    mode = os.getenv("DB_MIGRATIONS_ON_STARTUP", "apply").strip().lower()
+    if mode == "skip":
+        return
+    if migrations_dir() is None:
+        print("[WARN] No migrations directory found; set MIGRATIONS_DIR to enable schema migrations")
+        return
+    pending = schema_status()
+    if not pending:
+        return
+    versions = ", ".join(m.version for m in pending)
+    if mode == "check":
+        print(f"[WARN] Pending schema migrations: {versions}")
+        return
+    apply_migrations()
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="Schema migrations")
+    parser.add_argument("command", choices=["status", "apply"], nargs="?", default="status")
+    parser.add_argument("--dir", type=Path, default=None, help="migrations directory (default: auto-detect)")
+    args = parser.parse_args()
+
+    if args.command == "apply":
+        applied = apply_migrations(args.dir)
+        print(f"Applied {len(applied)} migration(s)")
+        return 0
+    pending = schema_status(args.dir)
+    if not pending:
+        print("Schema is up to date")
+        return 0
+    for migration in pending:
+        print(f"pending: {migration.version}")
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -1,36 +1,59 @@
-from typing import Any, Dict, List, Optional
-
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from agents.llm_budget import agent_deadline, rules_only
+from agents.llm_cache import bypass as bypass_llm_cache
+from agents.timing import collect_node_timings
+from core.cache import TTLCache
 from core.db import fetch_payment_context
+from core.metrics import AGENT_FALLBACKS, AGENT_SECONDS, ORCHESTRATIONS_IN_FLIGHT
+from core.scheduler import Stage, blocking_pool, close_loop_resources, run_blocking, run_stages_async
+from core.tracing import span
 
 try:
-    from agents.document_agent import analyze_documents  # type: ignore
+    from agents.document_agent import analyze_documents, analyze_documents_async  # type: ignore
 except Exception:  # pragma: no cover - fallback
     analyze_documents = None  # type: ignore
+    analyze_documents_async = None  # type: ignore
 
 try:
-    from agents.similarity_agent import analyze_similarity  # type: ignore
+    from agents.similarity_agent import analyze_similarity, analyze_similarity_async  # type: ignore
 except Exception:  # pragma: no cover
     analyze_similarity = None  # type: ignore
+    analyze_similarity_async = None  # type: ignore
 
 try:
-    from agents.behavior_agent import analyze_behavior  # type: ignore
+    from agents.behavior_agent import analyze_behavior, analyze_behavior_async  # type: ignore
 except Exception:  # pragma: no cover
     analyze_behavior = None  # type: ignore
+    analyze_behavior_async = None  # type: ignore
 
 try:
-    from agents.fraud_agent import analyze_fraud  # type: ignore
+    from agents.fraud_agent import analyze_fraud, analyze_fraud_async  # type: ignore
 except Exception:  # pragma: no cover
     analyze_fraud = None  # type: ignore
+    analyze_fraud_async = None  # type: ignore
 
 try:
-    from agents.explanation_agent import explain_decision  # type: ignore
+    from agents.explanation_agent import explain_decision, explain_decision_async  # type: ignore
 except Exception:  # pragma: no cover
     explain_decision = None  # type: ignore
+    explain_decision_async = None  # type: ignore
 
 try:
-    from agents.decision_agent import make_decision_payload as make_decision_payload  # type: ignore
+    from agents.decision_agent import make_decision_payload, make_decision_payload_async  # type: ignore
 except Exception:  # pragma: no cover
     make_decision_payload = None  # type: ignore
+    make_decision_payload_async = None  # type: ignore
 
 try:
     from agents.orchestrator import orchestrate_decision  # type: ignore
@@ -38,9 +61,10 @@ except Exception:  # pragma: no cover
     orchestrate_decision = None  # type: ignore
 
 try:
-    from agents.image_agent import analyze_images  # type: ignore
+    from agents.image_agent import analyze_images, analyze_images_async  # type: ignore
 except Exception:  # pragma: no cover
     analyze_images = None  # type: ignore
+    analyze_images_async = None  # type: ignore
 
 
 def _normalize_contract_type(raw: Optional[str]) -> Optional[str]:
@@ -501,77 +525,16 @@ def _build_agent_bundle(
     return bundle
 
 
-def run_orchestrator(request_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Execute agents, aggregate outputs, and produce an explanation-ready payload."""
-
-    case_id = request_data.get("case_id") or request_data.get("request_id") or "unknown"
-    user_id = request_data.get("user_id")
-
-    payment_context = request_data.get("payment_history")
-    if not payment_context and user_id:
-        try:
-            payment_context = fetch_payment_context(int(user_id), int(case_id) if str(case_id).isdigit() else None)
-        except Exception:
-            payment_context = None
-    if payment_context:
-        request_data = {**request_data, "payment_history": payment_context}
-
-    documents_payload = _build_documents_payload(request_data)
-    declared_profile = request_data.get("declared_profile") or _build_declared_profile(request_data)
-    telemetry = request_data.get("telemetry") or {}
-    payment_summary = request_data.get("payment_behavior_summary")
-    if not payment_summary and payment_context:
-        payment_summary = payment_context.get("payment_behavior_summary")
-    if payment_summary:
-        request_data = {**request_data, "payment_behavior_summary": payment_summary}
-
-    doc_request = {
-        "case_id": case_id,
-        "declared_profile": declared_profile,
-        "documents": documents_payload,
-    }
-
-    if analyze_documents:
-        try:
-            doc_result = analyze_documents(doc_request)
-        except Exception:
-            doc_result = {"case_id": case_id, "document_analysis": {}, "confidence": 0.4}
-    else:
-        doc_result = {"case_id": case_id, "document_analysis": {}, "confidence": 0.0}
-
-    if analyze_behavior:
-        try:
-            behavior_result = analyze_behavior({
-                "case_id": case_id,
-                "telemetry": telemetry,
-                "payment_behavior_summary": payment_summary,
-                "payment_history": payment_context,
-            })
-        except Exception:
-            behavior_result = {"case_id": case_id, "behavior_analysis": {}, "confidence": 0.4}
-    else:
-        behavior_result = {"case_id": case_id, "behavior_analysis": {}, "confidence": 0.0}
-
-    if analyze_similarity:
-        try:
-            sim_result = analyze_similarity({**_build_similarity_payload(request_data), "payment_behavior_summary": payment_summary})
-        except Exception:
-            sim_result = {"case_id": case_id, "ai_analysis": {}, "rag_statistics": {}, "confidence": 0.3}
-    else:
-        sim_result = {"case_id": case_id, "ai_analysis": {}, "rag_statistics": {}, "confidence": 0.0}
-
-    request_image_flags = _safe_list(request_data.get("image_flags", []))
-    if analyze_images:
-        try:
-            image_result = analyze_images({
-                "case_id": case_id,
-                "image_flags": request_image_flags,
-            })
-        except Exception:
-            image_result = {"case_id": case_id, "image_analysis": {}, "confidence": 0.4}
-    else:
-        image_result = {"case_id": case_id, "image_analysis": {}, "confidence": 0.0}
-
+def _build_fraud_payload(
+    request_data: Dict[str, Any],
+    case_id: Any,
+    payment_context: Optional[Dict[str, Any]],
+    request_image_flags: List[str],
+    doc_result: Dict[str, Any],
+    behavior_result: Dict[str, Any],
+    sim_result: Dict[str, Any],
+    image_result: Dict[str, Any],
+) -> Dict[str, Any]:
     doc_flags = _safe_list(doc_result.get("document_analysis", {}).get("flags", []))
     behavior_flags = _safe_list(behavior_result.get("behavior_analysis", {}).get("behavior_flags", []))
     image_flags = _merge_flags(request_image_flags, image_result.get("image_analysis", {}).get("flags", []))
@@ -585,11 +548,11 @@ def run_orchestrator(request_data: Dict[str, Any]) -> Dict[str, Any]:
     similarity_flags.extend(sim_red_flags)
 
     projected_ratio = _compute_projected_debt_ratio(request_data)
-    txn_flags = _safe_list(request_data.get("transaction_flags", []))
+    txn_flags = list(_safe_list(request_data.get("transaction_flags", [])))
     if projected_ratio >= 45:
         txn_flags.append("HIGH_DTI")
 
-    fraud_payload = {
+    return {
         "case_id": case_id,
         "document_flags": doc_flags,
         "behavior_flags": behavior_flags,
@@ -600,26 +563,193 @@ def run_orchestrator(request_data: Dict[str, Any]) -> Dict[str, Any]:
         "payment_history": payment_context,
     }
 
-    if analyze_fraud:
-        try:
-            fraud_result = analyze_fraud(fraud_payload)
-        except Exception:
-            fraud_result = {"case_id": case_id, "fraud_analysis": {}, "confidence": 0.4}
-    else:
-        fraud_result = {"case_id": case_id, "fraud_analysis": {}, "confidence": 0.0}
-
-    agent_results = {
-        "document_agent": doc_result,
-        "similarity_agent": sim_result,
-        "behavior_agent": behavior_result,
-        "fraud_agent": fraud_result,
-        "image_agent": image_result,
+
+def _load_payment_context(request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    payment_context = request_data.get("payment_history")
+    if payment_context:
+        return payment_context
+    case_id = request_data.get("case_id") or request_data.get("request_id") or "unknown"
+    user_id = request_data.get("user_id")
+    if not user_id:
+        return None
+    try:
+        return fetch_payment_context(int(user_id), int(case_id) if str(case_id).isdigit() else None)
+    except Exception:
+        return None
+
+
+def _env_seconds(name: str, default: float) -> Optional[float]:
+    """Seconds from the environment; zero or negative means no limit."""
+    try:
+        value = float(os.getenv(name, str(default)))
+    except ValueError:
+        value = default
+    return value if value > 0 else None
+
+
+def _agent_timeout(name: str) -> Optional[float]:
+    default = _env_seconds("AGENT_TIMEOUT_SEC", 20.0)
+    override = os.getenv(f"AGENT_TIMEOUT_{name.upper()}_SEC")
+    if override is None:
+        return default
+    return _env_seconds(f"AGENT_TIMEOUT_{name.upper()}_SEC", default or 0.0)
+
+
+def _prior_stages(request_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Reusable stage results saved with the case's current `agent_outputs` rows."""
+
+    prior: Dict[str, Dict[str, Any]] = {}
+    for row in _safe_list(request_data.get("agent_outputs")):
+        if not isinstance(row, dict):
+            continue
+        output = row.get("output_json")
+        if isinstance(output, str):
+            try:
+                output = json.loads(output)
+            except ValueError:
+                continue
+        reuse = output.get("reuse") if isinstance(output, dict) else None
+        if isinstance(reuse, dict) and reuse.get("input_fingerprint") and "result" in reuse:
+            prior[str(row.get("agent_name"))] = reuse
+    return prior
+
+
+def _prepare_context(
+    request_data: Dict[str, Any],
+    payment_context: Optional[Dict[str, Any]],
+    started: float,
+    force: bool = False,
+) -> Dict[str, Any]:
+    case_id = request_data.get("case_id") or request_data.get("request_id") or "unknown"
+    if payment_context:
+        request_data = {**request_data, "payment_history": payment_context}
+
+    payment_summary = request_data.get("payment_behavior_summary")
+    if not payment_summary and payment_context:
+        payment_summary = payment_context.get("payment_behavior_summary")
+    if payment_summary:
+        request_data = {**request_data, "payment_behavior_summary": payment_summary}
+
+    budget = _env_seconds("ORCHESTRATOR_DEADLINE_SEC", 45.0)
+    return {
+        "case_id": case_id,
+        "request_data": request_data,
+        "payment_context": payment_context,
+        "payment_summary": payment_summary,
+        "request_image_flags": _safe_list(request_data.get("image_flags", [])),
+        "budget": budget,
+        "started": started,
+        "deadline": started + budget if budget is not None else None,
+        # stage name -> "timeout" | "error"; first reason wins
+        "degraded": {},
+        "prior": {} if force else _prior_stages(request_data),
+        # stage name -> fingerprint of the arguments its agent was called with
+        "stage_fingerprints": {},
+        "reused": set(),
+        # stage name -> perf_counter() when it started / {"ms", "nodes", ...}
+        "stage_started": {},
+        "timings": {},
     }
 
+
+@dataclass(frozen=True)
+class _AgentStep:
+    """How one pipeline stage calls its agent.
+
+    `prepare` turns the context and upstream results into call arguments plus
+    private state for `finish`; `fallback` stands in for the agent's output when
+    it is not installed (`failed=False`) or raised (`failed=True`); `finish`
+    shapes the raw output into the stage result. When the agent runs out of
+    time, agents with `rules_fallback` are re-run with the LLM switched off;
+    the others get `fallback`.
+    """
+
+    name: str
+    entry_point: str
+    prepare: Callable[[Dict[str, Any], Dict[str, Any]], Tuple[tuple, Dict[str, Any], Any]]
+    fallback: Callable[[Dict[str, Any], bool], Dict[str, Any]]
+    finish: Optional[Callable[[Dict[str, Any], Any, Dict[str, Any]], Any]] = None
+    depends_on: Tuple[str, ...] = ()
+    rules_fallback: bool = True
+
+
+def _fallback(template: Dict[str, Any], failed_confidence: float, confidence_key: str = "confidence"):
+    def _build(ctx: Dict[str, Any], failed: bool) -> Dict[str, Any]:
+        return {
+            "case_id": ctx["case_id"],
+            **{key: dict(value) for key, value in template.items()},
+            confidence_key: failed_confidence if failed else 0.0,
+        }
+    return _build
+
+
+def _prepare_document(ctx: Dict[str, Any], _: Dict[str, Any]):
+    request_data = ctx["request_data"]
+    return ({
+        "case_id": ctx["case_id"],
+        "declared_profile": request_data.get("declared_profile") or _build_declared_profile(request_data),
+        "documents": _build_documents_payload(request_data),
+    },), {}, None
+
+
+def _prepare_behavior(ctx: Dict[str, Any], _: Dict[str, Any]):
+    return ({
+        "case_id": ctx["case_id"],
+        "telemetry": ctx["request_data"].get("telemetry") or {},
+        "payment_behavior_summary": ctx["payment_summary"],
+        "payment_history": ctx["payment_context"],
+    },), {}, None
+
+
+def _prepare_similarity(ctx: Dict[str, Any], _: Dict[str, Any]):
+    payload = {**_build_similarity_payload(ctx["request_data"]), "payment_behavior_summary": ctx["payment_summary"]}
+    return (payload,), {}, None
+
+
+def _prepare_image(ctx: Dict[str, Any], _: Dict[str, Any]):
+    return ({"case_id": ctx["case_id"], "image_flags": ctx["request_image_flags"]},), {}, None
+
+
+def _prepare_fraud(ctx: Dict[str, Any], inputs: Dict[str, Any]):
+    payload = _build_fraud_payload(
+        ctx["request_data"],
+        ctx["case_id"],
+        ctx["payment_context"],
+        ctx["request_image_flags"],
+        inputs["document"],
+        inputs["behavior"],
+        inputs["similarity"],
+        inputs["image"],
+    )
+    return (payload,), {}, None
+
+
+_AGENT_RESULT_KEYS = {
+    "document": "document_agent",
+    "similarity": "similarity_agent",
+    "behavior": "behavior_agent",
+    "fraud": "fraud_agent",
+    "image": "image_agent",
+}
+
+
+def _agent_results(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: inputs[name] for name, key in _AGENT_RESULT_KEYS.items()}
+
+
+def _agent_execution_times(ctx: Dict[str, Any]) -> Dict[str, float]:
+    return {key: ctx["timings"][name]["ms"] for name, key in _AGENT_RESULT_KEYS.items() if name in ctx["timings"]}
+
+
+def _prepare_decision(ctx: Dict[str, Any], inputs: Dict[str, Any]):
+    case_id = ctx["case_id"]
+    request_data = ctx["request_data"]
     if orchestrate_decision:
-        orchestrator_output = orchestrate_decision({"case_id": case_id, **request_data}, agent_results)
-        proposed = orchestrator_output.get("proposed_decision", "review")
-        confidence = orchestrator_output.get("decision_confidence", 0.0)
+        orchestrator_output = orchestrate_decision(
+            {"case_id": case_id, **request_data},
+            _agent_results(inputs),
+            _agent_execution_times(ctx),
+        )
     else:
         orchestrator_output = {
             "case_id": case_id,
@@ -628,27 +758,37 @@ def run_orchestrator(request_data: Dict[str, Any]) -> Dict[str, Any]:
             "human_review_required": True,
             "aggregated_signals": {},
         }
-        proposed = "review"
-        confidence = 0.0
 
-    reason_codes = _derive_reason_codes(request_data, doc_result, behavior_result, sim_result, fraud_result, image_result)
+    reason_codes = _derive_reason_codes(
+        request_data,
+        inputs["document"],
+        inputs["behavior"],
+        inputs["similarity"],
+        inputs["fraud"],
+        inputs["image"],
+    )
+    args = (inputs["document"], inputs["similarity"])
+    kwargs = {
+        "behavior_result": inputs["behavior"],
+        "payment_summary": ctx["payment_summary"],
+        "fraud_result": inputs["fraud"],
+        "image_result": inputs["image"],
+        "orchestrator_output": orchestrator_output,
+        "reason_codes": reason_codes,
+        "case_id": str(case_id),
+    }
+    return args, kwargs, {"orchestrator_output": orchestrator_output, "reason_codes": reason_codes}
 
-    decision_agent_raw: Dict[str, Any] = {}
-    if make_decision_payload:
-        try:
-            decision_agent_raw = make_decision_payload(
-                doc_result,
-                sim_result,
-                behavior_result=behavior_result,
-                payment_summary=payment_summary,
-                fraud_result=fraud_result,
-                image_result=image_result,
-                orchestrator_output=orchestrator_output,
-                reason_codes=reason_codes,
-                case_id=str(case_id),
-            )
-        except Exception:
-            decision_agent_raw = {}
+
+def _finish_decision(ctx: Dict[str, Any], state: Dict[str, Any], decision_agent_raw: Dict[str, Any]) -> Dict[str, Any]:
+    orchestrator_output = state["orchestrator_output"]
+    reason_codes = state["reason_codes"]
+    if orchestrate_decision:
+        proposed = orchestrator_output.get("proposed_decision", "review")
+        confidence = orchestrator_output.get("decision_confidence", 0.0)
+    else:
+        proposed = "review"
+        confidence = 0.0
 
     decision_choice = decision_agent_raw.get("decision") or proposed
     decision_label = _normalize_decision_label(str(decision_choice))
@@ -671,7 +811,7 @@ def run_orchestrator(request_data: Dict[str, Any]) -> Dict[str, Any]:
         decision_reason_codes = reason_codes
 
     decision_payload = {
-        "case_id": case_id,
+        "case_id": ctx["case_id"],
         "decision": decision_label,
         "decision_raw": decision_agent_raw.get("decision_raw", decision_choice),
         "reason_codes": decision_reason_codes,
@@ -681,6 +821,336 @@ def run_orchestrator(request_data: Dict[str, Any]) -> Dict[str, Any]:
     if isinstance(decision_agent_raw.get("summary"), str):
         decision_payload["summary"] = decision_agent_raw.get("summary")
 
+    return {
+        "payload": decision_payload,
+        "raw": decision_agent_raw,
+        "orchestrator_output": orchestrator_output,
+        "reason_codes": reason_codes,
+    }
+
+
+def _prepare_explanation(ctx: Dict[str, Any], inputs: Dict[str, Any]):
+    args = (inputs["decision"]["payload"], inputs["document"], inputs["similarity"])
+    kwargs = {
+        "behavior_result": inputs["behavior"],
+        "fraud_result": inputs["fraud"],
+        "image_result": inputs["image"],
+        "payment_behavior_summary": ctx["payment_summary"],
+    }
+    return args, kwargs, None
+
+
+_ANALYSIS_STAGES = ("document", "behavior", "similarity", "image")
+
+# the four analysis agents are independent; fraud needs all of them, decision
+# needs fraud, and explanation needs the decision
+_AGENT_STEPS: Tuple[_AgentStep, ...] = (
+    _AgentStep("document", "analyze_documents", _prepare_document, _fallback({"document_analysis": {}}, 0.4)),
+    _AgentStep("behavior", "analyze_behavior", _prepare_behavior, _fallback({"behavior_analysis": {}}, 0.4)),
+    _AgentStep(
+        "similarity",
+        "analyze_similarity",
+        _prepare_similarity,
+        _fallback({"ai_analysis": {}, "rag_statistics": {}}, 0.3),
+        # without the LLM it would still wait on Qdrant and the embedder
+        rules_fallback=False,
+    ),
+    _AgentStep("image", "analyze_images", _prepare_image, _fallback({"image_analysis": {}}, 0.4)),
+    _AgentStep(
+        "fraud",
+        "analyze_fraud",
+        _prepare_fraud,
+        _fallback({"fraud_analysis": {}}, 0.4),
+        depends_on=_ANALYSIS_STAGES,
+    ),
+    _AgentStep(
+        "decision",
+        "make_decision_payload",
+        _prepare_decision,
+        lambda _ctx, _failed: {},
+        finish=_finish_decision,
+        depends_on=_ANALYSIS_STAGES + ("fraud",),
+    ),
+    _AgentStep(
+        "explanation",
+        "explain_decision",
+        _prepare_explanation,
+        _fallback({"explanation": {}}, 0.3, confidence_key="explanation_confidence"),
+        depends_on=_ANALYSIS_STAGES + ("fraud", "decision"),
+    ),
+)
+
+
+def _step_slice(step: _AgentStep, ctx: Dict[str, Any]) -> Optional[float]:
+    timeout = _agent_timeout(step.name)
+    if ctx["deadline"] is not None:
+        left = ctx["deadline"] - time.monotonic()
+        timeout = left if timeout is None else min(timeout, left)
+    return timeout
+
+
+def _record_timing(step: _AgentStep, ctx: Dict[str, Any], nodes: Dict[str, float], **extra: Any) -> None:
+    elapsed = (time.perf_counter() - ctx["stage_started"][step.name]) * 1000.0
+    ctx["timings"][step.name] = {"ms": round(elapsed, 2), "nodes": dict(nodes), **extra}
+
+
+def _finish_timing(step: _AgentStep, ctx: Dict[str, Any], nodes: Dict[str, float]) -> None:
+    # a stage that overran its slice was already recorded by the timeout path
+    if ctx["degraded"].get(step.name) != "timeout":
+        _record_timing(step, ctx, nodes)
+
+
+def _reused_result(step: _AgentStep, ctx: Dict[str, Any], args: tuple, kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The stage's saved result when its agent would be called with the same arguments."""
+
+    fingerprint = _stage_fingerprint(step, args, kwargs)
+    ctx["stage_fingerprints"][step.name] = fingerprint
+    prior = ctx["prior"].get(step.name)
+    if prior is None or prior.get("input_fingerprint") != fingerprint:
+        return None
+    ctx["reused"].add(step.name)
+    return copy.deepcopy(prior["result"])
+
+
+def _call_agent(step: _AgentStep, ctx: Dict[str, Any], agent: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Any:
+    # on the worker thread: the agent's slice and the stage clock start once it picks the stage up
+    ctx["stage_started"][step.name] = time.perf_counter()
+    with agent_deadline(_step_slice(step, ctx)):
+        return agent(*args, **kwargs)
+
+
+async def _run_step_async(step: _AgentStep, ctx: Dict[str, Any], inputs: Dict[str, Any]) -> Any:
+    ctx["stage_started"][step.name] = time.perf_counter()
+    args, kwargs, state = step.prepare(ctx, inputs)
+    reused = _reused_result(step, ctx, args, kwargs)
+    if reused is not None:
+        _record_timing(step, ctx, {}, reused=True)
+        return reused
+    agent = globals().get(step.entry_point)
+    agent_async = globals().get(step.entry_point + "_async")
+    with collect_node_timings() as nodes, span("agent." + step.name):
+        if agent is None:
+            raw = step.fallback(ctx, False)
+        else:
+            try:
+                if agent_async is not None:
+                    with agent_deadline(_step_slice(step, ctx)):
+                        raw = await agent_async(*args, **kwargs)
+                else:
+                    raw = await run_blocking(_call_agent, step, ctx, agent, args, kwargs)
+            except Exception:
+                ctx["degraded"].setdefault(step.name, "error")
+                raw = step.fallback(ctx, True)
+    result = step.finish(ctx, state, raw) if step.finish else raw
+    _finish_timing(step, ctx, nodes)
+    return result
+
+
+def _run_step_timed_out(step: _AgentStep, ctx: Dict[str, Any], inputs: Dict[str, Any]) -> Any:
+    """Stage result for an agent that used up its slice: its rule-based output."""
+
+    ctx["stage_started"].setdefault(step.name, time.perf_counter())
+    args, kwargs, state = step.prepare(ctx, inputs)
+    reused = _reused_result(step, ctx, args, kwargs)
+    if reused is not None:
+        _record_timing(step, ctx, {}, reused=True)
+        return reused
+    ctx["degraded"].setdefault(step.name, "timeout")
+    agent = globals().get(step.entry_point)
+    raw = None
+    with collect_node_timings() as nodes, span("agent." + step.name, timed_out=True):
+        if agent is not None and step.rules_fallback:
+            try:
+                with rules_only():
+                    raw = agent(*args, **kwargs)
+            except Exception:
+                raw = None
+    if raw is None:
+        raw = step.fallback(ctx, True)
+    result = step.finish(ctx, state, raw) if step.finish else raw
+    # from the start of the abandoned run; nodes are those of the rule-based re-run
+    _record_timing(step, ctx, nodes, timed_out=True)
+    return result
+
+
+async def _run_step_timed_out_async(step: _AgentStep, ctx: Dict[str, Any], inputs: Dict[str, Any]) -> Any:
+    # the rule-based re-run is blocking: keep it off the event loop
+    return await run_blocking(_run_step_timed_out, step, ctx, inputs)
+
+
+def _pipeline(ctx: Dict[str, Any], run: Callable[..., Any], on_timeout: Callable[..., Any]) -> List[Stage]:
+    return [
+        Stage(
+            step.name,
+            partial(run, step, ctx),
+            step.depends_on,
+            timeout=_agent_timeout(step.name),
+            on_timeout=partial(on_timeout, step, ctx),
+        )
+        for step in _AGENT_STEPS
+    ]
+
+
+# fields that change without changing what the agents see
+_FINGERPRINT_IGNORED_KEYS = {"updated_at", "execution_timestamp", "execution_time_ms"}
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items() if k not in _FINGERPRINT_IGNORED_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def _agent_versions() -> Dict[str, Any]:
+    """`AGENT_VERSION` and configured model of every installed agent module.
+
+    Bumping an agent's `AGENT_VERSION` (or changing its model) invalidates
+    cached orchestrations.
+    """
+
+    return {step.name: _agent_version(step) for step in _AGENT_STEPS}
+
+
+def _agent_version(step: _AgentStep) -> Optional[Dict[str, Any]]:
+    agent = globals().get(step.entry_point)
+    module = sys.modules.get(getattr(agent, "__module__", "")) if agent is not None else None
+    if module is None:
+        return None
+    return {
+        "version": getattr(module, "AGENT_VERSION", None),
+        "model": getattr(module, "DECISION_LLM_MODEL", None) or getattr(module, "LLM_MODEL", None),
+    }
+
+
+def _stage_fingerprint(step: _AgentStep, args: tuple, kwargs: Dict[str, Any]) -> str:
+    """sha256 over the arguments one agent is called with and its version."""
+
+    effective = {"args": args, "kwargs": kwargs, "agent": _agent_version(step)}
+    encoded = json.dumps(_canonical(effective), sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _input_fingerprint(ctx: Dict[str, Any]) -> str:
+    """sha256 over everything the agents read for this case."""
+
+    request_data = ctx["request_data"]
+    documents = [
+        {
+            "doc_type": doc.get("doc_type"),
+            "filename": doc.get("filename"),
+            "sha256": hashlib.sha256(str(doc.get("raw_text") or "").encode("utf-8")).hexdigest(),
+        }
+        for doc in _build_documents_payload(request_data)
+    ]
+    effective = {
+        "case_id": str(ctx["case_id"]),
+        "declared_profile": request_data.get("declared_profile") or _build_declared_profile(request_data),
+        "profile": _build_similarity_payload(request_data),
+        "documents": documents,
+        "payment_summary": ctx["payment_summary"],
+        "payment_history": ctx["payment_context"],
+        "telemetry": request_data.get("telemetry") or {},
+        "image_flags": ctx["request_image_flags"],
+        "transaction_flags": _safe_list(request_data.get("transaction_flags", [])),
+        "free_text": _safe_list(request_data.get("free_text", [])),
+        "agents": _agent_versions(),
+    }
+    encoded = json.dumps(_canonical(effective), sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+_CACHE: Optional[TTLCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def _orchestration_cache() -> Optional[TTLCache]:
+    """Process-wide cache of orchestrations by input fingerprint (None when disabled)."""
+
+    global _CACHE
+    ttl = _env_seconds("ORCHESTRATION_CACHE_TTL_SEC", 900.0)
+    if ttl is None:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            try:
+                size = int(os.getenv("ORCHESTRATION_CACHE_SIZE", "256"))
+            except ValueError:
+                size = 256
+            _CACHE = TTLCache(maxsize=size, ttl=ttl)
+        return _CACHE
+
+
+def clear_orchestration_cache() -> None:
+    cache = _orchestration_cache()
+    if cache is not None:
+        cache.clear()
+
+
+def _cached_orchestration(ctx: Dict[str, Any], force: bool) -> Optional[Dict[str, Any]]:
+    cache = _orchestration_cache()
+    if cache is None:
+        return None
+    ctx["fingerprint"] = _input_fingerprint(ctx)
+    if force:
+        return None
+    cached = cache.get(ctx["fingerprint"])
+    if cached is None:
+        return None
+    orchestration = copy.deepcopy(cached)
+    orchestration["orchestrator"]["orchestration_metadata"]["cache_hit"] = True
+    return orchestration
+
+
+def _remember_orchestration(ctx: Dict[str, Any], orchestration: Dict[str, Any]) -> None:
+    cache = _orchestration_cache()
+    # a degraded run reflects a transient outage, not the inputs
+    if cache is None or not ctx.get("fingerprint") or ctx["degraded"]:
+        return
+    cache.set(ctx["fingerprint"], copy.deepcopy(orchestration))
+
+
+def _reusable_stages(ctx: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    # taken before assembly mutates the results; degraded stages must run again
+    return {
+        name: {"input_fingerprint": fingerprint, "result": copy.deepcopy(results[name])}
+        for name, fingerprint in ctx["stage_fingerprints"].items()
+        if name in results and name not in ctx["degraded"]
+    }
+
+
+def _record_stage_metrics(ctx: Dict[str, Any]) -> None:
+    for name, timing in ctx["timings"].items():
+        if not timing.get("reused"):
+            AGENT_SECONDS.observe(timing["ms"] / 1000.0, name)
+    for name, reason in ctx["degraded"].items():
+        AGENT_FALLBACKS.inc(name, reason)
+
+
+def _assemble_orchestration(ctx: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    case_id = ctx["case_id"]
+    stages = _reusable_stages(ctx, results)
+    doc_result = results["document"]
+    sim_result = results["similarity"]
+    behavior_result = results["behavior"]
+    fraud_result = results["fraud"]
+    image_result = results["image"]
+    explanation_result = results["explanation"]
+    decision = results["decision"]
+    decision_payload = decision["payload"]
+    decision_agent_raw = decision["raw"]
+    orchestrator_output = decision["orchestrator_output"]
+    metadata = orchestrator_output.setdefault("orchestration_metadata", {})
+    metadata["latency_budget_ms"] = round(ctx["budget"] * 1000) if ctx["budget"] is not None else None
+    metadata["degraded_agents"] = dict(ctx["degraded"])
+    metadata["input_fingerprint"] = ctx.get("fingerprint")
+    metadata["cache_hit"] = False
+    metadata["reused_agents"] = sorted(ctx["reused"])
+    metadata["stage_timings"] = copy.deepcopy(ctx["timings"])
+    metadata["total_ms"] = round((time.monotonic() - ctx["started"]) * 1000.0, 2)
+
+    agent_results = _agent_results(results)
     agent_results["decision_agent"] = decision_agent_raw or {
         "decision": decision_payload.get("decision"),
         "decision_confidence": decision_payload.get("decision_confidence"),
@@ -688,22 +1158,6 @@ def run_orchestrator(request_data: Dict[str, Any]) -> Dict[str, Any]:
         "human_review_required": decision_payload.get("human_review_required"),
     }
 
-    if explain_decision:
-        try:
-            explanation_result = explain_decision(
-                decision_payload,
-                doc_result,
-                sim_result,
-                behavior_result=behavior_result,
-                fraud_result=fraud_result,
-                image_result=image_result,
-                payment_behavior_summary=payment_summary,
-            )
-        except Exception:
-            explanation_result = {"case_id": case_id, "explanation": {}, "explanation_confidence": 0.3}
-    else:
-        explanation_result = {"case_id": case_id, "explanation": {}, "explanation_confidence": 0.0}
-
     agent_bundle = _build_agent_bundle(doc_result, sim_result, behavior_result, fraud_result, image_result, explanation_result)
     agent_bundle["decision"] = _build_decision_agent_output(
         decision_payload,
@@ -715,7 +1169,7 @@ def run_orchestrator(request_data: Dict[str, Any]) -> Dict[str, Any]:
     if customer_summary:
         summary = customer_summary
     else:
-        final_reasons = decision_payload.get("reason_codes") or reason_codes
+        final_reasons = decision_payload.get("reason_codes") or decision["reason_codes"]
         reasons = ", ".join(final_reasons) if final_reasons else "aucun signal majeur"
         summary = f"Decision proposee: {decision_payload['decision']} | Raisons: {reasons}"
 
@@ -728,4 +1182,73 @@ def run_orchestrator(request_data: Dict[str, Any]) -> Dict[str, Any]:
         "agents_raw": agent_results,
         "summary": summary,
         "customer_explanation": customer_expl.get("summary"),
+        "stages": stages,
     }
+
+
+def run_orchestrator(request_data: Dict[str, Any], force: bool = False) -> Dict[str, Any]:
+    """Execute agents, aggregate outputs, and produce an explanation-ready payload.
+
+    An orchestration cached for the same input fingerprint is returned as is
+    unless `force` is set. Otherwise, when `request_data` carries the case's
+    `agent_outputs` (as `fetch_case_detail` returns them), every agent whose
+    arguments match those of its saved run is skipped and its saved result
+    reused, so only the agents downstream of a change run again; `force`
+    disables this too, and makes the agents skip the LLM response cache.
+
+    A thin wrapper for threads without an event loop (worker job slots, sync
+    routes, scripts): it runs `run_orchestrator_async` on a loop of its own.
+    """
+
+    return asyncio.run(_run_on_own_loop(request_data, force))
+
+
+def _blocking_workers() -> int:
+    # one per agent stage and per rule-based re-run of a timed-out one, plus the payment context load
+    needed = 2 * len(_AGENT_STEPS) + 1
+    try:
+        cap = int(os.getenv("ORCHESTRATOR_MAX_WORKERS", "0"))
+    except ValueError:
+        cap = 0
+    return min(cap, needed) if cap > 0 else needed
+
+
+async def _run_on_own_loop(request_data: Dict[str, Any], force: bool) -> Dict[str, Any]:
+    # Blocking work (DB, embeddings, rule-based re-runs) gets a pool of this
+    # run: asyncio.run joins the default executor's threads on exit, which
+    # would wait for a stage abandoned at its deadline. The loop's async
+    # clients are closed with it.
+    with blocking_pool(_blocking_workers()):
+        try:
+            return await run_orchestrator_async(request_data, force)
+        finally:
+            await close_loop_resources()
+
+
+async def run_orchestrator_async(request_data: Dict[str, Any], force: bool = False) -> Dict[str, Any]:
+    """`run_orchestrator` on the running event loop, for `async def` routes.
+
+    Every agent has a native `*_async` entry point: its LLM calls go through
+    the loop's shared `AsyncOpenAI` (`allm_client`), the similarity agent's
+    searches through an `AsyncQdrantClient`, and a stage waiting on either
+    holds no thread, so one process can keep hundreds of cases in flight.
+    What stays blocking (psycopg2 queries, the embedding model, the
+    rule-based re-run of a timed-out stage, agents without an async entry
+    point) runs on `run_blocking`'s pool.
+    """
+
+    with ORCHESTRATIONS_IN_FLIGHT.track_inprogress(), span("orchestrator", force=force), bypass_llm_cache(force):
+        started = time.monotonic()
+        payment_context = await run_blocking(_load_payment_context, request_data)
+        ctx = _prepare_context(request_data, payment_context, started, force)
+        cached = _cached_orchestration(ctx, force)
+        if cached is not None:
+            return cached
+        results = await run_stages_async(
+            _pipeline(ctx, _run_step_async, _run_step_timed_out_async),
+            deadline=ctx["deadline"],
+        )
+        _record_stage_metrics(ctx)
+        orchestration = _assemble_orchestration(ctx, results)
+        _remember_orchestration(ctx, orchestration)
+        return orchestration
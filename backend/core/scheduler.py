@@ -0,0 +1,381 @@
+"""Dependency-aware stage scheduler for the agent pipeline.
+
+A pipeline is a list of `Stage`s. Each stage names the stages whose results
+it needs; `run_stages` submits every stage whose dependencies are done to a
+thread pool of its own and starts downstream stages as soon as their inputs
+are ready, so wall time follows the slowest branch rather than the sum of all
+stages. The pool lives for one run, so concurrent orchestrations never queue
+behind each other's agents (threads are only started as stages need them).
+
+`run_stages_async` is the event-loop twin: stages may be coroutine functions
+and are awaited as tasks, and `run_blocking` moves sync work onto the loop's
+default executor so `async def` routes never block the loop. That executor
+is shared and sized by asyncio (min(32, cpu + 4) threads), so sync stages of
+concurrent async runs do queue behind each other once it is full; stages
+that only await async clients hold no thread at all. Inside
+`blocking_pool(n)`, `run_blocking` uses a pool of its own instead, left to
+finish abandoned work in the background when the block exits.
+
+Async clients are bound to the event loop they were opened on, so they are
+kept per loop: `loop_resource(key, build)` returns the running loop's
+instance, built on first use, and `close_loop_resources()` closes them.
+
+A stage may carry a `timeout`, counted from when a thread starts running it
+(an async stage's clock stops while it waits for a `run_blocking` thread);
+`run_stages(..., deadline=...)` further caps every stage by a shared monotonic
+deadline, which also covers the time spent waiting for a thread. A stage that
+runs out of time is abandoned (its thread cannot be interrupted, so agents
+bound their own I/O) and `on_timeout(inputs)` supplies its result instead;
+it runs on the pool like a stage, without a slice of its own.
+
+`ORCHESTRATOR_MAX_WORKERS` caps the threads of one `run_stages` run (default:
+one per stage, plus one per `on_timeout`), as it does the orchestrator's
+`blocking_pool`. `ORCHESTRATOR_PARALLEL=0` runs stages inline in dependency order,
+which is handy when debugging an agent.
+"""
+
+import asyncio
+import contextvars
+import inspect
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One node of the pipeline.
+
+    `run` (a plain or coroutine function) receives the results of the stages
+    listed in `depends_on`, keyed by stage name, and returns this stage's result.
+    Without `on_timeout`, running out of time raises `TimeoutError`.
+    """
+
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    on_timeout: Optional[Callable[[Dict[str, Any]], Any]] = None
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _pool_size(stages: List[Stage]) -> int:
+    # an abandoned stage keeps its thread while its on_timeout runs on another
+    needed = len(stages) + sum(1 for stage in stages if stage.on_timeout is not None)
+    cap = _env_int("ORCHESTRATOR_MAX_WORKERS", 0)
+    return max(1, min(cap, needed) if cap > 0 else needed)
+
+
+def _validate(stages: List[Stage]) -> Dict[str, Stage]:
+    by_name: Dict[str, Stage] = {}
+    for stage in stages:
+        if stage.name in by_name:
+            raise ValueError(f"duplicate stage: {stage.name}")
+        by_name[stage.name] = stage
+    for stage in stages:
+        missing = [dep for dep in stage.depends_on if dep not in by_name]
+        if missing:
+            raise ValueError(f"stage {stage.name} depends on unknown stages: {', '.join(missing)}")
+    return by_name
+
+
+def _inputs(stage: Stage, results: Dict[str, Any]) -> Dict[str, Any]:
+    return {dep: results[dep] for dep in stage.depends_on}
+
+
+def _budget(stage: Stage, deadline: Optional[float]) -> Optional[float]:
+    budget = stage.timeout
+    if deadline is not None:
+        left = deadline - time.monotonic()
+        budget = left if budget is None else min(budget, left)
+    return budget
+
+
+def _run_started(started: List[float], run: Callable[..., Any], *args: Any) -> Any:
+    started.append(time.monotonic())
+    return run(*args)
+
+
+def _expiry(stage: Stage, started: List[float], deadline: Optional[float], now: float) -> Optional[float]:
+    """When a submitted stage runs out of time: its slice counts from its start, not its submission."""
+    expiry = deadline
+    if stage.timeout is not None:
+        # still queued: its slice cannot end before now + timeout
+        slice_end = (started[0] if started else now) + stage.timeout
+        expiry = slice_end if expiry is None else min(expiry, slice_end)
+    return expiry
+
+
+def _timed_out(stage: Stage, inputs: Dict[str, Any]) -> Any:
+    if stage.on_timeout is None:
+        raise TimeoutError(f"stage {stage.name} ran out of time")
+    return stage.on_timeout(inputs)
+
+
+def _run_inline(stages: List[Stage]) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    pending = list(stages)
+    while pending:
+        ready = [stage for stage in pending if all(dep in results for dep in stage.depends_on)]
+        if not ready:
+            raise ValueError("stage dependencies form a cycle: " + ", ".join(s.name for s in pending))
+        for stage in ready:
+            results[stage.name] = stage.run(_inputs(stage, results))
+            pending.remove(stage)
+    return results
+
+
+def run_stages(
+    stages: List[Stage],
+    executor: Optional[ThreadPoolExecutor] = None,
+    deadline: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Run `stages` respecting dependencies and return `{name: result}`.
+
+    The first stage that raises cancels the stages not yet started and its
+    exception propagates to the caller. Timeouts are not enforced in inline
+    mode (`ORCHESTRATOR_PARALLEL=0`).
+    """
+
+    _validate(stages)
+    if executor is not None:
+        return _run_parallel(stages, executor, deadline)
+    if os.getenv("ORCHESTRATOR_PARALLEL", "1") == "0":
+        return _run_inline(stages)
+    own = ThreadPoolExecutor(max_workers=_pool_size(stages), thread_name_prefix="agent")
+    try:
+        return _run_parallel(stages, own, deadline)
+    finally:
+        # abandoned stages finish in the background; their threads exit afterwards
+        own.shutdown(wait=False)
+
+
+def _run_parallel(stages: List[Stage], executor: ThreadPoolExecutor, deadline: Optional[float]) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    pending = list(stages)
+    # future -> (stage, inputs, [monotonic start] once a thread runs it, whether it runs on_timeout)
+    running: Dict[Future, Tuple[Stage, Dict[str, Any], List[float], bool]] = {}
+
+    def _submit(stage: Stage, inputs: Dict[str, Any], fallback: bool) -> None:
+        started: List[float] = []
+        run = _timed_out if fallback else stage.run
+        args = (stage, inputs) if fallback else (inputs,)
+        # each stage in its own copy of the caller's context (tracing spans)
+        future = executor.submit(contextvars.copy_context().run, _run_started, started, run, *args)
+        running[future] = (stage, inputs, started, fallback)
+
+    try:
+        while pending or running:
+            ready = [stage for stage in pending if all(dep in results for dep in stage.depends_on)]
+            for stage in ready:
+                pending.remove(stage)
+                budget = _budget(stage, deadline)
+                _submit(stage, _inputs(stage, results), budget is not None and budget <= 0)
+            if not running:
+                raise ValueError("stage dependencies form a cycle: " + ", ".join(s.name for s in pending))
+
+            now = time.monotonic()
+            # the on_timeout fallbacks have no slice of their own
+            expiries = [_expiry(stage, started, deadline, now) for stage, _, started, fallback in running.values() if not fallback]
+            expiries = [expiry for expiry in expiries if expiry is not None]
+            wait_for = max(0.0, min(expiries) - now) if expiries else None
+            done, _ = wait(list(running), timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, _, _, _ = running.pop(future)
+                results[stage.name] = future.result()
+            now = time.monotonic()
+            for future, (stage, inputs, started, fallback) in list(running.items()):
+                expiry = None if fallback else _expiry(stage, started, deadline, now)
+                if expiry is not None and now >= expiry:
+                    del running[future]
+                    future.cancel()
+                    # off this thread, so other stages keep being collected and started meanwhile
+                    _submit(stage, inputs, True)
+    finally:
+        for future in running:
+            future.cancel()
+    return results
+
+
+class _StageClock:
+    """Running time of an async stage, leaving out its waits for an executor thread."""
+
+    __slots__ = ("started", "queued", "waiting_since")
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.queued = 0.0
+        self.waiting_since: Optional[float] = None
+
+    def wait_for_thread(self) -> None:
+        if self.waiting_since is None:
+            self.waiting_since = time.monotonic()
+
+    def thread_started(self) -> None:
+        waiting_since, self.waiting_since = self.waiting_since, None
+        if waiting_since is not None:
+            self.queued += time.monotonic() - waiting_since
+
+    def slice_end(self, timeout: float, now: float) -> float:
+        waiting = now - self.waiting_since if self.waiting_since is not None else 0.0
+        return self.started + self.queued + waiting + timeout
+
+
+# clock of the async stage the current task runs, if any
+_CLOCK: contextvars.ContextVar[Optional[_StageClock]] = contextvars.ContextVar("stage_clock", default=None)
+# pool `run_blocking` uses instead of the loop's default executor, if any
+_EXECUTOR: contextvars.ContextVar[Optional[Executor]] = contextvars.ContextVar("blocking_executor", default=None)
+
+
+@contextmanager
+def blocking_pool(max_workers: int) -> Iterator[None]:
+    """Run this context's `run_blocking` calls on a pool of their own.
+
+    On exit the pool is shut down without waiting, so an abandoned stage's
+    thread does not hold up the caller (`asyncio.run` would otherwise join
+    every thread of the loop's default executor before returning).
+    """
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="agent")
+    token = _EXECUTOR.set(pool)
+    try:
+        yield
+    finally:
+        _EXECUTOR.reset(token)
+        pool.shutdown(wait=False)
+
+
+# event loop -> {key: async client opened on it}
+_LOOP_RESOURCES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, Any]]" = weakref.WeakKeyDictionary()
+_LOOP_LOCK = threading.Lock()
+
+
+def loop_resource(key: Hashable, build: Callable[[], Any]) -> Any:
+    """The running loop's `build()` for `key`, built on first use (None results are not kept)."""
+    loop = asyncio.get_running_loop()
+    with _LOOP_LOCK:
+        resources = _LOOP_RESOURCES.setdefault(loop, {})
+        if key in resources:
+            return resources[key]
+    resource = build()
+    if resource is None:
+        return None
+    with _LOOP_LOCK:
+        return resources.setdefault(key, resource)
+
+
+async def close_loop_resources() -> None:
+    """Close the async clients opened on the running loop (`aclose()` or `close()`)."""
+    with _LOOP_LOCK:
+        resources = _LOOP_RESOURCES.pop(asyncio.get_running_loop(), {})
+    for resource in resources.values():
+        closer = getattr(resource, "aclose", None) or getattr(resource, "close", None)
+        if closer is None:
+            continue
+        try:
+            await _maybe_await(closer())
+        except Exception as exc:
+            print(f"[WARN] Failed to close {type(resource).__name__}: {exc}")
+
+
+def _in_thread(clock: Optional[_StageClock], fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    if clock is not None:
+        clock.thread_started()
+    return fn(*args, **kwargs)
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Await a blocking call on the loop's default executor (or the `blocking_pool`).
+
+    Inside a `run_stages_async` stage, the time spent waiting for a thread is
+    not counted against the stage's timeout.
+    """
+
+    loop = asyncio.get_running_loop()
+    clock = _CLOCK.get()
+    if clock is not None:
+        clock.wait_for_thread()
+    # carry context variables (agent deadlines) into the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_EXECUTOR.get(), partial(context.run, _in_thread, clock, fn, *args, **kwargs))
+
+
+async def _maybe_await(outcome: Any) -> Any:
+    if inspect.isawaitable(outcome):
+        return await outcome
+    return outcome
+
+
+def _async_expiry(stage: Stage, clock: _StageClock, deadline: Optional[float], now: float) -> Optional[float]:
+    expiry = deadline
+    if stage.timeout is not None:
+        slice_end = clock.slice_end(stage.timeout, now)
+        expiry = slice_end if expiry is None else min(expiry, slice_end)
+    return expiry
+
+
+async def _await_stage(stage: Stage, inputs: Dict[str, Any], deadline: Optional[float]) -> Any:
+    budget = _budget(stage, deadline)
+    if budget is not None and budget <= 0:
+        return await _maybe_await(_timed_out(stage, inputs))
+    if budget is None:
+        return await _maybe_await(stage.run(inputs))
+    clock = _StageClock()
+    # the stage's task (a copy of this context) reports its thread waits to the clock
+    _CLOCK.set(clock)
+    task = asyncio.ensure_future(_maybe_await(stage.run(inputs)))
+    try:
+        while True:
+            now = time.monotonic()
+            expiry = _async_expiry(stage, clock, deadline, now)
+            done, _ = await asyncio.wait({task}, timeout=max(0.0, expiry - now) if expiry is not None else None)
+            if done:
+                return task.result()
+            now = time.monotonic()
+            expiry = _async_expiry(stage, clock, deadline, now)
+            if expiry is not None and now >= expiry:
+                task.cancel()
+                return await _maybe_await(_timed_out(stage, inputs))
+    finally:
+        task.cancel()
+
+
+async def run_stages_async(stages: List[Stage], deadline: Optional[float] = None) -> Dict[str, Any]:
+    """Async `run_stages`: each ready stage becomes a task on the running loop.
+
+    Sync `run` callables execute on the loop itself, so they must be cheap;
+    wrap blocking work with `run_blocking`.
+    """
+
+    _validate(stages)
+    results: Dict[str, Any] = {}
+    pending = list(stages)
+    running: Dict[asyncio.Task, Stage] = {}
+    try:
+        while pending or running:
+            ready = [stage for stage in pending if all(dep in results for dep in stage.depends_on)]
+            for stage in ready:
+                pending.remove(stage)
+                task = asyncio.ensure_future(_await_stage(stage, _inputs(stage, results), deadline))
+                running[task] = stage
+            if not running:
+                raise ValueError("stage dependencies form a cycle: " + ", ".join(s.name for s in pending))
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                stage = running.pop(task)
+                results[stage.name] = task.result()
+    finally:
+        for task in running:
+            task.cancel()
+    return results
@@ -0,0 +1,107 @@
+"""Coalescing of identical concurrent calls ("single flight").
+
+`group.do(key, fn)` runs `fn()` unless a call with the same key is already
+running in another thread; it then waits for that call and returns its result
+(or raises its exception). `await group.ado(key, afn)` is the same for
+coroutine functions, and sync and async callers join each other's flights,
+whichever thread or event loop they run on. When several bankers open the
+same case, or a rerun overlaps a queued orchestration, identical LLM prompts,
+embeddings and Qdrant searches therefore reach the provider once.
+
+Only calls in flight are shared, nothing is remembered once the leader
+returns: the response caches (`agents.llm_cache`) cover repeated calls.
+Results are handed to every caller of the flight and must be treated as
+read-only. SINGLE_FLIGHT_ENABLED=0 turns coalescing off.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from core.metrics import SINGLE_FLIGHT_SHARED
+
+
+class SingleFlight:
+    """Per-key coalescing of concurrent calls of one kind (`llm`, `embedding`, ...)."""
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """`fn()`, or the result of the identical call in flight.
+
+        A caller joining a flight waits at most `timeout` seconds (None: until
+        the leader returns) and then raises TimeoutError, as its own call would
+        have timed out.
+        """
+        if os.getenv("SINGLE_FLIGHT_ENABLED", "1") == "0":
+            return fn()
+        flight, leader = self._join(key)
+        if not leader:
+            try:
+                return flight.result(timeout)
+            except TimeoutError:
+                if flight.done():
+                    raise
+                raise TimeoutError(f"{self.kind} call still in flight after {timeout}s") from None
+        try:
+            value = fn()
+        except BaseException as exc:
+            self._land(key, flight, error=exc)
+            raise
+        self._land(key, flight, value=value)
+        return value
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """`await fn()`, or the result of the identical call in flight (sync or async)."""
+        if os.getenv("SINGLE_FLIGHT_ENABLED", "1") == "0":
+            return await fn()
+        flight, leader = self._join(key)
+        if not leader:
+            try:
+                # shielded: a joiner giving up must not cancel the leader's call
+                return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(flight)), timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"{self.kind} call still in flight after {timeout}s") from None
+        try:
+            value = await fn()
+        except asyncio.CancelledError:
+            # the leader's caller gave up; its joiners must not see that as their own cancellation
+            self._land(key, flight, error=TimeoutError(f"{self.kind} call abandoned by its caller"))
+            raise
+        except BaseException as exc:
+            self._land(key, flight, error=exc)
+            raise
+        self._land(key, flight, value=value)
+        return value
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+        if not leader:
+            SINGLE_FLIGHT_SHARED.inc(self.kind)
+        return flight, leader
+
+    def _land(self, key: Hashable, flight: Future, value: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._flights.pop(key, None)
+        if error is not None:
+            flight.set_exception(error)
+        else:
+            flight.set_result(value)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+LLM_CALLS = SingleFlight("llm")
+EMBEDDINGS = SingleFlight("embedding")
+QDRANT_SEARCHES = SingleFlight("qdrant")
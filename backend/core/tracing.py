@@ -0,0 +1,256 @@
+"""Request-scoped span tracing.
+
+`start_trace()` opens the root span of a trace (one per API request or worker
+job); `span()` opens a child of whatever span is current. The current span
+lives in a context variable, so spans follow the request through
+`asyncio.to_thread`, the agent thread pool and LangGraph nodes. Outside of a
+trace `span()` returns a shared no-op, which keeps instrumented hot paths
+(every SQL statement, every agent node) at a context-variable lookup.
+
+When the root span ends, the whole trace is handed to a background exporter
+chosen by TRACE_EXPORTER:
+- `file`: one JSON object per span appended to TRACE_FILE;
+- `otlp`: OTLP/HTTP JSON posted to OTEL_EXPORTER_OTLP_ENDPOINT + `/v1/traces`
+  (any OpenTelemetry collector, Jaeger, Tempo...);
+- unset / `none`: nothing is exported, but the API still returns each
+  request's trace id and `Server-Timing` summary.
+
+Span names are dotted, the first part being the category summarised in
+`Server-Timing`: `orchestrator`, `agent.<stage>`, `node.<name>`,
+`db.connect`, `db.query`, `llm`, `embed`, `qdrant.<operation>`, `pdf.extract`.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+_CURRENT: ContextVar[Optional["Span"]] = ContextVar("trace_current_span", default=None)
+
+# summed per category in Server-Timing; spans of other categories are listed by name
+_SUMMED_CATEGORIES = ("db", "llm", "qdrant", "embed", "pdf")
+_LISTED_CATEGORIES = ("orchestrator", "agent")
+
+
+def _max_spans() -> int:
+    try:
+        return int(os.getenv("TRACE_MAX_SPANS", "2000"))
+    except ValueError:
+        return 2000
+
+
+class Trace:
+    """The spans finished so far in one trace (appended from any thread)."""
+
+    __slots__ = ("trace_id", "spans", "dropped", "closed", "limit")
+
+    def __init__(self) -> None:
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List["Span"] = []
+        self.dropped = 0
+        self.closed = False
+        self.limit = _max_spans()
+
+    def add(self, span: "Span") -> None:
+        if self.closed:
+            return
+        if len(self.spans) >= self.limit:
+            self.dropped += 1
+            return
+        self.spans.append(span)
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "attributes", "start", "end", "start_ns", "_token")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any]) -> None:
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start = 0.0
+        self.end: Optional[float] = None
+        self.start_ns = 0
+        self._token = None
+
+    def __enter__(self) -> "Span":
+        self._token = _CURRENT.set(self)
+        self.start_ns = time.time_ns()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        _CURRENT.reset(self._token)
+        self.trace.add(self)
+        if self.parent_id is None:
+            self.trace.closed = True
+            _export(self.trace)
+        return False
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000.0
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attributes: Any):
+    """Child of the current span; a no-op outside of a trace."""
+    parent = _CURRENT.get()
+    if parent is None:
+        return _NOOP
+    return Span(parent.trace, name, parent.span_id, attributes)
+
+
+def start_trace(name: str, **attributes: Any) -> Span:
+    """Root span of a new trace; the trace is exported when it ends."""
+    return Span(Trace(), name, None, attributes)
+
+
+def current_trace_id() -> Optional[str]:
+    current = _CURRENT.get()
+    return current.trace.trace_id if current is not None else None
+
+
+def server_timing(root: Span) -> str:
+    """`Server-Timing` value summarising the spans finished under `root`."""
+    summed: Dict[str, List[float]] = {}
+    listed: Dict[str, float] = {}
+    for item in list(root.trace.spans):
+        category = item.name.split(".", 1)[0]
+        if category in _SUMMED_CATEGORIES:
+            entry = summed.setdefault(category, [0.0, 0])
+            entry[0] += item.duration_ms
+            entry[1] += 1
+        elif category in _LISTED_CATEGORIES:
+            listed[item.name] = listed.get(item.name, 0.0) + item.duration_ms
+    parts = [f"total;dur={root.duration_ms:.1f}"]
+    parts.extend(f"{name};dur={ms:.1f}" for name, ms in listed.items())
+    parts.extend(f'{name};dur={ms:.1f};desc="{count} calls"' for name, (ms, count) in summed.items())
+    return ", ".join(parts)
+
+
+def _span_record(item: Span) -> Dict[str, Any]:
+    duration_ns = int(item.duration_ms * 1_000_000)
+    return {
+        "trace_id": item.trace.trace_id,
+        "span_id": item.span_id,
+        "parent_span_id": item.parent_id,
+        "name": item.name,
+        "start_time_unix_nano": item.start_ns,
+        "end_time_unix_nano": item.start_ns + duration_ns,
+        "duration_ms": round(item.duration_ms, 3),
+        "attributes": item.attributes,
+    }
+
+
+def _otlp_payload(trace: Trace) -> Dict[str, Any]:
+    spans = []
+    for record in map(_span_record, trace.spans):
+        otlp_span = {
+            "traceId": record["trace_id"],
+            "spanId": record["span_id"],
+            "name": record["name"],
+            "kind": 1,
+            "startTimeUnixNano": str(record["start_time_unix_nano"]),
+            "endTimeUnixNano": str(record["end_time_unix_nano"]),
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in record["attributes"].items()],
+        }
+        if record["parent_span_id"]:
+            otlp_span["parentSpanId"] = record["parent_span_id"]
+        if "error" in record["attributes"]:
+            otlp_span["status"] = {"code": 2}
+        spans.append(otlp_span)
+    service = os.getenv("OTEL_SERVICE_NAME", "credit-decision-ai")
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+            "scopeSpans": [{"scope": {"name": "credit-decision-ai"}, "spans": spans}],
+        }]
+    }
+
+
+def _write_file(trace: Trace) -> None:
+    path = os.getenv("TRACE_FILE", "traces.jsonl")
+    lines = [json.dumps(_span_record(item), default=str) for item in trace.spans]
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write("\n".join(lines) + "\n")
+
+
+def _post_otlp(trace: Trace) -> None:
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318").rstrip("/")
+    request = urllib.request.Request(
+        endpoint + "/v1/traces",
+        data=json.dumps(_otlp_payload(trace), default=str).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=5):
+        pass
+
+
+_EXPORTERS = {"file": _write_file, "otlp": _post_otlp}
+_QUEUE: "queue.Queue[Trace]" = queue.Queue(maxsize=1000)
+_EXPORT_THREAD: Optional[threading.Thread] = None
+_EXPORT_LOCK = threading.Lock()
+
+
+def _export_loop() -> None:
+    while True:
+        trace = _QUEUE.get()
+        exporter = _EXPORTERS.get(os.getenv("TRACE_EXPORTER", "").strip().lower())
+        try:
+            if exporter is not None:
+                exporter(trace)
+        except Exception as exc:
+            print(f"[WARN] Trace export failed: {exc}")
+        finally:
+            _QUEUE.task_done()
+
+
+def _export(trace: Trace) -> None:
+    global _EXPORT_THREAD
+    if os.getenv("TRACE_EXPORTER", "").strip().lower() not in _EXPORTERS:
+        return
+    if _EXPORT_THREAD is None or not _EXPORT_THREAD.is_alive():
+        with _EXPORT_LOCK:
+            if _EXPORT_THREAD is None or not _EXPORT_THREAD.is_alive():
+                _EXPORT_THREAD = threading.Thread(target=_export_loop, name="trace-exporter", daemon=True)
+                _EXPORT_THREAD.start()
+    try:
+        _QUEUE.put_nowait(trace)
+    except queue.Full:
+        print("[WARN] Trace export queue full; dropping trace")
+
+
+def flush(timeout: float = 5.0) -> None:
+    """Wait (up to `timeout`) for queued traces to be exported."""
+    deadline = time.monotonic() + timeout
+    while _QUEUE.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.01)
@@ -1,8 +1,16 @@
-from fastapi import FastAPI
+import os
+import time
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from agents.llm_gateway import close_clients
 from api.routes import router
-from core.db import init_db
+from core import metrics
+from core.db import close_pool
+from core.migrations import init_db
+from core.scheduler import close_loop_resources
+from core.tracing import server_timing, start_trace
 
 app = FastAPI(title="Credit Decision AI", version="0.2.0")
 
@@ -12,11 +20,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Trace-Id", "Server-Timing"],
 )
 
 app.include_router(router)
 
 
+@app.middleware("http")
+async def _trace_request(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    with start_trace("http.request", method=request.method) as root:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["X-Trace-Id"] = root.trace.trace_id
+            response.headers["Server-Timing"] = server_timing(root)
+            return response
+        finally:
+            # the route template, not the raw path, keeps label values bounded
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            root.name = f"{request.method} {route}"
+            root.set("status", status)
+            metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, route, status)
+
+
+if os.getenv("METRICS_ENABLED", "1") != "0":
+
+    @app.get("/metrics", include_in_schema=False)
+    def _metrics() -> Response:
+        return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.on_event("startup")
 def _startup() -> None:
     init_db()
+
+
+@app.on_event("shutdown")
+async def _shutdown() -> None:
+    close_clients()
+    # async LLM/Qdrant clients opened on the server's loop by async routes
+    await close_loop_resources()
+    close_pool()
@@ -0,0 +1,84 @@
+"""
+Benchmark the case detail loaders against a live database.
+
+Compares the single-statement JSON loader with the legacy one-query-per-section
+loader on the same case ids and prints latency percentiles for each.
+
+Usage (from backend/):
+    python -m scripts.bench_case_detail --cases 1 2 3 --iterations 200
+    python -m scripts.bench_case_detail --sample 50 --no-payments
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from core import db  # noqa: E402
+
+
+def _sample_case_ids(limit: int) -> List[int]:
+    conn = db._connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT case_id FROM credit_cases ORDER BY random() LIMIT %s", (limit,))
+            return [int(row[0]) for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def _run(loader: Callable[..., object], case_ids: List[int], iterations: int, include_payments: bool) -> List[float]:
+    timings: List[float] = []
+    for i in range(iterations):
+        case_id = case_ids[i % len(case_ids)]
+        start = time.perf_counter()
+        loader(case_id, include_payments=include_payments)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return timings
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark fetch_case_detail loaders")
+    parser.add_argument("--cases", type=int, nargs="*", default=[])
+    parser.add_argument("--sample", type=int, default=20, help="random case ids to use when --cases is empty")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--no-payments", action="store_true")
+    args = parser.parse_args()
+
+    case_ids = args.cases or _sample_case_ids(args.sample)
+    if not case_ids:
+        print("No credit cases found")
+        return 1
+    include_payments = not args.no_payments
+
+    loaders: Dict[str, Callable[..., object]] = {
+        "multi": db._fetch_case_detail_multi,
+        "json": db._fetch_case_detail_json,
+    }
+    for name, loader in loaders.items():
+        _run(loader, case_ids, args.warmup, include_payments)
+        timings = _run(loader, case_ids, args.iterations, include_payments)
+        print(
+            f"{name:>5}: n={len(timings)} mean={statistics.mean(timings):.2f}ms "
+            f"p50={_percentile(timings, 50):.2f}ms p95={_percentile(timings, 95):.2f}ms "
+            f"p99={_percentile(timings, 99):.2f}ms"
+        )
+    db.close_pool()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
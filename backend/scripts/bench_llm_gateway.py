@@ -0,0 +1,91 @@
+"""
+Benchmark the shared LLM gateway against a client built per call.
+
+Sends the same minimal completion (one output token) through a new
+`OpenAI(...)` client per call, as the agents used to, and through the
+gateway's shared keep-alive clients, then prints latency percentiles for both
+and the latency saved per case (an orchestration makes about one LLM call per
+agent: document, behavior, fraud, decision, explanation).
+
+Needs OPENAI_API_KEY (and OPENAI_BASE_URL for a non-default provider).
+
+Usage (from backend/):
+    python -m scripts.bench_llm_gateway --iterations 30
+    python -m scripts.bench_llm_gateway --model llama-3.1-8b-instant --calls-per-case 5
+"""
+
+import argparse
+import importlib
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from agents import llm_gateway  # noqa: E402
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+
+def _per_call_client() -> Any:
+    OpenAI = getattr(importlib.import_module("openai"), "OpenAI")
+    return OpenAI(api_key=llm_gateway.OPENAI_API_KEY, base_url=llm_gateway.OPENAI_BASE_URL)
+
+
+def _gateway_client() -> Any:
+    return llm_gateway.llm_client("bench")
+
+
+def _run(make_client: Callable[[], Any], model: str, iterations: int) -> List[float]:
+    timings: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        client = make_client()
+        client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": "Reply with OK."}],
+            max_tokens=1,
+        )
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return timings
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the shared LLM gateway")
+    parser.add_argument("--model", default=os.getenv("LLM_MODEL", "llama-3.1-8b-instant"))
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--calls-per-case", type=int, default=5)
+    args = parser.parse_args()
+
+    if not llm_gateway.OPENAI_API_KEY:
+        print("OPENAI_API_KEY is not set")
+        return 1
+
+    means = {}
+    for name, make_client in (("per-call", _per_call_client), ("gateway", _gateway_client)):
+        _run(make_client, args.model, args.warmup)
+        timings = _run(make_client, args.model, args.iterations)
+        means[name] = statistics.mean(timings)
+        print(
+            f"{name:>8}: n={len(timings)} mean={means[name]:.1f}ms "
+            f"p50={_percentile(timings, 50):.1f}ms p95={_percentile(timings, 95):.1f}ms "
+            f"p99={_percentile(timings, 99):.1f}ms"
+        )
+    saved = (means["per-call"] - means["gateway"]) * args.calls_per_case
+    print(f"saved per case (~{args.calls_per_case} LLM calls): {saved:.1f}ms")
+    llm_gateway.close_clients()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -0,0 +1,114 @@
+"""
+Compare gated and ungated decisions on saved cases (offline).
+
+Replays each case's orchestration twice: with DECISION_LLM_GATING=off (the LLM
+sees every case) and with the `band` policy. Saved agent outputs are reused,
+so only the decision stage (and the explanation, when the decision changes)
+runs again. The LLM response cache is bypassed, so both runs reach the
+provider. Prints decision agreement, the share of cases the gate leaves to the
+rules, and the decision-stage latency saved.
+
+Usage (from backend/):
+    python -m scripts.compare_decision_gating --sample 100
+    python -m scripts.compare_decision_gating --cases 12 15 --low 0.35 --high 0.8
+"""
+
+import argparse
+import statistics
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from agents import decision_agent  # noqa: E402
+from agents.llm_cache import bypass as bypass_llm_cache  # noqa: E402
+from core import db  # noqa: E402
+from core.orchestrator import run_orchestrator  # noqa: E402
+
+
+def _sample_case_ids(limit: int) -> List[int]:
+    conn = db._connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT case_id FROM credit_cases ORDER BY random() LIMIT %s", (limit,))
+            return [int(row[0]) for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def _replay(detail: Dict[str, Any]) -> Dict[str, Any]:
+    with bypass_llm_cache():
+        orchestration = run_orchestrator(detail)
+    raw = (orchestration.get("agents_raw") or {}).get("decision_agent") or {}
+    timings = orchestration["orchestrator"]["orchestration_metadata"]["stage_timings"]
+    return {
+        "decision": (orchestration.get("decision") or {}).get("decision"),
+        "gate": raw.get("llm_gate"),
+        "source": raw.get("decision_source"),
+        "ms": (timings.get("decision") or {}).get("ms", 0.0),
+    }
+
+
+def _pct(part: int, total: int) -> str:
+    return f"{100.0 * part / total:.1f}%" if total else "n/a"
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="Compare gated and ungated decision agent runs")
+    parser.add_argument("--cases", type=int, nargs="*", default=[])
+    parser.add_argument("--sample", type=int, default=50, help="random case ids to use when --cases is empty")
+    parser.add_argument("--low", type=float, default=decision_agent.DECISION_LLM_GATE_LOW)
+    parser.add_argument("--high", type=float, default=decision_agent.DECISION_LLM_GATE_HIGH)
+    args = parser.parse_args()
+
+    case_ids = args.cases or _sample_case_ids(args.sample)
+    if not case_ids:
+        print("No credit cases found")
+        return 1
+
+    rows = []
+    for case_id in case_ids:
+        detail = db.fetch_case_detail(case_id)
+        if not detail:
+            continue
+        decision_agent.configure_gating("off")
+        baseline = _replay(detail)
+        decision_agent.configure_gating("band", args.low, args.high)
+        gated = _replay(detail)
+        rows.append((case_id, baseline, gated))
+    db.close_pool()
+    if not rows:
+        print("No credit cases found")
+        return 1
+
+    total = len(rows)
+    skipped = [row for row in rows if row[2]["source"] == "rules" and row[2]["gate"] in ("clear_approve", "clear_reject")]
+    agree = [row for row in rows if row[1]["decision"] == row[2]["decision"]]
+    agree_skipped = [row for row in skipped if row[1]["decision"] == row[2]["decision"]]
+    baseline_ms = [row[1]["ms"] for row in rows]
+    gated_ms = [row[2]["ms"] for row in rows]
+
+    print(f"cases: {total}  band: low={args.low} high={args.high}")
+    print("gate: " + ", ".join(f"{gate}={n}" for gate, n in Counter(row[2]["gate"] for row in rows).most_common()))
+    print(f"decided by rules: {len(skipped)}/{total} ({_pct(len(skipped), total)})")
+    print(f"agreement: {len(agree)}/{total} ({_pct(len(agree), total)}); "
+          f"on rule-decided cases: {len(agree_skipped)}/{len(skipped)} ({_pct(len(agree_skipped), len(skipped))})")
+    transitions = Counter(f"{row[1]['decision']}->{row[2]['decision']}" for row in rows)
+    print("off -> band: " + ", ".join(f"{k}={n}" for k, n in sorted(transitions.items())))
+    saved = sum(baseline_ms) - sum(gated_ms)
+    print(
+        f"decision stage: off mean={statistics.mean(baseline_ms):.1f}ms band mean={statistics.mean(gated_ms):.1f}ms "
+        f"saved={saved:.0f}ms total ({saved / total:.1f}ms per case)"
+    )
+    for case_id, baseline, gated in rows:
+        if baseline["decision"] != gated["decision"]:
+            print(f"  case {case_id}: off={baseline['decision']} band={gated['decision']} gate={gated['gate']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
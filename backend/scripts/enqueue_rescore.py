@@ -0,0 +1,37 @@
+"""
+Queue a bulk re-scoring of existing cases.
+
+Adds one `rescore` job per case to the job queue. Rescore jobs have the
+lowest priority, so workers only pick them up when no banker rerun, new
+submission or Qdrant sync is waiting; cases that already have a rescore
+queued are skipped.
+
+Usage (from backend/):
+    python -m scripts.enqueue_rescore
+    python -m scripts.enqueue_rescore --status SUBMITTED UNDER_REVIEW
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from core import db  # noqa: E402
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="Queue rescore jobs for existing cases")
+    parser.add_argument("--status", nargs="*", default=[], help="only cases in these statuses (default: all)")
+    args = parser.parse_args()
+
+    queued = db.enqueue_rescore_jobs(args.status or None)
+    print(f"Queued {queued} rescore job(s) at priority {db.job_priority('rescore')}")
+    db.close_pool()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -0,0 +1,114 @@
+"""
+Reconcile payment_behavior_summary with a full recompute.
+
+Writes keep the summary up to date from per-payment deltas; this command
+re-aggregates each user's whole installment and payment history, reports rows
+that drifted (or whose running totals were never initialised) and, with
+--fix, rewrites them. Each user is reconciled in its own transaction.
+
+Usage (from backend/):
+    python -m scripts.reconcile_payment_summaries
+    python -m scripts.reconcile_payment_summaries --fix
+    python -m scripts.reconcile_payment_summaries --user-id 42 --fix
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from psycopg2.extras import RealDictCursor  # noqa: E402
+
+from core import db  # noqa: E402
+
+# Stored columns are NUMERIC(5,4) / (6,2) / (14,2): compare at that precision.
+_TOLERANCE = {"on_time_rate": 0.0001, "avg_days_late": 0.01, "avg_payment_amount": 0.01, "payment_amount_sum": 0.01}
+
+
+def _user_ids(only: Optional[int]) -> List[int]:
+    if only is not None:
+        return [only]
+    conn = db._connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT user_id FROM loans
+                UNION
+                SELECT user_id FROM payment_behavior_summary
+                ORDER BY user_id
+                """
+            )
+            return [int(row[0]) for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def _drift(stored: Optional[Dict[str, Any]], expected: Dict[str, Any]) -> List[str]:
+    if stored is None:
+        return ["missing row"]
+    problems = []
+    for key, value in expected.items():
+        current = stored.get(key)
+        if current is None or value is None:
+            if current != value:
+                problems.append(f"{key}: {current!r} != {value!r}")
+            continue
+        if key == "last_payment_date":
+            if current != value:
+                problems.append(f"{key}: {current} != {value}")
+            continue
+        if abs(float(current) - float(value)) > _TOLERANCE.get(key, 0) + 1e-9:
+            problems.append(f"{key}: {current} != {value}")
+    return problems
+
+
+def reconcile(user_id: int, fix: bool) -> List[str]:
+    conn = db._connect()
+    try:
+        with conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(
+                    """
+                    SELECT * FROM payment_behavior_summary
+                    WHERE user_id = %s
+                    FOR UPDATE
+                    """,
+                    (user_id,),
+                )
+                stored = cur.fetchone()
+                problems = _drift(stored, db._compute_payment_behavior_summary(cur, user_id))
+                if problems and fix:
+                    db._recompute_payment_behavior_summary_tx(cur, user_id)
+                return problems
+    finally:
+        conn.close()
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="Reconcile payment_behavior_summary with a full recompute")
+    parser.add_argument("--user-id", type=int, default=None, help="only reconcile this user")
+    parser.add_argument("--fix", action="store_true", help="rewrite drifted rows (default: report only)")
+    args = parser.parse_args()
+
+    drifted = 0
+    users = _user_ids(args.user_id)
+    try:
+        for user_id in users:
+            problems = reconcile(user_id, args.fix)
+            if problems:
+                drifted += 1
+                print(f"{'fixed' if args.fix else 'drift'} user {user_id}: {'; '.join(problems)}")
+    finally:
+        db.close_pool()
+
+    print(f"{len(users)} users checked, {drifted} {'repaired' if args.fix else 'drifted'}")
+    return 1 if drifted and not args.fix else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -0,0 +1,220 @@
+"""
+Verify that the queries issued by core/db.py are served by indexes.
+
+Runs the real accessors against a seeded database and records every statement
+they execute; writes are rolled back, so nothing is persisted. Each recorded
+SELECT/UPDATE/DELETE is then EXPLAINed with `enable_seqscan = off`: on small
+seeded tables the planner may legitimately prefer a sequential scan, but with
+seqscans disabled it only falls back to one when no usable index exists. Any
+Seq Scan left in a plan, or an index scan that walks a whole index just to
+filter rows, is reported as a failure.
+
+Usage (from backend/, against a database seeded with seed_database.py):
+    python -m scripts.verify_indexes
+    python -m scripts.verify_indexes --verbose
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from core import db  # noqa: E402
+
+
+class _RecordingCursor:
+    def __init__(self, cursor, statements: List[Tuple[str, str]], label: List[str]) -> None:
+        self._cursor = cursor
+        self._statements = statements
+        self._label = label
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._cursor.__exit__(*exc)
+
+    def execute(self, sql: str, params: Any = None) -> None:
+        rendered = self._cursor.mogrify(sql, params).decode("utf-8")
+        self._statements.append((self._label[0], rendered))
+        self._cursor.execute(sql, params)
+
+
+class _RollbackConnection:
+    """Connection proxy that records statements and never commits."""
+
+    def __init__(self, conn, statements: List[Tuple[str, str]], label: List[str]) -> None:
+        self._conn = conn
+        self._statements = statements
+        self._label = label
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self._conn.rollback()
+        return False
+
+    def commit(self) -> None:
+        self._conn.rollback()
+
+    def cursor(self, *args, **kwargs):
+        return _RecordingCursor(self._conn.cursor(*args, **kwargs), self._statements, self._label)
+
+    def close(self) -> None:
+        self._conn.rollback()
+        self._conn.close()
+
+
+def _sample_ids() -> Dict[str, Any]:
+    conn = db._connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT l.case_id, l.loan_id, l.user_id, u.email
+                FROM loans l
+                JOIN users u ON u.user_id = l.user_id
+                WHERE l.case_id IS NOT NULL
+                ORDER BY l.loan_id
+                LIMIT 1
+                """
+            )
+            row = cur.fetchone()
+            if not row:
+                raise SystemExit("No loans found: seed the database first (python seed_database.py)")
+            cur.execute("SELECT user_id FROM users WHERE role = 'BANKER' ORDER BY user_id LIMIT 1")
+            banker = cur.fetchone()
+    finally:
+        conn.close()
+    return {
+        "case_id": int(row[0]),
+        "loan_id": int(row[1]),
+        "user_id": int(row[2]),
+        "email": row[3],
+        "banker_id": int(banker[0]) if banker else int(row[2]),
+    }
+
+
+def _accessor_calls(ids: Dict[str, Any]) -> List[Tuple[str, Callable[[], Any]]]:
+    case_id, loan_id, user_id, banker_id = ids["case_id"], ids["loan_id"], ids["user_id"], ids["banker_id"]
+    _, cursor = db.list_cases_for_banker(limit=5)
+    return [
+        ("fetch_user_by_email", lambda: db.fetch_user_by_email(ids["email"])),
+        ("fetch_user_by_id", lambda: db.fetch_user_by_id(user_id)),
+        ("list_cases_for_banker", lambda: db.list_cases_for_banker(limit=20)),
+        ("list_cases_for_banker[pending]", lambda: db.list_cases_for_banker(status_filter="pending", limit=20)),
+        ("list_cases_for_banker[decided,cursor]", lambda: db.list_cases_for_banker(status_filter="decided", limit=20, cursor=cursor)),
+        ("list_cases_for_banker[asc]", lambda: db.list_cases_for_banker(sort="asc", limit=20)),
+        ("list_cases_for_client", lambda: db.list_cases_for_client(user_id)),
+        ("fetch_case_overview", lambda: db.fetch_case_overview(case_id)),
+        ("fetch_case_overview_for_client", lambda: db.fetch_case_overview_for_client(case_id, user_id)),
+        ("fetch_case_detail[json]", lambda: db._fetch_case_detail_json(case_id)),
+        ("fetch_case_detail[multi]", lambda: db._fetch_case_detail_multi(case_id)),
+        ("fetch_case_detail_for_client", lambda: db.fetch_case_detail_for_client(case_id, user_id)),
+        ("fetch_case_vector_sync", lambda: db.fetch_case_vector_sync(case_id)),
+        ("get_agent_session", lambda: db.get_agent_session(case_id, "decision", banker_id)),
+        ("clear_agent_sessions_for_banker", lambda: db.clear_agent_sessions_for_banker(banker_id)),
+        ("fetch_loan_by_case", lambda: db.fetch_loan_by_case(case_id)),
+        ("fetch_installments_by_loan", lambda: db.fetch_installments_by_loan(loan_id)),
+        ("fetch_payments_by_loan", lambda: db.fetch_payments_by_loan(loan_id)),
+        ("fetch_payment_behavior_summary", lambda: db.fetch_payment_behavior_summary(user_id)),
+        ("fetch_payment_context", lambda: db.fetch_payment_context(user_id, case_id)),
+        ("recompute_payment_behavior_summary", lambda: db.recompute_payment_behavior_summary(user_id)),
+        (
+            "create_payment_for_case",
+            lambda: db.create_payment_for_case(case_id, date.today(), 100.0, "bank_transfer", "COMPLETED"),
+        ),
+        ("add_comment", lambda: db.add_comment(case_id, banker_id, "index check", False)),
+        (
+            "save_orchestration",
+            lambda: db.save_orchestration(case_id, {"summary": "index check", "agents": {}, "decision": {}}),
+        ),
+    ]
+
+
+def _unindexed_scans(plan: Dict[str, Any]) -> List[str]:
+    """Seq scans, and index scans that only filter rows (whole index walked, no Index Cond)."""
+    found = []
+    node = plan.get("Node Type")
+    relation = plan.get("Relation Name", "?")
+    if node == "Seq Scan":
+        found.append(f"seq scan on {relation}")
+    elif node in ("Index Scan", "Index Only Scan") and plan.get("Filter") and not plan.get("Index Cond"):
+        found.append(f"full scan of {plan.get('Index Name')} filtering {relation}")
+    for child in plan.get("Plans", []) or []:
+        found.extend(_unindexed_scans(child))
+    return found
+
+
+def _indexes_used(plan: Dict[str, Any]) -> List[str]:
+    found = [plan["Index Name"]] if plan.get("Index Name") else []
+    for child in plan.get("Plans", []) or []:
+        found.extend(_indexes_used(child))
+    return found
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="Assert index usage for core/db.py queries")
+    parser.add_argument("--verbose", action="store_true", help="print the indexes used by every statement")
+    args = parser.parse_args()
+
+    ids = _sample_ids()
+    calls = _accessor_calls(ids)
+    statements: List[Tuple[str, str]] = []
+    label = [""]
+    real_connect = db._connect
+    db._connect = lambda: _RollbackConnection(real_connect(), statements, label)  # type: ignore[assignment]
+    try:
+        for name, call in calls:
+            label[0] = name
+            try:
+                call()
+            except Exception as exc:
+                print(f"[WARN] {name} raised {exc!r}; statements recorded so far are still checked")
+    finally:
+        db._connect = real_connect  # type: ignore[assignment]
+
+    failures = 0
+    checked = 0
+    conn = real_connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET enable_seqscan = off")
+            for name, sql in statements:
+                head = sql.lstrip().split(None, 1)[0].upper()
+                if head not in ("SELECT", "UPDATE", "DELETE", "WITH"):
+                    continue
+                cur.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                plan = cur.fetchone()[0][0]["Plan"]
+                checked += 1
+                problems = _unindexed_scans(plan)
+                if problems:
+                    failures += 1
+                    print(f"FAIL {name}: {'; '.join(sorted(set(problems)))}")
+                    print("     " + " ".join(sql.split())[:200])
+                elif args.verbose:
+                    print(f"ok   {name}: {', '.join(sorted(set(_indexes_used(plan)))) or '(no index needed)'}")
+        conn.rollback()
+    finally:
+        conn.close()
+        db.close_pool()
+
+    print(f"{checked} statements checked, {failures} without index coverage")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
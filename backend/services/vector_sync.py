@@ -21,6 +21,9 @@ import threading
 from qdrant_client import QdrantClient
 
 from core.db import fetch_case_vector_sync
+from core.metrics import EMBEDDING_SECONDS, QDRANT_RETRIES, QDRANT_SECONDS, VECTOR_SYNC
+from core.singleflight import EMBEDDINGS
+from core.tracing import span
 
 
 QDRANT_URL = os.getenv("QDRANT_URL")
@@ -54,15 +57,22 @@ def _now_iso() -> str:
 def _embed_with_timeout(embedder, text: str, timeout_sec: float) -> Optional[list[float]]:
     result: Dict[str, Any] = {"value": None, "error": None}
 
+    def _embed() -> list[float]:
+        with EMBEDDING_SECONDS.time("vector_sync"):
+            return embedder.embed_query(text)
+
     def _run() -> None:
         try:
-            result["value"] = embedder.embed_query(text)
+            # the same text being embedded elsewhere (other case, sync job) is awaited, not recomputed
+            result["value"] = EMBEDDINGS.do((EMBEDDING_MODEL, text), _embed)
         except Exception as exc:
             result["error"] = exc
 
     thread = threading.Thread(target=_run, daemon=True)
-    thread.start()
-    thread.join(timeout_sec)
+    # spanned here: the embedding thread does not inherit the trace context
+    with span("embed", source="vector_sync"):
+        thread.start()
+        thread.join(timeout_sec)
     if thread.is_alive():
         return None
     if result.get("error") is not None:
@@ -252,6 +262,12 @@ def sync_credit_case_to_qdrant(case_id: int) -> bool:
 
     Returns True on success, False on any failure (never raises).
     """
+    ok = _sync_case(case_id)
+    VECTOR_SYNC.inc("success" if ok else "failure")
+    return ok
+
+
+def _sync_case(case_id: int) -> bool:
     deps = _get_deps()
     if not deps.qdrant_client or not deps.embedder:
         print(f"[WARN] Qdrant sync skipped (missing deps) for case_id={case_id}")
@@ -287,28 +303,32 @@ def sync_credit_case_to_qdrant(case_id: int) -> bool:
         attempts = max(1, QDRANT_RETRY_COUNT + 1)
         for attempt in range(attempts):
             try:
-                deps.qdrant_client.upsert(
-                    collection_name=QDRANT_COLLECTION_NAME,
-                    points=points,
-                    timeout=QDRANT_TIMEOUT_SEC,
-                )
-                return True
-            except TypeError:
-                # Some client stubs or older clients don't accept timeout.
-                try:
+                with QDRANT_SECONDS.time("upsert"), span("qdrant.upsert"):
                     deps.qdrant_client.upsert(
                         collection_name=QDRANT_COLLECTION_NAME,
                         points=points,
+                        timeout=QDRANT_TIMEOUT_SEC,
                     )
+                return True
+            except TypeError:
+                # Some client stubs or older clients don't accept timeout.
+                try:
+                    with QDRANT_SECONDS.time("upsert"), span("qdrant.upsert"):
+                        deps.qdrant_client.upsert(
+                            collection_name=QDRANT_COLLECTION_NAME,
+                            points=points,
+                        )
                     return True
                 except Exception as exc:
                     if attempt < attempts - 1:
+                        QDRANT_RETRIES.inc("upsert")
                         time.sleep(0.1 * (attempt + 1))
                         continue
                     print(f"[WARN] Qdrant sync failed (upsert) for case_id={case_id}: {exc}")
                     return False
             except Exception as exc:
                 if attempt < attempts - 1:
+                    QDRANT_RETRIES.inc("upsert")
                     time.sleep(0.1 * (attempt + 1))
                     continue
                 print(f"[WARN] Qdrant sync failed (upsert) for case_id={case_id}: {exc}")
@@ -0,0 +1,54 @@
+import copy
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+@pytest.fixture
+def stub_agents(monkeypatch: pytest.MonkeyPatch) -> Callable[..., None]:
+    """
+    Replace every agent the orchestrator runs, for both `run_orchestrator` and
+    `run_orchestrator_async`:
+
+        stub_agents({"analyze_fraud": {"confidence": 0.6}, "analyze_documents": fn}, calls=recorded)
+
+    A dict value is returned (a fresh copy per call, as a real agent returns)
+    and the entry point's name appended to `calls`; a callable is used as is.
+    Unlisted agents run `default`, or return `{"confidence": 0.5}`. Native
+    `*_async` entry points are removed so the stubs are what runs, the legacy
+    `orchestrate_decision` is disabled and the orchestration cache is off.
+    """
+    import core.orchestrator as orchestrator  # type: ignore
+
+    def _returning(name: str, result: Dict[str, Any], calls: Optional[List[str]]) -> Callable[..., Any]:
+        def _agent(*_args: Any, **_kwargs: Any) -> Dict[str, Any]:
+            if calls is not None:
+                calls.append(name)
+            return copy.deepcopy(result)
+
+        return _agent
+
+    def _stub(
+        results: Optional[Dict[str, Any]] = None,
+        calls: Optional[List[str]] = None,
+        default: Optional[Callable[..., Any]] = None,
+    ) -> None:
+        results = results or {}
+        for step in orchestrator._AGENT_STEPS:
+            name = step.entry_point
+            agent = results.get(name, default or {"confidence": 0.5})
+            if not callable(agent):
+                agent = _returning(name, agent, calls)
+            monkeypatch.setattr(orchestrator, name, agent)
+            monkeypatch.setattr(orchestrator, name + "_async", None)
+        monkeypatch.setattr(orchestrator, "orchestrate_decision", None)
+        monkeypatch.setenv("ORCHESTRATION_CACHE_TTL_SEC", "0")
+
+    return _stub
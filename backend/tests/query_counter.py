@@ -0,0 +1,158 @@
+"""
+Query counting helper for core.db accessors.
+
+`assert_num_queries` patches `core.db._connect` so every statement an accessor
+executes is recorded, and fails if the count differs from the expected one:
+
+    with assert_num_queries(monkeypatch, 1, responder=rows_for) as counter:
+        db.list_cases_for_client(7)
+    assert counter.connections == 1
+
+By default no database is needed: cursors answer `fetchone`/`fetchall` with
+whatever `responder(sql, params)` returns (a list of row dicts), and
+`counter.transactions` records how each `with conn:` block ended ("commit", or
+"rollback" when the responder raised). Pass `wrap_real=True` to count
+statements on real connections instead.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+Responder = Callable[[str, Any], List[Dict[str, Any]]]
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.statements: List[Tuple[str, Any]] = []
+        self.connections = 0
+        self.transactions: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def describe(self) -> str:
+        lines = [f"{self.count} queries on {self.connections} connection(s):"]
+        for idx, (sql, params) in enumerate(self.statements, start=1):
+            lines.append(f"  {idx}. {' '.join(sql.split())[:160]} -- {params!r}")
+        return "\n".join(lines)
+
+
+class _FakeCursor:
+    def __init__(self, counter: QueryCounter, responder: Responder) -> None:
+        self._counter = counter
+        self._responder = responder
+        self._rows: List[Dict[str, Any]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+    def execute(self, sql: str, params: Any = None) -> None:
+        self._counter.statements.append((sql, params))
+        self._rows = [dict(row) for row in (self._responder(sql, params) or [])]
+
+    def fetchone(self) -> Optional[Dict[str, Any]]:
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self) -> List[Dict[str, Any]]:
+        rows, self._rows = self._rows, []
+        return rows
+
+    @property
+    def rowcount(self) -> int:
+        return len(self._rows)
+
+
+class _FakeConnection:
+    def __init__(self, counter: QueryCounter, responder: Responder) -> None:
+        self._counter = counter
+        self._responder = responder
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *_exc):
+        self._counter.transactions.append("rollback" if exc_type else "commit")
+        return False
+
+    def cursor(self, **_kwargs):
+        return _FakeCursor(self._counter, self._responder)
+
+    def close(self) -> None:
+        pass
+
+
+class _CountingCursor:
+    def __init__(self, cursor, counter: QueryCounter) -> None:
+        self._cursor = cursor
+        self._counter = counter
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._cursor.__exit__(*exc)
+
+    def execute(self, sql: str, params: Any = None) -> None:
+        self._counter.statements.append((sql, params))
+        self._cursor.execute(sql, params)
+
+
+class _CountingConnection:
+    def __init__(self, conn, counter: QueryCounter) -> None:
+        self._conn = conn
+        self._counter = counter
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._conn.cursor(*args, **kwargs), self._counter)
+
+
+@contextmanager
+def count_queries(monkeypatch, responder: Optional[Responder] = None, wrap_real: bool = False) -> Iterator[QueryCounter]:
+    import core.db as db  # type: ignore
+
+    counter = QueryCounter()
+    real_connect = db._connect
+    respond: Responder = responder or (lambda _sql, _params: [])
+
+    def _counting_connect():
+        counter.connections += 1
+        if wrap_real:
+            return _CountingConnection(real_connect(), counter)
+        return _FakeConnection(counter, respond)
+
+    monkeypatch.setattr(db, "_connect", _counting_connect)
+    try:
+        yield counter
+    finally:
+        monkeypatch.setattr(db, "_connect", real_connect)
+
+
+@contextmanager
+def assert_num_queries(
+    monkeypatch,
+    expected: int,
+    responder: Optional[Responder] = None,
+    wrap_real: bool = False,
+) -> Iterator[QueryCounter]:
+    with count_queries(monkeypatch, responder=responder, wrap_real=wrap_real) as counter:
+        yield counter
+    assert counter.count == expected, f"expected {expected} queries, got {counter.describe()}"
@@ -0,0 +1,37 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TESTS_DIR = Path(__file__).resolve().parent
+for path in (BACKEND_DIR, TESTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+import core.db as db  # type: ignore
+from query_counter import assert_num_queries  # type: ignore
+
+
+def test_save_orchestration_writes_agents_in_one_statement(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("AGENT_OUTPUT_HISTORY", "0")
+    orchestration = {
+        "summary": "ok",
+        "decision": {"decision": "approve", "decision_confidence": 0.8},
+        "agents": {name: {"score": idx} for idx, name in enumerate(db._AGENT_OUTPUT_NAMES)} | {"unknown": {}},
+    }
+
+    with assert_num_queries(monkeypatch, 2) as counter:
+        db.save_orchestration(12, orchestration)
+
+    sql, params = counter.statements[1]
+    assert "ON CONFLICT (case_id, agent_name)" in sql
+    assert "DELETE FROM agent_outputs" in sql and "agent_output_history" in sql
+    # a rewritten output reports the time of its current version
+    assert "created_at = NOW()" in sql
+    assert params["case_id"] == 12 and params["history"] is False
+    rows = json.loads(params["rows"])
+    assert [row["agent_name"] for row in rows] == list(db._AGENT_OUTPUT_NAMES)
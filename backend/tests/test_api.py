@@ -24,6 +24,10 @@ def _stub_orchestrator(_: dict) -> dict:
     }
 
 
+async def _stub_orchestrator_async(request: dict) -> dict:
+    return _stub_orchestrator(request)
+
+
 @pytest.fixture()
 def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
     import api.routes as routes  # type: ignore
@@ -31,6 +35,7 @@ def client(monkeypatch: pytest.MonkeyPatch) -> TestClient:
     routes._requests.clear()
     routes._agent_chats.clear()
     monkeypatch.setattr(routes, "run_orchestrator", _stub_orchestrator)
+    monkeypatch.setattr(routes, "run_orchestrator_async", _stub_orchestrator_async)
     monkeypatch.setattr(routes, "generate_agent_reply", lambda *_args, **_kwargs: "stub-reply")
 
     import main  # type: ignore
@@ -0,0 +1,76 @@
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException, Response
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TESTS_DIR = Path(__file__).resolve().parent
+for path in (BACKEND_DIR, TESTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+import core.db as db  # type: ignore
+from query_counter import assert_num_queries  # type: ignore
+
+
+def _row(case_id: int):
+    return {
+        "case_id": case_id,
+        "status": "SUBMITTED",
+        "created_at": datetime(2026, 1, 29, 12, 0, tzinfo=timezone.utc),
+        "decision_value": None,
+    }
+
+
+def test_cursor_round_trip_and_sort_mismatch():
+    created_at = datetime(2026, 1, 29, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    token = db._encode_case_cursor(created_at, 42, "desc")
+    assert db._decode_case_cursor(token, "desc") == (created_at, 42)
+    with pytest.raises(ValueError):
+        db._decode_case_cursor(token, "asc")
+    with pytest.raises(ValueError):
+        db._decode_case_cursor("not-a-cursor", "desc")
+
+
+def test_list_cases_for_banker_pages_with_keyset(monkeypatch: pytest.MonkeyPatch):
+    seen = []
+
+    def _responder(sql, params):
+        seen.append((sql, params))
+        return [_row(case_id) for case_id in (9, 8, 7)]
+
+    with assert_num_queries(monkeypatch, 1, responder=_responder):
+        rows, next_cursor = db.list_cases_for_banker(status_filter="pending", employment_type="Employee", limit=2)
+
+    assert [row["case_id"] for row in rows] == [9, 8]
+    assert db._decode_case_cursor(next_cursor, "desc")[1] == 8
+    sql, params = seen[0]
+    assert "ORDER BY c.created_at DESC, c.case_id DESC" in sql
+    assert params == [["SUBMITTED", "UNDER_REVIEW"], "employee", 3]
+
+    with assert_num_queries(monkeypatch, 1, responder=lambda _sql, _params: [_row(7)]):
+        rows, last_cursor = db.list_cases_for_banker(limit=2, cursor=next_cursor)
+    assert [row["case_id"] for row in rows] == [7]
+    assert last_cursor is None
+
+
+def test_list_requests_route_exposes_cursor_header(monkeypatch: pytest.MonkeyPatch):
+    import api.routes as routes  # type: ignore
+
+    monkeypatch.setattr(routes, "list_cases_for_banker", lambda **_kwargs: ([], "next-token"))
+    response = Response()
+    result = routes.list_requests(response=response, sort="desc", user={"role": "banker", "user_id": 1})
+    assert result == []
+    assert response.headers["X-Next-Cursor"] == "next-token"
+
+    def _bad(**_kwargs):
+        raise ValueError("Invalid cursor")
+
+    monkeypatch.setattr(routes, "list_cases_for_banker", _bad)
+    with pytest.raises(HTTPException) as exc:
+        routes.list_requests(response=Response(), sort="desc", cursor="x", user={"role": "banker", "user_id": 1})
+    assert exc.value.status_code == 400
@@ -0,0 +1,44 @@
+import sys
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import core.db as db  # type: ignore
+
+
+def test_decode_json_column_matches_driver_types():
+    raw = (
+        '[{"installment_id": 7, "due_date": "2026-02-28", "amount_due": 1250.50, '
+        '"paid_at": null, "created_at": "2026-01-29T10:15:00.123456+00:00"}]'
+    )
+    rows = db._decode_json_column(raw)
+    assert rows == [
+        {
+            "installment_id": 7,
+            "due_date": date(2026, 2, 28),
+            "amount_due": Decimal("1250.50"),
+            "paid_at": None,
+            "created_at": datetime(2026, 1, 29, 10, 15, 0, 123456, tzinfo=timezone.utc),
+        }
+    ]
+    assert db._decode_json_column(None) is None
+
+
+def test_fetch_case_detail_loader_switch(monkeypatch: pytest.MonkeyPatch):
+    calls = []
+    monkeypatch.setattr(db, "_fetch_case_detail_json", lambda case_id, include_payments=True: calls.append("json"))
+    monkeypatch.setattr(db, "_fetch_case_detail_multi", lambda case_id, include_payments=True: calls.append("multi"))
+
+    monkeypatch.delenv("DB_CASE_DETAIL_LOADER", raising=False)
+    db.fetch_case_detail(1)
+    monkeypatch.setenv("DB_CASE_DETAIL_LOADER", "multi")
+    db.fetch_case_detail(1)
+    assert calls == ["json", "multi"]
@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TESTS_DIR = Path(__file__).resolve().parent
+for path in (BACKEND_DIR, TESTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+import core.db as db  # type: ignore
+from query_counter import assert_num_queries  # type: ignore
+
+
+def _overview_row(case_id: int, decision=None):
+    row = {
+        "case_id": case_id,
+        "user_id": 7,
+        "status": "DECIDED" if decision else "SUBMITTED",
+        "loan_amount": 10000,
+        "loan_duration": 24,
+        "decision_value": decision,
+        "decision_confidence": 0.9 if decision else None,
+        "decision_reason_codes": {"source": "test"} if decision else None,
+        "decision_note": None,
+        "decision_decided_by": 1 if decision else None,
+        "decision_decided_at": None,
+    }
+    return row
+
+
+def test_list_cases_for_client_is_a_single_query(monkeypatch: pytest.MonkeyPatch):
+    rows = [_overview_row(case_id, "APPROVE" if case_id % 2 else None) for case_id in range(1, 41)]
+
+    with assert_num_queries(monkeypatch, 1, responder=lambda _sql, _params: rows) as counter:
+        cases = db.list_cases_for_client(7)
+
+    assert counter.connections == 1
+    assert len(cases) == 40
+    assert cases[0]["decision"] == {
+        "decision": "APPROVE",
+        "confidence": 0.9,
+        "reason_codes": {"source": "test"},
+        "note": None,
+        "decided_by": 1,
+        "decided_at": None,
+    }
+    assert cases[1]["decision"] is None
+    assert "decision_value" not in cases[1]
+    assert cases[1]["documents"] == [] and cases[1]["comments"] == []
+
+
+def test_fetch_case_overview_for_client_is_a_single_query(monkeypatch: pytest.MonkeyPatch):
+    with assert_num_queries(monkeypatch, 1) as counter:
+        assert db.fetch_case_overview_for_client(3, 7) is None
+    assert counter.connections == 1
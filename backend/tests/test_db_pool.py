@@ -0,0 +1,141 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import psycopg2  # type: ignore
+import psycopg2.extensions  # type: ignore
+import psycopg2.pool  # type: ignore
+
+import core.db as db  # type: ignore
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+    def execute(self, sql, _params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        self.conn.executed.append(sql)
+
+
+class _FakeConn:
+    def __init__(self, host):
+        self.host = host
+        self.closed = 0
+        self.broken = False
+        self.in_tx = False
+        self.rollbacks = 0
+        self.executed = []
+        self.autocommit = False
+
+    def cursor(self, **_kwargs):
+        self.in_tx = True
+        return _FakeCursor(self)
+
+    def get_transaction_status(self):
+        if self.in_tx:
+            return psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_tx = False
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def fake_connect(monkeypatch: pytest.MonkeyPatch):
+    opened = []
+
+    def _fake_connect(**params):
+        if params["host"] == "postgres":
+            raise psycopg2.OperationalError("could not translate host name \"postgres\"")
+        conn = _FakeConn(params["host"])
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(db.psycopg2, "connect", _fake_connect)
+    monkeypatch.setenv("DB_HOST", "postgres")
+    monkeypatch.setenv("DB_CONNECT_RETRIES", "1")
+    monkeypatch.setenv("DB_POOL_MIN", "1")
+    monkeypatch.setenv("DB_POOL_MAX", "2")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "0.05")
+    monkeypatch.setenv("DB_POOL_HEALTHCHECK_SEC", "0")
+    db.close_pool()
+    yield opened
+    db.close_pool()
+
+
+def test_connections_are_reused_and_host_resolved_once(fake_connect):
+    first = db._connect()
+    raw = first._conn
+    assert raw.host == "host.docker.internal"
+    first.close()
+
+    second = db._connect()
+    assert second._conn is raw
+    second.close()
+    assert len(fake_connect) == 1
+
+
+def test_pool_is_bounded(fake_connect):
+    a = db._connect()
+    b = db._connect()
+    with pytest.raises(psycopg2.pool.PoolError):
+        db._connect()
+    a.close()
+    c = db._connect()
+    assert len(fake_connect) == 2
+    b.close()
+    c.close()
+
+
+def test_open_transaction_is_rolled_back_on_release(fake_connect, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("DB_POOL_HEALTHCHECK_SEC", "60")
+    conn = db._connect()
+    raw = conn._conn
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1")
+    conn.close()
+    assert raw.rollbacks == 1
+    with pytest.raises(psycopg2.InterfaceError):
+        conn.cursor()
+
+
+def test_broken_connection_is_replaced_on_borrow(fake_connect):
+    conn = db._connect()
+    raw = conn._conn
+    conn.close()
+    raw.broken = True
+
+    replacement = db._connect()
+    assert replacement._conn is not raw
+    assert raw.closed
+    replacement.close()
+
+
+def test_attribute_writes_reach_the_connection_and_are_reset(fake_connect):
+    conn = db._connect()
+    raw = conn._conn
+    conn.autocommit = True
+    assert raw.autocommit is True
+    conn.close()
+    assert raw.autocommit is False
+    with pytest.raises(psycopg2.InterfaceError):
+        conn.autocommit = True
@@ -0,0 +1,87 @@
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import agents.decision_agent as decision_agent  # type: ignore
+import core.metrics as metrics  # type: ignore
+
+
+def _sim(risk_score: float) -> dict:
+    return {"ai_analysis": {"risk_score": risk_score}, "confidence": 0.8}
+
+
+class _FakeClient:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    def _create(self, **_kwargs):
+        self.calls += 1
+        content = '{"decision": "review", "confidence": 0.7, "summary": "A verifier."}'
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> _FakeClient:
+    fake = _FakeClient()
+    monkeypatch.setattr(decision_agent, "_llm_client", lambda: fake)
+    monkeypatch.setattr(decision_agent, "DECISION_LLM_GATING", "band")
+    return fake
+
+
+def test_gate_reasons(client: _FakeClient, monkeypatch: pytest.MonkeyPatch):
+    def _gate(risk, fraud_flags=(), conflicts=()):
+        signals = {"fraud": {"flags": list(fraud_flags)}, "orchestrator": {"detected_conflicts": list(conflicts)}}
+        return decision_agent._llm_gate(signals, {"risk_score": risk})
+
+    assert _gate(0.1) == (False, "clear_approve")
+    assert _gate(0.1, fraud_flags=["FRAUD"]) == (True, "uncertain")
+    assert _gate(0.9, fraud_flags=["FRAUD"]) == (False, "clear_reject")
+    assert _gate(0.9) == (True, "uncertain")
+    assert _gate(0.55) == (True, "uncertain")
+    assert _gate(0.1, conflicts=["doc vs behavior"]) == (True, "conflicts")
+    monkeypatch.setattr(decision_agent, "DECISION_LLM_GATING", "off")
+    assert _gate(0.1) == (True, "gating_off")
+
+
+def test_clear_cases_skip_the_llm(client: _FakeClient):
+    before = metrics.DECISION_LLM_GATE.value("skipped", "clear_approve")
+    approve = decision_agent.make_decision_payload({}, _sim(0.1))
+    reject = decision_agent.make_decision_payload({}, _sim(0.95), fraud_result={"fraud_flags": ["FRAUD"]})
+
+    assert client.calls == 0
+    assert (approve["decision"], approve["llm_gate"], approve["decision_source"]) == ("approve", "clear_approve", "rules")
+    assert (reject["decision"], reject["llm_gate"], reject["decision_source"]) == ("reject", "clear_reject", "rules")
+    assert metrics.DECISION_LLM_GATE.value("skipped", "clear_approve") == before + 1
+
+
+def test_uncertain_cases_go_to_the_llm(client: _FakeClient, monkeypatch: pytest.MonkeyPatch):
+    before = metrics.DECISION_LLM_GATE.value("llm", "uncertain")
+    payload = decision_agent.make_decision_payload({}, _sim(0.55))
+
+    assert client.calls == 1
+    assert (payload["decision"], payload["llm_gate"], payload["decision_source"]) == ("review", "uncertain", "llm")
+    assert metrics.DECISION_LLM_GATE.value("llm", "uncertain") == before + 1
+
+    monkeypatch.setattr(decision_agent, "DECISION_LLM_GATING", "off")
+    payload = decision_agent.make_decision_payload({}, _sim(0.1))
+    assert client.calls == 2
+    assert payload["llm_gate"] == "gating_off"
+
+
+def test_policy_is_part_of_agent_version(monkeypatch: pytest.MonkeyPatch):
+    for name in ("AGENT_VERSION", "DECISION_LLM_GATING", "DECISION_LLM_GATE_LOW", "DECISION_LLM_GATE_HIGH"):
+        monkeypatch.setattr(decision_agent, name, getattr(decision_agent, name))
+    decision_agent.configure_gating("band", 0.3, 0.8)
+    banded = decision_agent.AGENT_VERSION
+    decision_agent.configure_gating("off")
+    assert decision_agent.AGENT_VERSION != banded
+    assert decision_agent.DECISION_LLM_GATE_LOW == 0.3
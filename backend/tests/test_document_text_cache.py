@@ -0,0 +1,110 @@
+import asyncio
+import sys
+import threading
+import types
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def test_hydrate_documents_extracts_each_content_once(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    import api.routes as routes  # type: ignore
+
+    cache = {"h-cached": {"file_hash": "h-cached", "raw_text": "Fiche de paie mars", "page_count": 1}}
+    extracted = []
+
+    def _fake_extract(filename, data):
+        extracted.append(filename)
+        return data.decode("utf-8"), 1
+
+    monkeypatch.setattr(routes, "fetch_document_texts", lambda hashes: {h: cache[h] for h in hashes if h in cache})
+    monkeypatch.setattr(routes, "upsert_document_texts", lambda entries: cache.update({e["file_hash"]: e for e in entries}))
+    monkeypatch.setattr(routes, "_extract_document", _fake_extract)
+
+    statement = tmp_path / "1.pdf"
+    statement.write_bytes(b"Releve bancaire IBAN FR76")
+    detail = {
+        "documents": [
+            {"file_hash": "h-cached", "file_path": str(tmp_path / "missing.pdf")},
+            {"file_hash": "h-new", "file_path": str(statement)},
+            {"file_hash": "h-new", "file_path": str(statement)},
+        ]
+    }
+
+    routes._hydrate_documents(detail)
+    assert extracted == ["1.pdf"]
+    assert [doc["document_type"] for doc in detail["documents"]] == ["salary_slip", "bank_statement", "bank_statement"]
+    assert cache["h-new"]["document_type"] == "bank_statement"
+
+    # Second view (or another case with the same bytes): pure lookup.
+    detail = {"documents": [{"file_hash": "h-new", "file_path": str(statement)}]}
+    routes._hydrate_documents(detail)
+    assert extracted == ["1.pdf"]
+    assert detail["documents"][0]["raw_text"] == "Releve bancaire IBAN FR76"
+
+
+def test_documents_without_hash_are_keyed_by_content(tmp_path: Path):
+    import core.db as db  # type: ignore
+
+    payslip = tmp_path / "1.pdf"
+    payslip.write_bytes(b"Fiche de paie janvier")
+    before = db._document_hash(str(payslip))
+    payslip.write_bytes(b"Fiche de paie fevrier")
+    assert db._document_hash(str(payslip)) != before
+
+    missing = db._document_hash(str(tmp_path / "missing.pdf"))
+    assert missing.startswith(db.PATH_HASH_PREFIX)
+    assert db.fetch_document_texts([missing]) == {}  # never looked up, no database access
+
+
+def test_failed_pdf_extraction_is_not_cached(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    import api.routes as routes  # type: ignore
+
+    stored = []
+    monkeypatch.setattr(routes, "fetch_document_texts", lambda hashes: {})
+    monkeypatch.setattr(routes, "upsert_document_texts", stored.extend)
+    def _corrupt(_stream):
+        raise ValueError("EOF marker not found")
+
+    monkeypatch.setitem(sys.modules, "PyPDF2", types.SimpleNamespace(PdfReader=_corrupt))
+
+    texts = routes._resolve_document_texts([{"file_hash": "h-pdf", "filename": "1.pdf", "data": b"%PDF-1.4"}])
+    assert texts == {"h-pdf": ""}
+    assert stored == []
+
+
+def test_storing_uploads_keeps_the_event_loop_free(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    import api.routes as routes  # type: ignore
+
+    loop_ran = threading.Event()
+    waited = []
+
+    def _slow_lookup(hashes):
+        # a cache lookup stuck on the database (or an exhausted pool)
+        waited.append(loop_ran.wait(2))
+        return {}
+
+    monkeypatch.setattr(routes, "fetch_document_texts", _slow_lookup)
+    monkeypatch.setattr(routes, "upsert_document_texts", lambda entries: None)
+    monkeypatch.setattr(routes, "UPLOAD_ROOT", str(tmp_path))
+
+    class _Upload:
+        filename = "note.txt"
+
+        async def read(self):
+            return b"Net pay 2500"
+
+    async def _upload_while_serving():
+        store = asyncio.ensure_future(routes._store_files(3, [_Upload()]))
+        await asyncio.sleep(0.05)  # another request's work, on the same loop
+        loop_ran.set()
+        return await store
+
+    stored = asyncio.run(_upload_while_serving())
+    assert waited == [True]
+    assert stored[0]["raw_text"] == "Net pay 2500"
@@ -0,0 +1,105 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import core.db as db  # type: ignore
+import core.orchestrator as orchestrator  # type: ignore
+
+
+AGENT_RESULTS = {
+    "analyze_documents": {"document_analysis": {"flags": ["INCOME_MISMATCH"], "dds_score": 0.4}, "confidence": 0.7},
+    "analyze_behavior": {"behavior_analysis": {"behavior_flags": [], "brs_score": 0.2}, "confidence": 0.6},
+    "analyze_similarity": {"ai_analysis": {"risk_level": "high", "red_flags": []}, "rag_statistics": {}, "confidence": 0.5},
+    "analyze_images": {"image_analysis": {"flags": []}, "confidence": 0.55},
+    "analyze_fraud": {"fraud_analysis": {"risk_level": "LOW", "detected_flags": []}, "confidence": 0.6},
+    "make_decision_payload": {"decision": "review", "decision_confidence": 0.62, "human_review_required": True},
+    "explain_decision": {"explanation": {"customer_explanation": {"summary": "ok"}}, "explanation_confidence": 0.5},
+}
+
+REQUEST = {
+    "case_id": 11,
+    "amount": 10000,
+    "duration_months": 24,
+    "monthly_income": 2500,
+    "payment_history": {"loan": None},
+    "documents": [{"filename": "salary_march.pdf", "raw_text": "Net pay 2500"}],
+}
+
+
+@pytest.fixture
+def calls(stub_agents) -> list:
+    recorded: list = []
+    stub_agents(AGENT_RESULTS, recorded)
+    return recorded
+
+
+def _saved_rows(orchestration):
+    """`agent_outputs` rows as `fetch_case_detail` returns them after `save_orchestration`."""
+    return [
+        {"agent_name": name, "output_json": json.loads(json.dumps(output))}
+        for name, output in db._with_reusable_stages(orchestration).items()
+    ]
+
+
+def test_unchanged_case_reuses_every_saved_stage(calls: list):
+    first = orchestrator.run_orchestrator(REQUEST)
+    assert len(calls) == len(AGENT_RESULTS)
+    calls.clear()
+
+    second = orchestrator.run_orchestrator({**REQUEST, "agent_outputs": _saved_rows(first)})
+
+    assert calls == []
+    assert second["agents"] == first["agents"]
+    assert second["decision"] == first["decision"]
+    assert second["orchestrator"]["orchestration_metadata"]["reused_agents"] == sorted(
+        step.name for step in orchestrator._AGENT_STEPS
+    )
+
+
+def test_new_document_reruns_only_document_and_its_dependents(calls: list, monkeypatch: pytest.MonkeyPatch):
+    first = orchestrator.run_orchestrator(REQUEST)
+    calls.clear()
+
+    documents = REQUEST["documents"] + [{"filename": "bank_statement.pdf", "raw_text": "Balance 900"}]
+    saved = _saved_rows(first)
+    orchestrator.run_orchestrator({**REQUEST, "documents": documents, "agent_outputs": saved})
+    # the document agent found nothing new, so nothing downstream had to run
+    assert calls == ["analyze_documents"]
+
+    def _documents(payload):
+        calls.append("analyze_documents")
+        return {"document_analysis": {"flags": [], "dds_score": 0.9}, "confidence": 0.8}
+
+    monkeypatch.setattr(orchestrator, "analyze_documents", _documents)
+    calls.clear()
+    orchestrator.run_orchestrator({**REQUEST, "documents": documents, "agent_outputs": saved})
+    assert sorted(calls) == ["analyze_documents", "analyze_fraud", "explain_decision", "make_decision_payload"]
+
+
+def test_force_and_degraded_stages_run_again(calls: list, monkeypatch: pytest.MonkeyPatch):
+    first = orchestrator.run_orchestrator(REQUEST)
+    calls.clear()
+    orchestrator.run_orchestrator({**REQUEST, "agent_outputs": _saved_rows(first)}, force=True)
+    assert len(calls) == len(AGENT_RESULTS)
+
+    def _boom(*args, **kwargs):
+        raise RuntimeError("qdrant unavailable")
+
+    monkeypatch.setattr(orchestrator, "analyze_similarity", _boom)
+    degraded = orchestrator.run_orchestrator(REQUEST)
+    assert "similarity" not in degraded["stages"]
+    assert "reuse" not in db._with_reusable_stages(degraded)["similarity"]
+
+    monkeypatch.setattr(orchestrator, "analyze_similarity", lambda payload: AGENT_RESULTS["analyze_similarity"])
+    calls.clear()
+    orchestrator.run_orchestrator({**REQUEST, "agent_outputs": _saved_rows(degraded)})
+    # fraud, decision and explanation saw the fallback, so they follow the recovered result
+    assert sorted(calls) == ["analyze_fraud", "explain_decision", "make_decision_payload"]
@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TESTS_DIR = Path(__file__).resolve().parent
+for path in (BACKEND_DIR, TESTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+import core.db as db  # type: ignore
+from query_counter import assert_num_queries  # type: ignore
+
+
+def test_monthly_installment_amounts():
+    # Simple interest: principal plus rate * years, split evenly.
+    assert db._monthly_installment_amount(12000, 0.05, 12) == 1050.0
+    # Annuity: standard amortizing payment, 200k over 20 years at 5%.
+    assert db._monthly_installment_amount(200000, 0.05, 240, "annuity") == 1319.91
+    assert db._monthly_installment_amount(1200, 0.0, 12, "annuity") == 100.0
+    with pytest.raises(ValueError):
+        db._monthly_installment_amount(1000, 0.05, 0)
+
+
+def test_loan_approval_inserts_schedule_in_one_statement(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("LOAN_AMORTIZATION_METHOD", "annuity")
+
+    def _responder(sql, _params):
+        if "FROM credit_cases" in sql:
+            return [{"user_id": 7, "loan_amount": 200000, "loan_duration": 360}]
+        if "INSERT INTO loans" in sql:
+            return [{"loan_id": 55}]
+        return []
+
+    with assert_num_queries(monkeypatch, 4, responder=_responder) as counter:
+        conn = db._connect()
+        with conn.cursor() as cur:
+            assert db._ensure_loan_for_case(cur, 3) == (55, 360)
+
+    sql, params = counter.statements[-1]
+    assert "generate_series" in sql
+    assert params[0] == 55 and params[2] == db._monthly_installment_amount(200000, 0.05, 360, "annuity")
+    assert params[3] == 360
@@ -0,0 +1,265 @@
+import json
+import multiprocessing
+import os
+import queue as queue_module
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TESTS_DIR = Path(__file__).resolve().parent
+for path in (BACKEND_DIR, TESTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+import core.db as db  # type: ignore
+import worker  # type: ignore
+from query_counter import assert_num_queries  # type: ignore
+
+
+def test_enqueue_and_claim_statements(monkeypatch: pytest.MonkeyPatch):
+    with assert_num_queries(monkeypatch, 1, responder=lambda sql, params: [{"job_id": 41}]) as counter:
+        assert db.enqueue_job("orchestrate", 9, {"case_id": 9, "amount": 1000}) == 41
+    sql, params = counter.statements[0]
+    assert "ON CONFLICT (case_id, job_type) WHERE status = 'queued'" in sql
+    assert params[0] == "orchestrate" and json.loads(params[2]) == {"case_id": 9, "amount": 1000}
+
+    with assert_num_queries(monkeypatch, 1) as counter:
+        assert db.claim_job("host:1", ["orchestrate"]) is None
+    sql, params = counter.statements[0]
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "ORDER BY priority DESC" in sql and "lease_expires_at < NOW()" in sql
+    assert params["worker_id"] == "host:1" and params["job_types"] == ["orchestrate"]
+
+
+def test_job_type_priorities(monkeypatch: pytest.MonkeyPatch):
+    assert db.job_priority("rerun") > db.job_priority("orchestrate") > db.job_priority("vector_sync") > db.job_priority("rescore")
+    monkeypatch.setenv("JOB_PRIORITY_RESCORE", "500")
+    with assert_num_queries(monkeypatch, 1, responder=lambda sql, params: [{"job_id": 1}]) as counter:
+        db.enqueue_job("rescore", 9, {})
+    assert counter.statements[0][1][4] == 500
+
+    with assert_num_queries(monkeypatch, 1, responder=lambda sql, params: [{"job_id": 3}]) as counter:
+        assert db.heartbeat_jobs("host:1", [3, 4]) == [3]
+    assert counter.statements[0][1][1:] == ([3, 4], "host:1")
+
+
+
+def _case_rows(fail_job_insert: bool):
+    def _rows(sql, params):
+        if "INSERT INTO job_queue" in sql:
+            if fail_job_insert:
+                raise RuntimeError("job_queue unavailable")
+            return [{"job_id": 12}]
+        if "INSERT INTO credit_cases" in sql:
+            return [{"case_id": 7, "created_at": "t0", "updated_at": "t0"}]
+        return []
+
+    return _rows
+
+
+def test_case_and_its_orchestrate_job_commit_together(monkeypatch: pytest.MonkeyPatch):
+    with assert_num_queries(monkeypatch, 3, responder=_case_rows(fail_job_insert=False)) as counter:
+        created = db.create_credit_request(3, {"amount": 1000}, None, {"amount": 1000, "user_id": 3}, 300)
+    assert created["case_id"] == 7
+    assert counter.connections == 1 and counter.transactions == ["commit"]
+    sql, params = counter.statements[-1]
+    assert "INSERT INTO job_queue" in sql and "LEAST(job_queue.run_after, EXCLUDED.run_after)" in sql
+    assert params[0] == "orchestrate" and params[1] == 7 and params[5] == 300
+    assert json.loads(params[2]) == {"amount": 1000, "user_id": 3, "case_id": 7}
+
+    # An upload releases its held job once the documents are attached.
+    with assert_num_queries(monkeypatch, 1, responder=_case_rows(fail_job_insert=False)) as counter:
+        db.add_case_documents(7, [], {"amount": 1000, "user_id": 3})
+    assert counter.transactions == ["commit"] and counter.statements[0][1][5] == 0
+
+
+def test_failed_enqueue_rolls_the_case_back(monkeypatch: pytest.MonkeyPatch):
+    with assert_num_queries(monkeypatch, 3, responder=_case_rows(fail_job_insert=True)) as counter:
+        with pytest.raises(RuntimeError, match="job_queue unavailable"):
+            db.create_credit_request(3, {"amount": 1000}, None, {"amount": 1000, "user_id": 3})
+    assert "INSERT INTO credit_cases" in counter.statements[0][0]
+    assert counter.connections == 1 and counter.transactions == ["rollback"]
+
+
+def test_failed_job_yields_to_a_queued_sibling(monkeypatch: pytest.MonkeyPatch):
+    rows = {"status": "failed", "superseded": True}
+    with assert_num_queries(monkeypatch, 1, responder=lambda sql, params: [rows]) as counter:
+        assert db.fail_job(5, "host:1", "RuntimeError: llm down") == "superseded"
+    sql, params = counter.statements[0]
+    assert "w.status = 'queued'" in sql and params["error"] == "RuntimeError: llm down"
+
+    rows = {"status": "failed", "superseded": False}
+    with assert_num_queries(monkeypatch, 1, responder=lambda sql, params: [rows]):
+        assert db.fail_job(5, "host:1", "boom") == "failed"
+
+    # the sibling was queued between the check and the update: retried once
+    calls = []
+
+    def _conflict_once(sql, params):
+        calls.append(sql)
+        if len(calls) == 1:
+            raise db.psycopg2.IntegrityError("duplicate key value violates unique constraint \"uq_job_queue_waiting\"")
+        return [{"status": "failed", "superseded": True}]
+
+    with assert_num_queries(monkeypatch, 2, responder=_conflict_once):
+        assert db.fail_job(5, "host:1", "boom") == "superseded"
+
+
+def _job(**overrides):
+    job = {"job_id": 5, "job_type": "orchestrate", "case_id": 9, "payload": {"amount": 1000}, "attempts": 1, "max_attempts": 3}
+    job.update(overrides)
+    return job
+
+
+@pytest.fixture
+def queue(monkeypatch: pytest.MonkeyPatch):
+    state = {"claimed": [], "done": [], "failed": [], "ran": []}
+    monkeypatch.setattr(worker, "claim_job", lambda worker_id, types: state["claimed"].pop(0) if state["claimed"] else None)
+    monkeypatch.setattr(worker, "complete_job", lambda job_id, worker_id: state["done"].append(job_id) or True)
+    monkeypatch.setattr(worker, "fail_job", lambda job_id, worker_id, error: state["failed"].append((job_id, error)) or "queued")
+    monkeypatch.setitem(worker.HANDLERS, "orchestrate", lambda job: state["ran"].append(job["case_id"]))
+    return state
+
+
+def test_worker_completes_retries_and_gives_up(queue, monkeypatch: pytest.MonkeyPatch):
+    assert worker.run_once("host:1") is False
+
+    queue["claimed"].append(_job())
+    assert worker.run_once("host:1") is True
+    assert queue["ran"] == [9] and queue["done"] == [5]
+
+    def _boom(job):
+        raise RuntimeError("llm down")
+
+    monkeypatch.setitem(worker.HANDLERS, "orchestrate", _boom)
+    queue["claimed"].append(_job(job_id=6))
+    worker.run_once("host:1")
+    assert queue["failed"] == [(6, "RuntimeError: llm down")]
+    assert queue["done"] == [5]
+
+    # reclaimed after its worker died on the last attempt: failed without running
+    queue["claimed"].append(_job(job_id=7, attempts=4, last_error=None))
+    worker.run_once("host:1")
+    assert queue["failed"][-1][0] == 7
+
+
+def test_pool_heartbeats_running_jobs_and_drains(queue, monkeypatch: pytest.MonkeyPatch):
+    started, release = threading.Event(), threading.Event()
+    beats: list = []
+
+    def _slow(job):
+        started.set()
+        release.wait(2)
+
+    monkeypatch.setitem(worker.HANDLERS, "orchestrate", _slow)
+    monkeypatch.setattr(worker, "heartbeat_jobs", lambda worker_id, ids: beats.append(sorted(ids)) or ids)
+    queue["claimed"].extend([_job(job_id=8), _job(job_id=9)])
+
+    pool = worker.WorkerPool(1, ["orchestrate"], worker="host:1", poll_interval=0.01, heartbeat_interval=0.02).start()
+    assert started.wait(2)
+    time.sleep(0.1)
+    assert [8] in beats
+
+    # draining finishes the running job but claims nothing new
+    threading.Timer(0.1, release.set).start()
+    assert pool.drain(timeout=2) is True
+    assert queue["done"] == [8]
+    assert queue["claimed"] == [_job(job_id=9)]
+
+
+
+def test_run_that_lost_its_lease_is_not_saved(monkeypatch: pytest.MonkeyPatch):
+    saved, owned = [], {5}
+    monkeypatch.setattr(worker, "run_orchestrator", lambda request: {"case_id": request["case_id"]})
+    monkeypatch.setattr(worker, "heartbeat_jobs", lambda worker_id, ids: [i for i in ids if i in owned])
+    monkeypatch.setattr(worker, "save_orchestration", lambda case_id, orchestration: saved.append(case_id))
+    monkeypatch.setattr(worker, "enqueue_job", lambda *_args: saved.append("vector_sync"))
+
+    worker._run_orchestration(_job(locked_by="host:1"))
+    assert saved == [9, "vector_sync"]
+
+    owned.clear()
+    worker._run_orchestration(_job(locked_by="host:1"))
+    assert saved == [9, "vector_sync"]
+
+
+def _pool_process(jobs, done, stop, barrier):
+    def _claim(worker_id, job_types):
+        try:
+            return jobs.get_nowait()
+        except queue_module.Empty:
+            return None
+
+    worker.claim_job = _claim
+    worker.complete_job = lambda job_id, worker_id: done.put(job_id) or True
+    worker.fail_job = lambda job_id, worker_id, error: done.put(-job_id) or "failed"
+    # each process has one slot, so a job only gets past the barrier while
+    # every other process is running one too
+    worker.HANDLERS["bench"] = lambda job: barrier.wait(10)
+    pool = worker.WorkerPool(1, ["bench"], poll_interval=0.01, heartbeat_interval=60).start()
+    stop.wait(30)
+    pool.drain(timeout=5)
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_worker_processes_run_jobs_concurrently():
+    processes, count = 4, 8
+    ctx = multiprocessing.get_context("fork")
+    with ctx.Manager() as manager:
+        jobs, done, stop = manager.Queue(), manager.Queue(), manager.Event()
+        barrier = manager.Barrier(processes)
+        for job_id in range(1, count + 1):
+            jobs.put(_job(job_id=job_id, job_type="bench"))
+        workers = [ctx.Process(target=_pool_process, args=(jobs, done, stop, barrier)) for _ in range(processes)]
+        for proc in workers:
+            proc.start()
+        finished = sorted(done.get(timeout=30) for _ in range(count))
+        stop.set()
+        for proc in workers:
+            proc.join(10)
+    assert finished == list(range(1, count + 1))
+
+
+def _claim_process(job_type, claimed):
+    while True:
+        job = db.claim_job(f"test:{os.getpid()}", [job_type])
+        if job is None:
+            break
+        claimed.put(int(job["job_id"]))
+        db.complete_job(int(job["job_id"]), f"test:{os.getpid()}")
+    db.close_pool()
+
+
+@pytest.mark.skipif(os.getenv("JOB_QUEUE_PG_TESTS") != "1", reason="needs a migrated Postgres (JOB_QUEUE_PG_TESTS=1)")
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_concurrent_claims_take_each_job_once():
+    job_type = f"test_claim_{os.getpid()}"
+    job_ids = [db.enqueue_job(job_type, None, {"n": n}) for n in range(40)]
+    # children open their own connections
+    db.close_pool()
+    ctx = multiprocessing.get_context("fork")
+    claimed = ctx.Queue()
+    workers = [ctx.Process(target=_claim_process, args=(job_type, claimed)) for _ in range(4)]
+    try:
+        for proc in workers:
+            proc.start()
+        taken = [claimed.get(timeout=30) for _ in job_ids]
+        for proc in workers:
+            proc.join(10)
+        assert sorted(taken) == sorted(job_ids)
+        assert db.claim_job("test:parent", [job_type]) is None
+    finally:
+        conn = db._connect()
+        try:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute("DELETE FROM job_queue WHERE job_type = %s", (job_type,))
+        finally:
+            conn.close()
+        db.close_pool()
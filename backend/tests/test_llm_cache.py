@@ -0,0 +1,131 @@
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import agents.llm_cache as llm_cache  # type: ignore
+import agents.llm_gateway as gateway  # type: ignore
+import core.metrics as metrics  # type: ignore
+import core.orchestrator as orchestrator  # type: ignore
+
+
+def _completion(text):
+    message = types.SimpleNamespace(content=text)
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+class _FakeOpenAI:
+    replies: list = []
+    calls: list = []
+
+    def __init__(self, **kwargs):
+        completions = types.SimpleNamespace(create=self._create)
+        self.chat = types.SimpleNamespace(completions=completions)
+
+    def _create(self, **kwargs):
+        _FakeOpenAI.calls.append(kwargs)
+        return _completion(_FakeOpenAI.replies.pop(0) if _FakeOpenAI.replies else "answer")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch: pytest.MonkeyPatch):
+    _FakeOpenAI.replies, _FakeOpenAI.calls = [], []
+    monkeypatch.setitem(sys.modules, "openai", types.SimpleNamespace(OpenAI=_FakeOpenAI))
+    monkeypatch.setattr(gateway, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(gateway, "_new_http_client", lambda: None)
+    for name in ("LLM_CACHE_ENABLED", "LLM_CACHE_BACKEND", "LLM_CACHE_TTL_SEC", "LLM_MODEL_SETTINGS"):
+        monkeypatch.delenv(name, raising=False)
+    gateway.close_clients()
+    llm_cache.clear()
+    yield
+    llm_cache.clear()
+
+
+def _ask(agent, prompt, **params):
+    chat = gateway.llm_client(agent).chat.completions.create(
+        model="m1", messages=[{"role": "user", "content": prompt}], **params
+    )
+    return chat.choices[0].message.content
+
+
+def test_identical_requests_reach_the_provider_once():
+    hits = metrics.LLM_CACHE.value("fraud", "memory_hit")
+    assert _ask("fraud", "Explain flags:\n  VELOCITY") == "answer"
+    assert _ask("fraud", "Explain flags: VELOCITY ", timeout=3) == "answer"
+    assert len(_FakeOpenAI.calls) == 1
+    assert metrics.LLM_CACHE.value("fraud", "memory_hit") == hits + 1
+
+    _ask("fraud", "Explain flags: VELOCITY", temperature=0.7)
+    _ask("decision", "Explain flags: INCOME_MISMATCH")
+    assert len(_FakeOpenAI.calls) == 3
+
+
+def test_ttls_are_per_agent(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("LLM_CACHE_TTL_FRAUD_SEC", "0")
+    for agent in ("fraud", "fraud", "chat", "chat", "document", "document"):
+        _ask(agent, "same prompt")
+    assert len(_FakeOpenAI.calls) == 5
+    assert llm_cache.agent_ttl("document") == 86400.0
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "0")
+    assert llm_cache.agent_ttl("document") is None
+
+
+def test_bypass_refreshes_the_entry():
+    _FakeOpenAI.replies = ["first", "second"]
+    assert _ask("decision", "p") == "first"
+    with llm_cache.bypass():
+        assert _ask("decision", "p") == "second"
+    assert _ask("decision", "p") == "second"
+    assert len(_FakeOpenAI.calls) == 2
+
+
+def test_empty_responses_are_not_cached():
+    _FakeOpenAI.replies = ["", "answer"]
+    assert _ask("explanation", "p") == ""
+    assert _ask("explanation", "p") == "answer"
+    assert len(_FakeOpenAI.calls) == 2
+
+
+def test_disk_tier_survives_the_in_process_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("LLM_CACHE_BACKEND", "disk")
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+    calls = []
+
+    def _analysis():
+        calls.append(1)
+        return '{"summary": "ok"}'
+
+    request = {"model": "m1", "messages": ["system", "profile"]}
+    assert llm_cache.cached_call("similarity", "m1", "langchain.chat", request, _analysis) == '{"summary": "ok"}'
+    llm_cache.clear()
+    hits = metrics.LLM_CACHE.value("similarity", "store_hit")
+    assert llm_cache.cached_call("similarity", "m1", "langchain.chat", request, _analysis) == '{"summary": "ok"}'
+    assert calls == [1]
+    assert metrics.LLM_CACHE.value("similarity", "store_hit") == hits + 1
+    assert len(list(tmp_path.rglob("*.json"))) == 1
+
+
+def test_forced_rerun_bypasses_the_cache(stub_agents):
+    seen = []
+
+    def _agent(*_args, **_kwargs):
+        seen.append(llm_cache._BYPASS.get())
+        return {"confidence": 0.5}
+
+    stub_agents(default=_agent)
+
+    orchestrator.run_orchestrator({"case_id": 5, "payment_history": {"loan": None}})
+    assert seen and not any(seen)
+    seen.clear()
+    orchestrator.run_orchestrator({"case_id": 5, "payment_history": {"loan": None}}, force=True)
+    assert seen and all(seen)
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import agents.llm_gateway as gateway  # type: ignore
+from agents import decision_agent, document_agent, fraud_agent  # type: ignore
+from agents.llm_budget import agent_deadline, rules_only  # type: ignore
+from core.scheduler import close_loop_resources  # type: ignore
+
+
+class _Create:
+    def __init__(self, owner, kind):
+        self.owner = owner
+        self.kind = kind
+
+    def create(self, **kwargs):
+        self.owner.calls.append((self.kind, kwargs))
+        return self.owner.reply
+
+
+class _FakeOpenAI:
+    built: list = []
+    reply: object = "ok"
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.calls: list = []
+        self.responses = _Create(self, "responses")
+        self.chat = types.SimpleNamespace(completions=_Create(self, "chat"))
+        _FakeOpenAI.built.append(self)
+
+    def close(self):
+        pass
+
+
+class _AsyncCreate(_Create):
+    async def create(self, **kwargs):
+        self.owner.calls.append((self.kind, kwargs))
+        await asyncio.sleep(0)
+        return self.owner.reply
+
+
+class _FakeAsyncOpenAI:
+    built: list = []
+    reply: object = "ok"
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.calls: list = []
+        self.responses = _AsyncCreate(self, "responses")
+        self.chat = types.SimpleNamespace(completions=_AsyncCreate(self, "chat"))
+        _FakeAsyncOpenAI.built.append(self)
+
+
+class _FakeHttpClient:
+    def __init__(self, limits):
+        self.limits = limits
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeAsyncHttpClient(_FakeHttpClient):
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_openai(monkeypatch: pytest.MonkeyPatch):
+    _FakeOpenAI.built = []
+    _FakeAsyncOpenAI.built = []
+    monkeypatch.setitem(
+        sys.modules, "openai", types.SimpleNamespace(OpenAI=_FakeOpenAI, AsyncOpenAI=_FakeAsyncOpenAI)
+    )
+    monkeypatch.setitem(
+        sys.modules,
+        "httpx",
+        types.SimpleNamespace(Limits=lambda **kw: kw, Client=_FakeHttpClient, AsyncClient=_FakeAsyncHttpClient),
+    )
+    monkeypatch.setattr(gateway, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(gateway, "OPENAI_BASE_URL", "http://llm.local/v1")
+    monkeypatch.delenv("LLM_MODEL_SETTINGS", raising=False)
+    gateway.close_clients()
+    yield _FakeOpenAI
+    gateway.close_clients()
+
+
+def test_agents_share_one_pooled_client(fake_openai, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("LLM_POOL_MAX_CONNECTIONS", "7")
+    for agent in (document_agent, fraud_agent, decision_agent, document_agent):
+        client = agent._llm_client()
+        client.responses.create(model="m1", input="hi")
+        client.chat.completions.create(model="m1", messages=[])
+
+    assert len(fake_openai.built) == 1
+    shared = fake_openai.built[0]
+    assert len(shared.calls) == 8
+    assert shared.kwargs["base_url"] == "http://llm.local/v1"
+    pool = shared.kwargs["http_client"]
+    assert pool is gateway.http_client()
+    assert pool.limits["max_connections"] == 7
+
+    gateway.close_clients()
+    assert pool.closed
+
+
+def test_async_agents_share_one_client_per_event_loop(fake_openai, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("LLM_POOL_MAX_CONNECTIONS", "7")
+
+    async def _calls() -> list:
+        for agent in (document_agent, fraud_agent, decision_agent):
+            client = agent._allm_client()
+            await client.responses.create(model="m1", input="hi")
+            await client.chat.completions.create(model="m1", messages=[])
+        built = list(_FakeAsyncOpenAI.built)
+        await close_loop_resources()
+        return built
+
+    first = asyncio.run(_calls())
+    second = asyncio.run(_calls())
+
+    assert fake_openai.built == []
+    assert len(first) == 1 and len(second) == 2
+    shared = first[0]
+    assert len(shared.calls) == 6
+    pool = shared.kwargs["http_client"]
+    assert isinstance(pool, _FakeAsyncHttpClient)
+    assert pool.limits["max_connections"] == 7
+    # bound to the loop that opened it: closed with it, and the next loop opens its own
+    assert pool.closed
+    assert second[1].kwargs["http_client"] is not pool
+
+
+def test_async_entry_point_matches_sync(fake_openai, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "0")
+    reply = json.dumps({"flag_explanations": {"DOC_TAMPER": "llm says so"}, "global_summary": "risky"})
+    for fake in (_FakeOpenAI, _FakeAsyncOpenAI):
+        monkeypatch.setattr(fake, "reply", types.SimpleNamespace(output_text=reply))
+    payload = {"case_id": 7, "document_flags": ["DOC_TAMPER"], "behavior_flags": [], "transaction_flags": []}
+
+    async def _analyze() -> dict:
+        try:
+            return await fraud_agent.analyze_fraud_async(payload)
+        finally:
+            await close_loop_resources()
+
+    expected = fraud_agent.analyze_fraud(payload)
+    result = asyncio.run(_analyze())
+
+    assert result == expected
+    assert "llm says so" in json.dumps(result)
+    assert len(fake_openai.built) == 1 and len(_FakeAsyncOpenAI.built) == 1
+
+
+def test_calls_are_routed_by_model(fake_openai, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("OAI_KEY", "sk-other")
+    monkeypatch.setenv(
+        "LLM_MODEL_SETTINGS",
+        '{"big": {"timeout": 45, "max_retries": 0}, "oai": {"base_url": "http://oai/v1", "api_key_env": "OAI_KEY"}}',
+    )
+    client = gateway.llm_client("decision")
+    for model in ("small", "big", "oai", "small"):
+        client.chat.completions.create(model=model, messages=[])
+
+    by_url = {(c.kwargs["base_url"], c.kwargs["max_retries"]): c for c in fake_openai.built}
+    assert set(by_url) == {("http://llm.local/v1", 2), ("http://llm.local/v1", 0), ("http://oai/v1", 2)}
+    assert by_url[("http://oai/v1", 2)].kwargs["api_key"] == "sk-other"
+    assert [kw["model"] for _, kw in by_url[("http://llm.local/v1", 2)].calls] == ["small", "small"]
+    (_, big), = by_url[("http://llm.local/v1", 0)].calls
+    assert big["timeout"] == 45
+
+
+def test_timeout_is_capped_by_the_agent_slice_at_call_time(fake_openai):
+    client = gateway.llm_client("fraud")
+    with agent_deadline(0.5):
+        client.responses.create(model="m1", input="hi")
+    client.responses.create(model="m1", input="hi", timeout=3)
+    (_, capped), (_, explicit) = fake_openai.built[0].calls
+    assert 0 < capped["timeout"] <= 0.5
+    assert explicit["timeout"] == 3
+
+
+def test_no_client_without_key_or_in_rules_only(fake_openai, monkeypatch: pytest.MonkeyPatch):
+    with rules_only():
+        assert gateway.llm_client("fraud") is None
+    monkeypatch.setattr(gateway, "OPENAI_API_KEY", "")
+    assert gateway.llm_client("fraud") is None
+    assert fake_openai.built == []
+
+
+def test_model_with_its_own_key_gets_a_client(fake_openai, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(gateway, "OPENAI_API_KEY", "")
+    monkeypatch.setenv("OAI_KEY", "sk-other")
+    monkeypatch.setenv("LLM_MODEL_SETTINGS", '{"oai": {"base_url": "http://oai/v1", "api_key_env": "OAI_KEY"}}')
+
+    assert gateway.llm_client("decision", "groq-model") is None
+    client = gateway.llm_client("decision", "groq-model", "oai")
+    assert client is not None and gateway.llm_client("chat") is not None
+
+    with pytest.raises(RuntimeError):
+        client.chat.completions.create(model="groq-model", messages=[])
+    client.chat.completions.create(model="oai", messages=[])
+    assert [c.kwargs["api_key"] for c in fake_openai.built] == ["sk-other"]
+
+
+def test_explanation_llm_stays_disabled(fake_openai):
+    from agents import explanation_agent  # type: ignore
+
+    assert explanation_agent._llm_client() is None
+
+
+def test_invalid_model_settings_fall_back_to_defaults(fake_openai, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("LLM_MODEL_SETTINGS", "{not json")
+    settings = gateway.model_settings("m1")
+    assert settings == gateway.ModelSettings(base_url="http://llm.local/v1", api_key="sk-test")
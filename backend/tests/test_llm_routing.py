@@ -0,0 +1,115 @@
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import agents.decision_agent as decision_agent  # type: ignore
+import agents.llm_metrics as llm_metrics  # type: ignore
+import agents.llm_routing as llm_routing  # type: ignore
+import core.metrics as metrics  # type: ignore
+from agents.llm_budget import agent_deadline  # type: ignore
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class _Provider:
+    """Fake OpenAI client; `responses_error` set means the Responses API fails with it."""
+
+    def __init__(self, responses_error=None) -> None:
+        self.responses_error = responses_error
+        self.calls = []
+        self.responses = types.SimpleNamespace(create=self._responses)
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._chat))
+
+    def _responses(self, **kwargs):
+        self.calls.append(("responses", kwargs["model"]))
+        if self.responses_error is not None:
+            raise self.responses_error
+        return types.SimpleNamespace(output_text='{"decision": "review"}')
+
+    def _chat(self, **kwargs):
+        self.calls.append(("chat", kwargs["model"]))
+        message = types.SimpleNamespace(content='{"decision": "review"}')
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry():
+    llm_routing.forget_endpoints()
+    llm_metrics.reset_latencies()
+    yield
+    llm_routing.forget_endpoints()
+    llm_metrics.reset_latencies()
+
+
+def test_chat_only_provider_is_probed_once():
+    provider = _Provider(_StatusError(404))
+    before = metrics.LLM_ENDPOINTS.value("m-chat", "chat")
+
+    assert llm_routing.complete(provider, "m-chat", "p1", 50) == '{"decision": "review"}'
+    assert llm_routing.complete(provider, "m-chat", "p2", 50) == '{"decision": "review"}'
+
+    assert provider.calls == [("responses", "m-chat"), ("chat", "m-chat"), ("chat", "m-chat")]
+    assert llm_routing.endpoint_for("m-chat") == "chat"
+    assert metrics.LLM_ENDPOINTS.value("m-chat", "chat") == before + 1
+
+
+def test_transient_failures_do_not_mark_the_model():
+    provider = _Provider(_StatusError(503))
+    llm_routing.complete(provider, "m-flaky", "p", 50)
+    assert llm_routing.endpoint_for("m-flaky") is None
+
+    provider.responses_error = None
+    llm_routing.complete(provider, "m-flaky", "p", 50)
+    llm_routing.complete(provider, "m-flaky", "p", 50)
+    assert provider.calls == [("responses", "m-flaky"), ("chat", "m-flaky"), ("responses", "m-flaky"), ("responses", "m-flaky")]
+    assert llm_routing.endpoint_for("m-flaky") == "responses"
+
+
+def test_configured_endpoint_skips_probing(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("LLM_MODEL_SETTINGS", '{"m-conf": {"endpoint": "chat"}}')
+    provider = _Provider()
+    llm_routing.complete(provider, "m-conf", "p", 50)
+    assert provider.calls == [("chat", "m-conf")]
+
+
+def test_route_prefers_the_faster_model_once_observed():
+    assert llm_routing.route("decision", "big", "small") == ["big", "small"]
+    for _ in range(llm_metrics.LLM_LATENCY_MIN_SAMPLES):
+        llm_metrics._record_latency("big", 4.0)
+        llm_metrics._record_latency("small", 1.0)
+
+    before = metrics.LLM_ROUTED.value("decision", "small", "p95")
+    assert llm_routing.route("decision", "big", "small") == ["small", "big"]
+    assert metrics.LLM_ROUTED.value("decision", "small", "p95") == before + 1
+    assert llm_routing.route("decision", "big", "big") == ["big"]
+
+
+def test_route_falls_back_when_primary_p95_exceeds_the_budget():
+    for _ in range(llm_metrics.LLM_LATENCY_MIN_SAMPLES):
+        llm_metrics._record_latency("big", 3.0)
+        llm_metrics._record_latency("small", 2.5)
+    assert llm_routing.route("decision", "big", "small") == ["big", "small"]
+    with agent_deadline(2.8):
+        assert llm_routing.route("decision", "big", "small") == ["small", "big"]
+
+
+def test_decision_agent_skips_the_unsupported_endpoint(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(decision_agent, "DECISION_LLM_MODEL", "m-primary")
+    monkeypatch.setattr(decision_agent, "DECISION_LLM_FALLBACK_MODEL", "m-fallback")
+    provider = _Provider(_StatusError(404))
+
+    assert decision_agent._call_llm(provider, "prompt") == '{"decision": "review"}'
+    assert decision_agent._call_llm(provider, "prompt") == '{"decision": "review"}'
+    assert provider.calls == [("responses", "m-primary"), ("chat", "m-primary"), ("chat", "m-primary")]
@@ -0,0 +1,137 @@
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import core.db as db  # type: ignore
+import core.metrics as metrics  # type: ignore
+import core.orchestrator as orchestrator  # type: ignore
+from agents.llm_metrics import instrument_client  # type: ignore
+
+
+def test_text_exposition_format():
+    requests = metrics.Counter("test_requests_total", "Requests.", ("route",))
+    requests.inc('/a"b')
+    requests.inc('/a"b', amount=2)
+    latency = metrics.Histogram("test_latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    latency.observe(0.05, "/x")
+    latency.observe(0.5, "/x")
+    latency.observe(5, "/x")
+    in_flight = metrics.Gauge("test_in_flight", "In flight.")
+    with in_flight.track_inprogress():
+        assert in_flight.value() == 1
+
+    text = metrics.render()
+    assert "# TYPE test_requests_total counter\ntest_requests_total{route=\"/a\\\"b\"} 3\n" in text
+    assert 'test_latency_seconds_bucket{route="/x",le="0.1"} 1\n' in text
+    assert 'test_latency_seconds_bucket{route="/x",le="1"} 2\n' in text
+    assert 'test_latency_seconds_bucket{route="/x",le="+Inf"} 3\n' in text
+    assert 'test_latency_seconds_sum{route="/x"} 5.55\n' in text
+    assert 'test_latency_seconds_count{route="/x"} 3\n' in text
+    assert "test_in_flight 0\n" in text
+    with pytest.raises(ValueError):
+        requests.inc()
+
+
+def test_recording_is_cheap():
+    histogram = metrics.Histogram("test_hot_path_seconds", "Hot path.", ("query",))
+    calls = 50_000
+    started = time.perf_counter()
+    for _ in range(calls):
+        histogram.observe(0.002, "fetch_case_detail")
+    per_call = (time.perf_counter() - started) / calls
+    assert histogram.count("fetch_case_detail") == calls
+    assert per_call < 10e-6, per_call
+
+
+class _Cursor:
+    def execute(self, query, vars=None):
+        return None
+
+
+class _TimedCursor(db._TimedCursorMixin, _Cursor):
+    pass
+
+
+def fetch_widget(cur):
+    cur.execute("SELECT 1")
+
+
+def execute_values(cur):
+    cur.execute("INSERT ...")
+
+
+def upsert_widgets(cur):
+    execute_values(cur)
+
+
+def test_db_statements_are_timed_per_accessor():
+    before = metrics.DB_QUERY_SECONDS.count("fetch_widget"), metrics.DB_QUERY_SECONDS.count("upsert_widgets")
+    cur = _TimedCursor()
+    fetch_widget(cur)
+    fetch_widget(cur)
+    upsert_widgets(cur)
+    after = metrics.DB_QUERY_SECONDS.count("fetch_widget"), metrics.DB_QUERY_SECONDS.count("upsert_widgets")
+    assert (after[0] - before[0], after[1] - before[1]) == (2, 1)
+
+
+def test_llm_calls_are_timed_and_errors_counted():
+    class _Responses:
+        def create(self, **kwargs):
+            raise RuntimeError("unsupported")
+
+    class _Completions:
+        def create(self, **kwargs):
+            return "ok"
+
+    class _Client:
+        responses = _Responses()
+        chat = type("Chat", (), {"completions": _Completions()})()
+        base_url = "http://llm"
+
+    client = instrument_client(_Client(), "test-agent")
+    errors = metrics.LLM_ERRORS.value("test-agent", "m1")
+    with pytest.raises(RuntimeError):
+        client.responses.create(model="m1", input="hi")
+    assert client.chat.completions.create(model="m1", messages=[]) == "ok"
+    assert client.base_url == "http://llm"
+    assert metrics.LLM_ERRORS.value("test-agent", "m1") == errors + 1
+    assert metrics.LLM_SECONDS.count("test-agent", "m1") >= 2
+    assert instrument_client(None, "test-agent") is None
+
+
+def test_orchestration_records_agent_latency_and_fallbacks(stub_agents):
+    def _boom(*_args, **_kwargs):
+        raise RuntimeError("provider down")
+
+    stub_agents({"analyze_fraud": _boom})
+
+    runs = metrics.AGENT_SECONDS.count("document")
+    fallbacks = metrics.AGENT_FALLBACKS.value("fraud", "error")
+    orchestrator.run_orchestrator({"case_id": 3, "payment_history": {"loan": None}})
+
+    assert metrics.AGENT_SECONDS.count("document") == runs + 1
+    assert metrics.AGENT_FALLBACKS.value("fraud", "error") == fallbacks + 1
+    assert metrics.ORCHESTRATIONS_IN_FLIGHT.value() == 0
+
+
+def test_metrics_server_serves_the_registry():
+    server = metrics.serve_metrics(0, host="127.0.0.1")
+    assert server is not None
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as resp:
+            body = resp.read().decode("utf-8")
+            assert resp.headers["Content-Type"] == metrics.CONTENT_TYPE
+        assert "# TYPE db_query_duration_seconds histogram" in body
+    finally:
+        server.shutdown()
+        server.server_close()
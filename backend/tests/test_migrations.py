@@ -0,0 +1,128 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import core.migrations as migrations  # type: ignore
+
+
+def _write(directory: Path, name: str, sql: str) -> None:
+    (directory / name).write_text(sql, encoding="utf-8")
+
+
+def test_discover_and_pending(tmp_path: Path):
+    _write(tmp_path, "20260201_b.sql", "SELECT 2;")
+    _write(tmp_path, "20260101_a.sql", "SELECT 1;")
+    _write(tmp_path, "notes.txt", "ignored")
+
+    found = migrations.discover_migrations(tmp_path)
+    assert [m.version for m in found] == ["20260101_a", "20260201_b"]
+
+    applied = {"20260101_a": found[0].checksum}
+    assert [m.version for m in migrations.pending_migrations(applied, found)] == ["20260201_b"]
+
+    # An edited, already-applied file is reported but never re-run.
+    applied = {"20260101_a": "stale-checksum", "20260201_b": found[1].checksum}
+    assert migrations.pending_migrations(applied, found) == []
+
+
+def test_repo_migrations_are_discovered():
+    versions = [m.version for m in migrations.discover_migrations()]
+    assert "20260129_runtime_schema" in versions
+    assert versions == sorted(versions)
+
+
+def test_init_db_modes(monkeypatch: pytest.MonkeyPatch, tmp_path: Path):
+    _write(tmp_path, "20260101_a.sql", "SELECT 1;")
+    monkeypatch.setenv("MIGRATIONS_DIR", str(tmp_path))
+    applied = []
+    monkeypatch.setattr(migrations, "apply_migrations", lambda directory=None: applied.append(True) or [])
+
+    def _no_db(*_args, **_kwargs):
+        raise AssertionError("skip mode must not touch the database")
+
+    monkeypatch.setenv("DB_MIGRATIONS_ON_STARTUP", "skip")
+    monkeypatch.setattr(migrations, "schema_status", _no_db)
+    migrations.init_db()
+
+    pending = migrations.discover_migrations(tmp_path)
+    monkeypatch.setattr(migrations, "schema_status", lambda directory=None: pending)
+    monkeypatch.setenv("DB_MIGRATIONS_ON_STARTUP", "check")
+    migrations.init_db()
+    assert applied == []
+
+    monkeypatch.setenv("DB_MIGRATIONS_ON_STARTUP", "apply")
+    migrations.init_db()
+    assert applied == [True]
+
+    monkeypatch.setattr(migrations, "schema_status", lambda directory=None: [])
+    migrations.init_db()
+    assert applied == [True]
+
+
+def test_no_transaction_migrations_are_split(tmp_path: Path):
+    _write(
+        tmp_path,
+        "20260301_idx.sql",
+        "-- migrate: no-transaction\n-- comment\nCREATE INDEX CONCURRENTLY IF NOT EXISTS a ON t (x);\n\n"
+        "DROP INDEX CONCURRENTLY IF EXISTS b;\n",
+    )
+    _write(tmp_path, "20260302_tx.sql", "ALTER TABLE t ADD COLUMN IF NOT EXISTS y INT;\n")
+    no_tx, tx = migrations.discover_migrations(tmp_path)
+    assert not no_tx.transactional
+    assert tx.transactional
+    assert migrations._split_statements(no_tx.sql) == [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS a ON t (x)",
+        "DROP INDEX CONCURRENTLY IF EXISTS b",
+    ]
+
+
+class _BaselineCursor:
+    def __init__(self, admits_explanation):
+        self.admits_explanation = admits_explanation
+        self.inserted = []
+        self._row = None
+
+    def execute(self, sql, params=None):
+        if "pg_constraint" in sql:
+            self._row = None if self.admits_explanation is None else (self.admits_explanation,)
+        elif sql.startswith("INSERT INTO schema_version"):
+            self.inserted.append(params[0])
+
+    def fetchone(self):
+        return self._row
+
+
+def test_existing_schema_records_baseline_migrations():
+    repo = migrations.discover_migrations()
+    for admits, expected in ((True, list(migrations._BASELINE_VERSIONS)), (False, []), (None, [])):
+        cur = _BaselineCursor(admits)
+        migrations._record_baseline(cur, repo)
+        assert cur.inserted == expected
+
+
+def test_baseline_constraints_admit_explanation_rows(capsys: pytest.CaptureFixture):
+    repo = {m.version: m for m in migrations.discover_migrations()}
+    for version in migrations._BASELINE_VERSIONS:
+        assert "'explanation'" in repo[version].sql
+
+    # databases that recorded the file before it was widened are not warned about
+    edited = repo["20260127_add_decision_agent_output"]
+    (previous,) = migrations._PREVIOUS_CHECKSUMS[edited.version]
+    assert migrations.pending_migrations({edited.version: previous}, [edited]) == []
+    assert "[WARN]" not in capsys.readouterr().out
+
+
+def test_agent_outputs_unique_index_is_built_concurrently():
+    versions = {m.version: (i, m) for i, m in enumerate(migrations.discover_migrations())}
+    upserts, _ = versions["20260201_agent_output_upserts"]
+    position, index = versions["20260201_agent_output_upserts_index"]
+    assert position == upserts + 1
+    assert not index.transactional
+    assert "CREATE UNIQUE INDEX CONCURRENTLY" in index.sql
@@ -0,0 +1,90 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TESTS_DIR = Path(__file__).resolve().parent
+for path in (BACKEND_DIR, TESTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+import core.orchestrator as orchestrator  # type: ignore
+from core.cache import TTLCache  # type: ignore
+from test_orchestrator_async import AGENT_RESULTS  # type: ignore
+
+
+REQUEST = {
+    "case_id": 21,
+    "amount": 12000,
+    "duration_months": 36,
+    "monthly_income": 3200,
+    "documents_payloads": [{"doc_type": "salary_slip", "raw_text": "Salaire net 3200", "filename": "pay.pdf"}],
+    "payment_history": {"loan": None, "payment_behavior_summary": {"on_time_rate": 1.0, "updated_at": "2026-01-01"}},
+}
+
+
+@pytest.fixture()
+def calls(stub_agents, monkeypatch: pytest.MonkeyPatch) -> list:
+    recorded: list = []
+    stub_agents(AGENT_RESULTS, recorded)
+    monkeypatch.setenv("ORCHESTRATION_CACHE_TTL_SEC", "600")
+    monkeypatch.setattr(orchestrator, "_CACHE", None)
+    return recorded
+
+
+def test_unchanged_inputs_are_served_from_cache(calls: list):
+    first = orchestrator.run_orchestrator(REQUEST)
+    assert first["orchestrator"]["orchestration_metadata"]["cache_hit"] is False
+    executed = len(calls)
+
+    # a refreshed summary timestamp is not an input change
+    touched = {**REQUEST, "payment_history": {**REQUEST["payment_history"], "payment_behavior_summary": {"on_time_rate": 1.0, "updated_at": "2026-02-01"}}}
+    second = orchestrator.run_orchestrator(touched)
+    assert len(calls) == executed
+    assert second["orchestrator"]["orchestration_metadata"]["cache_hit"] is True
+    assert second["agents"] == first["agents"]
+
+    second["agents"]["document"]["flags"].append("MUTATED")
+    assert "MUTATED" not in orchestrator.run_orchestrator(REQUEST)["agents"]["document"]["flags"]
+
+
+def test_changed_inputs_force_and_agent_versions_miss(calls: list, monkeypatch: pytest.MonkeyPatch):
+    orchestrator.run_orchestrator(REQUEST)
+    executed = len(calls)
+
+    edited_doc = {**REQUEST, "documents_payloads": [{"doc_type": "salary_slip", "raw_text": "Salaire net 2100", "filename": "pay.pdf"}]}
+    orchestrator.run_orchestrator(edited_doc)
+    assert len(calls) == 2 * executed
+
+    orchestrator.run_orchestrator(REQUEST, force=True)
+    assert len(calls) == 3 * executed
+
+    monkeypatch.setattr(orchestrator, "_agent_versions", lambda: {"document": {"version": "2"}})
+    orchestrator.run_orchestrator(REQUEST)
+    assert len(calls) == 4 * executed
+
+
+def test_degraded_runs_are_not_cached(calls: list, monkeypatch: pytest.MonkeyPatch):
+    def _boom(_payload):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(orchestrator, "analyze_fraud", _boom)
+    orchestrator.run_orchestrator(REQUEST)
+    assert len(orchestrator._orchestration_cache()) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expires():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    cache.set("short", 4, ttl=0)
+    assert cache.get("short") is None
+    assert cache.stats() == {"size": 1, "hits": 3, "misses": 2, "evictions": 2}
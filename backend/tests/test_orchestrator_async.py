@@ -0,0 +1,173 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import core.orchestrator as orchestrator  # type: ignore
+
+
+AGENT_RESULTS = {
+    "analyze_documents": {"document_analysis": {"flags": ["INCOME_MISMATCH"], "dds_score": 0.4}, "confidence": 0.7},
+    "analyze_behavior": {"behavior_analysis": {"behavior_flags": [], "brs_score": 0.2}, "confidence": 0.6},
+    "analyze_similarity": {"ai_analysis": {"risk_level": "high", "red_flags": []}, "rag_statistics": {}, "confidence": 0.5},
+    "analyze_images": {"image_analysis": {"flags": []}, "confidence": 0.55},
+    "analyze_fraud": {"fraud_analysis": {"risk_level": "LOW", "detected_flags": []}, "confidence": 0.6},
+    "make_decision_payload": {"decision": "review", "decision_confidence": 0.62, "human_review_required": True},
+    "explain_decision": {"explanation": {"customer_explanation": {"summary": "ok"}}, "explanation_confidence": 0.5},
+}
+
+
+def test_async_orchestrator_matches_sync(stub_agents):
+    calls: list = []
+    stub_agents(AGENT_RESULTS, calls)
+    request = {"case_id": 7, "amount": 10000, "duration_months": 24, "monthly_income": 2500, "payment_history": {"loan": None}}
+
+    expected = orchestrator.run_orchestrator(request)
+    sync_calls = list(calls)
+    calls.clear()
+    result = asyncio.run(orchestrator.run_orchestrator_async(request))
+
+    for run in (result, expected):
+        # wall-clock timings differ between any two runs
+        run["orchestrator"]["orchestration_metadata"].pop("stage_timings")
+        run["orchestrator"]["orchestration_metadata"].pop("total_ms")
+    assert result == expected
+    assert sorted(calls) == sorted(sync_calls)
+    assert calls[-2:] == ["make_decision_payload", "explain_decision"]
+    assert result["decision"]["decision"] == "review"
+    assert "PEER_RISK_HIGH" in result["decision"]["reason_codes"]
+
+
+def test_sync_entry_point_runs_the_async_path_on_its_own_loop(monkeypatch: pytest.MonkeyPatch):
+    from core.scheduler import loop_resource  # type: ignore
+
+    closed = []
+
+    class _Client:
+        async def aclose(self):
+            closed.append(True)
+
+    async def _async_run(request_data, force=False):
+        loop_resource("test.client", _Client)
+        return {"request": request_data, "force": force, "thread": threading.current_thread()}
+
+    monkeypatch.setattr(orchestrator, "run_orchestrator_async", _async_run)
+    result = orchestrator.run_orchestrator({"case_id": 1}, force=True)
+
+    assert result == {"request": {"case_id": 1}, "force": True, "thread": threading.current_thread()}
+    # the loop's async clients are closed with it
+    assert closed == [True]
+
+
+def test_native_async_agents_keep_hundreds_of_cases_in_flight(stub_agents, monkeypatch: pytest.MonkeyPatch):
+    stub_agents(AGENT_RESULTS)
+    cases = 300
+    in_flight = {"now": 0, "peak": 0, "threads": 0}
+
+    def _native(result):
+        async def _agent(*_args, **_kwargs):
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+            in_flight["threads"] = max(in_flight["threads"], threading.active_count())
+            await asyncio.sleep(0.05)
+            in_flight["now"] -= 1
+            return dict(result)
+
+        return _agent
+
+    for name, result in AGENT_RESULTS.items():
+        monkeypatch.setattr(orchestrator, name + "_async", _native(result))
+
+    async def _run_all():
+        started = time.monotonic()
+        results = await asyncio.gather(*(
+            orchestrator.run_orchestrator_async({"case_id": case_id, "payment_history": {"loan": None}})
+            for case_id in range(cases)
+        ))
+        return results, time.monotonic() - started
+
+    results, elapsed = asyncio.run(_run_all())
+
+    assert [r["decision"]["decision"] for r in results] == ["review"] * cases
+    # every case's analysis stages waited at once, on the loop rather than on a thread each
+    assert in_flight["peak"] >= cases * 4
+    assert in_flight["threads"] < 50
+    assert elapsed < 5
+
+
+def test_async_orchestrator_falls_back_when_agent_raises(stub_agents, monkeypatch: pytest.MonkeyPatch):
+    stub_agents(AGENT_RESULTS)
+
+    async def _boom(*_args, **_kwargs):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(orchestrator, "analyze_fraud_async", _boom, raising=False)
+    result = asyncio.run(orchestrator.run_orchestrator_async({"case_id": 8, "payment_history": {"loan": None}}))
+    assert result["agents_raw"]["fraud_agent"] == {"case_id": 8, "fraud_analysis": {}, "confidence": 0.4}
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_slow_agent_is_cut_off_and_replaced_by_rules(stub_agents, monkeypatch: pytest.MonkeyPatch, use_async: bool):
+    from agents.llm_budget import llm_allowed  # type: ignore
+
+    stub_agents(AGENT_RESULTS)
+    release = threading.Event()
+
+    def _slow_documents(_request):
+        if not llm_allowed():
+            return {"document_analysis": {"flags": ["RULES_ONLY"]}, "confidence": 0.5}
+        release.wait(2)
+        return {"document_analysis": {"flags": ["FROM_LLM"]}, "confidence": 0.9}
+
+    monkeypatch.setattr(orchestrator, "analyze_documents", _slow_documents)
+    monkeypatch.setenv("AGENT_TIMEOUT_DOCUMENT_SEC", "0.2")
+    request = {"case_id": 9, "payment_history": {"loan": None}}
+
+    async def _timed_async():
+        started = time.monotonic()
+        result = await orchestrator.run_orchestrator_async(request)
+        return result, time.monotonic() - started
+
+    try:
+        if use_async:
+            # timed inside the loop: asyncio.run then waits for the abandoned thread
+            result, elapsed = asyncio.run(_timed_async())
+        else:
+            started = time.monotonic()
+            result = orchestrator.run_orchestrator(request)
+            elapsed = time.monotonic() - started
+    finally:
+        release.set()
+
+    assert elapsed < 1.5
+    assert result["agents_raw"]["document_agent"]["document_analysis"]["flags"] == ["RULES_ONLY"]
+    metadata = result["orchestrator"]["orchestration_metadata"]
+    assert metadata["degraded_agents"] == {"document": "timeout"}
+    assert metadata["latency_budget_ms"] == 45000
+
+
+def test_exhausted_budget_degrades_downstream_stages(stub_agents, monkeypatch: pytest.MonkeyPatch):
+    stub_agents(AGENT_RESULTS)
+    monkeypatch.setenv("ORCHESTRATOR_DEADLINE_SEC", "0.2")
+
+    def _slow_similarity(_request):
+        time.sleep(0.4)
+        return {"ai_analysis": {"risk_level": "low"}, "confidence": 0.9}
+
+    monkeypatch.setattr(orchestrator, "analyze_similarity", _slow_similarity)
+    result = orchestrator.run_orchestrator({"case_id": 10, "payment_history": {"loan": None}})
+
+    degraded = result["orchestrator"]["orchestration_metadata"]["degraded_agents"]
+    assert degraded["similarity"] == "timeout"
+    assert {"fraud", "decision", "explanation"} <= set(degraded)
+    assert result["agents_raw"]["similarity_agent"] == {"case_id": 10, "ai_analysis": {}, "rag_statistics": {}, "confidence": 0.3}
+    assert result["decision"]["decision"] in {"approve", "review", "reject"}
@@ -0,0 +1,59 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TESTS_DIR = Path(__file__).resolve().parent
+for path in (BACKEND_DIR, TESTS_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+import core.db as db  # type: ignore
+from query_counter import assert_num_queries  # type: ignore
+
+
+def test_installment_delta_moves_counters_between_buckets():
+    delta = db._installment_delta({"status": "MISSED", "days_late": None}, {"status": "PAID", "days_late": 12})
+    assert delta["missed_installments"] == -1
+    assert delta["late_installments"] == 1
+    assert delta["on_time_installments"] == 0
+    assert (delta["days_late_sum"], delta["days_late_count"]) == (12, 1)
+    assert delta["max_days_late"] == 12 and not delta["max_days_late_stale"]
+
+    # A backdated payment shrinking days_late may lower the user's maximum.
+    delta = db._installment_delta({"status": "PAID", "days_late": 30}, {"status": "PAID", "days_late": 0})
+    assert delta["late_installments"] == -1 and delta["on_time_installments"] == 1
+    assert (delta["days_late_sum"], delta["days_late_count"]) == (-30, -1)
+    assert delta["max_days_late_stale"]
+
+
+def test_payment_updates_summary_with_one_delta_statement(monkeypatch: pytest.MonkeyPatch):
+    def _responder(sql, _params):
+        if "FROM loans" in sql and "case_id" in sql:
+            return [{"loan_id": 10, "user_id": 7}]
+        if "FOR UPDATE" in sql:
+            return [{"installment_id": 5, "due_date": date(2026, 1, 1), "amount_due": 100, "amount_paid": 0,
+                     "status": "PENDING", "days_late": None}]
+        if "INSERT INTO payments" in sql:
+            return [{"payment_id": 1}]
+        if "UPDATE installments" in sql:
+            return [{"status": "PAID", "days_late": 4}]
+        if "UPDATE payment_behavior_summary" in sql:
+            return [{"summary_id": 1, "user_id": 7}]
+        return []
+
+    # loan, installment lock, payment, installment update, summary delta, case touch
+    with assert_num_queries(monkeypatch, 6, responder=_responder) as counter:
+        db.create_payment_for_case(3, date(2026, 1, 5), 100.0, "card", "COMPLETED", installment_id=5)
+
+    summary = [(sql, params) for sql, params in counter.statements if "payment_behavior_summary" in sql]
+    assert len(summary) == 1
+    params = summary[0][1]
+    assert params["payment_count"] == 1 and params["payment_amount_sum"] == 100.0
+    assert params["late_installments"] == 1 and params["days_late_sum"] == 4
+    assert "FROM installments i" in summary[0][0]  # MAX is only re-read when stale
+    assert not params["max_days_late_stale"]
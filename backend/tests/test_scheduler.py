@@ -0,0 +1,244 @@
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+from core.scheduler import Stage, run_blocking, run_stages, run_stages_async  # type: ignore
+
+
+def _sleeper(name: str, delay: float, log: list):
+    def _run(inputs):
+        log.append((name, "start", sorted(inputs)))
+        time.sleep(delay)
+        return name
+    return _run
+
+
+def test_independent_stages_overlap_and_downstream_waits_for_inputs():
+    log: list = []
+    stages = [Stage(name, _sleeper(name, 0.2, log)) for name in ("document", "behavior", "similarity", "image")]
+    stages.append(Stage("fraud", _sleeper("fraud", 0.0, log), depends_on=("document", "behavior", "similarity", "image")))
+
+    started = time.monotonic()
+    results = run_stages(stages)
+    elapsed = time.monotonic() - started
+
+    assert results == {name: name for name in ("document", "behavior", "similarity", "image", "fraud")}
+    assert elapsed < 0.6
+    assert log[-1] == ("fraud", "start", ["behavior", "document", "image", "similarity"])
+
+
+def test_downstream_starts_before_unrelated_slow_branch_finishes():
+    fast_done = threading.Event()
+    slow_release = threading.Event()
+
+    def _slow(_):
+        assert slow_release.wait(2)
+        return "slow"
+
+    def _after_fast(inputs):
+        fast_done.set()
+        slow_release.set()
+        return inputs["fast"] + "+next"
+
+    results = run_stages([
+        Stage("slow", _slow),
+        Stage("fast", lambda _: "fast"),
+        Stage("next", _after_fast, depends_on=("fast",)),
+    ])
+    assert fast_done.is_set()
+    assert results["next"] == "fast+next"
+
+
+def test_stage_errors_propagate(monkeypatch: pytest.MonkeyPatch):
+    def _boom(_):
+        raise RuntimeError("agent crashed")
+
+    with pytest.raises(RuntimeError, match="agent crashed"):
+        run_stages([Stage("a", _boom), Stage("b", lambda inputs: inputs, depends_on=("a",))])
+
+    monkeypatch.setenv("ORCHESTRATOR_PARALLEL", "0")
+    with pytest.raises(RuntimeError, match="agent crashed"):
+        run_stages([Stage("a", _boom)])
+
+
+def test_inline_mode_and_invalid_graphs(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("ORCHESTRATOR_PARALLEL", "0")
+    results = run_stages([
+        Stage("b", lambda inputs: inputs["a"] * 2, depends_on=("a",)),
+        Stage("a", lambda _: 21),
+    ])
+    assert results == {"a": 21, "b": 42}
+
+    with pytest.raises(ValueError, match="unknown"):
+        run_stages([Stage("a", lambda _: 1, depends_on=("missing",))])
+    with pytest.raises(ValueError, match="cycle"):
+        run_stages([Stage("a", lambda _: 1, depends_on=("b",)), Stage("b", lambda _: 1, depends_on=("a",))])
+
+
+def test_async_stages_overlap_and_mix_sync_and_coroutines():
+    order: list = []
+
+    async def _agent(name: str):
+        order.append(name)
+        await asyncio.sleep(0.2)
+        return name
+
+    async def _blocking_agent(_):
+        return await run_blocking(time.sleep, 0.2) or "similarity"
+
+    stages = [
+        Stage("document", lambda _: _agent("document")),
+        Stage("behavior", lambda _: _agent("behavior")),
+        Stage("similarity", _blocking_agent),
+        Stage("image", lambda _: "image"),
+        Stage("fraud", lambda inputs: sorted(inputs), depends_on=("document", "behavior", "similarity", "image")),
+    ]
+
+    started = time.monotonic()
+    results = asyncio.run(run_stages_async(stages))
+    assert time.monotonic() - started < 0.6
+    assert results["similarity"] == "similarity"
+    assert results["fraud"] == ["behavior", "document", "image", "similarity"]
+    assert order == ["document", "behavior"]
+
+
+def test_stage_over_its_timeout_uses_on_timeout_result():
+    release = threading.Event()
+
+    def _stuck(_):
+        release.wait(2)
+        return "late"
+
+    try:
+        results = run_stages([
+            Stage("slow", _stuck, timeout=0.1, on_timeout=lambda _: "fallback"),
+            Stage("after", lambda inputs: inputs["slow"] + "+after", depends_on=("slow",)),
+        ])
+        assert results == {"slow": "fallback", "after": "fallback+after"}
+
+        with pytest.raises(TimeoutError):
+            asyncio.run(run_stages_async([Stage("slow", lambda _: asyncio.sleep(1))], deadline=time.monotonic() + 0.1))
+    finally:
+        release.set()
+
+
+
+def test_on_timeout_does_not_hold_up_other_stages():
+    release, downstream_started = threading.Event(), threading.Event()
+
+    def _stuck(_):
+        release.wait(2)
+        return "late"
+
+    def _fallback(_):
+        # run on the scheduler's own thread, this would keep "next" from starting
+        return "fallback" if downstream_started.wait(2) else "blocked"
+
+    def _fast(_):
+        time.sleep(0.2)
+        return "fast"
+
+    def _next(inputs):
+        downstream_started.set()
+        return inputs["fast"] + "+next"
+
+    try:
+        results = run_stages([
+            Stage("slow", _stuck, timeout=0.1, on_timeout=_fallback),
+            Stage("fast", _fast),
+            Stage("next", _next, depends_on=("fast",)),
+        ])
+    finally:
+        release.set()
+    assert results == {"slow": "fallback", "fast": "fast", "next": "fast+next"}
+
+def test_concurrent_runs_do_not_queue_behind_each_other():
+    runs, width = 6, 4
+    # every stage of every run must be in flight at once for the barrier to open
+    barrier = threading.Barrier(runs * width, timeout=5)
+
+    def _agent(_):
+        barrier.wait()
+        return "ok"
+
+    def _orchestrate(_):
+        stages = [Stage(f"agent{i}", _agent) for i in range(width)]
+        stages.append(Stage("decision", lambda inputs: len(inputs), depends_on=tuple(f"agent{i}" for i in range(width))))
+        return run_stages(stages)["decision"]
+
+    with ThreadPoolExecutor(max_workers=runs) as requests:
+        assert list(requests.map(_orchestrate, range(runs))) == [width] * runs
+
+
+def test_queue_wait_does_not_count_against_a_stage_slice():
+    def _work(name: str, delay: float):
+        def _run(_):
+            time.sleep(delay)
+            return name
+        return _run
+
+    def _fallback(_):
+        return "fallback"
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # "second" waits ~0.3s for the only thread, then runs well within its 0.2s slice
+        results = run_stages(
+            [
+                Stage("first", _work("first", 0.3), timeout=1.0, on_timeout=_fallback),
+                Stage("second", _work("second", 0.05), timeout=0.2, on_timeout=_fallback),
+            ],
+            executor=executor,
+        )
+        assert results == {"first": "first", "second": "second"}
+
+        # the shared deadline still covers the wait
+        results = run_stages(
+            [
+                Stage("first", _work("first", 0.3), on_timeout=_fallback),
+                Stage("second", _work("second", 0.05), on_timeout=_fallback),
+            ],
+            executor=executor,
+            deadline=time.monotonic() + 0.15,
+        )
+        assert results == {"first": "fallback", "second": "fallback"}
+
+
+def test_thread_wait_does_not_count_against_an_async_stage_slice():
+    async def _blocking(name: str, delay: float):
+        await run_blocking(time.sleep, delay)
+        return name
+
+    def _fallback(_):
+        return "fallback"
+
+    async def _run(stages, deadline=None):
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=1))
+        return await run_stages_async(stages, deadline=deadline)
+
+    # "second" waits ~0.3s for the only thread, then runs well within its 0.2s slice
+    results = asyncio.run(_run([
+        Stage("first", lambda _: _blocking("first", 0.3), timeout=1.0, on_timeout=_fallback),
+        Stage("second", lambda _: _blocking("second", 0.05), timeout=0.2, on_timeout=_fallback),
+    ]))
+    assert results == {"first": "first", "second": "second"}
+
+    # the shared deadline still covers the wait
+    results = asyncio.run(_run(
+        [
+            Stage("first", lambda _: _blocking("first", 0.3), on_timeout=_fallback),
+            Stage("second", lambda _: _blocking("second", 0.05), on_timeout=_fallback),
+        ],
+        deadline=time.monotonic() + 0.15,
+    ))
+    assert results == {"first": "fallback", "second": "fallback"}
@@ -0,0 +1,187 @@
+import asyncio
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import agents.llm_cache as llm_cache  # type: ignore
+import agents.llm_gateway as gateway  # type: ignore
+import core.metrics as metrics  # type: ignore
+from core.singleflight import SingleFlight  # type: ignore
+
+
+def _wait_for_followers(kind: str, before: float, followers: int) -> None:
+    deadline = time.monotonic() + 5
+    while metrics.SINGLE_FLIGHT_SHARED.value(kind) < before + followers and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    group = SingleFlight("test-shared")
+    release = threading.Event()
+    calls = []
+
+    def _slow():
+        calls.append(1)
+        release.wait(5)
+        return {"points": [1, 2]}
+
+    before = metrics.SINGLE_FLIGHT_SHARED.value("test-shared")
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(group.do, "same", _slow) for _ in range(4)]
+        _wait_for_followers("test-shared", before, 3)
+        release.set()
+        results = [f.result(timeout=5) for f in futures]
+
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert metrics.SINGLE_FLIGHT_SHARED.value("test-shared") == before + 3
+    assert group.in_flight() == 0
+    assert group.do("same", lambda: "fresh") == "fresh"
+
+
+def test_errors_fan_out_and_followers_time_out():
+    group = SingleFlight("test-errors")
+    release = threading.Event()
+
+    def _failing():
+        release.wait(5)
+        raise RuntimeError("provider down")
+
+    before = metrics.SINGLE_FLIGHT_SHARED.value("test-errors")
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        leader = pool.submit(group.do, "k", _failing)
+        deadline = time.monotonic() + 5
+        while group.in_flight() == 0 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        impatient = pool.submit(group.do, "k", _failing, 0.05)
+        follower = pool.submit(group.do, "k", _failing)
+        with pytest.raises(TimeoutError):
+            impatient.result(timeout=5)
+        _wait_for_followers("test-errors", before, 2)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="provider down"):
+                future.result(timeout=5)
+
+
+def test_async_and_sync_callers_join_each_others_flights():
+    group = SingleFlight("test-async")
+    release = threading.Event()
+    calls = []
+
+    def _sync():
+        calls.append("sync")
+        release.wait(5)
+        return "from thread"
+
+    async def _async(value="from loop"):
+        calls.append("async")
+        await asyncio.sleep(0.05)
+        return value
+
+    async def _joiners():
+        joined = asyncio.gather(group.ado("k", _async), group.ado("k", _async))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await joined
+
+    before = metrics.SINGLE_FLIGHT_SHARED.value("test-async")
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(group.do, "k", _sync)
+        deadline = time.monotonic() + 5
+        while group.in_flight() == 0 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert asyncio.run(_joiners()) == ["from thread", "from thread"]
+        assert leader.result(timeout=5) == "from thread"
+
+        async def _async_leader():
+            flight = asyncio.ensure_future(group.ado("k2", _async))
+            await asyncio.sleep(0.01)
+            follower = asyncio.get_running_loop().run_in_executor(pool, group.do, "k2", _sync)
+            return await flight, await follower
+
+        assert asyncio.run(_async_leader()) == ("from loop", "from loop")
+
+    assert calls == ["sync", "async"]
+    assert metrics.SINGLE_FLIGHT_SHARED.value("test-async") == before + 3
+    assert group.in_flight() == 0
+
+
+def test_abandoned_async_leader_times_out_its_followers():
+    group = SingleFlight("test-abandoned")
+
+    async def _hang():
+        await asyncio.sleep(5)
+
+    async def _run():
+        leader = asyncio.ensure_future(group.ado("k", _hang))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(group.ado("k", _hang))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(TimeoutError, match="abandoned"):
+            await follower
+
+    asyncio.run(_run())
+    assert group.in_flight() == 0
+
+
+def test_disabled_runs_every_call(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("SINGLE_FLIGHT_ENABLED", "0")
+    group = SingleFlight("test-disabled")
+    calls = []
+    group.do("k", lambda: calls.append(1))
+    group.do("k", lambda: calls.append(1))
+    assert calls == [1, 1]
+
+
+def test_uncached_llm_prompts_are_coalesced(monkeypatch: pytest.MonkeyPatch):
+    release = threading.Event()
+    calls = []
+
+    class _OpenAI:
+        def __init__(self, **_kwargs):
+            self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+        def _create(self, **kwargs):
+            calls.append(kwargs)
+            release.wait(5)
+            message = types.SimpleNamespace(content="Dossier complet, revenus stables.")
+            return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+        def close(self):
+            pass
+
+    monkeypatch.setitem(sys.modules, "openai", types.SimpleNamespace(OpenAI=_OpenAI))
+    monkeypatch.setattr(gateway, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(gateway, "_new_http_client", lambda: None)
+    gateway.close_clients()
+    llm_cache.clear()
+
+    def _note():
+        client = gateway.llm_client("chat")  # chat replies are not cached
+        reply = client.chat.completions.create(model="m1", messages=[{"role": "user", "content": "note"}])
+        return reply.choices[0].message.content
+
+    before = metrics.SINGLE_FLIGHT_SHARED.value("llm")
+    try:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(_note) for _ in range(3)]
+            _wait_for_followers("llm", before, 2)
+            release.set()
+            replies = {f.result(timeout=5) for f in futures}
+    finally:
+        gateway.close_clients()
+    assert replies == {"Dossier complet, revenus stables."}
+    assert len(calls) == 1
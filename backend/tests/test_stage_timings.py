@@ -0,0 +1,139 @@
+import asyncio
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import core.db as db  # type: ignore
+import core.orchestrator as orchestrator  # type: ignore
+from agents.orchestrator import orchestrate_decision  # type: ignore
+from agents.timing import collect_node_timings, timed_node  # type: ignore
+from query_counter import assert_num_queries  # type: ignore
+
+
+STUBS = {
+    "analyze_behavior": {"behavior_analysis": {"behavior_flags": [], "brs_score": 0.2}, "confidence": 0.6},
+    "analyze_similarity": {"ai_analysis": {"risk_level": "low", "red_flags": []}, "rag_statistics": {}, "confidence": 0.5},
+    "analyze_images": {"image_analysis": {"flags": []}, "confidence": 0.55},
+    "analyze_fraud": {"fraud_analysis": {"risk_level": "LOW", "detected_flags": []}, "confidence": 0.6},
+    "make_decision_payload": {"decision": "review", "decision_confidence": 0.62, "human_review_required": True},
+    "explain_decision": {"explanation": {"customer_explanation": {"summary": "ok"}}, "explanation_confidence": 0.5},
+}
+
+REQUEST = {"case_id": 21, "amount": 10000, "duration_months": 24, "monthly_income": 2500, "payment_history": {"loan": None}}
+
+
+@timed_node("extract")
+def _extract(state):
+    time.sleep(0.02)
+    return {**state, "fields": {}}
+
+
+@timed_node("score")
+def _score(state):
+    return {**state, "score": 0.4}
+
+
+def _documents(request):
+    state = _score(_extract({"case_id": request["case_id"]}))
+    return {"document_analysis": {"flags": [], "dds_score": state["score"]}, "confidence": 0.7}
+
+
+@pytest.fixture(autouse=True)
+def _stubbed(stub_agents, monkeypatch: pytest.MonkeyPatch):
+    stub_agents({**STUBS, "analyze_documents": _documents})
+    monkeypatch.setattr(orchestrator, "orchestrate_decision", orchestrate_decision)
+
+
+def test_timed_node_only_records_inside_a_collector():
+    assert _score({})["score"] == 0.4
+    with collect_node_timings() as outer:
+        _extract({})
+        with collect_node_timings() as inner:
+            _score({})
+        _extract({})
+    assert set(outer) == {"extract"} and outer["extract"] >= 40
+    assert set(inner) == {"score"}
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_every_stage_and_node_is_timed(use_async: bool):
+    if use_async:
+        result = asyncio.run(orchestrator.run_orchestrator_async(REQUEST))
+    else:
+        result = orchestrator.run_orchestrator(REQUEST)
+
+    metadata = result["orchestrator"]["orchestration_metadata"]
+    timings = metadata["stage_timings"]
+    assert set(timings) == {step.name for step in orchestrator._AGENT_STEPS}
+    document = timings["document"]
+    assert set(document["nodes"]) == {"extract", "score"}
+    assert document["ms"] >= document["nodes"]["extract"] >= 20
+    assert metadata["total_ms"] >= document["ms"]
+
+    agent_outputs = result["orchestrator"]["agent_outputs"]
+    assert agent_outputs["document_agent"]["execution_time_ms"] == document["ms"]
+    assert agent_outputs["fraud_agent"]["execution_time_ms"] == timings["fraud"]["ms"]
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_timed_out_stage_records_time_until_cut_off(monkeypatch: pytest.MonkeyPatch, use_async: bool):
+    release = threading.Event()
+
+    def _slow_similarity(_request):
+        release.wait(2)
+        return STUBS["analyze_similarity"]
+
+    async def _run_async():
+        try:
+            return await orchestrator.run_orchestrator_async(REQUEST)
+        finally:
+            release.set()
+
+    monkeypatch.setattr(orchestrator, "analyze_similarity", _slow_similarity)
+    monkeypatch.setenv("AGENT_TIMEOUT_SIMILARITY_SEC", "0.2")
+    try:
+        result = asyncio.run(_run_async()) if use_async else orchestrator.run_orchestrator(REQUEST)
+    finally:
+        release.set()
+    time.sleep(0.05)  # the abandoned run finishing must not overwrite the entry
+
+    similarity = result["orchestrator"]["orchestration_metadata"]["stage_timings"]["similarity"]
+    assert similarity["timed_out"] is True
+    # both the slice and the stage clock start when a thread picks the stage up
+    assert 190 <= similarity["ms"] < 1000
+
+
+def test_reused_stages_are_marked_and_timings_do_not_break_reuse():
+    first = orchestrator.run_orchestrator(REQUEST)
+    rows = [
+        {"agent_name": name, "output_json": json.loads(json.dumps(output))}
+        for name, output in db._with_reusable_stages(first).items()
+    ]
+    second = orchestrator.run_orchestrator({**REQUEST, "agent_outputs": rows})
+
+    metadata = second["orchestrator"]["orchestration_metadata"]
+    assert metadata["reused_agents"] == sorted(step.name for step in orchestrator._AGENT_STEPS)
+    assert all(stage["reused"] and stage["nodes"] == {} for stage in metadata["stage_timings"].values())
+
+
+def test_metadata_is_saved_with_the_case(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("AGENT_OUTPUT_HISTORY", "0")
+    orchestration = orchestrator.run_orchestrator(REQUEST)
+
+    with assert_num_queries(monkeypatch, 2) as counter:
+        db.save_orchestration(21, orchestration)
+
+    sql, params = counter.statements[0]
+    assert "orchestration_metadata = COALESCE(%s::jsonb, orchestration_metadata)" in sql
+    saved = json.loads(params[-2])
+    assert saved["stage_timings"]["document"]["nodes"]["extract"] >= 20
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+import core.db as db  # type: ignore
+import core.orchestrator as orchestrator  # type: ignore
+import core.tracing as tracing  # type: ignore
+from agents.timing import timed_node  # type: ignore
+
+
+@timed_node("extract")
+def _extract(state):
+    return state
+
+
+class _Cursor:
+    def execute(self, query, vars=None):
+        return None
+
+
+class _TimedCursor(db._TimedCursorMixin, _Cursor):
+    pass
+
+
+def fetch_documents():
+    _TimedCursor().execute("SELECT 1")
+
+
+def _documents(request):
+    fetch_documents()
+    _extract({})
+    return {"document_analysis": {"flags": []}, "confidence": 0.7}
+
+
+def test_span_is_a_noop_outside_a_trace():
+    with tracing.span("db.query") as noop:
+        noop.set("query", "x")
+    assert tracing.current_trace_id() is None
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_spans_follow_the_orchestration_across_threads(stub_agents, use_async: bool):
+    stub_agents({"analyze_documents": _documents})
+    with tracing.start_trace("POST /api/client/credit-requests") as root:
+        if use_async:
+            asyncio.run(orchestrator.run_orchestrator_async({"case_id": 4, "payment_history": {"loan": None}}))
+        else:
+            orchestrator.run_orchestrator({"case_id": 4, "payment_history": {"loan": None}})
+        assert tracing.current_trace_id() == root.trace.trace_id
+
+    by_name = {item.name: item for item in root.trace.spans}
+    orchestration = by_name["orchestrator"]
+    assert orchestration.parent_id == root.span_id
+    agents = {name for name in by_name if name.startswith("agent.")}
+    assert agents == {"agent." + step.name for step in orchestrator._AGENT_STEPS}
+    assert all(by_name[name].parent_id == orchestration.span_id for name in agents)
+    assert by_name["node.extract"].parent_id == by_name["agent.document"].span_id
+    query = by_name["db.query"]
+    assert query.parent_id == by_name["agent.document"].span_id
+    assert query.attributes == {"query": "fetch_documents"}
+
+    header = tracing.server_timing(root)
+    assert header.startswith("total;dur=")
+    assert "orchestrator;dur=" in header and "agent.document;dur=" in header
+    assert 'db;dur=' in header and 'desc="1 calls"' in header
+
+
+def test_spans_after_the_root_ends_are_ignored():
+    with tracing.start_trace("job.rerun") as root:
+        pass
+    child = tracing.Span(root.trace, "late", root.span_id, {})
+    with child:
+        pass
+    assert [item.name for item in root.trace.spans] == ["job.rerun"]
+
+
+def test_file_exporter_writes_one_line_per_span(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setenv("TRACE_EXPORTER", "file")
+    monkeypatch.setenv("TRACE_FILE", str(path))
+    with tracing.start_trace("GET /api/health") as root:
+        with tracing.span("db.connect"):
+            pass
+    tracing.flush()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [r["name"] for r in records] == ["db.connect", "GET /api/health"]
+    assert {r["trace_id"] for r in records} == {root.trace.trace_id}
+    assert records[0]["parent_span_id"] == records[1]["span_id"]
+    assert records[1]["parent_span_id"] is None
+
+
+def test_otlp_exporter_posts_the_trace(monkeypatch: pytest.MonkeyPatch):
+    received: list = []
+    done = threading.Event()
+
+    class _Collector(BaseHTTPRequestHandler):
+        def do_POST(self):  # noqa: N802
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((self.path, json.loads(body)))
+            self.send_response(200)
+            self.end_headers()
+            done.set()
+
+        def log_message(self, *_args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Collector)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("TRACE_EXPORTER", "otlp")
+    monkeypatch.setenv("OTEL_EXPORTER_OTLP_ENDPOINT", f"http://127.0.0.1:{server.server_address[1]}")
+    try:
+        with tracing.start_trace("job.orchestrate", case_id=9):
+            with pytest.raises(RuntimeError):
+                with tracing.span("llm", model="m1"):
+                    raise RuntimeError("provider down")
+        assert done.wait(5)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    path, payload = received[0]
+    assert path == "/v1/traces"
+    spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    llm, job = spans
+    assert llm["parentSpanId"] == job["spanId"] and "parentSpanId" not in job
+    assert llm["status"] == {"code": 2}
+    assert {"key": "case_id", "value": {"stringValue": "9"}} in job["attributes"]
@@ -0,0 +1,242 @@
+"""
+Background worker: drains the shared Postgres job queue.
+
+Any number of worker processes, on any number of machines, can point at the
+same database. Each runs JOB_WORKER_CONCURRENCY slots; a free slot leases the
+highest-priority due job (`FOR UPDATE SKIP LOCKED`, so workers never wait on
+each other), and a heartbeat thread keeps extending the leases of running
+jobs. A worker that dies stops heartbeating, and its jobs are claimed again
+once their lease lapses (JOB_LEASE_SEC).
+
+Job types:
+- `orchestrate`: agents for a newly submitted case (payload = request data).
+- `rerun` / `rescore`: re-orchestrate an existing case (banker rerun, bulk
+  rescoring); only their priorities differ.
+- `vector_sync`: refresh the case's Qdrant point.
+
+A failing job is retried with backoff until it has used JOB_MAX_ATTEMPTS,
+unless its case was queued again for the same job type meanwhile: that
+newer job is the retry, and the failed one is marked superseded.
+SIGTERM/SIGINT drain the worker: slots stop claiming, running jobs finish
+(up to JOB_DRAIN_TIMEOUT_SEC) and only then does the process exit.
+
+Orchestrations run here rather than in the API, so the worker serves its own
+Prometheus `/metrics` on JOB_METRICS_PORT (default 9101, `0` disables it).
+
+Usage (from backend/):
+    python worker.py
+    python worker.py --concurrency 4 --types rerun orchestrate
+"""
+
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from agents.llm_gateway import close_clients
+from core.db import (
+    claim_job,
+    close_pool,
+    complete_job,
+    enqueue_job,
+    fail_job,
+    fetch_case_detail,
+    heartbeat_jobs,
+    save_orchestration,
+)
+from core.metrics import serve_metrics
+from core.migrations import init_db
+from core.orchestrator import run_orchestrator
+from core.tracing import flush as flush_traces, start_trace
+
+try:
+    from services.vector_sync import sync_credit_case_to_qdrant  # type: ignore
+except Exception:  # pragma: no cover
+    sync_credit_case_to_qdrant = None  # type: ignore
+
+
+def _save_if_leased(job: Dict[str, Any], orchestration: Dict[str, Any]) -> None:
+    case_id = int(job["case_id"])
+    # the lease lapsed mid-run and another worker reclaimed the job: its run is the one saved
+    if int(job["job_id"]) not in heartbeat_jobs(job["locked_by"], [int(job["job_id"])]):
+        print(f"[WARN] Job {job['job_id']} lost its lease; not saving its orchestration of case {case_id}")
+        return
+    save_orchestration(case_id, orchestration)
+    enqueue_job("vector_sync", case_id, {})
+
+
+def _run_orchestration(job: Dict[str, Any]) -> None:
+    payload = job.get("payload") or {}
+    orchestration = run_orchestrator({**payload, "case_id": int(job["case_id"])})
+    _save_if_leased(job, orchestration)
+
+
+def _run_rerun(job: Dict[str, Any]) -> None:
+    detail = fetch_case_detail(int(job["case_id"]))
+    if not detail:
+        return
+    orchestration = run_orchestrator(detail, force=bool((job.get("payload") or {}).get("force")))
+    _save_if_leased(job, orchestration)
+
+
+def _run_vector_sync(job: Dict[str, Any]) -> None:
+    if sync_credit_case_to_qdrant is None:
+        return
+    if not sync_credit_case_to_qdrant(int(job["case_id"])):
+        raise RuntimeError("Qdrant sync failed")
+
+
+HANDLERS: Dict[str, Callable[[Dict[str, Any]], None]] = {
+    "orchestrate": _run_orchestration,
+    "rerun": _run_rerun,
+    "rescore": _run_rerun,
+    "vector_sync": _run_vector_sync,
+}
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_once(worker: str, job_types: Optional[List[str]] = None, active: Optional[Set[int]] = None) -> bool:
+    """Claim and run one job; False when there was nothing to do.
+
+    While the job runs its id is in `active`, the set the heartbeat renews.
+    """
+    job = claim_job(worker, job_types or list(HANDLERS))
+    if job is None:
+        return False
+    job_id = int(job["job_id"])
+    if job["attempts"] > job["max_attempts"]:
+        # reclaimed from a worker that died on its last attempt
+        fail_job(job_id, worker, job.get("last_error") or "worker lost the job on its last attempt")
+        return True
+    if active is not None:
+        active.add(job_id)
+    try:
+        with start_trace("job." + job["job_type"], job_id=job_id, case_id=job.get("case_id"), attempt=job["attempts"]):
+            HANDLERS[job["job_type"]](job)
+    except Exception as exc:
+        status = fail_job(job_id, worker, "".join(traceback.format_exception_only(type(exc), exc)).strip())
+        print(f"[WARN] Job {job_id} ({job['job_type']}, case {job.get('case_id')}) failed, now {status}: {exc}")
+        return True
+    finally:
+        if active is not None:
+            active.discard(job_id)
+    complete_job(job_id, worker)
+    return True
+
+
+class WorkerPool:
+    """`concurrency` job slots plus a lease heartbeat, stopped by `drain()`."""
+
+    def __init__(
+        self,
+        concurrency: int,
+        job_types: Optional[List[str]] = None,
+        worker: Optional[str] = None,
+        poll_interval: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None,
+    ) -> None:
+        self.concurrency = max(1, concurrency)
+        self.job_types = job_types or list(HANDLERS)
+        self.worker = worker or worker_id()
+        self.poll_interval = poll_interval if poll_interval is not None else float(os.getenv("JOB_POLL_INTERVAL_SEC", "1"))
+        self.heartbeat_interval = (
+            heartbeat_interval if heartbeat_interval is not None else float(os.getenv("JOB_HEARTBEAT_SEC", "15"))
+        )
+        self.active: Set[int] = set()
+        self.stopping = threading.Event()
+        self._heartbeat_stop = threading.Event()
+        self._slots: List[threading.Thread] = []
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def _slot(self) -> None:
+        while not self.stopping.is_set():
+            try:
+                busy = run_once(self.worker, self.job_types, self.active)
+            except Exception as exc:
+                # database unavailable: keep the slot alive and try again later
+                print(f"[WARN] Job queue unavailable: {exc}")
+                busy = False
+            if not busy:
+                self.stopping.wait(self.poll_interval)
+
+    def _beat(self) -> None:
+        while not self._heartbeat_stop.wait(self.heartbeat_interval):
+            running = list(self.active)
+            if not running:
+                continue
+            try:
+                owned = set(heartbeat_jobs(self.worker, running))
+            except Exception as exc:
+                print(f"[WARN] Job heartbeat failed: {exc}")
+                continue
+            lost = (set(running) & self.active) - owned
+            if lost:
+                # another worker took these over; their handlers will not save results
+                print(f"[WARN] Worker {self.worker} lost the lease on jobs {sorted(lost)}")
+
+    def start(self) -> "WorkerPool":
+        self._heartbeat = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+        self._heartbeat.start()
+        for idx in range(self.concurrency):
+            thread = threading.Thread(target=self._slot, name=f"job-slot-{idx}", daemon=True)
+            thread.start()
+            self._slots.append(thread)
+        return self
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Stop claiming, wait for running jobs; True when all of them finished."""
+        self.stopping.set()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self._slots:
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            thread.join(left)
+        drained = not any(thread.is_alive() for thread in self._slots)
+        # unfinished jobs keep no heartbeat and are reclaimed when their lease lapses
+        self._heartbeat_stop.set()
+        return drained
+
+    def wait(self) -> None:
+        # short waits so the main thread keeps handling signals
+        while not self.stopping.wait(1.0):
+            pass
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Process background jobs from the Postgres queue.")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("JOB_WORKER_CONCURRENCY", "2")))
+    parser.add_argument("--types", nargs="+", choices=sorted(HANDLERS), help="only claim these job types")
+    args = parser.parse_args(argv)
+
+    init_db()
+    metrics_port = int(os.getenv("JOB_METRICS_PORT", "9101"))
+    if metrics_port > 0:
+        serve_metrics(metrics_port)
+    pool = WorkerPool(args.concurrency, args.types)
+
+    def _request_stop(*_args: Any) -> None:
+        pool.stopping.set()
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+    print(f"[INFO] Worker {pool.worker} started with {pool.concurrency} slot(s) for {', '.join(pool.job_types)}")
+    pool.start()
+    try:
+        pool.wait()
+        print(f"[INFO] Worker {pool.worker} draining {len(pool.active)} running job(s)")
+        if not pool.drain(float(os.getenv("JOB_DRAIN_TIMEOUT_SEC", "120"))):
+            print(f"[WARN] Worker {pool.worker} exited with jobs still running; they will be retried")
+    finally:
+        flush_traces()
+        close_clients()
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
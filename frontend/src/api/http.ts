@@ -4,8 +4,11 @@ const API_BASE = import.meta.env.VITE_API_URL || "/api";
 
 type HttpOptions = RequestInit & { auth?: boolean };
 
+export type Page<T> = { items: T; nextCursor: string | null };
+
 type HttpClient = {
   get<T>(path: string, opts?: HttpOptions): Promise<T>;
+  getPage<T>(path: string, opts?: HttpOptions): Promise<Page<T>>;
   post<T>(path: string, body?: unknown, opts?: HttpOptions): Promise<T>;
   postForm<T>(path: string, body: FormData, opts?: HttpOptions): Promise<T>;
 };
@@ -34,6 +37,14 @@ export const http: HttpClient = {
     });
     return handle<T>(res);
   },
+  async getPage<T>(path: string, opts: HttpOptions = {}) {
+    const res = await fetch(`${API_BASE}${path}`, {
+      ...opts,
+      headers: { ...makeHeaders(opts.auth ?? true), ...(opts.headers || {}) },
+    });
+    const items = await handle<T>(res);
+    return { items, nextCursor: res.headers.get("X-Next-Cursor") };
+  },
   async post<T>(path: string, body?: unknown, opts: HttpOptions = {}) {
     const res = await fetch(`${API_BASE}${path}`, {
       method: "POST",
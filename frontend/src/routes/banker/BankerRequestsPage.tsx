@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import { Link, useLocation, useNavigate } from "react-router-dom";
 import { http } from "../../api/http";
 import { BankerRequest } from "../../api/types";
@@ -16,14 +16,22 @@ export const BankerRequestsPage = () => {
   const [statusFilter, setStatusFilter] = useState<string>("all");
   const [since, setSince] = useState<string | null>(() => localStorage.getItem("bankerRequestsSince"));
   const [lastUpdated, setLastUpdated] = useState<string | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const loadedMore = useRef(false);
 
   useEffect(() => {
     let active = true;
     const load = async () => {
       try {
-        const all = await http.get<BankerRequest[]>("/banker/credit-requests");
+        const page = await http.getPage<BankerRequest[]>("/banker/credit-requests");
         if (!active) return;
-        setItems(all);
+        // Refresh the first page; keep any older pages the banker already loaded.
+        setItems((prev) => {
+          const fresh = new Set(page.items.map((req) => req.id));
+          return [...page.items, ...prev.filter((req) => !fresh.has(req.id))];
+        });
+        if (!loadedMore.current) setNextCursor(page.nextCursor);
         setLastUpdated(new Date().toISOString());
       } catch (err) {
         if (!active) return;
@@ -101,6 +109,26 @@ export const BankerRequestsPage = () => {
     };
   }, [items]);
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const page = await http.getPage<BankerRequest[]>(
+        `/banker/credit-requests?cursor=${encodeURIComponent(nextCursor)}`
+      );
+      loadedMore.current = true;
+      setItems((prev) => {
+        const known = new Set(prev.map((req) => req.id));
+        return [...prev, ...page.items.filter((req) => !known.has(req.id))];
+      });
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      setError((err as Error).message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const resetToNow = () => {
     const now = new Date().toISOString();
     localStorage.setItem("bankerRequestsSince", now);
@@ -243,6 +271,11 @@ export const BankerRequestsPage = () => {
         {filteredItems.length === 0 && <div className="banker-empty">Aucune demande ne correspond aux filtres.</div>}
         <div className="banker-results">
           Affichage {filteredItems.length} sur {items.length} demandes
+          {nextCursor && (
+            <button className="button-ghost" type="button" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? "Chargement..." : "Charger plus"}
+            </button>
+          )}
         </div>
       </div>
     </div>
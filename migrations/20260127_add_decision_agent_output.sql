@@ -1,8 +1,10 @@
 -- Allow storing Decision agent outputs in agent_outputs.
+-- 'explanation' (20260128) is kept in the list so that re-running this file on a
+-- database that already stores explanation rows does not fail the check.
 
 ALTER TABLE agent_outputs
   DROP CONSTRAINT IF EXISTS agent_outputs_agent_name_check;
 
 ALTER TABLE agent_outputs
   ADD CONSTRAINT agent_outputs_agent_name_check
-  CHECK (agent_name IN ('document', 'image', 'behavior', 'similarity', 'fraud', 'decision'));
+  CHECK (agent_name IN ('document', 'image', 'behavior', 'similarity', 'fraud', 'decision', 'explanation'));
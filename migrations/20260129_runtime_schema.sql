@@ -0,0 +1,122 @@
+-- Runtime tables, columns and indexes that init_db() used to create on every startup.
+
+ALTER TABLE credit_cases
+  ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+ALTER TABLE credit_cases
+  ADD COLUMN IF NOT EXISTS summary TEXT;
+
+ALTER TABLE credit_cases
+  ADD COLUMN IF NOT EXISTS auto_decision TEXT;
+
+ALTER TABLE credit_cases
+  ADD COLUMN IF NOT EXISTS auto_decision_confidence NUMERIC;
+
+ALTER TABLE credit_cases
+  ADD COLUMN IF NOT EXISTS auto_review_required BOOLEAN;
+
+ALTER TABLE decisions
+  ADD COLUMN IF NOT EXISTS note TEXT;
+
+CREATE TABLE IF NOT EXISTS comments (
+    comment_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    case_id BIGINT NOT NULL REFERENCES credit_cases(case_id) ON DELETE CASCADE,
+    author_id BIGINT NOT NULL REFERENCES users(user_id),
+    message TEXT NOT NULL,
+    is_public BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS agent_sessions (
+    session_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    case_id BIGINT NOT NULL REFERENCES credit_cases(case_id) ON DELETE CASCADE,
+    agent_name TEXT NOT NULL,
+    banker_id BIGINT,
+    snapshot_json JSONB NOT NULL DEFAULT '{}'::jsonb,
+    messages_json JSONB NOT NULL DEFAULT '[]'::jsonb,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (case_id, agent_name, banker_id)
+);
+
+ALTER TABLE agent_sessions
+  ADD COLUMN IF NOT EXISTS banker_id BIGINT;
+
+ALTER TABLE agent_sessions
+  DROP CONSTRAINT IF EXISTS agent_sessions_case_id_agent_name_key;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conname = 'agent_sessions_case_id_agent_name_banker_id_key'
+    ) THEN
+        ALTER TABLE agent_sessions
+        ADD CONSTRAINT agent_sessions_case_id_agent_name_banker_id_key
+        UNIQUE (case_id, agent_name, banker_id);
+    END IF;
+END$$;
+
+CREATE TABLE IF NOT EXISTS loans (
+    loan_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    user_id BIGINT NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    case_id BIGINT UNIQUE REFERENCES credit_cases(case_id) ON DELETE SET NULL,
+    principal_amount NUMERIC(14,2) NOT NULL CHECK (principal_amount > 0),
+    interest_rate NUMERIC(5,4) NOT NULL CHECK (interest_rate >= 0),
+    term_months INTEGER NOT NULL CHECK (term_months > 0),
+    status TEXT NOT NULL CHECK (status IN ('ACTIVE', 'CLOSED', 'DEFAULTED', 'CANCELLED')),
+    approved_at TIMESTAMPTZ,
+    start_date DATE,
+    end_date DATE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS installments (
+    installment_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    loan_id BIGINT NOT NULL REFERENCES loans(loan_id) ON DELETE CASCADE,
+    installment_number INTEGER NOT NULL CHECK (installment_number > 0),
+    due_date DATE NOT NULL,
+    amount_due NUMERIC(14,2) NOT NULL CHECK (amount_due >= 0),
+    status TEXT NOT NULL CHECK (status IN ('PENDING', 'PAID', 'LATE', 'MISSED')),
+    amount_paid NUMERIC(14,2) NOT NULL DEFAULT 0 CHECK (amount_paid >= 0),
+    paid_at DATE,
+    days_late INTEGER,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (loan_id, installment_number)
+);
+
+CREATE TABLE IF NOT EXISTS payments (
+    payment_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    loan_id BIGINT NOT NULL REFERENCES loans(loan_id) ON DELETE CASCADE,
+    installment_id BIGINT REFERENCES installments(installment_id) ON DELETE SET NULL,
+    payment_date DATE NOT NULL,
+    amount NUMERIC(14,2) NOT NULL,
+    channel TEXT NOT NULL CHECK (channel IN ('bank_transfer', 'card', 'cash', 'direct_debit', 'mobile')),
+    status TEXT NOT NULL CHECK (status IN ('COMPLETED', 'PENDING', 'FAILED', 'REVERSED')),
+    is_reversal BOOLEAN NOT NULL DEFAULT FALSE,
+    reversal_of BIGINT REFERENCES payments(payment_id) ON DELETE SET NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS payment_behavior_summary (
+    summary_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    user_id BIGINT NOT NULL UNIQUE REFERENCES users(user_id) ON DELETE CASCADE,
+    total_loans INTEGER NOT NULL DEFAULT 0,
+    total_installments INTEGER NOT NULL DEFAULT 0,
+    on_time_installments INTEGER NOT NULL DEFAULT 0,
+    late_installments INTEGER NOT NULL DEFAULT 0,
+    missed_installments INTEGER NOT NULL DEFAULT 0,
+    on_time_rate NUMERIC(5,4) NOT NULL DEFAULT 0,
+    avg_days_late NUMERIC(6,2) NOT NULL DEFAULT 0,
+    max_days_late INTEGER NOT NULL DEFAULT 0,
+    avg_payment_amount NUMERIC(14,2) NOT NULL DEFAULT 0,
+    last_payment_date DATE,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_loans_user_id ON loans(user_id);
+
+CREATE INDEX IF NOT EXISTS idx_installments_loan_id ON installments(loan_id);
+
+CREATE INDEX IF NOT EXISTS idx_payments_loan_id ON payments(loan_id);
+
+CREATE INDEX IF NOT EXISTS idx_payments_installment_id ON payments(installment_id);
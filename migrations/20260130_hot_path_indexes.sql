@@ -0,0 +1,52 @@
+-- migrate: no-transaction
+-- Indexes for the lookups in backend/core/db.py (verify with backend/scripts/verify_indexes.py).
+-- Built CONCURRENTLY so they can be added to a live database without blocking writes.
+
+-- fetch_user_by_email: WHERE lower(email) = lower(%s)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_email_lower
+  ON users (lower(email));
+
+-- list_cases_for_banker: keyset on (created_at, case_id), optionally filtered by status
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_cases_created_at_case_id
+  ON credit_cases (created_at, case_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_cases_status_created_at_case_id
+  ON credit_cases (status, created_at, case_id);
+
+-- list_cases_for_client and the ownership checks: WHERE user_id = %s ORDER BY created_at
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_credit_cases_user_id_created_at
+  ON credit_cases (user_id, created_at);
+
+-- case detail sections, each ordered the way the loaders read them
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_documents_case_id_document_id
+  ON documents (case_id, document_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_agent_outputs_case_id_output_id
+  ON agent_outputs (case_id, output_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_comments_case_id_created_at
+  ON comments (case_id, created_at);
+
+-- clear_agent_sessions_for_banker
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_agent_sessions_banker_id
+  ON agent_sessions (banker_id);
+
+-- fetch_payments_by_loan ordering, plus the columns the behavior summary aggregates
+-- so it can be answered from the index alone.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_payments_loan_id_payment_date
+  ON payments (loan_id, payment_date, payment_id)
+  INCLUDE (amount, status, is_reversal);
+
+-- behavior summary aggregation over a user's installments
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_installments_loan_id_status
+  ON installments (loan_id)
+  INCLUDE (status, days_late);
+
+-- recompute: loans by user, index-only for the loan ids
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_loans_user_id_loan_id
+  ON loans (user_id, loan_id);
+
+-- Superseded by the composite indexes above (same leading column).
+DROP INDEX CONCURRENTLY IF EXISTS idx_payments_loan_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_installments_loan_id;
+DROP INDEX CONCURRENTLY IF EXISTS idx_loans_user_id;
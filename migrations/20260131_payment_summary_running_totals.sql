@@ -0,0 +1,27 @@
+-- Running totals so payment_behavior_summary can be maintained from deltas
+-- (one changed installment or payment) instead of re-aggregating a user's
+-- whole history on every write. NULL means "not initialised yet": the
+-- application falls back to a full recompute for such rows.
+ALTER TABLE payment_behavior_summary
+    ADD COLUMN IF NOT EXISTS days_late_sum BIGINT,
+    ADD COLUMN IF NOT EXISTS days_late_count INTEGER,
+    ADD COLUMN IF NOT EXISTS payment_count INTEGER,
+    ADD COLUMN IF NOT EXISTS payment_amount_sum NUMERIC(16,2);
+
+UPDATE payment_behavior_summary s
+SET (days_late_sum, days_late_count) = (
+        SELECT COALESCE(SUM(i.days_late) FILTER (WHERE i.days_late > 0), 0),
+               COUNT(*) FILTER (WHERE i.days_late > 0)
+        FROM installments i
+        JOIN loans l ON l.loan_id = i.loan_id
+        WHERE l.user_id = s.user_id
+    ),
+    (payment_count, payment_amount_sum) = (
+        SELECT COUNT(*), COALESCE(SUM(p.amount), 0)
+        FROM payments p
+        JOIN loans l ON l.loan_id = p.loan_id
+        WHERE l.user_id = s.user_id
+          AND p.status = 'COMPLETED'
+          AND p.is_reversal = FALSE
+    )
+WHERE s.days_late_sum IS NULL OR s.payment_count IS NULL;
@@ -0,0 +1,30 @@
+-- One current row per (case_id, agent_name), updated in place only when its
+-- content changes; replaced versions are archived in agent_output_history.
+ALTER TABLE agent_outputs
+    ADD COLUMN IF NOT EXISTS content_hash TEXT,
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
+-- Keep the latest output when reruns left duplicates behind; the unique index
+-- is built CONCURRENTLY by 20260201_agent_output_upserts_index.
+DELETE FROM agent_outputs a
+USING agent_outputs b
+WHERE a.case_id = b.case_id
+  AND a.agent_name = b.agent_name
+  AND a.output_id < b.output_id;
+
+UPDATE agent_outputs
+SET content_hash = md5(output_json::text)
+WHERE content_hash IS NULL;
+
+CREATE TABLE IF NOT EXISTS agent_output_history (
+    history_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    case_id BIGINT NOT NULL REFERENCES credit_cases(case_id) ON DELETE CASCADE,
+    agent_name TEXT NOT NULL,
+    output_json JSONB NOT NULL,
+    content_hash TEXT,
+    created_at TIMESTAMPTZ NOT NULL,
+    archived_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_agent_output_history_case_id_agent_name
+  ON agent_output_history (case_id, agent_name, archived_at);
@@ -0,0 +1,8 @@
+-- migrate: no-transaction
+-- Unique (case_id, agent_name) index behind the agent_outputs upserts, built
+-- CONCURRENTLY so agent_outputs stays writable while it builds. If the build
+-- fails (duplicates written since 20260201 removed them), drop the INVALID
+-- index, remove the duplicates and re-run this file.
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_agent_outputs_case_id_agent_name
+  ON agent_outputs (case_id, agent_name);
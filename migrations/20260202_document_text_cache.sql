@@ -0,0 +1,9 @@
+-- Content-addressed cache of extracted document text: one row per file_hash,
+-- shared by every case that uploaded the same bytes.
+CREATE TABLE IF NOT EXISTS document_text_cache (
+    file_hash TEXT PRIMARY KEY,
+    raw_text TEXT NOT NULL,
+    page_count INTEGER,
+    document_type TEXT,
+    extracted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,32 @@
+-- Durable background jobs (case orchestration). Workers claim rows with
+-- FOR UPDATE SKIP LOCKED, so any number of them can drain the queue without
+-- double-processing a job.
+CREATE TABLE IF NOT EXISTS job_queue (
+    job_id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    job_type TEXT NOT NULL,
+    case_id BIGINT REFERENCES credit_cases(case_id) ON DELETE CASCADE,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    run_after TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    locked_by TEXT,
+    locked_at TIMESTAMPTZ,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Claim scans: ready jobs in order, and running jobs whose worker went away.
+CREATE INDEX IF NOT EXISTS idx_job_queue_ready
+    ON job_queue (run_after, job_id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_job_queue_running
+    ON job_queue (locked_at) WHERE status = 'running';
+
+-- At most one waiting job per case and type; re-enqueueing refreshes it.
+CREATE UNIQUE INDEX IF NOT EXISTS uq_job_queue_waiting
+    ON job_queue (case_id, job_type) WHERE status = 'queued';
+
+-- Latest job of a case, for status polling.
+CREATE INDEX IF NOT EXISTS idx_job_queue_case
+    ON job_queue (case_id, job_id DESC);
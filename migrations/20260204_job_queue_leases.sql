@@ -0,0 +1,17 @@
+-- Job priorities and worker leases. Workers claim the highest-priority due
+-- job and keep extending lease_expires_at while they run it; a running job
+-- whose lease has lapsed belongs to a dead worker and is claimed again.
+ALTER TABLE job_queue ADD COLUMN IF NOT EXISTS priority INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE job_queue ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ;
+
+UPDATE job_queue
+SET lease_expires_at = locked_at + INTERVAL '5 minutes'
+WHERE status = 'running' AND lease_expires_at IS NULL;
+
+DROP INDEX IF EXISTS idx_job_queue_ready;
+DROP INDEX IF EXISTS idx_job_queue_running;
+
+CREATE INDEX IF NOT EXISTS idx_job_queue_ready_priority
+    ON job_queue (priority DESC, run_after, job_id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_job_queue_lease
+    ON job_queue (lease_expires_at) WHERE status = 'running';
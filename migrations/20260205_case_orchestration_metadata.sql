@@ -0,0 +1,4 @@
+-- Metadata of the latest orchestration of a case: per-stage and per-node
+-- timings, degraded/reused agents, latency budget.
+ALTER TABLE credit_cases
+  ADD COLUMN IF NOT EXISTS orchestration_metadata JSONB;
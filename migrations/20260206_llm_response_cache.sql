@@ -0,0 +1,12 @@
+-- Shared tier of the LLM response cache (LLM_CACHE_BACKEND=postgres): one row
+-- per request hash, read by every API process and worker.
+CREATE TABLE IF NOT EXISTS llm_response_cache (
+    cache_key TEXT PRIMARY KEY,
+    agent TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response JSONB NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_response_cache_agent_expiry ON llm_response_cache(agent, expires_at);
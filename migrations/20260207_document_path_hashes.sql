@@ -0,0 +1,13 @@
+-- Documents inserted without a file hash used to get sha256(file_path), so their
+-- extracted text was cached by path and went stale when the file was overwritten.
+-- Drop those cache entries and mark the hashes as path hashes, which
+-- core.db never caches (see PATH_HASH_PREFIX).
+
+DELETE FROM document_text_cache c
+USING documents d
+WHERE d.file_hash = encode(sha256(convert_to(d.file_path, 'UTF8')), 'hex')
+  AND c.file_hash = d.file_hash;
+
+UPDATE documents
+SET file_hash = 'path:' || file_hash
+WHERE file_hash = encode(sha256(convert_to(file_path, 'UTF8')), 'hex');
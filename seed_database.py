@@ -7,6 +7,7 @@ from decimal import Decimal
 from typing import Dict, List, Optional, Tuple
 
 import psycopg2
+from psycopg2.extras import execute_values
 
 
 def get_db_params():
@@ -187,6 +188,7 @@ def _seed_installments_and_payments(
     payment_channels = ["bank_transfer", "card", "direct_debit", "mobile"]
 
     if not installments_present:
+        rows = []
         for n in range(1, term_months + 1):
             due_date = _add_months(start_date, n)
             status = "PENDING"
@@ -215,15 +217,20 @@ def _seed_installments_and_payments(
                 days_late = random.randint(10, 40)
                 paid_at = due_date + timedelta(days=days_late)
 
-            cur.execute(
-                """
-                INSERT INTO installments (
-                    loan_id, installment_number, due_date, amount_due, status, amount_paid, paid_at, days_late
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """,
-                (loan_id, n, due_date, monthly_amount, status, amount_paid, paid_at, days_late),
+            rows.append((loan_id, n, due_date, monthly_amount, status, amount_paid, paid_at, days_late))
+
+        # One round trip per loan instead of one per installment.
+        execute_values(
+            cur,
+            """
+            INSERT INTO installments (
+                loan_id, installment_number, due_date, amount_due, status, amount_paid, paid_at, days_late
             )
+            VALUES %s
+            """,
+            rows,
+            page_size=500,
+        )
 
     if _payments_exist(cur, loan_id):
         return
@@ -238,32 +245,47 @@ def _seed_installments_and_payments(
     )
     installments = cur.fetchall()
 
+    payments = []
     for inst_id, due_date, amount_paid, status, paid_at in installments:
         if amount_paid and amount_paid > 0:
-            payment_date = paid_at or due_date
-            channel = random.choice(payment_channels)
-            cur.execute(
-                """
-                INSERT INTO payments (
-                    loan_id, installment_id, payment_date, amount, channel, status, is_reversal
-                )
-                VALUES (%s, %s, %s, %s, %s, 'COMPLETED', FALSE)
-                RETURNING payment_id
-                """,
-                (loan_id, inst_id, payment_date, amount_paid, channel),
+            payments.append((loan_id, inst_id, paid_at or due_date, amount_paid, random.choice(payment_channels)))
+    if not payments:
+        return
+
+    inserted = execute_values(
+        cur,
+        """
+        INSERT INTO payments (
+            loan_id, installment_id, payment_date, amount, channel, status, is_reversal
+        )
+        VALUES %s
+        RETURNING payment_id
+        """,
+        payments,
+        template="(%s, %s, %s, %s, %s, 'COMPLETED', FALSE)",
+        page_size=500,
+        fetch=True,
+    )
+
+    # RETURNING preserves VALUES order, so ids line up with the payments list.
+    reversals = [
+        payment + (payment_id,)
+        for payment, (payment_id,) in zip(payments, inserted)
+        if fraud_flag and random.random() < 0.15
+    ]
+    if reversals:
+        execute_values(
+            cur,
+            """
+            INSERT INTO payments (
+                loan_id, installment_id, payment_date, amount, channel, status, is_reversal, reversal_of
             )
-            payment_id = cur.fetchone()[0]
-
-            if fraud_flag and random.random() < 0.15:
-                cur.execute(
-                    """
-                    INSERT INTO payments (
-                        loan_id, installment_id, payment_date, amount, channel, status, is_reversal, reversal_of
-                    )
-                    VALUES (%s, %s, %s, %s, %s, 'REVERSED', TRUE, %s)
-                    """,
-                    (loan_id, inst_id, payment_date, amount_paid, channel, payment_id),
-                )
+            VALUES %s
+            """,
+            reversals,
+            template="(%s, %s, %s, %s, %s, 'REVERSED', TRUE, %s)",
+            page_size=500,
+        )
 
 
 def _update_payment_behavior_summary(cur, user_id: int):
@@ -466,6 +488,20 @@ def seed_case(cur, record, client_ids, banker_id):
                 )
 
 
+def _sync_case_id_sequence(cur):
+    # Cases are inserted with explicit ids (OVERRIDING SYSTEM VALUE); move the
+    # identity sequence past them so API-created cases don't collide.
+    cur.execute(
+        """
+        SELECT setval(
+            pg_get_serial_sequence('credit_cases', 'case_id'),
+            COALESCE((SELECT MAX(case_id) FROM credit_cases), 1),
+            (SELECT MAX(case_id) IS NOT NULL FROM credit_cases)
+        )
+        """
+    )
+
+
 def main():
     dataset_path = os.getenv(
         "DATASET_PATH",
@@ -485,6 +521,7 @@ def main():
                 seed_case(cur, record, client_ids, banker_id)
             for user_id in set(client_ids):
                 _update_payment_behavior_summary(cur, user_id)
+            _sync_case_id_sequence(cur)
         conn.commit()
         print("Database seeding completed successfully")
     except Exception as exc: